@@ -26,18 +26,19 @@ import os
 import sys
 import json
 import hashlib
+import hmac
 import time
-import collections
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 from contextlib import asynccontextmanager
+from collections import OrderedDict
 from functools import lru_cache
 
 import re
 from fastapi import FastAPI, HTTPException, Depends, Header, BackgroundTasks, Request, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, PlainTextResponse
 from fastapi.security import APIKeyHeader
 from pydantic import BaseModel, Field
 
@@ -67,61 +68,6 @@ def escape_like_pattern(pattern: str) -> str:
     return pattern.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
 
 
-# =============================================================================
-# Rate Limiter en memoire (par cle API)
-# =============================================================================
-
-class RateLimiter:
-    """
-    Limite le nombre de requetes par cle API par fenetre de temps.
-    Utilise un algorithme de fenetre glissante en memoire.
-    """
-
-    def __init__(self, default_rpm: int = 60, window_seconds: int = 60):
-        self._default_rpm = default_rpm
-        self._window = window_seconds
-        # {api_key_id: deque de timestamps}
-        self._requests: Dict[str, collections.deque] = {}
-
-    def check(self, key_id: str, limit_rpm: int = None) -> bool:
-        """
-        Verifie si la requete est autorisee.
-        Retourne True si OK, False si limite depassee.
-        """
-        now = time.monotonic()
-        limit = limit_rpm or self._default_rpm
-        cutoff = now - self._window
-
-        if key_id not in self._requests:
-            self._requests[key_id] = collections.deque()
-
-        q = self._requests[key_id]
-
-        # Purger les anciennes requetes
-        while q and q[0] < cutoff:
-            q.popleft()
-
-        if len(q) >= limit:
-            return False
-
-        q.append(now)
-        return True
-
-    def cleanup(self):
-        """Nettoie les entrees perimees (appeler periodiquement)."""
-        now = time.monotonic()
-        cutoff = now - self._window
-        empty_keys = []
-        for key_id, q in self._requests.items():
-            while q and q[0] < cutoff:
-                q.popleft()
-            if not q:
-                empty_keys.append(key_id)
-        for k in empty_keys:
-            del self._requests[k]
-
-
-rate_limiter = RateLimiter(default_rpm=60)
 
 
 # Ajouter le projet au path
@@ -133,6 +79,12 @@ from execution.agent_autonome import AgentNotaire, ParseurDemandeNL, DemandeAnal
 from execution.gestionnaires.orchestrateur import OrchestratorNotaire
 from execution.chat_handler import ChatHandler, create_chat_router
 from execution.security.signed_urls import verify_signed_url
+from execution.utils.executeurs import PoolSature, get_pool_execution, arreter_pool_execution
+from execution.utils.profilage import Trace, get_registre_metriques, mesurer
+from execution.anthropic_context import get_context_builder
+from execution.database.supabase_async import get_supabase_async, fermer_supabase_async
+from execution.database.telemetrie import get_telemetrie, arreter_telemetrie
+from execution.security.quotas_api import RateLimiter, CacheClesAPI, BackendMemoire, creer_backend
 
 # Import Supabase (optionnel - mode offline si non disponible)
 SUPABASE_AVAILABLE = False
@@ -153,7 +105,12 @@ except (ImportError, AttributeError, Exception) as e:
 
 @lru_cache()
 def get_supabase_client() -> Optional[Client]:
-    """Crée un client Supabase (singleton)."""
+    """
+    Client Supabase synchrone partagé (endpoints non critiques).
+
+    Les chemins chauds (auth, audit, sync dossiers) passent par
+    get_supabase_async() pour ne pas bloquer la boucle asyncio.
+    """
     if not SUPABASE_AVAILABLE:
         return None
 
@@ -164,7 +121,8 @@ def get_supabase_client() -> Optional[Client]:
         return None
 
     try:
-        return create_client(url, key)
+        from execution.database.supabase_client import get_client_partage
+        return get_client_partage(url, key)
     except Exception:
         return None
 
@@ -270,10 +228,20 @@ class DossierResponse(BaseModel):
 
 api_key_header = APIKeyHeader(name="X-API-Key", auto_error=False)
 
-# Cache en mémoire pour réduire les appels Supabase (TTL: 5 minutes)
-_api_key_cache: Dict[str, tuple] = {}  # key_hash -> (auth_context, timestamp)
+# Rate limiting + cache des clés (TTL: 5 minutes) sur un backend partagé
+# entre workers: memoire (défaut), sqlite:///... ou redis://...
+# (NOTAIRE_QUOTAS_BACKEND, voir execution/security/quotas_api.py)
 CACHE_TTL_SECONDS = 300
 
+try:
+    _backend_quotas = creer_backend()
+except Exception as e:
+    logger.warning(f"Backend de quotas invalide ({e}), repli en mémoire")
+    _backend_quotas = BackendMemoire()
+
+rate_limiter = RateLimiter(default_rpm=60, backend=_backend_quotas)
+cache_cles_api = CacheClesAPI(ttl_seconds=CACHE_TTL_SECONDS, backend=_backend_quotas)
+
 
 def _hash_api_key(api_key: str) -> str:
     """Hash SHA256 d'une clé API."""
@@ -319,44 +287,49 @@ async def verify_api_key(
 
     key_hash = _hash_api_key(api_key)
     key_prefix = _get_key_prefix(api_key)
-    now = datetime.now().timestamp()
 
-    # 1. Vérifier le cache
-    if key_hash in _api_key_cache:
-        cached_auth, cached_time = _api_key_cache[key_hash]
-        if now - cached_time < CACHE_TTL_SECONDS:
-            # Rate limiting
-            if not rate_limiter.check(cached_auth.api_key_id, cached_auth.rate_limit_rpm):
-                raise HTTPException(
-                    status_code=429,
-                    detail=f"Limite de requetes depassee ({cached_auth.rate_limit_rpm}/min). Reessayez dans quelques secondes."
-                )
-            return cached_auth
+    # 1. Vérifier le cache (partagé entre workers selon le backend)
+    # (SQLite/Redis: appels déportés dans un thread, la boucle n'est pas bloquée)
+    cached = await cache_cles_api.lire_async(key_hash)
+    if cached:
+        cached_auth = AuthContext(**cached)
+        # Rate limiting
+        if not await rate_limiter.check_async(cached_auth.api_key_id, cached_auth.rate_limit_rpm):
+            raise HTTPException(
+                status_code=429,
+                detail=f"Limite de requetes depassee ({cached_auth.rate_limit_rpm}/min). Reessayez dans quelques secondes."
+            )
+        get_telemetrie().enregistrer_usage_cle(cached_auth.api_key_id)
+        return cached_auth
 
     # 2. Vérifier dans Supabase
-    supabase = get_supabase_client()
+    db = get_supabase_async()
 
-    if supabase:
+    if db.est_configure:
         try:
             # Rechercher la clé par hash
-            result = supabase.table("agent_api_keys").select(
-                "id, etude_id, name, permissions, rate_limit_rpm, expires_at, revoked_at, etudes(nom)"
-            ).eq("key_hash", key_hash).eq("key_prefix", key_prefix).execute()
+            lignes = await db.selectionner(
+                "agent_api_keys",
+                "id, etude_id, name, permissions, rate_limit_rpm, expires_at, revoked_at, etudes(nom)",
+                filtres={"key_hash": key_hash, "key_prefix": key_prefix},
+            )
 
-            if not result.data:
+            if not lignes:
                 raise HTTPException(status_code=401, detail="Clé API invalide")
 
-            key_data = result.data[0]
+            key_data = lignes[0]
 
             # Vérifier si la clé est révoquée
             if key_data.get("revoked_at"):
                 raise HTTPException(status_code=401, detail="Clé API révoquée")
 
             # Vérifier l'expiration
+            expire_dans = None
             if key_data.get("expires_at"):
                 expires = datetime.fromisoformat(key_data["expires_at"].replace("Z", "+00:00"))
                 if expires < datetime.now(expires.tzinfo):
                     raise HTTPException(status_code=401, detail="Clé API expirée")
+                expire_dans = (expires - datetime.now(expires.tzinfo)).total_seconds()
 
             # Construire le contexte d'authentification
             auth_context = AuthContext(
@@ -368,23 +341,19 @@ async def verify_api_key(
             )
 
             # Rate limiting
-            if not rate_limiter.check(auth_context.api_key_id, auth_context.rate_limit_rpm):
+            if not await rate_limiter.check_async(auth_context.api_key_id, auth_context.rate_limit_rpm):
                 raise HTTPException(
                     status_code=429,
                     detail=f"Limite de requetes depassee ({auth_context.rate_limit_rpm}/min). Reessayez dans quelques secondes."
                 )
 
-            # Mettre en cache
-            _api_key_cache[key_hash] = (auth_context, now)
+            # Mettre en cache (jamais au-delà de l'expiration de la clé)
+            await cache_cles_api.ecrire_async(
+                key_hash, auth_context.api_key_id, auth_context.model_dump(), expire_dans
+            )
 
-            # Mettre à jour last_used_at en arrière-plan
-            try:
-                supabase.table("agent_api_keys").update({
-                    "last_used_at": datetime.now().isoformat(),
-                    "total_requests": key_data.get("total_requests", 0) + 1
-                }).eq("id", key_data["id"]).execute()
-            except Exception:
-                pass  # Non-bloquant
+            # last_used_at / total_requests: agrégés et écrits en arrière-plan
+            get_telemetrie().enregistrer_usage_cle(key_data["id"])
 
             return auth_context
 
@@ -443,11 +412,11 @@ async def lifespan(app: FastAPI):
     print("🚀 NotaireAI API démarrée")
 
     # Health check Supabase
-    supabase = get_supabase_client()
-    if supabase:
+    db = get_supabase_async()
+    if db.est_configure:
         try:
-            # Test connexion avec une requête simple
-            result = supabase.table("etudes").select("id").limit(1).execute()
+            # Test connexion avec une requête simple (ouvre le pool keep-alive)
+            await db.selectionner("etudes", "id", limite=1)
             print("✅ Supabase connecté")
         except Exception as e:
             logger.warning(f"⚠️ Supabase non accessible au démarrage: {e}")
@@ -455,9 +424,25 @@ async def lifespan(app: FastAPI):
     else:
         print("⚠️ Supabase non configuré (SUPABASE_URL/KEY manquants)")
 
+    # Warm-up templates: charge le bytecode précompilé (ou compile) tous les
+    # templates/sections/clauses pour que la 1re génération après cold start
+    # tourne à vitesse nominale
+    try:
+        from execution.core.assembler_acte import precompiler_templates
+        rapport = precompiler_templates()
+        print(f"✅ Templates préchargés: {rapport['templates']} en {rapport['duree_ms']} ms")
+        for erreur in rapport['erreurs']:
+            logger.warning(f"⚠️ Template invalide: {erreur}")
+    except Exception as e:
+        logger.warning(f"⚠️ Warm-up templates échoué: {e}")
+
     yield
 
-    # Shutdown
+    # Shutdown (flush final de la télémétrie hors de la boucle)
+    import asyncio
+    arreter_pool_execution()
+    await asyncio.to_thread(arreter_telemetrie)
+    await fermer_supabase_async()
     print("👋 NotaireAI API arrêtée")
 
 
@@ -966,6 +951,25 @@ async def delete_dossier(
         if not result.data:
             raise HTTPException(status_code=404, detail="Dossier non trouvé")
 
+        # Sessions d'anonymisation (noms réels) des conversations du dossier
+        try:
+            from execution.security.chat_anonymizer import get_cache_anonymisation
+            conversations = await executer_bloquant(
+                lambda: supabase.table("conversations").select("id")
+                .eq("dossier_id", dossier_id).eq("etude_id", auth.etude_id).execute()
+            )
+            for conversation in conversations.data or []:
+                get_cache_anonymisation().oublier(conversation["id"])
+        except Exception as e:
+            logger.warning(f"Purge des sessions d'anonymisation impossible: {e}")
+
+        # Les actes générés du dossier peuvent être dans le cache de génération
+        try:
+            from execution.core.cache_generation import invalider_cache_generation
+            await executer_bloquant(invalider_cache_generation)
+        except Exception as e:
+            logger.warning(f"Purge du cache de génération impossible: {e}")
+
         return {"succes": True, "message": "Dossier supprimé"}
 
     except HTTPException:
@@ -975,6 +979,34 @@ async def delete_dossier(
         raise HTTPException(status_code=500, detail="Erreur lors de la suppression")
 
 
+# =============================================================================
+# Exécution hors boucle asyncio
+# =============================================================================
+
+RETRY_AFTER_SATURATION = "5"
+
+
+def _erreur_saturation() -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail="Serveur saturé, réessayez dans quelques secondes",
+        headers={"Retry-After": RETRY_AFTER_SATURATION},
+    )
+
+
+async def executer_bloquant(fn, *args, **kwargs):
+    """
+    Exécute un appel bloquant (génération, export DOCX, Supabase synchrone)
+    dans le pool I/O borné, pour que /health et les heartbeats SSE restent
+    servis pendant une génération. Lève 503 si le pool est saturé.
+    """
+    try:
+        return await get_pool_execution().executer_io(fn, *args, **kwargs)
+    except PoolSature as e:
+        logger.warning(f"Génération refusée: {e}")
+        raise _erreur_saturation()
+
+
 # =============================================================================
 # Endpoints Système
 # =============================================================================
@@ -982,17 +1014,19 @@ async def delete_dossier(
 @app.get("/health", tags=["Système"])
 async def health_check():
     """Vérifie la santé du service (endpoint public)."""
-    supabase = get_supabase_client()
+    db = get_supabase_async()
     supabase_status = "offline"
 
-    if supabase:
+    if db.est_configure:
         try:
             # Test de connexion
-            supabase.table("etudes").select("id").limit(1).execute()
+            await db.selectionner("etudes", "id", limite=1)
             supabase_status = "ok"
         except Exception:
             supabase_status = "error"
 
+    executeurs = get_pool_execution().statistiques()
+
     return {
         "status": "healthy" if supabase_status == "ok" else "degraded",
         "version": "1.1.0",
@@ -1000,11 +1034,47 @@ async def health_check():
         "components": {
             "agent": "ok",
             "orchestrateur": "ok",
-            "supabase": supabase_status
-        }
+            "supabase": supabase_status,
+            "executeurs": "sature" if executeurs["sature"] else "ok"
+        },
+        "executeurs": executeurs,
+        "telemetrie_en_attente": get_telemetrie().en_attente()
     }
 
 
+@app.get("/metrics", tags=["Système"], response_class=PlainTextResponse)
+async def metrics(authorization: Optional[str] = Header(None)):
+    """
+    Métriques Prometheus: durée par étape de génération (histogrammes),
+    erreurs par étape, occupation des pools d'exécution, tokens et hits
+    du cache de prompt de l'agent.
+
+    Public comme /health, sauf si NOTAIRE_METRICS_TOKEN est défini
+    (le collecteur envoie alors `Authorization: Bearer <token>`).
+    """
+    jeton = os.getenv("NOTAIRE_METRICS_TOKEN")
+    if jeton and not hmac.compare_digest(
+        (authorization or "").encode(), f"Bearer {jeton}".encode()
+    ):
+        raise HTTPException(status_code=401, detail="Jeton métriques invalide")
+
+    jauges = {"notaire_telemetrie_en_attente": get_telemetrie().en_attente()}
+    compteurs = {}
+    executeurs = get_pool_execution().statistiques()
+    for nom_pool in ("io", "cpu"):
+        for cle, valeur in (executeurs.get(nom_pool) or {}).items():
+            cible = compteurs if cle in ("terminees", "rejetees") else jauges
+            cible[f"notaire_pool_{nom_pool}_{cle}"] = valeur
+    # Totaux cumulés depuis le démarrage du process
+    for cle, valeur in get_context_builder().stats().items():
+        compteurs[f"notaire_agent_contexte_{cle}"] = valeur
+
+    return PlainTextResponse(
+        get_registre_metriques().exposer(jauges, compteurs),
+        media_type="text/plain; version=0.0.4"
+    )
+
+
 @app.get("/files/{filename}", tags=["Fichiers"])
 async def download_file(filename: str, auth: AuthContext = Depends(verify_api_key)):
     """Télécharge un fichier généré (DOCX/PDF)."""
@@ -1214,6 +1284,54 @@ async def get_current_etude(auth: AuthContext = Depends(verify_api_key)):
     }
 
 
+@app.post("/api-keys/{api_key_id}/revoke", tags=["Système"])
+async def revoquer_cle_api(
+    api_key_id: str,
+    auth: AuthContext = Depends(require_delete_permission)
+):
+    """
+    Révoque une clé API de l'étude.
+
+    La clé est marquée revoked_at dans Supabase puis retirée du cache partagé:
+    tous les workers la refusent dès la requête suivante (pas d'attente du TTL).
+    """
+    api_key_id = sanitize_identifier(api_key_id)
+    if not api_key_id:
+        raise HTTPException(status_code=400, detail="api_key_id invalide")
+
+    db = get_supabase_async()
+    if not db.est_configure:
+        raise HTTPException(status_code=503, detail="Service Supabase indisponible")
+
+    try:
+        lignes = await db.mettre_a_jour(
+            "agent_api_keys",
+            {"revoked_at": datetime.now().isoformat()},
+            filtres={"id": api_key_id, "etude_id": auth.etude_id},
+            retourner=True,
+        )
+    except Exception as e:
+        logger.error(f"Erreur révocation clé API: {e}")
+        raise HTTPException(status_code=500, detail="Erreur lors de la révocation")
+
+    if not lignes:
+        raise HTTPException(status_code=404, detail="Clé API non trouvée")
+
+    try:
+        await cache_cles_api.revoquer_async(api_key_id)
+    except Exception as e:
+        # Révocation déjà effective en base: l'entrée en cache expirera au TTL
+        logger.error(f"Retrait du cache de la clé {api_key_id} impossible: {e}")
+    get_telemetrie().enregistrer_audit({
+        "etude_id": auth.etude_id,
+        "action": "api_key_revoke",
+        "resource_type": "api_key",
+        "resource_id": api_key_id,
+        "details": {"par": auth.api_key_id}
+    })
+    return {"api_key_id": api_key_id, "revoquee": True}
+
+
 # =============================================================================
 # Endpoints Clauses Intelligentes (Promesse de Vente)
 # =============================================================================
@@ -1460,27 +1578,21 @@ async def log_clause_feedback(
     contenu: Optional[str],
     raison: str
 ):
-    """Log le feedback de clause dans Supabase."""
-    supabase = get_supabase_client()
-
-    if supabase:
-        try:
-            supabase.table("audit_logs").insert({
-                "etude_id": etude_id,
-                "action": f"clause_feedback_{action}",
-                "resource_type": "clause",
-                "resource_id": cible,
-                "details": {
-                    "feedback_id": feedback_id,
-                    "action": action,
-                    "cible": cible,
-                    "contenu": contenu,
-                    "raison": raison,
-                    "timestamp": datetime.now().isoformat()
-                }
-            }).execute()
-        except Exception:
-            pass
+    """Log le feedback de clause dans Supabase (envoi groupé en arrière-plan)."""
+    get_telemetrie().enregistrer_audit({
+        "etude_id": etude_id,
+        "action": f"clause_feedback_{action}",
+        "resource_type": "clause",
+        "resource_id": cible,
+        "details": {
+            "feedback_id": feedback_id,
+            "action": action,
+            "cible": cible,
+            "contenu": contenu,
+            "raison": raison,
+            "timestamp": datetime.now().isoformat()
+        }
+    })
 
 
 # =============================================================================
@@ -1516,8 +1628,11 @@ async def generer_promesse(
         # Forcer le type si spécifié
         type_promesse = TypePromesse(type_force) if type_force else None
 
-        # Générer
-        resultat = gestionnaire.generer(donnees, type_promesse)
+        # Générer (hors boucle: rendu + export DOCX dans les pools bornés)
+        resultat = await executer_bloquant(
+            gestionnaire.generer, donnees, type_promesse,
+            exporteur=get_pool_execution().exporteur_docx()
+        )
 
         return {
             "succes": resultat.succes,
@@ -1528,11 +1643,14 @@ async def generer_promesse(
             "fichier_docx": resultat.fichier_docx,
             "sections_incluses": resultat.sections_incluses,
             "duree_generation": resultat.duree_generation,
+            "chronometrage": resultat.chronometrage,
             "erreurs": resultat.erreurs,
             "warnings": resultat.warnings,
             "metadata": resultat.metadata
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Erreur génération promesse: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="Erreur lors de la génération")
@@ -1693,8 +1811,8 @@ async def generer_vente(
         ts = time.strftime("%Y%m%d_%H%M%S")
         output_path = str(output_dir / f"vente_{ts}.docx")
 
-        resultat = orchestrateur.generer_acte_complet(
-            "vente", donnees, output=output_path
+        resultat = await executer_bloquant(
+            orchestrateur.generer_acte_complet, "vente", donnees, output=output_path
         )
 
         fichier_url = None
@@ -1713,6 +1831,8 @@ async def generer_vente(
             "alertes": resultat.alertes,
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Erreur génération vente: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="Erreur lors de la génération de l'acte de vente")
@@ -1730,6 +1850,40 @@ try:
 except ImportError:
     logger.warning("CollecteurInteractif non disponible")
 
+# Validation en direct des réponses Q&R (revalidation incrémentale par dossier)
+VALIDATION_QR_DISPONIBLE = False
+try:
+    from execution.core.valider_acte import ValidateurActe
+    VALIDATION_QR_DISPONIBLE = True
+except ImportError:
+    logger.warning("ValidateurActe non disponible pour la validation Q&R")
+
+MAX_VALIDATEURS_QR = 256
+_validateurs_qr: "OrderedDict[Tuple[str, str], ValidateurActe]" = OrderedDict()
+
+
+def _valider_reponses_qr(etude_id: str, dossier_id: str, donnees: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Revalide uniquement les règles touchées depuis la validation précédente.
+
+    Les chemins modifiés sont déduits des empreintes des valeurs (et non
+    des clés soumises): une modification faite par un autre endpoint ou un
+    autre worker est prise en compte.
+    """
+    if not VALIDATION_QR_DISPONIBLE:
+        return None
+    cle = (etude_id, dossier_id)
+    validateur = _validateurs_qr.pop(cle, None)
+    if validateur is None:
+        validateur = ValidateurActe({})
+        rapport = validateur.valider_complet(donnees)
+    else:
+        rapport = validateur.revalider(donnees)
+    _validateurs_qr[cle] = validateur
+    while len(_validateurs_qr) > MAX_VALIDATEURS_QR:
+        _validateurs_qr.popitem(last=False)
+    return rapport.to_dict()
+
 
 class AnswerSubmission(BaseModel):
     """Soumission de réponses Q&R."""
@@ -1863,6 +2017,14 @@ async def submit_answers(
         # Progression mise à jour
         progress = collecteur.get_progress()
 
+        # Validation en direct (règles dépendant des champs modifiés)
+        try:
+            validation = _valider_reponses_qr(auth.etude_id, dossier_id, collecteur.donnees)
+        except Exception as e:
+            logger.warning(f"Validation Q&R échouée pour {dossier_id}: {e}")
+            _validateurs_qr.pop((auth.etude_id, dossier_id), None)
+            validation = None
+
         # Log en arrière-plan
         background_tasks.add_task(
             _log_qr_activity, auth.etude_id, dossier_id,
@@ -1874,6 +2036,7 @@ async def submit_answers(
             "accepted": result['accepted'],
             "errors": result['errors'],
             "progress": progress,
+            "validation": validation,
         }
 
     except Exception as e:
@@ -1984,12 +2147,8 @@ async def _log_qr_activity(
         "count": count,
     }
 
-    logs_dir = PROJECT_ROOT / ".tmp" / "logs"
-    logs_dir.mkdir(parents=True, exist_ok=True)
-    log_file = logs_dir / f"qr_activity_{datetime.now().strftime('%Y%m%d')}.jsonl"
-
-    with open(log_file, "a", encoding="utf-8") as f:
-        f.write(json.dumps(log_entry, ensure_ascii=False) + "\n")
+    log_file = PROJECT_ROOT / ".tmp" / "logs" / f"qr_activity_{datetime.now().strftime('%Y%m%d')}.jsonl"
+    get_telemetrie().enregistrer_ligne_locale(log_file, log_entry)
 
 
 # =============================================================================
@@ -2199,14 +2358,17 @@ async def workflow_generate(
         wf_state['status'] = 'generating'
         wf_state['generation_started'] = datetime.now().isoformat()
         _workflow_states[workflow_id] = wf_state
+        trace = Trace("promesse")
 
         # --- Étape 0: Enrichissement données brutes → structure Jinja2 ---
         try:
             from execution.data_enrichment import enrichir_donnees_pour_generation
             type_acte = wf_state.get('type_acte', 'promesse_vente')
-            donnees = enrichir_donnees_pour_generation(
-                donnees, type_acte=type_acte, etude_id=auth.etude_id
-            )
+            with mesurer("enrichment", trace=trace):
+                donnees = await executer_bloquant(
+                    enrichir_donnees_pour_generation,
+                    donnees, type_acte=type_acte, etude_id=auth.etude_id
+                )
         except ValueError as e:
             wf_state['status'] = 'enrichment_failed'
             _workflow_states[workflow_id] = wf_state
@@ -2215,6 +2377,8 @@ async def workflow_generate(
                 "status": "enrichment_failed",
                 "erreur": str(e),
             }
+        except HTTPException:
+            raise
         except Exception as e:
             logger.warning(f"Enrichissement partiel: {e}")
 
@@ -2222,7 +2386,8 @@ async def workflow_generate(
         from execution.gestionnaires.gestionnaire_promesses import GestionnairePromesses
         gestionnaire = GestionnairePromesses()
 
-        validation = gestionnaire.valider(donnees)
+        with mesurer("validation", trace=trace):
+            validation = gestionnaire.valider(donnees)
         # validation is ResultatValidationPromesse dataclass, not dict
         if not validation.valide:
             wf_state['status'] = 'validation_failed'
@@ -2235,10 +2400,15 @@ async def workflow_generate(
             }
 
         # --- Étape 2: Détection 3 niveaux (catégorie + type + sous-type) ---
-        detection = gestionnaire.detecter_type(donnees)
+        with mesurer("detection", trace=trace):
+            detection = gestionnaire.detecter_type(donnees)
 
-        # --- Étape 3: Génération ---
-        resultat = gestionnaire.generer(donnees)
+        # --- Étape 3: Génération (hors boucle, 503 si pools saturés) ---
+        resultat = await executer_bloquant(
+            gestionnaire.generer, donnees,
+            exporteur=get_pool_execution().exporteur_docx()
+        )
+        trace.fusionner(resultat.chronometrage)
 
         wf_state['status'] = 'completed' if resultat.succes else 'generation_failed'
         wf_state['steps_completed'] = wf_state.get('steps_completed', []) + [
@@ -2262,6 +2432,7 @@ async def workflow_generate(
             "fichier_docx": resultat.fichier_docx,
             "erreurs": resultat.erreurs if hasattr(resultat, 'erreurs') else [],
             "warnings": resultat.warnings if hasattr(resultat, 'warnings') else [],
+            "chronometrage": trace.en_dict(),
         }
 
         if resultat.fichier_docx:
@@ -2294,7 +2465,11 @@ async def workflow_generate_stream(
     - step: {step: "detection", message: "Détection catégorie..."}
     - step: {step: "assembly", message: "Assemblage du document..."}
     - step: {step: "export", message: "Export DOCX..."}
-    - complete: {fichier_url: "/files/xxx.docx"}
+    - step: {step: "section", section: "...", index: n} (une par section H2 convertie)
+    - complete: {fichier_url: "/files/xxx.docx", chronometrage: {...}}
+
+    Les événements step (hors section) portent `chronometrage`: durée des
+    étapes déjà terminées ({total_ms, etapes: {enrichment: ms, ...}}).
     - error: {message: "..."}
     """
     if not COLLECTEUR_DISPONIBLE:
@@ -2312,37 +2487,44 @@ async def workflow_generate_stream(
         import asyncio
         donnees = collecteur.donnees
         wf_state = _workflow_states.get(workflow_id, {})
+        trace = Trace("promesse")
+
+        def _step(step: str, message: str) -> Dict[str, str]:
+            return {"event": "step", "data": json.dumps(
+                {"step": step, "message": message, "chronometrage": trace.en_dict()}
+            )}
 
         try:
             # Étape 0: Enrichissement données brutes → structure Jinja2
-            yield {"event": "step", "data": json.dumps(
-                {"step": "enrichment", "message": "Enrichissement des données..."}
-            )}
+            yield _step("enrichment", "Enrichissement des données...")
             await asyncio.sleep(0.1)
 
             try:
                 from execution.data_enrichment import enrichir_donnees_pour_generation
                 type_acte = wf_state.get('type_acte', 'promesse_vente')
-                donnees = enrichir_donnees_pour_generation(
-                    donnees, type_acte=type_acte, etude_id=auth.etude_id
-                )
+                with mesurer("enrichment", trace=trace):
+                    donnees = await get_pool_execution().executer_io(
+                        enrichir_donnees_pour_generation,
+                        donnees, type_acte=type_acte, etude_id=auth.etude_id
+                    )
             except ValueError as e:
                 yield {"event": "error", "data": json.dumps(
                     {"message": f"Données manquantes: {e}"}
                 )}
                 return
+            except PoolSature:
+                raise
             except Exception as e:
                 logger.warning(f"Enrichissement partiel: {e}")
 
             # Étape 1: Validation
-            yield {"event": "step", "data": json.dumps(
-                {"step": "validation", "message": "Validation des données..."}
-            )}
+            yield _step("validation", "Validation des données...")
             await asyncio.sleep(0.1)
 
             from execution.gestionnaires.gestionnaire_promesses import GestionnairePromesses
             gestionnaire = GestionnairePromesses()
-            validation = gestionnaire.valider(donnees)
+            with mesurer("validation", trace=trace):
+                validation = gestionnaire.valider(donnees)
 
             # validation is ResultatValidationPromesse dataclass, not dict
             if not validation.valide:
@@ -2352,25 +2534,40 @@ async def workflow_generate_stream(
                 return
 
             # Étape 2: Détection 3 niveaux
-            yield {"event": "step", "data": json.dumps(
-                {"step": "detection", "message": "Détection catégorie + sous-type..."}
-            )}
+            yield _step("detection", "Détection catégorie + sous-type...")
             await asyncio.sleep(0.1)
-            detection = gestionnaire.detecter_type(donnees)
+            with mesurer("detection", trace=trace):
+                detection = gestionnaire.detecter_type(donnees)
             sous_info = f" ({detection.sous_type})" if detection.sous_type else ""
 
             # Étape 3: Assemblage
-            yield {"event": "step", "data": json.dumps(
-                {"step": "assembly", "message": f"Assemblage template {detection.categorie_bien.value}{sous_info}..."}
-            )}
+            yield _step("assembly", f"Assemblage template {detection.categorie_bien.value}{sous_info}...")
             await asyncio.sleep(0.1)
 
-            # Étape 4: Export
-            yield {"event": "step", "data": json.dumps(
-                {"step": "export", "message": "Export DOCX en cours..."}
-            )}
-
-            resultat = gestionnaire.generer(donnees)
+            # Étape 4: Export (pipeline: le DOCX se construit pendant le rendu)
+            yield _step("export", "Export DOCX en cours...")
+
+            loop = asyncio.get_running_loop()
+            sections_converties: asyncio.Queue = asyncio.Queue()
+
+            def _progression(evenement: Dict[str, Any]):
+                loop.call_soon_threadsafe(sections_converties.put_nowait, evenement)
+
+            generation = asyncio.ensure_future(get_pool_execution().executer_io(
+                gestionnaire.generer, donnees, streaming=True, progression=_progression
+            ))
+            while not generation.done() or not sections_converties.empty():
+                try:
+                    evenement = await asyncio.wait_for(sections_converties.get(), timeout=0.5)
+                except asyncio.TimeoutError:
+                    continue
+                yield {"event": "step", "data": json.dumps({
+                    "step": "section",
+                    "message": f"Section {evenement['index'] + 1}: {evenement['section']}",
+                    **evenement,
+                })}
+            resultat = await generation
+            trace.fusionner(resultat.chronometrage)
 
             if resultat.succes:
                 filename = Path(resultat.fichier_docx).name if resultat.fichier_docx else None
@@ -2383,6 +2580,7 @@ async def workflow_generate_stream(
                     "fichier_url": f"/files/{filename}" if filename else None,
                     "type_promesse": resultat.type_promesse.value if hasattr(resultat, 'type_promesse') else None,
                     "sous_type": detection.sous_type,
+                    "chronometrage": trace.en_dict(),
                 })}
             else:
                 yield {"event": "error", "data": json.dumps({
@@ -2390,12 +2588,22 @@ async def workflow_generate_stream(
                     "erreurs": resultat.erreurs if hasattr(resultat, 'erreurs') else [],
                 })}
 
+        except PoolSature as e:
+            logger.warning(f"Génération refusée: {e}")
+            yield {"event": "error", "data": json.dumps({
+                "message": "Serveur saturé, réessayez dans quelques secondes",
+                "retry_after": int(RETRY_AFTER_SATURATION),
+            })}
         except Exception as e:
             logger.error(f"Erreur streaming workflow: {e}", exc_info=True)
             yield {"event": "error", "data": json.dumps({
                 "message": str(e),
             })}
 
+    # Refus avant d'ouvrir le flux: une fois l'en-tête SSE envoyé, plus de 503
+    if get_pool_execution().est_sature():
+        raise _erreur_saturation()
+
     try:
         from sse_starlette.sse import EventSourceResponse
         return EventSourceResponse(event_generator())
@@ -2538,7 +2746,7 @@ async def rechercher_titre_adresse(
         supabase = get_supabase_client()
         gestionnaire = GestionnairePromesses(supabase_client=supabase)
 
-        resultats = gestionnaire.rechercher_titre_par_adresse(adresse)
+        resultats = gestionnaire.rechercher_titre_par_adresse(adresse, etude_id=auth.etude_id)
 
         return {
             "query": adresse,
@@ -2565,7 +2773,7 @@ async def rechercher_titre_proprietaire(
         supabase = get_supabase_client()
         gestionnaire = GestionnairePromesses(supabase_client=supabase)
 
-        resultats = gestionnaire.rechercher_titre_par_proprietaire(nom)
+        resultats = gestionnaire.rechercher_titre_par_proprietaire(nom, etude_id=auth.etude_id)
 
         return {
             "query": nom,
@@ -2578,6 +2786,112 @@ async def rechercher_titre_proprietaire(
         raise HTTPException(status_code=500, detail="Erreur lors de la recherche")
 
 
+@app.post("/titres/batch", status_code=202, tags=["Titres"])
+async def importer_titres_batch(
+    request: Request,
+    nom: str = Query("titres.zip", description="Nom de l'archive (.zip, .tar.gz)"),
+    workers: Optional[int] = Query(None, ge=1, le=32, description="Extractions en vol dans le pool partagé"),
+    auth: AuthContext = Depends(require_write_permission)
+):
+    """
+    Importe en masse une archive de titres de propriété (PDF/DOCX).
+
+    Le corps de la requête est l'archive brute, écrite sur disque au fil de
+    l'eau (NOTAIRE_INGESTION_MAX_MO, 413 au-delà). L'import tourne en tâche de
+    fond: suivre la progression via GET /titres/batch/{job_id}/stream.
+    Renvoyer la même archive reprend un import interrompu.
+    """
+    import asyncio
+
+    from execution.gestionnaires.ingestion_titres import TAILLE_MAX_ARCHIVE, chemin_archive, lancer_job
+    from execution.security.secure_delete import secure_delete_file
+
+    trop_grande = HTTPException(
+        status_code=413,
+        detail=f"Archive trop volumineuse (max {TAILLE_MAX_ARCHIVE // (1024 * 1024)} Mo)"
+    )
+    if int(request.headers.get("content-length") or 0) > TAILLE_MAX_ARCHIVE:
+        raise trop_grande
+
+    archive = chemin_archive(nom)
+    taille = 0
+    try:
+        with open(archive, "wb") as f:
+            async for morceau in request.stream():
+                taille += len(morceau)
+                if taille > TAILLE_MAX_ARCHIVE:
+                    raise trop_grande
+                if morceau:
+                    await executer_bloquant(f.write, morceau)
+        if not taille:
+            raise HTTPException(status_code=400, detail="Archive vide")
+        job_id = await executer_bloquant(
+            lancer_job, archive, etude_id=auth.etude_id, workers=workers, supprimer_source=True
+        )
+    except BaseException:
+        await asyncio.to_thread(secure_delete_file, archive)
+        raise
+    return {"job_id": job_id, "etat": "en_cours", "stream": f"/titres/batch/{job_id}/stream"}
+
+
+def _job_ingestion(job_id: str, auth: AuthContext) -> Dict[str, Any]:
+    from execution.gestionnaires.ingestion_titres import get_job
+
+    job = get_job(sanitize_identifier(job_id))
+    if not job or job.get("etude_id") != auth.etude_id:
+        raise HTTPException(status_code=404, detail="Import non trouvé")
+    return job
+
+
+@app.get("/titres/batch/{job_id}", tags=["Titres"])
+async def etat_import_titres(job_id: str, auth: AuthContext = Depends(verify_api_key)):
+    """État d'un import en masse (dernier événement de progression)."""
+    job = _job_ingestion(job_id, auth)
+    evenements = job["evenements"]
+    fin = next((e for e in reversed(evenements) if e["type"] == "termine"), None)
+    progression = next((e for e in reversed(evenements) if e["type"] == "fichier"), None)
+    return {
+        "job_id": job["job_id"],
+        "etat": job["etat"],
+        "traites": progression["traites"] if progression else 0,
+        "total": progression["total"] if progression else None,
+        "stats": fin["stats"] if fin else None,
+    }
+
+
+@app.get("/titres/batch/{job_id}/stream", tags=["Titres"])
+async def stream_import_titres(job_id: str, auth: AuthContext = Depends(verify_api_key)):
+    """
+    Progression d'un import en masse (SSE).
+
+    Événements: inventaire, fichier (un par titre), lot, termine, erreur.
+    """
+    import asyncio
+
+    job = _job_ingestion(job_id, auth)
+
+    async def event_generator():
+        envoyes = 0
+        while True:
+            evenements = job["evenements"]
+            while envoyes < len(evenements):
+                evenement = evenements[envoyes]
+                envoyes += 1
+                yield {"event": evenement["type"], "data": json.dumps(evenement, ensure_ascii=False)}
+            if job["etat"] != "en_cours" and envoyes >= len(job["evenements"]):
+                return
+            await asyncio.sleep(0.5)
+
+    try:
+        from sse_starlette.sse import EventSourceResponse
+        return EventSourceResponse(event_generator())
+    except ImportError:
+        raise HTTPException(
+            status_code=501,
+            detail="Streaming SSE non disponible. Installer: pip install sse-starlette"
+        )
+
+
 @app.post("/titres/{titre_id}/vers-promesse", tags=["Titres"])
 async def convertir_titre_en_promesse(
     titre_id: str,
@@ -2759,10 +3073,7 @@ async def submit_paragraph_feedback(
     Enregistre un feedback paragraphe par paragraphe dans Supabase.
     Utilisé par la notaire pour valider ou corriger chaque section du document.
     """
-    try:
-        supabase = get_supabase_client()
-    except Exception:
-        supabase = None
+    db = get_supabase_async()
 
     feedback_data = {
         "etude_id": auth.etude_id,
@@ -2777,12 +3088,10 @@ async def submit_paragraph_feedback(
         },
     }
 
-    if supabase:
+    if db.est_configure:
         try:
-            result = supabase.table("feedbacks_promesse").insert(
-                feedback_data
-            ).execute()
-            feedback_id = result.data[0]["id"] if result.data else None
+            lignes = await db.inserer("feedbacks_promesse", feedback_data)
+            feedback_id = lignes[0]["id"] if lignes else None
         except Exception as e:
             logger.warning(f"Supabase insert feedback failed: {e}")
             feedback_id = None
@@ -2829,26 +3138,16 @@ async def log_execution(
         "fichier_genere": resultat.fichier_genere
     }
 
-    # Sauvegarder localement
-    logs_dir = PROJECT_ROOT / ".tmp" / "logs"
-    logs_dir.mkdir(parents=True, exist_ok=True)
-
-    log_file = logs_dir / f"executions_{datetime.now().strftime('%Y%m%d')}.jsonl"
-    with open(log_file, "a", encoding="utf-8") as f:
-        f.write(json.dumps(log_entry, ensure_ascii=False) + "\n")
-
-    # Sauvegarder dans Supabase audit_logs
-    supabase = get_supabase_client()
-    if supabase:
-        try:
-            supabase.table("audit_logs").insert({
-                "etude_id": etude_id,
-                "action": "agent_execute",
-                "resource_type": "acte",
-                "details": log_entry
-            }).execute()
-        except Exception:
-            pass  # Non-bloquant
+    # Sauvegarder localement + Supabase audit_logs (écrits par lot en arrière-plan)
+    telemetrie = get_telemetrie()
+    log_file = PROJECT_ROOT / ".tmp" / "logs" / f"executions_{datetime.now().strftime('%Y%m%d')}.jsonl"
+    telemetrie.enregistrer_ligne_locale(log_file, log_entry)
+    telemetrie.enregistrer_audit({
+        "etude_id": etude_id,
+        "action": "agent_execute",
+        "resource_type": "acte",
+        "details": log_entry
+    })
 
     # Analyser les patterns fréquents pour amélioration
     if analyse.confiance < 0.7:
@@ -2863,35 +3162,35 @@ async def sync_dossier_to_supabase(
     fichier: Optional[str]
 ):
     """Synchronise un dossier généré vers Supabase."""
-    supabase = get_supabase_client()
+    db = get_supabase_async()
 
-    if not supabase:
+    if not db.est_configure:
         return
 
     try:
         # Vérifier si le dossier existe
-        existing = supabase.table("dossiers").select("id").eq(
-            "numero", dossier_id
-        ).eq("etude_id", etude_id).execute()
+        existing = await db.selectionner(
+            "dossiers", "id", filtres={"numero": dossier_id, "etude_id": etude_id}
+        )
 
         donnees_metier = {"fichier_genere": fichier} if fichier else {}
 
-        if existing.data:
+        if existing:
             # Mettre à jour
-            supabase.table("dossiers").update({
+            await db.mettre_a_jour("dossiers", {
                 "statut": "termine",
                 "donnees_metier": donnees_metier,
                 "updated_at": datetime.now().isoformat()
-            }).eq("id", existing.data[0]["id"]).execute()
+            }, filtres={"id": existing[0]["id"]})
         else:
             # Créer
-            supabase.table("dossiers").insert({
+            await db.inserer("dossiers", {
                 "etude_id": etude_id,
                 "numero": dossier_id,
                 "type_acte": type_acte,
                 "statut": "termine",
                 "donnees_metier": donnees_metier
-            }).execute()
+            }, retourner=False)
 
     except Exception as e:
         print(f"⚠️ Erreur sync Supabase: {e}")
@@ -2928,19 +3227,14 @@ async def process_feedback(
     with open(feedback_file, "a", encoding="utf-8") as f:
         f.write(json.dumps(feedback_entry, ensure_ascii=False) + "\n")
 
-    # 2. Logger dans Supabase audit_logs
-    supabase = get_supabase_client()
-    if supabase:
-        try:
-            supabase.table("audit_logs").insert({
-                "etude_id": etude_id,
-                "action": f"feedback_{feedback.type_feedback}",
-                "resource_type": "feedback",
-                "resource_id": feedback.dossier_id if feedback.dossier_id else None,
-                "details": feedback_entry
-            }).execute()
-        except Exception:
-            pass
+    # 2. Logger dans Supabase audit_logs (envoi groupé en arrière-plan)
+    get_telemetrie().enregistrer_audit({
+        "etude_id": etude_id,
+        "action": f"feedback_{feedback.type_feedback}",
+        "resource_type": "feedback",
+        "resource_id": feedback.dossier_id if feedback.dossier_id else None,
+        "details": feedback_entry
+    })
 
     # 3. Si nouvelle clause → ajouter au catalogue
     if feedback.nouvelle_clause:
@@ -93,6 +93,7 @@ def fastapi_app():
 
     # Configurer les chemins pour Modal
     os.environ["NOTAIRE_OUTPUT_DIR"] = "/outputs"
+    os.environ["NOTAIRE_JINJA_CACHE_DIR"] = "/outputs/.jinja_bytecode"  # Bytecode partagé entre containers
     os.environ["MODAL_ENVIRONMENT"] = "production"
 
     # Importer l'app FastAPI
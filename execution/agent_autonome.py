@@ -2263,12 +2263,11 @@ class CollecteurInteractif:
             raise ValueError(f"Type d'acte non supporte pour Q&R: {type_acte}. "
                              f"Supportes: {list(self.SCHEMAS.keys())}")
 
-        schema_path = PROJECT_ROOT / 'schemas' / schema_nom
-        if not schema_path.exists():
-            raise FileNotFoundError(f"Schema Q&R introuvable: {schema_path}")
-
-        with open(schema_path, 'r', encoding='utf-8') as f:
-            self.schema = json.load(f)
+        # Schéma figé partagé par tous les collecteurs (chargé une fois par
+        # process, rechargé si le fichier change) et ses index
+        from execution.core.registre_schemas import get_registre_schemas
+        self._catalogue = get_registre_schemas().catalogue(schema_nom)
+        self.schema = self._catalogue.schema
 
     def collecter(
         self,
@@ -2285,7 +2284,6 @@ class CollecteurInteractif:
         Returns:
             Dictionnaire de données complet pour le pipeline
         """
-        sections = self.schema.get('sections', {})
         ignorer = set(sections_a_ignorer or [])
 
         print(f"\n{'='*60}")
@@ -2297,20 +2295,14 @@ class CollecteurInteractif:
             print(f"  Donnees pre-remplies: {nb} sections detectees")
             print(f"  Les champs deja renseignes seront auto-valides\n")
 
-        for section_key in sorted(sections.keys()):
+        for section_key, section in self._catalogue.sections:
             if section_key in ignorer:
                 continue
 
-            section = sections[section_key]
-
-            # Ignorer les sections conditionnelles non applicables
-            condition = section.get('condition', '')
-            if condition and not self._evaluer_condition_section(condition):
-                continue
-
-            # Filtrer par catégorie de bien (v1.7.0)
-            condition_categorie = section.get('condition_categorie', '')
-            if condition_categorie and not self._evaluer_condition_categorie(condition_categorie):
+            # Ignorer les sections conditionnelles non applicables,
+            # filtrer par catégorie de bien (v1.7.0). Réévalué à chaque
+            # section: les réponses précédentes peuvent changer le résultat.
+            if not self._catalogue.section_applicable(section_key, self.donnees):
                 continue
 
             self._traiter_section(section_key, section, mode)
@@ -2431,7 +2423,7 @@ class CollecteurInteractif:
         # Poser la question ou utiliser le défaut
         if mode == 'prefill_only':
             if defaut is not None:
-                reponse = defaut
+                reponse = copy.deepcopy(defaut)  # jamais de valeur du schéma partagé dans les données
                 if variable:
                     chemin = self._parse_variable(variable, index)
                     self._set_deep(self.donnees, chemin, reponse)
@@ -2605,30 +2597,8 @@ class CollecteurInteractif:
 
     def _evaluer_condition_section(self, condition: str) -> bool:
         """Évalue une condition de section (ex: 'mobilier.existe == true')."""
-        try:
-            match = re.match(r'([\w.]+)\s*(==|!=|>|<)\s*(.+)', condition)
-            if not match:
-                return True
-
-            var_path, op, val_attendue = match.groups()
-            val_attendue = val_attendue.strip().strip("'\"")
-            chemin = var_path.split('.')
-            val_actuelle = self._get_deep(self.donnees, chemin)
-
-            if val_actuelle is None:
-                return False
-
-            if op == '==':
-                return str(val_actuelle).lower() == val_attendue.lower()
-            elif op == '!=':
-                return str(val_actuelle).lower() != val_attendue.lower()
-            elif op == '>':
-                return float(val_actuelle) > float(val_attendue)
-            elif op == '<':
-                return float(val_actuelle) < float(val_attendue)
-        except Exception:
-            pass
-        return True
+        from execution.core.registre_schemas import compiler_condition_section
+        return compiler_condition_section(condition)(self.donnees)
 
     def _evaluer_condition_categorie(self, condition_categorie: str) -> bool:
         """Évalue si la section est applicable à la catégorie de bien détectée.
@@ -2637,39 +2607,8 @@ class CollecteurInteractif:
         1. _metadata.categorie_bien (choix explicite du notaire)
         2. Détection automatique via bien.copropriete, bien.lotissement, bien.type_bien
         """
-        # 1. Chercher la catégorie explicite
-        categorie = self._get_deep(self.donnees, ['_metadata', 'categorie_bien'])
-        if categorie:
-            # Normaliser: "Lot en copropriété (appartement...)" -> "copropriete"
-            # IMPORTANT: vérifier 'hors' et 'terrain' AVANT 'copropri'
-            # car 'hors_copropriete' contient 'copropri' comme substring
-            cat_lower = str(categorie).lower()
-            if 'hors' in cat_lower or 'maison' in cat_lower:
-                categorie_normalisee = 'hors_copropriete'
-            elif 'terrain' in cat_lower:
-                categorie_normalisee = 'terrain_a_batir'
-            elif 'copropri' in cat_lower:
-                categorie_normalisee = 'copropriete'
-            else:
-                categorie_normalisee = 'copropriete'
-            return condition_categorie == categorie_normalisee
-
-        # 2. Détection automatique
-        bien = self._get_deep(self.donnees, ['bien']) or {}
-        lotissement = bien.get('lotissement')
-        type_bien = str(bien.get('type_bien', '')).lower()
-        copropriete = bien.get('copropriete')
-
-        if lotissement or type_bien in ('terrain', 'parcelle'):
-            categorie_detectee = 'terrain_a_batir'
-        elif copropriete is True or bien.get('lots'):
-            categorie_detectee = 'copropriete'
-        elif copropriete is False or type_bien in ('maison', 'villa', 'local_commercial', 'immeuble'):
-            categorie_detectee = 'hors_copropriete'
-        else:
-            categorie_detectee = 'copropriete'
-
-        return condition_categorie == categorie_detectee
+        from execution.core.registre_schemas import categorie_bien
+        return condition_categorie == categorie_bien(self.donnees)
 
     def _afficher_rapport(self):
         """Affiche le rapport de collecte."""
@@ -2711,19 +2650,11 @@ class CollecteurInteractif:
         Returns:
             Liste de dicts: {key, titre, nb_questions, nb_repondues, complete}
         """
-        sections = self.schema.get('sections', {})
         result = []
 
-        for section_key in sorted(sections.keys()):
-            section = sections[section_key]
-
-            # Filtrage conditions
-            condition = section.get('condition', '')
-            if condition and not self._evaluer_condition_section(condition):
-                continue
-            condition_categorie = section.get('condition_categorie', '')
-            if condition_categorie and not self._evaluer_condition_categorie(condition_categorie):
-                continue
+        # Filtrage conditions (fonctions d'applicabilité précompilées)
+        for section_key in self._catalogue.sections_applicables(self.donnees):
+            section = self._catalogue.section(section_key)
 
             questions = section.get('questions', [])
             nb_total = len(questions)
@@ -2757,8 +2688,7 @@ class CollecteurInteractif:
                              valeur_actuelle, pre_rempli, obligatoire,
                              sous_questions}
         """
-        sections = self.schema.get('sections', {})
-        section = sections.get(section_key)
+        section = self._catalogue.section(section_key)
         if not section:
             return []
 
@@ -2770,8 +2700,8 @@ class CollecteurInteractif:
                 'id': q.get('id', ''),
                 'question': q.get('question', ''),
                 'type': q.get('type', 'texte'),
-                'options': q.get('options', []),
-                'defaut': q.get('defaut'),
+                'options': list(q.get('options', [])),
+                'defaut': copy.deepcopy(q.get('defaut')),
                 'variable': q.get('variable', ''),
                 'obligatoire': q.get('obligatoire', False),
                 'aide': q.get('aide', ''),
@@ -2799,8 +2729,8 @@ class CollecteurInteractif:
                             'id': sq.get('id', ''),
                             'question': sq.get('question', ''),
                             'type': sq.get('type', 'texte'),
-                            'options': sq.get('options', []),
-                            'defaut': sq.get('defaut'),
+                            'options': list(sq.get('options', [])),
+                            'defaut': copy.deepcopy(sq.get('defaut')),
                             'variable': sq.get('variable', ''),
                             'obligatoire': sq.get('obligatoire', False),
                         }
@@ -2826,30 +2756,8 @@ class CollecteurInteractif:
         errors = []
         updated_keys = []
 
-        # Index id->variable depuis le schema
-        id_to_variable = {}
-        for section in self.schema.get('sections', {}).values():
-            for q in section.get('questions', []):
-                qid = q.get('id', '')
-                var = q.get('variable', '')
-                if qid and var:
-                    id_to_variable[qid] = var
-                # Sous-questions (peut être dict {condition: [questions]} ou list)
-                sous_q = q.get('sous_questions', {})
-                if isinstance(sous_q, dict):
-                    sq_lists = sous_q.values()
-                elif isinstance(sous_q, list):
-                    sq_lists = [sous_q]
-                else:
-                    sq_lists = []
-                for sq_list in sq_lists:
-                    if not isinstance(sq_list, list):
-                        continue
-                    for sq in sq_list:
-                        sqid = sq.get('id', '') if isinstance(sq, dict) else ''
-                        svar = sq.get('variable', '') if isinstance(sq, dict) else ''
-                        if sqid and svar:
-                            id_to_variable[sqid] = svar
+        # Index id->variable precalcule par le registre (sous-questions comprises)
+        id_to_variable = self._catalogue.variable_par_id
 
         for key, value in answers.items():
             # Résoudre le chemin variable
@@ -2891,12 +2799,9 @@ class CollecteurInteractif:
 
         # Champs manquants (obligatoires)
         champs_manquants = []
-        for section in self.schema.get('sections', {}).values():
-            condition = section.get('condition', '')
-            if condition and not self._evaluer_condition_section(condition):
-                continue
-            condition_categorie = section.get('condition_categorie', '')
-            if condition_categorie and not self._evaluer_condition_categorie(condition_categorie):
+        applicables = set(self._catalogue.sections_applicables(self.donnees))
+        for section_key, section in self.schema.get('sections', {}).items():
+            if section_key not in applicables:
                 continue
 
             for q in section.get('questions', []):
@@ -2974,11 +2879,10 @@ class CollecteurInteractif:
         with open(session_path, 'r', encoding='utf-8') as f:
             state = json.load(f)
 
-        instance = cls(
-            type_acte=state['type_acte'],
-            prefill=state.get('donnees', {}),
-        )
-        instance.donnees = state.get('donnees', {})
+        # Schéma servi par le registre (pas de re-parse); les données de la
+        # session sont reprises telles quelles, sans copie de pré-remplissage
+        instance = cls(type_acte=state['type_acte'])
+        instance.prefill = instance.donnees = state.get('donnees', {})
         instance.questions_posees = state.get('questions_posees', 0)
         instance.questions_preremplies = state.get('questions_preremplies', 0)
         instance.questions_ignorees = state.get('questions_ignorees', 0)
@@ -9,7 +9,8 @@ Architecture:
 1. Charge historique + agent_state depuis Supabase
 2. Anonymise les PII (ChatAnonymizer Python) AVANT envoi
 3. Appel Anthropic Messages API avec 8 tools (3-tier prompt caching)
-4. Boucle tool_use: execute tool -> envoie tool_result -> repete (max 15 iterations)
+4. Boucle tool_use: execute tools -> envoie tool_result -> repete (max 15 iterations)
+   (outils en lecture seule d'un meme tour en parallele, hors event loop)
 5. De-anonymise la reponse finale APRES reception
 6. Sauvegarde agent_state dans Supabase
 
@@ -17,16 +18,19 @@ Constantes:
 - MAX_TOOL_ITERATIONS = 15  (workflow complet = ~10 appels tools minimum)
 - MAX_OUTPUT_TOKENS = 4096  (eviter truncations sur rapports de validation)
 - MAX_HISTORY_MESSAGES = 30 (plus de contexte pour conversations longues)
+  (l'historique est aussi tenu dans un budget de tokens, cf. anthropic_context)
 
 Methodes de chargement de directives:
 - _load_full_directive(): charge une directive complete depuis directives/
+  (memoisee par type d'acte et mtime des fichiers)
 - _read_directive_file(): lit le contenu brut d'un fichier directive
 - _filter_directive_sections(): filtre les sections selon le type d'acte
 - _build_session_context(): construit le contexte de session avec directives
-- _build_cached_system(): construit le prompt systeme 3-tier avec cache Anthropic
+- _build_cached_system(): construit le prefixe systeme stable (core + directive)
+- _build_context(): assemble system/tools/messages (prefixe cacheable, budget
+  d'historique, contexte de session dans le message courant)
 """
 
-import asyncio
 import json
 import re
 import sys
@@ -46,7 +50,7 @@ logger = logging.getLogger(__name__)
 
 # PII anonymization for RGPD compliance
 try:
-    from execution.security.chat_anonymizer import ChatAnonymizer
+    from execution.security.chat_anonymizer import get_cache_anonymisation
     ANONYMIZER_AVAILABLE = True
 except ImportError:
     ANONYMIZER_AVAILABLE = False
@@ -295,6 +299,8 @@ class AgentResponse:
     agent_state: Dict[str, Any] = field(default_factory=dict)
     action: Optional[Dict[str, Any]] = None
     contexte_mis_a_jour: Optional[Dict[str, Any]] = None
+    tool_timings: List[Dict[str, Any]] = field(default_factory=list)
+    context_stats: Dict[str, Any] = field(default_factory=dict)
 
 
 # =============================================================================
@@ -309,6 +315,8 @@ class AnthropicAgent:
     def __init__(self, supabase_client=None):
         self.supabase = supabase_client
         self._client = None
+        # Etats charges (version + base du patch) par conversation
+        self._etats: Dict[str, Any] = {}
 
     def _get_client(self):
         """Initialise le client Anthropic async (lazy)."""
@@ -322,42 +330,57 @@ class AnthropicAgent:
     # =========================================================================
 
     def _load_agent_state(self, conversation_id: str) -> Dict[str, Any]:
-        """Charge l'agent_state depuis Supabase conversations.agent_state."""
+        """
+        Charge l'agent_state (snapshot conversations.agent_state + patchs
+        agent_state_deltas, via le cache du process).
+        """
         if not self.supabase or not conversation_id:
             logger.debug(f"Cannot load state: supabase={bool(self.supabase)}, conv_id={conversation_id}")
             return {}
         try:
-            # Utiliser .limit(1) au lieu de .maybe_single() pour éviter erreur 406
-            resp = self.supabase.table("conversations").select(
-                "agent_state"
-            ).eq("id", conversation_id).limit(1).execute()
-
-            if resp.data and len(resp.data) > 0:
-                state = resp.data[0].get("agent_state") or {}
-                donnees = state.get("donnees_collectees", {})
-                logger.info(f"[STATE] Loaded agent_state: {len(donnees)} keys in donnees_collectees for conv={conversation_id[:8]}")
-                return state
-            else:
-                logger.info(f"[STATE] No existing state for conv={conversation_id[:8]}")
+            from execution.database.etat_agent import get_magasin_etat_agent
+
+            etat = get_magasin_etat_agent().charger(self.supabase, conversation_id)
+            self._etats[conversation_id] = etat
+            donnees = etat.donnees.get("donnees_collectees", {})
+            logger.info(
+                f"[STATE] Loaded agent_state v{etat.version}: {len(donnees)} keys "
+                f"in donnees_collectees for conv={conversation_id[:8]}"
+            )
+            return etat.donnees
         except Exception as e:
             logger.warning(f"Impossible de charger agent_state: {e}")
         return {}
 
     def _save_agent_state(self, conversation_id: str, agent_state: Dict) -> bool:
-        """Sauvegarde l'agent_state dans Supabase."""
+        """
+        Sauvegarde l'agent_state: seul le patch des champs modifies depuis
+        le chargement est ecrit (version suivante, conflit si un autre
+        onglet a modifie les memes champs).
+        """
         if not self.supabase or not conversation_id:
             logger.warning(f"[STATE] Cannot save: supabase={bool(self.supabase)}, conv_id={conversation_id}")
             return False
         try:
+            from execution.database.etat_agent import ConflitVersion, get_magasin_etat_agent
+
+            magasin = get_magasin_etat_agent()
+            etat = self._etats.get(conversation_id)
+            if etat is None:
+                # Etat non charge par cet agent: patch par rapport au stocke
+                etat = magasin.charger(self.supabase, conversation_id)
+            etat.donnees = agent_state
+
             donnees = agent_state.get("donnees_collectees", {})
             progress = agent_state.get("progress_pct", 0)
             logger.info(f"[STATE] Saving agent_state: {len(donnees)} keys, progress={progress}% for conv={conversation_id[:8]}")
 
-            self.supabase.table("conversations").update({
-                "agent_state": agent_state,
-            }).eq("id", conversation_id).execute()
-            logger.info(f"[STATE] Saved successfully for conv={conversation_id[:8]}")
+            version = magasin.sauvegarder(self.supabase, etat)
+            logger.info(f"[STATE] Saved v{version} for conv={conversation_id[:8]}")
             return True
+        except ConflitVersion as e:
+            logger.warning(f"[STATE] Conflit de version, etat non sauvegarde: {e}")
+            return False
         except Exception as e:
             logger.error(f"[STATE] FAILED to save agent_state: {e}", exc_info=True)
             return False
@@ -398,12 +421,28 @@ class AnthropicAgent:
 
         Cap: ~32000 chars (~8000 tokens) par directive.
         """
-        from pathlib import Path
+        return self._cached_directive(type_acte)[0]
+
+    def _cached_directive(self, type_acte: str):
+        """(directive, hit) — memoisee tant que les fichiers sources ne changent pas.
+
+        Un texte identique d'un message a l'autre garde le tier 2 en cache
+        cote fournisseur; hit vaut None si le type d'acte n'a pas de directive.
+        """
+        from execution.anthropic_context import get_context_builder
 
         filenames = self._DIRECTIVE_MAPPING.get(type_acte, [])
         if not filenames:
-            return ""
+            return "", None
+
+        return get_context_builder().directives.get(
+            type_acte,
+            [self._directive_path(f) for f in filenames],
+            lambda: self._assemble_directive(filenames),
+        )
 
+    def _assemble_directive(self, filenames: List[str]) -> str:
+        """Lit, filtre et concatene les fichiers directives (cap 32000 chars)."""
         parts = []
         total_chars = 0
         max_chars = 32000  # ~8000 tokens
@@ -427,8 +466,8 @@ class AnthropicAgent:
 
         return "\n".join(parts) if parts else ""
 
-    def _read_directive_file(self, filename: str) -> str:
-        """Lit un fichier directive depuis le filesystem (Modal ou local)."""
+    def _directive_path(self, filename: str):
+        """Chemin du fichier directive (Modal ou local), None si introuvable."""
         from pathlib import Path
 
         paths = [
@@ -439,10 +478,21 @@ class AnthropicAgent:
         for path in paths:
             try:
                 if path.exists():
-                    return path.read_text(encoding="utf-8")
+                    return path
             except Exception as e:
-                logger.warning(f"Erreur lecture directive {filename}: {e}")
+                logger.warning(f"Erreur acces directive {filename}: {e}")
 
+        return None
+
+    def _read_directive_file(self, filename: str) -> str:
+        """Lit un fichier directive depuis le filesystem (Modal ou local)."""
+        path = self._directive_path(filename)
+        if path is None:
+            return ""
+        try:
+            return path.read_text(encoding="utf-8")
+        except Exception as e:
+            logger.warning(f"Erreur lecture directive {filename}: {e}")
         return ""
 
     def _filter_directive_sections(self, content: str) -> str:
@@ -517,12 +567,15 @@ class AnthropicAgent:
 
         return "\n".join(parts)
 
-    def _build_cached_system(self, agent_state: Dict) -> list:
+    def _build_cached_system(self, agent_state: Dict, directive: Optional[str] = None) -> list:
         """System prompt avec prompt caching Anthropic en 3 tiers.
 
         Tier 1 (cache): SYSTEM_PROMPT core — identite, detection, outils, workflow, regles.
         Tier 2 (cache): Directive complete pour le type_acte detecte.
         Tier 3 (dynamique): Contexte session — progression, donnees collectees.
+        Il n'est plus dans le system: _build_context le place dans le message
+        courant, apres l'historique, pour ne pas invalider le cache de
+        l'historique a chaque tour.
 
         Les tiers 1 et 2 sont caches (cache_control ephemeral, TTL 5 min).
         Apres le 1er message, ils coutent 1/10e du prix.
@@ -537,19 +590,14 @@ class AnthropicAgent:
         ]
 
         # Tier 2: Directive complete (cache, charge quand type_acte connu)
-        if agent_state.get("type_acte"):
+        if directive is None and agent_state.get("type_acte"):
             directive = self._load_full_directive(agent_state['type_acte'])
-            if directive:
-                blocks.append({
-                    "type": "text",
-                    "text": directive,
-                    "cache_control": {"type": "ephemeral"},
-                })
-
-        # Tier 3: Contexte dynamique de la session (jamais cache)
-        session_ctx = self._build_session_context(agent_state)
-        if session_ctx:
-            blocks.append({"type": "text", "text": session_ctx})
+        if directive:
+            blocks.append({
+                "type": "text",
+                "text": directive,
+                "cache_control": {"type": "ephemeral"},
+            })
 
         return blocks
 
@@ -561,29 +609,36 @@ class AnthropicAgent:
             tools[-1] = {**tools[-1], "cache_control": {"type": "ephemeral"}}
         return tools
 
-    def _prepare_messages(
-        self,
-        message: str,
-        history: List[Dict],
-    ) -> List[Dict]:
-        """Prepare les messages pour l'API Anthropic."""
-        messages = []
-
-        # Historique recent (tronque)
-        recent = history[-MAX_HISTORY_MESSAGES:] if history else []
-        for msg in recent:
-            role = msg.get("role", "user")
-            content = msg.get("content", "")
-            if role in ("user", "assistant") and content:
-                messages.append({"role": role, "content": content})
-            elif role == "assistant" and isinstance(msg.get("content"), list):
-                # Forward-compatible: handle structured content (tool_use blocks)
-                messages.append({"role": role, "content": msg["content"]})
-
-        # Message courant
-        messages.append({"role": "user", "content": message})
-
-        return messages
+    def _build_context(self, message: str, history: List[Dict], agent_state: Dict):
+        """Assemble system/tools/messages pour l'API Anthropic.
+
+        Prefixe stable et cacheable: tools -> system (tiers 1-2) -> historique
+        (breakpoint sur le dernier message). L'historique est tenu dans le
+        budget de tokens (anciens messages resumes localement) et le contexte
+        de session (tier 3) passe en tete du message courant.
+        """
+        from execution.anthropic_context import get_context_builder
+
+        directive, directive_hit = "", None
+        if agent_state.get("type_acte"):
+            directive, directive_hit = self._cached_directive(agent_state["type_acte"])
+
+        tools = self._get_cached_tools()
+        # Retirer detect_property_type des tools si categorie deja connue
+        if agent_state.get("categorie_bien"):
+            tools = [t for t in tools if t.get("name") != "detect_property_type"]
+            if tools and "cache_control" not in tools[-1]:
+                tools[-1] = {**tools[-1], "cache_control": {"type": "ephemeral"}}
+
+        return get_context_builder().build(
+            system=self._build_cached_system(agent_state, directive=directive),
+            tools=tools,
+            history=history,
+            message=message,
+            session_context=self._build_session_context(agent_state),
+            max_messages=MAX_HISTORY_MESSAGES,
+            directive_hit=directive_hit,
+        )
 
     # =========================================================================
     # Parsing de la reponse
@@ -913,8 +968,8 @@ class AnthropicAgent:
         if not anon_mapping:
             return tool_input
 
-        reverse_map = anon_mapping.get_reverse_mapping()
-        if not reverse_map:
+        remplaceur = anon_mapping.remplaceur(inverse=True)
+        if not len(remplaceur):
             return tool_input
 
         import copy
@@ -922,10 +977,7 @@ class AnthropicAgent:
 
         def _deano(obj):
             if isinstance(obj, str):
-                for token, original in reverse_map.items():
-                    if token in obj:
-                        obj = obj.replace(token, original)
-                return obj
+                return remplaceur.remplacer(obj)
             elif isinstance(obj, dict):
                 return {k: _deano(v) for k, v in obj.items()}
             elif isinstance(obj, list):
@@ -934,6 +986,39 @@ class AnthropicAgent:
 
         return _deano(result)
 
+    def _tool_calls(self, response, iteration: int, anon_mapping) -> list:
+        """Blocs tool_use de la reponse, inputs de-anonymises (noms, adresses)."""
+        from execution.anthropic_tools import ToolCall
+
+        calls = []
+        for block in response.content:
+            if block.type == "tool_use":
+                logger.info(
+                    f"Tool call [{iteration}/{MAX_TOOL_ITERATIONS}]: "
+                    f"{block.name}({json.dumps(block.input, ensure_ascii=False)[:200]})"
+                )
+                calls.append(ToolCall(
+                    id=block.id,
+                    name=block.name,
+                    input=self._deanonymise_tool_input(block.input, anon_mapping),
+                ))
+        return calls
+
+    @staticmethod
+    def _context_stats(context) -> Dict[str, Any]:
+        """Rapport de contexte de la requete (cumule dans les compteurs du process)."""
+        from execution.anthropic_context import get_context_builder
+
+        get_context_builder().record(context.report)
+        return context.report.to_dict()
+
+    def _finalize_response(
+        self, response: AgentResponse, tool_timings: List[Dict[str, Any]], context
+    ) -> AgentResponse:
+        response.tool_timings = tool_timings
+        response.context_stats = self._context_stats(context)
+        return response
+
     def _get_tool_status(self, tool_name: str, agent_state: Dict) -> str:
         """
         Génère un message de statut contextuel pour un outil.
@@ -977,7 +1062,7 @@ class AnthropicAgent:
         2. Si Claude appelle un tool -> execute -> renvoie tool_result
         3. Repete jusqu'a reponse texte (ou max iterations)
         """
-        from execution.anthropic_tools import TOOLS, ToolExecutor
+        from execution.anthropic_tools import ToolExecutor, group_tool_calls
 
         # 1. Charger agent_state persiste
         agent_state = self._load_agent_state(conversation_id) if conversation_id else {}
@@ -988,44 +1073,29 @@ class AnthropicAgent:
         anon_mapping = None
         if ANONYMIZER_AVAILABLE:
             try:
-                anonymizer = ChatAnonymizer()
-                message, anon_mapping = anonymizer.anonymiser(message)
-                if history:
-                    history_anonyme = []
-                    for msg in history:
-                        if isinstance(msg.get("content"), str):
-                            msg_anon, _ = anonymizer.anonymiser(msg["content"])
-                            history_anonyme.append({**msg, "content": msg_anon})
-                        else:
-                            history_anonyme.append(msg)
-                    history = history_anonyme
+                # Historique deja anonymise en cache: seuls les nouveaux messages sont traites
+                message, history, anon_mapping = get_cache_anonymisation().anonymiser_conversation(
+                    conversation_id, message, history
+                )
             except Exception as e:
                 logger.warning(f"Anonymisation échouée, envoi en clair: {e}")
 
-        # 2. Preparer les messages
-        messages = self._prepare_messages(message, history or [])
-
-        # 3. Tool executor (avant pre-processing qui en a besoin)
+        # 2. Tool executor (avant pre-processing qui en a besoin)
         executor = ToolExecutor(etude_id=etude_id, supabase_client=self.supabase)
 
-        # 4. Pre-traitement local — economise 1 round-trip (~3-6s)
+        # 3. Pre-traitement local — economise 1 round-trip (~3-6s)
         pre_info = self._pre_process_message(message, agent_state, executor)
 
-        # 5. System prompt dynamique (apres pre-processing qui peut modifier agent_state)
-        cached_system = self._build_cached_system(agent_state)
-        cached_tools = self._get_cached_tools()
-
-        # Retirer detect_property_type des tools si categorie deja connue
-        if agent_state.get("categorie_bien"):
-            cached_tools = [
-                t for t in cached_tools
-                if t.get("name") != "detect_property_type"
-            ]
+        # 4. Contexte (apres pre-processing qui peut modifier agent_state):
+        #    prefixe cacheable + historique dans le budget de tokens
+        context = self._build_context(message, history or [], agent_state)
+        messages = context.messages
 
-        # 6. Boucle agentic
+        # 5. Boucle agentic
         client = self._get_client()
         iteration = 0
         force_tool = self._should_force_tool(message, agent_state, pre_info)
+        tool_timings: List[Dict[str, Any]] = []
 
         while iteration < MAX_TOOL_ITERATIONS:
             iteration += 1
@@ -1034,14 +1104,15 @@ class AnthropicAgent:
             api_kwargs = dict(
                 model=MODEL,
                 max_tokens=MAX_OUTPUT_TOKENS,
-                system=cached_system,
-                tools=cached_tools,
+                system=context.system,
+                tools=context.tools,
                 messages=messages,
             )
             if force_tool and iteration == 1:
                 api_kwargs["tool_choice"] = {"type": "any"}
 
             response = await client.messages.create(**api_kwargs)
+            context.report.record_usage(getattr(response, "usage", None))
 
             if response.stop_reason == "end_turn":
                 # Reponse finale en texte
@@ -1051,14 +1122,14 @@ class AnthropicAgent:
                 # De-anonymiser la reponse (RGPD)
                 if ANONYMIZER_AVAILABLE and anon_mapping:
                     try:
-                        final_text = anonymizer.deanonymiser(final_text, anon_mapping)
+                        final_text = anon_mapping.remplaceur(inverse=True).remplacer(final_text)
                     except Exception as e:
                         logger.warning(f"De-anonymisation échouée: {e}")
 
                 # Persister l'etat
                 self._save_agent_state(conversation_id, agent_state)
 
-                return self._parse_response(final_text, agent_state)
+                return self._finalize_response(self._parse_response(final_text, agent_state), tool_timings, context)
 
             elif response.stop_reason == "tool_use":
                 # Claude veut utiliser un ou plusieurs tools
@@ -1067,31 +1138,13 @@ class AnthropicAgent:
                     "content": response.content,
                 })
 
-                # Executer chaque tool_use block
+                # Executer les tool_use blocks: lectures en parallele,
+                # outils mutants dans l'ordre (hors event loop)
                 tool_results = []
-                for block in response.content:
-                    if block.type == "tool_use":
-                        logger.info(
-                            f"Tool call [{iteration}/{MAX_TOOL_ITERATIONS}]: "
-                            f"{block.name}({json.dumps(block.input, ensure_ascii=False)[:200]})"
-                        )
-
-                        # Dé-anonymiser les inputs (noms, adresses)
-                        real_input = self._deanonymise_tool_input(
-                            block.input, anon_mapping
-                        )
-
-                        result = executor.execute(
-                            tool_name=block.name,
-                            tool_input=real_input,
-                            agent_state=agent_state,
-                        )
-
-                        tool_results.append({
-                            "type": "tool_result",
-                            "tool_use_id": block.id,
-                            "content": json.dumps(result, ensure_ascii=False, default=str),
-                        })
+                for group in group_tool_calls(self._tool_calls(response, iteration, anon_mapping)):
+                    for outcome in await executor.execute_group(group, agent_state):
+                        tool_results.append(outcome.to_tool_result())
+                        tool_timings.append(outcome.timing())
 
                 messages.append({
                     "role": "user",
@@ -1105,7 +1158,7 @@ class AnthropicAgent:
                     "Ma reponse a ete interrompue. Pouvez-vous reformuler votre demande ?"
                 )
                 self._save_agent_state(conversation_id, agent_state)
-                return self._parse_response(final_text, agent_state)
+                return self._finalize_response(self._parse_response(final_text, agent_state), tool_timings, context)
 
         # Max iterations atteint - résumé intelligent SANS appel API
         logger.warning(f"Max tool iterations ({MAX_TOOL_ITERATIONS}) atteint pour conversation {conversation_id}")
@@ -1114,7 +1167,7 @@ class AnthropicAgent:
         summary_text = self._build_smart_summary(agent_state)
 
         self._save_agent_state(conversation_id, agent_state)
-        return self._parse_response(summary_text, agent_state)
+        return self._finalize_response(self._parse_response(summary_text, agent_state), tool_timings, context)
 
     # =========================================================================
     # Streaming (SSE)
@@ -1137,7 +1190,7 @@ class AnthropicAgent:
           {"event": "token",  "data": "{\"text\": \"...\"}"}
           {"event": "done",   "data": "{\"suggestions\": [...], ...}"}
         """
-        from execution.anthropic_tools import TOOLS, ToolExecutor
+        from execution.anthropic_tools import ToolExecutor, group_tool_calls
 
         # 1. Charger agent_state
         agent_state = self._load_agent_state(conversation_id) if conversation_id else {}
@@ -1146,30 +1199,19 @@ class AnthropicAgent:
 
         # 1b. Anonymiser les PII avant envoi (RGPD)
         anon_mapping = None
-        anonymizer = None
         if ANONYMIZER_AVAILABLE:
             try:
-                anonymizer = ChatAnonymizer()
-                message, anon_mapping = anonymizer.anonymiser(message)
-                if history:
-                    history_anonyme = []
-                    for msg in history:
-                        if isinstance(msg.get("content"), str):
-                            msg_anon, _ = anonymizer.anonymiser(msg["content"])
-                            history_anonyme.append({**msg, "content": msg_anon})
-                        else:
-                            history_anonyme.append(msg)
-                    history = history_anonyme
+                # Historique deja anonymise en cache: seuls les nouveaux messages sont traites
+                message, history, anon_mapping = get_cache_anonymisation().anonymiser_conversation(
+                    conversation_id, message, history
+                )
             except Exception as e:
                 logger.warning(f"Anonymisation stream échouée, envoi en clair: {e}")
 
-        # 2. Preparer les messages
-        messages = self._prepare_messages(message, history or [])
-
-        # 3. Tool executor (avant pre-processing qui en a besoin)
+        # 2. Tool executor (avant pre-processing qui en a besoin)
         executor = ToolExecutor(etude_id=etude_id, supabase_client=self.supabase)
 
-        # 4. Pre-traitement local — economise 1 round-trip (~3-6s)
+        # 3. Pre-traitement local — economise 1 round-trip (~3-6s)
         pre_info = self._pre_process_message(message, agent_state, executor)
         if pre_info.get("pre_detected"):
             yield {
@@ -1177,18 +1219,11 @@ class AnthropicAgent:
                 "data": json.dumps({"message": "Détection du type de bien..."}),
             }
 
-        # 5. System + tools avec cache (apres pre-processing)
-        cached_system = self._build_cached_system(agent_state)
-        cached_tools = self._get_cached_tools()
-
-        # Retirer detect_property_type des tools si categorie deja connue
-        if agent_state.get("categorie_bien"):
-            cached_tools = [
-                t for t in cached_tools
-                if t.get("name") != "detect_property_type"
-            ]
+        # 4. Contexte avec cache (apres pre-processing)
+        context = self._build_context(message, history or [], agent_state)
+        messages = context.messages
 
-        # 6. Boucle agentic avec streaming
+        # 5. Boucle agentic avec streaming
         client = self._get_client()
         iteration = 0
         force_tool = self._should_force_tool(message, agent_state, pre_info)
@@ -1205,8 +1240,8 @@ class AnthropicAgent:
             stream_kwargs = dict(
                 model=MODEL,
                 max_tokens=MAX_OUTPUT_TOKENS,
-                system=cached_system,
-                tools=cached_tools,
+                system=context.system,
+                tools=context.tools,
                 messages=messages,
             )
             if force_tool and iteration == 1:
@@ -1222,15 +1257,16 @@ class AnthropicAgent:
                         "data": json.dumps({"text": text}),
                     }
                 response = await stream.get_final_message()
+            context.report.record_usage(getattr(response, "usage", None))
 
             if response.stop_reason == "end_turn":
                 # Reponse finale — texte deja streame token par token
                 final_text = "".join(all_streamed_text)
 
                 # De-anonymiser la reponse (RGPD)
-                if ANONYMIZER_AVAILABLE and anon_mapping and anonymizer:
+                if ANONYMIZER_AVAILABLE and anon_mapping:
                     try:
-                        final_text = anonymizer.deanonymiser(final_text, anon_mapping)
+                        final_text = anon_mapping.remplaceur(inverse=True).remplacer(final_text)
                     except Exception as e:
                         logger.warning(f"De-anonymisation stream échouée: {e}")
 
@@ -1248,6 +1284,7 @@ class AnthropicAgent:
                         "fichier_url": parsed.fichier_url,
                         "progress_pct": agent_state.get("progress_pct"),
                         "categorie_bien": agent_state.get("categorie_bien"),
+                        "context": self._context_stats(context),
                     }),
                 }
                 return
@@ -1260,36 +1297,23 @@ class AnthropicAgent:
                 })
 
                 tool_results = []
-                for block in response.content:
-                    if block.type == "tool_use":
+                for group in group_tool_calls(self._tool_calls(response, iteration, anon_mapping)):
+                    for call in group:
                         # Message de statut contextuel (dynamique selon agent_state)
-                        status_msg = self._get_tool_status(block.name, agent_state)
+                        status_msg = self._get_tool_status(call.name, agent_state)
                         yield {
                             "event": "status",
                             "data": json.dumps({"message": status_msg}),
                         }
 
-                        logger.info(
-                            f"Tool call [{iteration}/{MAX_TOOL_ITERATIONS}]: "
-                            f"{block.name}({json.dumps(block.input, ensure_ascii=False)[:200]})"
-                        )
-
-                        # Dé-anonymiser les inputs (noms, adresses)
-                        real_input = self._deanonymise_tool_input(
-                            block.input, anon_mapping
-                        )
-
-                        # asyncio.to_thread libere l'event loop pendant
-                        # l'execution (permet a sse-starlette d'envoyer des pings)
-                        result = await asyncio.to_thread(
-                            executor.execute,
-                            tool_name=block.name,
-                            tool_input=real_input,
-                            agent_state=agent_state,
-                        )
+                    # Execution hors event loop (sse-starlette continue
+                    # d'envoyer ses pings), lectures du groupe en parallele
+                    outcomes = await executor.execute_group(group, agent_state)
 
+                    for outcome in outcomes:
+                        result = outcome.result
                         # Emettre un event file_ready si document genere
-                        if block.name == "generate_document" and result.get("succes"):
+                        if outcome.call.name == "generate_document" and result.get("succes"):
                             yield {
                                 "event": "file_ready",
                                 "data": json.dumps({
@@ -1297,12 +1321,12 @@ class AnthropicAgent:
                                     "type_acte": result.get("type_acte"),
                                 }),
                             }
+                        tool_results.append(outcome.to_tool_result())
 
-                        tool_results.append({
-                            "type": "tool_result",
-                            "tool_use_id": block.id,
-                            "content": json.dumps(result, ensure_ascii=False, default=str),
-                        })
+                    yield {
+                        "event": "tool_timing",
+                        "data": json.dumps({"tools": [o.timing() for o in outcomes]}),
+                    }
 
                 messages.append({
                     "role": "user",
@@ -1319,7 +1343,11 @@ class AnthropicAgent:
                 yield {"event": "token", "data": json.dumps({"text": text})}
                 yield {
                     "event": "done",
-                    "data": json.dumps({"content": text, "suggestions": []}),
+                    "data": json.dumps({
+                        "content": text,
+                        "suggestions": [],
+                        "context": self._context_stats(context),
+                    }),
                 }
                 return
 
@@ -1336,5 +1364,6 @@ class AnthropicAgent:
             "data": json.dumps({
                 "content": summary_text,
                 "suggestions": self._generate_suggestions(agent_state),
+                "context": self._context_stats(context),
             }),
         }
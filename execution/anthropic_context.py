@@ -0,0 +1,381 @@
+# -*- coding: utf-8 -*-
+"""
+Assemblage du contexte envoye a l'API Anthropic (prompt caching + budget tokens).
+
+- Directives filtrees memoisees par (type_acte, mtime des fichiers): plus de
+  relecture ni de filtrage des markdown a chaque message, et un texte
+  identique octet pour octet tant que les fichiers ne changent pas.
+- Estimation locale des tokens (aucun appel count_tokens).
+- Historique tenu dans un budget: les plus anciens messages sont retires et
+  resumes localement. Le point de coupe avance par paliers de
+  HISTORY_TRIM_STEP messages, pour que le prefixe ne change pas a chaque tour.
+- Prefixe stable: tools -> system (core + directive) -> historique, avec un
+  breakpoint cache_control sur le dernier message de l'historique. Le
+  contexte de session (dynamique) va dans le message courant, apres le prefixe.
+- Rapport par requete: tokens estimes, messages gardes/resumes, hit du cache
+  de directives, tokens lus/ecrits dans le cache du fournisseur (usage).
+
+Usage:
+    builder = get_context_builder()
+    context = builder.build(system_blocks, tools, history, message, session_context)
+    response = await client.messages.create(system=context.system, tools=context.tools,
+                                            messages=context.messages, ...)
+    context.report.record_usage(response.usage)
+    builder.record(context.report)
+
+Variables d'environnement:
+    NOTAIRE_HISTORY_TOKEN_BUDGET  Budget de l'historique en tokens estimes (defaut: 12000)
+    NOTAIRE_HISTORY_TRIM_STEP     Pas du point de coupe, en messages (defaut: 6)
+"""
+
+import json
+import logging
+import math
+import os
+import re
+import threading
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Francais + JSON: ~3.5 caracteres par token (tokenizer Claude)
+CHARS_PER_TOKEN = 3.5
+MESSAGE_OVERHEAD_TOKENS = 4  # role + delimiteurs
+
+HISTORY_TOKEN_BUDGET = int(os.getenv("NOTAIRE_HISTORY_TOKEN_BUDGET", "12000"))
+HISTORY_TRIM_STEP = max(int(os.getenv("NOTAIRE_HISTORY_TRIM_STEP", "6")), 1)
+
+SUMMARY_HEADER = "[Resume des echanges precedents, retires du contexte]"
+SUMMARY_LINE_CHARS = 160
+SUMMARY_MAX_CHARS = 2400  # ~700 tokens
+
+CACHE_CONTROL = {"type": "ephemeral"}
+
+
+def estimate_tokens(content: Any) -> int:
+    """Estimation locale du nombre de tokens (texte ou blocs structures)."""
+    if not content:
+        return 0
+    if not isinstance(content, str):
+        content = json.dumps(content, ensure_ascii=False, default=str)
+    return math.ceil(len(content) / CHARS_PER_TOKEN)
+
+
+def _message_tokens(message: Dict) -> int:
+    return estimate_tokens(message.get("content")) + MESSAGE_OVERHEAD_TOKENS
+
+
+# =============================================================================
+# Directives
+# =============================================================================
+
+def _file_signature(path: Optional[Path]) -> Optional[Tuple[str, int, int]]:
+    if path is None:
+        return None
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return (str(path), stat.st_mtime_ns, stat.st_size)
+
+
+class DirectiveCache:
+    """Directives filtrees par type d'acte, invalidees quand un fichier change."""
+
+    def __init__(self):
+        self._entries: Dict[str, Tuple[Tuple, str]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(
+        self,
+        type_acte: str,
+        paths: List[Optional[Path]],
+        build: Callable[[], str],
+    ) -> Tuple[str, bool]:
+        """
+        Retourne (texte, hit). `paths` sont les fichiers sources (None si
+        introuvable): leur (mtime, taille) forme la cle de validite.
+        """
+        signature = tuple(_file_signature(p) for p in paths)
+        with self._lock:
+            entry = self._entries.get(type_acte)
+            if entry is not None and entry[0] == signature:
+                self.hits += 1
+                return entry[1], True
+
+        text = build()
+        with self._lock:
+            self._entries[type_acte] = (signature, text)
+            self.misses += 1
+        return text, False
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# =============================================================================
+# Historique
+# =============================================================================
+
+@dataclass
+class HistoryWindow:
+    """Historique retenu pour une requete."""
+    messages: List[Dict]
+    dropped: int = 0
+    tokens: int = 0
+
+
+def _normalize_history(history: List[Dict]) -> List[Dict]:
+    """Messages user/assistant non vides, au format de l'API."""
+    messages = []
+    for msg in history or []:
+        role = msg.get("role", "user")
+        content = msg.get("content", "")
+        if role in ("user", "assistant") and content:
+            messages.append({"role": role, "content": content})
+    return messages
+
+
+def _plain_text(content: Any) -> str:
+    if isinstance(content, str):
+        return content
+    texts = []
+    for block in content or []:
+        if isinstance(block, dict) and block.get("type") == "text":
+            texts.append(block.get("text", ""))
+    return " ".join(texts)
+
+
+def summarize_messages(messages: List[Dict], max_chars: int = SUMMARY_MAX_CHARS) -> str:
+    """
+    Resume local (extractif) des messages retires: une ligne par message,
+    les plus recents en priorite si le resume depasse `max_chars`.
+    """
+    lines = []
+    total = len(SUMMARY_HEADER)
+    for msg in reversed(messages):
+        text = re.sub(r"\s+", " ", _plain_text(msg["content"])).strip()
+        if not text:
+            continue
+        if len(text) > SUMMARY_LINE_CHARS:
+            text = text[:SUMMARY_LINE_CHARS].rstrip() + "..."
+        line = f"- {'Notaire' if msg['role'] == 'user' else 'Assistant'}: {text}"
+        if total + len(line) + 1 > max_chars:
+            break
+        lines.append(line)
+        total += len(line) + 1
+    if not lines:
+        return ""
+    return "\n".join([SUMMARY_HEADER] + lines[::-1])
+
+
+def fit_history(
+    history: List[Dict],
+    budget: Optional[int] = None,
+    step: Optional[int] = None,
+    max_messages: Optional[int] = None,
+) -> HistoryWindow:
+    """
+    Coupe l'historique pour tenir dans `budget` tokens (et `max_messages`).
+
+    Le point de coupe est un multiple de `step`, puis avance jusqu'au
+    prochain message user: tant qu'il ne bouge pas, les messages retenus
+    (et le resume des messages retires) restent identiques d'un tour a
+    l'autre, donc cacheables.
+    """
+    budget = HISTORY_TOKEN_BUDGET if budget is None else budget
+    step = max(HISTORY_TRIM_STEP if step is None else step, 1)
+    messages = _normalize_history(history)
+    costs = [_message_tokens(m) for m in messages]
+    total = sum(costs)
+
+    cut = 0
+    kept_tokens = total
+    while cut < len(messages) and (
+        kept_tokens > budget or (max_messages is not None and len(messages) - cut > max_messages)
+    ):
+        nxt = min(cut + step, len(messages))
+        kept_tokens -= sum(costs[cut:nxt])
+        cut = nxt
+    if cut:
+        while cut < len(messages) and messages[cut]["role"] != "user":
+            kept_tokens -= costs[cut]
+            cut += 1
+
+    kept = messages[cut:]
+    if cut:
+        summary = summarize_messages(messages[:cut])
+        if summary:
+            if kept and isinstance(kept[0]["content"], str):
+                kept[0] = {"role": "user", "content": f"{summary}\n\n{kept[0]['content']}"}
+            else:
+                kept.insert(0, {"role": "user", "content": summary})
+            kept_tokens += estimate_tokens(summary)
+
+    return HistoryWindow(messages=kept, dropped=cut, tokens=kept_tokens)
+
+
+def with_cache_breakpoint(message: Dict) -> Dict:
+    """Copie du message avec cache_control sur son dernier bloc."""
+    content = message["content"]
+    if isinstance(content, str):
+        blocks = [{"type": "text", "text": content}]
+    else:
+        blocks = [dict(b) if isinstance(b, dict) else b for b in content]
+    if blocks and isinstance(blocks[-1], dict):
+        blocks[-1] = {**blocks[-1], "cache_control": CACHE_CONTROL}
+    return {**message, "content": blocks}
+
+
+# =============================================================================
+# Assemblage et rapport
+# =============================================================================
+
+@dataclass
+class ContextReport:
+    """Comptes d'une requete: estimations locales + usage renvoye par l'API."""
+    system_tokens: int = 0
+    tools_tokens: int = 0
+    history_tokens: int = 0
+    message_tokens: int = 0
+    history_kept: int = 0
+    history_dropped: int = 0
+    directive_cache: str = "none"  # hit | miss | none
+    api_calls: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cache_read_tokens: int = 0
+    cache_creation_tokens: int = 0
+
+    @property
+    def estimated_tokens(self) -> int:
+        return self.system_tokens + self.tools_tokens + self.history_tokens + self.message_tokens
+
+    @property
+    def prompt_cache_hit(self) -> bool:
+        return self.cache_read_tokens > 0
+
+    def record_usage(self, usage: Any):
+        """Ajoute l'usage d'un appel (response.usage du SDK ou dict)."""
+        self.api_calls += 1
+        if usage is None:
+            return
+        get = usage.get if isinstance(usage, dict) else lambda k: getattr(usage, k, None)
+        self.input_tokens += get("input_tokens") or 0
+        self.output_tokens += get("output_tokens") or 0
+        self.cache_read_tokens += get("cache_read_input_tokens") or 0
+        self.cache_creation_tokens += get("cache_creation_input_tokens") or 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        result = asdict(self)
+        result["estimated_tokens"] = self.estimated_tokens
+        result["prompt_cache_hit"] = self.prompt_cache_hit
+        return result
+
+
+@dataclass
+class AgentContext:
+    """Parametres system/tools/messages d'un appel Messages, et leur rapport."""
+    system: List[Dict]
+    tools: List[Dict]
+    messages: List[Dict]
+    report: ContextReport = field(default_factory=ContextReport)
+
+
+class ContextBuilder:
+    """Assemble le contexte d'une requete et cumule les compteurs du process."""
+
+    def __init__(
+        self,
+        history_budget: Optional[int] = None,
+        trim_step: Optional[int] = None,
+    ):
+        self.history_budget = HISTORY_TOKEN_BUDGET if history_budget is None else history_budget
+        self.trim_step = HISTORY_TRIM_STEP if trim_step is None else trim_step
+        self.directives = DirectiveCache()
+        self._lock = threading.Lock()
+        self._totals = {
+            "requests": 0, "prompt_cache_hits": 0, "history_dropped": 0,
+            "input_tokens": 0, "output_tokens": 0,
+            "cache_read_tokens": 0, "cache_creation_tokens": 0,
+        }
+
+    def build(
+        self,
+        system: List[Dict],
+        tools: List[Dict],
+        history: List[Dict],
+        message: str,
+        session_context: str = "",
+        max_messages: Optional[int] = None,
+        directive_hit: Optional[bool] = None,
+    ) -> AgentContext:
+        """
+        `system` et `tools` doivent etre stables (ils portent deja leurs
+        cache_control); `session_context` est prefixe au message courant.
+        """
+        window = fit_history(history, self.history_budget, self.trim_step, max_messages)
+        messages = list(window.messages)
+        if messages:
+            messages[-1] = with_cache_breakpoint(messages[-1])
+
+        if session_context:
+            current: Any = [
+                {"type": "text", "text": session_context},
+                {"type": "text", "text": message},
+            ]
+        else:
+            current = message
+        messages.append({"role": "user", "content": current})
+
+        report = ContextReport(
+            system_tokens=estimate_tokens(system),
+            tools_tokens=estimate_tokens(tools),
+            history_tokens=window.tokens,
+            message_tokens=estimate_tokens(current) + MESSAGE_OVERHEAD_TOKENS,
+            history_kept=len(window.messages),
+            history_dropped=window.dropped,
+            directive_cache="none" if directive_hit is None else ("hit" if directive_hit else "miss"),
+        )
+        return AgentContext(system=system, tools=tools, messages=messages, report=report)
+
+    def record(self, report: ContextReport):
+        """Cumule le rapport d'une requete terminee et le journalise."""
+        with self._lock:
+            self._totals["requests"] += 1
+            self._totals["prompt_cache_hits"] += int(report.prompt_cache_hit)
+            self._totals["history_dropped"] += report.history_dropped
+            for key in ("input_tokens", "output_tokens", "cache_read_tokens", "cache_creation_tokens"):
+                self._totals[key] += getattr(report, key)
+        logger.info(
+            f"[CONTEXT] ~{report.estimated_tokens} tokens estimes "
+            f"(historique {report.history_kept} msg, {report.history_dropped} resumes), "
+            f"directive={report.directive_cache}, cache lu={report.cache_read_tokens} "
+            f"ecrit={report.cache_creation_tokens}, input={report.input_tokens}"
+        )
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                **self._totals,
+                "directive_hits": self.directives.hits,
+                "directive_misses": self.directives.misses,
+            }
+
+
+_context_builder: Optional[ContextBuilder] = None
+_context_builder_lock = threading.Lock()
+
+
+def get_context_builder() -> ContextBuilder:
+    """Retourne le ContextBuilder partage du process (cree au premier appel)."""
+    global _context_builder
+    with _context_builder_lock:
+        if _context_builder is None:
+            _context_builder = ContextBuilder()
+        return _context_builder
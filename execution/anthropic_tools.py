@@ -11,12 +11,20 @@ Les tools wrappent:
 - ValidateurActe (validation donnees)
 - Catalogue de clauses (recherche)
 - API feedback (retours notaire)
+
+Dispatch: les outils en lecture seule (TOOLS_LECTURE_SEULE) appeles dans un
+meme tour s'executent en parallele, avec delai (TOOL_TIMEOUTS); les outils
+qui modifient agent_state restent executes dans l'ordre.
 """
 
+import asyncio
 import json
 import os
 import sys
 import logging
+import threading
+import time
+from dataclasses import dataclass
 from pathlib import Path
 from typing import Dict, Any, List
 
@@ -224,6 +232,78 @@ TOOLS = [
 ]
 
 
+# =============================================================================
+# Dispatch concurrent
+# =============================================================================
+
+# Outils qui ne modifient ni agent_state ni de donnees externes: plusieurs
+# appels consecutifs d'un meme tour s'executent en parallele. Les autres
+# (submit_answers, generate_document, ...) restent executes dans l'ordre et
+# servent de barriere.
+TOOLS_LECTURE_SEULE = frozenset({
+    "get_questions",
+    "validate_deed_data",
+    "search_clauses",
+})
+
+# Delai max (secondes) des outils en lecture seule. Un thread ne s'interrompt
+# pas: un outil mutant depasse continuerait de modifier agent_state, il n'a
+# donc pas de delai.
+TOOL_TIMEOUTS = {
+    "get_questions": 15,
+    "search_clauses": 15,
+    "validate_deed_data": 30,
+}
+DEFAULT_TOOL_TIMEOUT = float(os.getenv("NOTAIRE_TOOL_TIMEOUT", "30"))
+
+
+@dataclass
+class ToolCall:
+    """Appel d'outil d'un tour (bloc tool_use, input de-anonymise)."""
+    id: str
+    name: str
+    input: Dict[str, Any]
+
+
+@dataclass
+class ToolOutcome:
+    """Resultat d'un appel d'outil et sa duree."""
+    call: ToolCall
+    result: Dict[str, Any]
+    duree_ms: float
+    timeout: bool = False
+
+    def to_tool_result(self) -> Dict[str, Any]:
+        """Bloc tool_result renvoye a Claude."""
+        return {
+            "type": "tool_result",
+            "tool_use_id": self.call.id,
+            "content": json.dumps(self.result, ensure_ascii=False, default=str),
+        }
+
+    def timing(self) -> Dict[str, Any]:
+        return {"tool": self.call.name, "duree_ms": self.duree_ms, "timeout": self.timeout}
+
+
+def group_tool_calls(calls: List[ToolCall]) -> List[List[ToolCall]]:
+    """
+    Decoupe les appels d'un tour en groupes executables: les lectures
+    consecutives forment un groupe parallele, chaque outil mutant est seul
+    dans son groupe. L'ordre des groupes reproduit l'execution sequentielle.
+    """
+    groups: List[List[ToolCall]] = []
+    for call in calls:
+        if (
+            call.name in TOOLS_LECTURE_SEULE
+            and groups
+            and all(c.name in TOOLS_LECTURE_SEULE for c in groups[-1])
+        ):
+            groups[-1].append(call)
+        else:
+            groups.append([call])
+    return groups
+
+
 # =============================================================================
 # Executeur de tools
 # =============================================================================
@@ -242,6 +322,8 @@ class ToolExecutor:
         self._collecteur = None
         self._gestionnaire = None
         self._clauses_cache = None
+        # Initialisations paresseuses partagees par les outils paralleles
+        self._init_lock = threading.RLock()
 
         # Pile securite RGPD (chiffrement PII, audit logs, droit a l'effacement)
         self.agent_access = None
@@ -255,37 +337,44 @@ class ToolExecutor:
             logger.warning(f"AgentClientAccess non disponible: {e}")
 
     def _get_collecteur(self, agent_state: Dict) -> Any:
-        """Recupere ou cree le CollecteurInteractif depuis l'etat persiste."""
-        if self._collecteur is None:
-            from execution.agent_autonome import CollecteurInteractif
-            type_acte = agent_state.get("type_acte", "promesse_vente")
-            prefill = agent_state.get("donnees_collectees")
-            logger.info(
-                f"[COLLECTEUR] Creating new instance: type={type_acte}, "
-                f"prefill has {len(prefill) if prefill else 0} keys"
-            )
-            self._collecteur = CollecteurInteractif(
-                type_acte=type_acte,
-                prefill=prefill if prefill else None,
-            )
-        return self._collecteur
+        """Recupere ou cree le CollecteurInteractif depuis l'etat persiste.
+
+        Le schema Q&R vient du registre du process (vue figee partagee,
+        index precalcules): creer un collecteur ne relit pas le JSON.
+        """
+        with self._init_lock:
+            if self._collecteur is None:
+                from execution.agent_autonome import CollecteurInteractif
+                type_acte = agent_state.get("type_acte", "promesse_vente")
+                prefill = agent_state.get("donnees_collectees")
+                logger.info(
+                    f"[COLLECTEUR] Creating new instance: type={type_acte}, "
+                    f"prefill has {len(prefill) if prefill else 0} keys"
+                )
+                self._collecteur = CollecteurInteractif(
+                    type_acte=type_acte,
+                    prefill=prefill if prefill else None,
+                )
+            return self._collecteur
 
     def _get_gestionnaire(self) -> Any:
         """Recupere ou cree le GestionnairePromesses."""
-        if self._gestionnaire is None:
-            from execution.gestionnaires.gestionnaire_promesses import GestionnairePromesses
-            self._gestionnaire = GestionnairePromesses(
-                supabase_client=self.supabase
-            )
-        return self._gestionnaire
+        with self._init_lock:
+            if self._gestionnaire is None:
+                from execution.gestionnaires.gestionnaire_promesses import GestionnairePromesses
+                self._gestionnaire = GestionnairePromesses(
+                    supabase_client=self.supabase
+                )
+            return self._gestionnaire
 
     def _load_clauses(self) -> Dict:
         """Charge le catalogue de clauses (avec cache)."""
-        if self._clauses_cache is None:
-            path = PROJECT_ROOT / "schemas" / "clauses_catalogue.json"
-            with open(path, "r", encoding="utf-8") as f:
-                self._clauses_cache = json.load(f)
-        return self._clauses_cache
+        with self._init_lock:
+            if self._clauses_cache is None:
+                path = PROJECT_ROOT / "schemas" / "clauses_catalogue.json"
+                with open(path, "r", encoding="utf-8") as f:
+                    self._clauses_cache = json.load(f)
+            return self._clauses_cache
 
     def execute(
         self,
@@ -313,6 +402,43 @@ class ToolExecutor:
             logger.error(f"Erreur dans tool {tool_name}: {e}", exc_info=True)
             return {"error": f"Erreur dans {tool_name}: {str(e)}"}
 
+    async def execute_group(
+        self,
+        calls: List[ToolCall],
+        agent_state: Dict[str, Any],
+    ) -> List[ToolOutcome]:
+        """
+        Execute un groupe de group_tool_calls() hors de la boucle asyncio
+        (appels en parallele), resultats dans l'ordre des appels.
+        """
+        return list(await asyncio.gather(
+            *(self._execute_timed(call, agent_state) for call in calls)
+        ))
+
+    async def _execute_timed(self, call: ToolCall, agent_state: Dict[str, Any]) -> ToolOutcome:
+        from execution.utils.profilage import get_registre_metriques
+
+        timeout = (
+            TOOL_TIMEOUTS.get(call.name, DEFAULT_TOOL_TIMEOUT)
+            if call.name in TOOLS_LECTURE_SEULE else None
+        )
+        debut = time.perf_counter()
+        timed_out = False
+        try:
+            result = await asyncio.wait_for(
+                asyncio.to_thread(self.execute, call.name, call.input, agent_state),
+                timeout=timeout,
+            )
+        except asyncio.TimeoutError:
+            timed_out = True
+            result = {"error": f"Delai depasse pour {call.name} ({timeout:g}s)"}
+            logger.warning(f"Tool {call.name}: delai de {timeout:g}s depasse")
+
+        secondes = time.perf_counter() - debut
+        get_registre_metriques().observer("agent_tools", call.name, secondes)
+        logger.info(f"Tool {call.name} termine en {secondes * 1000:.0f}ms")
+        return ToolOutcome(call, result, round(secondes * 1000, 1), timed_out)
+
     # =========================================================================
     # Implementations des 8 tools
     # =========================================================================
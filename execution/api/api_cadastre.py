@@ -15,6 +15,7 @@ Endpoints:
     GET  /cadastre/surface      - Conversion surface texte → m²
 """
 
+import asyncio
 import sys
 from typing import Optional
 
@@ -80,9 +81,9 @@ try:
     @router.post("/geocoder", response_model=GeocodageResponse)
     async def geocoder_adresse(req: AdresseRequest):
         """Geocode une adresse française → code_insee, coordinates."""
-        from execution.services.cadastre_service import CadastreService
-        svc = CadastreService()
-        result = svc.geocoder_adresse(req.adresse)
+        from execution.services.cadastre_service import get_cadastre_service
+        svc = get_cadastre_service()
+        result = await asyncio.to_thread(svc.geocoder_adresse, req.adresse)
         if not result:
             raise HTTPException(404, f"Adresse non trouvee: {req.adresse}")
         return GeocodageResponse(**result)
@@ -94,9 +95,9 @@ try:
         numero: str = Query(..., description="Numero de parcelle"),
     ):
         """Recherche une parcelle cadastrale."""
-        from execution.services.cadastre_service import CadastreService
-        svc = CadastreService()
-        result = svc.chercher_parcelle(code_insee, section, numero)
+        from execution.services.cadastre_service import get_cadastre_service
+        svc = get_cadastre_service()
+        result = await asyncio.to_thread(svc.chercher_parcelle, code_insee, section, numero)
         if not result:
             raise HTTPException(
                 404,
@@ -111,17 +112,17 @@ try:
         code_insee: str = Query(..., description="Code INSEE commune"),
     ):
         """Liste toutes les sections cadastrales d'une commune."""
-        from execution.services.cadastre_service import CadastreService
-        svc = CadastreService()
-        sections = svc.lister_sections(code_insee)
+        from execution.services.cadastre_service import get_cadastre_service
+        svc = get_cadastre_service()
+        sections = await asyncio.to_thread(svc.lister_sections, code_insee)
         return [SectionResponse(**s) for s in sections]
 
     @router.post("/enrichir", response_model=EnrichirResponse)
     async def enrichir_cadastre(req: EnrichirRequest):
         """Enrichit les données d'un dossier avec le cadastre officiel."""
-        from execution.services.cadastre_service import CadastreService
-        svc = CadastreService()
-        result = svc.enrichir_cadastre(req.donnees)
+        from execution.services.cadastre_service import get_cadastre_service
+        svc = get_cadastre_service()
+        result = await asyncio.to_thread(svc.enrichir_cadastre, req.donnees)
         return EnrichirResponse(**result)
 
     @router.get("/surface", response_model=SurfaceResponse)
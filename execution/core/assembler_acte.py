@@ -16,9 +16,12 @@ Fonctionnalités:
 Usage:
     python assembler_acte.py --template <template> --donnees <donnees.json> --output <sortie.md>
     python assembler_acte.py --template <template> --donnees <donnees.json> --output <sortie.md> --zones-grisees
+    python assembler_acte.py --precompiler
 
 Options:
     --zones-grisees : Marquer les variables pour affichage avec fond gris dans le DOCX final
+    --precompiler   : Compiler tous les templates (templates/, sections/, clauses/) en bytecode
+                      Jinja2 (étape de build, évite la compilation au premier appel)
 
 Exemple:
     python assembler_acte.py --template ../templates/vente_lots_copropriete.md \\
@@ -30,11 +33,15 @@ import json
 import argparse
 import uuid
 import os
+import time
 from pathlib import Path
 from datetime import datetime
 from copy import deepcopy
-from typing import Dict, Any, Optional
-from jinja2 import Environment, FileSystemLoader, TemplateNotFound, UndefinedError, Undefined
+from typing import Dict, Any, Optional, Iterator, Callable
+from jinja2 import (
+    Environment, FileSystemLoader, FileSystemBytecodeCache,
+    TemplateNotFound, TemplateSyntaxError, UndefinedError, Undefined
+)
 from functools import lru_cache
 
 
@@ -115,6 +122,7 @@ def _creer_environnement(dossier_templates: str, zones_grisees: bool) -> Environ
             str(dossier / 'sections'),
             str(dossier.parent / 'clauses')
         ]),
+        bytecode_cache=_get_bytecode_cache(zones_grisees),
         undefined=SilentUndefined,
         trim_blocks=True,
         lstrip_blocks=True,
@@ -156,8 +164,95 @@ def _finalize_standard(valeur):
 
 
 def invalider_cache_templates():
-    """Invalide le cache des environments Jinja2 (utile en dev/test)."""
+    """Invalide le cache des environments Jinja2 et des actes générés (utile en dev/test)."""
     _env_cache.clear()
+    from execution.core.cache_generation import invalider_cache_generation
+    invalider_cache_generation()
+
+
+# ==============================================================================
+# BUNDLE PRÉCOMPILÉ (BYTECODE JINJA2)
+# ==============================================================================
+
+# Dossier du bytecode compilé. Sur Modal, pointer vers le volume persistant
+# pour que les containers suivants profitent de la compilation du premier.
+BYTECODE_CACHE_DIR = Path(os.getenv(
+    "NOTAIRE_JINJA_CACHE_DIR",
+    str(Path(__file__).parent.parent.parent / '.tmp' / 'jinja_bytecode')
+))
+
+
+def _get_bytecode_cache(zones_grisees: bool) -> Optional[FileSystemBytecodeCache]:
+    """
+    Retourne le cache de bytecode Jinja2 pour une variante d'environnement.
+
+    Un sous-dossier par variante: `finalize` est appliqué aux constantes dès la
+    compilation, le bytecode avec marqueurs n'est donc pas interchangeable avec
+    le bytecode standard. Les entrées sont validées par checksum du source, un
+    template modifié est recompilé automatiquement.
+    """
+    dossier = BYTECODE_CACHE_DIR / ('zones_grisees' if zones_grisees else 'standard')
+    try:
+        dossier.mkdir(parents=True, exist_ok=True)
+    except OSError:
+        # Système de fichiers en lecture seule: compilation en mémoire uniquement
+        return None
+    return FileSystemBytecodeCache(str(dossier))
+
+
+def _lister_templates_a_compiler(env: Environment) -> list:
+    """Liste les templates .md chargeables (hors archives et doublons de chemin)."""
+    noms = set(env.list_templates(extensions=['md']))
+    a_compiler = []
+    for nom in sorted(noms):
+        if '_archive' in nom.split('/'):
+            continue
+        # Les sections sont accessibles via 'sections/x.md' ET 'x.md'
+        # (deux entrées du loader): on ne compile que le chemin utilisé par les includes
+        if f"sections/{nom}" in noms:
+            continue
+        a_compiler.append(nom)
+    return a_compiler
+
+
+def precompiler_templates(dossier_templates: Optional[Path] = None) -> Dict[str, Any]:
+    """
+    Compile tous les templates (templates/, sections/, clauses/) pour les deux
+    variantes d'environnement (standard et zones grisées).
+
+    Sert à la fois d'étape de build (écrit le bytecode sur disque) et de warm-up
+    au démarrage de l'API (recharge le bytecode et remplit le cache mémoire de
+    l'Environment), de sorte que la première génération tourne à vitesse nominale.
+
+    Args:
+        dossier_templates: Dossier des templates (défaut: templates/ du projet)
+
+    Returns:
+        Rapport {'templates': nb compilés, 'erreurs': [...], 'duree_ms': float}
+    """
+    if dossier_templates is None:
+        dossier_templates = Path(__file__).parent.parent.parent / 'templates'
+
+    debut = time.perf_counter()
+    compiles = 0
+    erreurs = []
+
+    for zones_grisees in (False, True):
+        env = _get_cached_environment(str(dossier_templates), zones_grisees)
+        for nom in _lister_templates_a_compiler(env):
+            try:
+                env.get_template(nom)
+                compiles += 1
+            except TemplateSyntaxError as e:
+                erreurs.append(f"{nom}:{e.lineno}: {e.message}")
+            except TemplateNotFound as e:
+                erreurs.append(f"{nom}: include introuvable ({e})")
+
+    return {
+        'templates': compiles,
+        'erreurs': erreurs,
+        'duree_ms': round((time.perf_counter() - debut) * 1000, 1),
+    }
 
 
 # ==============================================================================
@@ -641,6 +736,61 @@ class AssembleurActe:
 
         return donnees_enrichies
 
+    def _preparer_rendu(self, nom_template: str, donnees: Dict[str, Any],
+                        sections_actives: Optional[Dict[str, bool]] = None):
+        """Charge le template et construit le contexte de rendu enrichi."""
+        try:
+            template = self.env.get_template(nom_template)
+        except TemplateNotFound:
+            raise FileNotFoundError(f"Template non trouvé: {nom_template}")
+
+        # Enrichir les données
+        donnees_enrichies = self.enrichir_donnees(donnees)
+
+        # Ajouter les sections actives au contexte
+        if sections_actives:
+            donnees_enrichies['sections'] = sections_actives
+
+        return template, donnees_enrichies
+
+    @staticmethod
+    def _erreur_variable_manquante(e: UndefinedError) -> ValueError:
+        """Construit une erreur explicite (variable + garde Jinja à ajouter)."""
+        import re
+        import traceback
+        err_str = str(e)
+        match = re.search(r"'(\w+)' is undefined|has no attribute '(\w+)'", err_str)
+        if match:
+            var_name = match.group(1) or match.group(2)
+            guard = "{% if " + var_name + " %}"
+
+            # Contexte enrichi pour variables connues
+            contextes = {
+                "syndic": "copropriete.syndic — absent si copropriété en création",
+                "reglement": "copropriete.reglement — absent si copropriété en création",
+                "immatriculation": "copropriete.immatriculation — peut être vide",
+                "lotissement": "bien.lotissement — uniquement pour hors copropriété",
+                "rente_viagere": "prix.rente_viagere — uniquement pour vente viager",
+                "bouquet": "prix.bouquet — uniquement pour vente viager",
+                "droit_usage_habitation": "bien.droit_usage_habitation — uniquement pour viager",
+                "viager": "prix.viager — uniquement pour vente viager",
+                "groupe_habitations": "bien.groupe_habitations — uniquement hors copropriété",
+                "servitudes": "bien.servitudes — optionnel, toutes catégories",
+                "dernier_exercice": "copropriete.dernier_exercice — optionnel",
+                "travaux_votes": "copropriete.travaux_votes — optionnel",
+            }
+            ctx = contextes.get(var_name, "")
+            ctx_msg = f"\n  Contexte: {ctx}" if ctx else ""
+
+            return ValueError(
+                f"Variable manquante dans le template: '{var_name}'\n"
+                f"  Erreur: {e}{ctx_msg}\n"
+                f"  Solution: Ajouter {guard} dans le template ou fournir la variable dans les données"
+            )
+        print("[DEBUG] Traceback complet:")
+        traceback.print_exc()
+        return ValueError(f"Variable manquante dans le template: {e}")
+
     def assembler(self, nom_template: str, donnees: Dict[str, Any],
                   sections_actives: Optional[Dict[str, bool]] = None) -> str:
         """
@@ -654,61 +804,41 @@ class AssembleurActe:
         Returns:
             Contenu de l'acte généré
         """
-        # Charger le template
-        try:
-            template = self.env.get_template(nom_template)
-        except TemplateNotFound:
-            raise FileNotFoundError(f"Template non trouvé: {nom_template}")
-
-        # Enrichir les données
-        donnees_enrichies = self.enrichir_donnees(donnees)
-
-        # Ajouter les sections actives au contexte
-        if sections_actives:
-            donnees_enrichies['sections'] = sections_actives
+        template, donnees_enrichies = self._preparer_rendu(nom_template, donnees, sections_actives)
 
         # Générer l'acte
         try:
             acte = template.render(**donnees_enrichies)
         except UndefinedError as e:
-            import re
-            import traceback
-            err_str = str(e)
-            match = re.search(r"'(\w+)' is undefined|has no attribute '(\w+)'", err_str)
-            if match:
-                var_name = match.group(1) or match.group(2)
-                guard = "{% if " + var_name + " %}"
-
-                # Contexte enrichi pour variables connues
-                contextes = {
-                    "syndic": "copropriete.syndic — absent si copropriété en création",
-                    "reglement": "copropriete.reglement — absent si copropriété en création",
-                    "immatriculation": "copropriete.immatriculation — peut être vide",
-                    "lotissement": "bien.lotissement — uniquement pour hors copropriété",
-                    "rente_viagere": "prix.rente_viagere — uniquement pour vente viager",
-                    "bouquet": "prix.bouquet — uniquement pour vente viager",
-                    "droit_usage_habitation": "bien.droit_usage_habitation — uniquement pour viager",
-                    "viager": "prix.viager — uniquement pour vente viager",
-                    "groupe_habitations": "bien.groupe_habitations — uniquement hors copropriété",
-                    "servitudes": "bien.servitudes — optionnel, toutes catégories",
-                    "dernier_exercice": "copropriete.dernier_exercice — optionnel",
-                    "travaux_votes": "copropriete.travaux_votes — optionnel",
-                }
-                ctx = contextes.get(var_name, "")
-                ctx_msg = f"\n  Contexte: {ctx}" if ctx else ""
-
-                raise ValueError(
-                    f"Variable manquante dans le template: '{var_name}'\n"
-                    f"  Erreur: {e}{ctx_msg}\n"
-                    f"  Solution: Ajouter {guard} dans le template ou fournir la variable dans les données"
-                )
-            else:
-                print("[DEBUG] Traceback complet:")
-                traceback.print_exc()
-                raise ValueError(f"Variable manquante dans le template: {e}")
+            raise self._erreur_variable_manquante(e)
 
         return acte
 
+    def assembler_flux(self, nom_template: str, donnees: Dict[str, Any],
+                       sections_actives: Optional[Dict[str, bool]] = None) -> Iterator[str]:
+        """
+        Assemble un acte fragment par fragment (Template.generate de Jinja2).
+
+        Le template est chargé et les données enrichies immédiatement
+        (FileNotFoundError levée ici), le rendu avance au fil de l'itération.
+
+        Args:
+            nom_template: Nom du fichier template
+            donnees: Données à injecter
+            sections_actives: Dictionnaire des sections à activer/désactiver
+
+        Returns:
+            Itérateur des fragments de l'acte
+        """
+        template, donnees_enrichies = self._preparer_rendu(nom_template, donnees, sections_actives)
+        return self._generer_fragments(template, donnees_enrichies)
+
+    def _generer_fragments(self, template, contexte: Dict[str, Any]) -> Iterator[str]:
+        try:
+            yield from template.generate(**contexte)
+        except UndefinedError as e:
+            raise self._erreur_variable_manquante(e)
+
     def sauvegarder(self, acte: str, donnees: Dict[str, Any],
                     dossier_sortie: Path, id_acte: Optional[str] = None) -> Dict[str, Path]:
         """
@@ -737,33 +867,101 @@ class AssembleurActe:
             f.write(acte)
         chemins['acte'] = chemin_acte
 
-        # Sauvegarder les données
-        chemin_donnees = dossier_acte / 'donnees.json'
-        with open(chemin_donnees, 'w', encoding='utf-8') as f:
-            json.dump(donnees, f, ensure_ascii=False, indent=2)
-        chemins['donnees'] = chemin_donnees
-
-        # Créer les métadonnées
-        metadata = {
-            'id': id_acte,
-            'date_generation': datetime.now().isoformat(),
-            'statut': 'brouillon',
-            'version': 1,
-            'historique': [
-                {
-                    'date': datetime.now().isoformat(),
-                    'action': 'creation',
-                    'description': 'Génération initiale'
-                }
-            ]
-        }
-        chemin_metadata = dossier_acte / 'metadata.json'
-        with open(chemin_metadata, 'w', encoding='utf-8') as f:
-            json.dump(metadata, f, ensure_ascii=False, indent=2)
-        chemins['metadata'] = chemin_metadata
+        chemins.update(self._sauvegarder_metadonnees(donnees, dossier_acte, id_acte))
+
+        return chemins
+
+    def exporter_flux(self, nom_template: str, donnees: Dict[str, Any],
+                      dossier_sortie: Path, chemin_docx: Path,
+                      id_acte: Optional[str] = None,
+                      sections_actives: Optional[Dict[str, bool]] = None,
+                      progression: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Path]:
+        """
+        Assemble et exporte en DOCX en un seul passage (mode pipeline).
+
+        Les fragments rendus alimentent directement le constructeur DOCX et sont
+        recopiés dans acte.md au fil de l'eau: ni relecture du fichier, ni copie
+        complète de l'acte en mémoire.
+
+        Args:
+            nom_template: Nom du fichier template
+            donnees: Données à injecter
+            dossier_sortie: Dossier de destination (acte.md, données, métadonnées)
+            chemin_docx: Fichier DOCX de sortie
+            id_acte: Identifiant optionnel
+            sections_actives: Dictionnaire des sections à activer/désactiver
+            progression: Callback appelé à chaque section H2 convertie
+
+        Returns:
+            Dictionnaire des chemins créés (acte, donnees, metadata, docx)
+        """
+        from execution.core.exporter_docx import exporter_docx_flux
+
+        fragments = self.assembler_flux(nom_template, donnees, sections_actives)
 
+        if not id_acte:
+            id_acte = str(uuid.uuid4())[:8]
+        dossier_acte = dossier_sortie / id_acte
+        dossier_acte.mkdir(parents=True, exist_ok=True)
+
+        chemin_acte = dossier_acte / 'acte.md'
+        exporter_docx_flux(
+            fragments, Path(chemin_docx),
+            zones_grisees=self.zones_grisees,
+            chemin_markdown=chemin_acte,
+            progression=progression
+        )
+
+        chemins = {'acte': chemin_acte, 'docx': Path(chemin_docx)}
+        chemins.update(self._sauvegarder_metadonnees(donnees, dossier_acte, id_acte))
         return chemins
 
+    def _sauvegarder_metadonnees(self, donnees: Dict[str, Any],
+                                 dossier_acte: Path, id_acte: str) -> Dict[str, Path]:
+        """Écrit donnees.json et metadata.json à côté de l'acte."""
+        return sauvegarder_metadonnees(donnees, dossier_acte, id_acte)
+
+
+def sauvegarder_metadonnees(donnees: Dict[str, Any], dossier_acte: Path, id_acte: str) -> Dict[str, Path]:
+    """Écrit donnees.json et metadata.json dans le dossier d'un acte."""
+    dossier_acte.mkdir(parents=True, exist_ok=True)
+    chemins = {}
+
+    # Sauvegarder les données
+    chemin_donnees = dossier_acte / 'donnees.json'
+    with open(chemin_donnees, 'w', encoding='utf-8') as f:
+        json.dump(donnees, f, ensure_ascii=False, indent=2)
+    chemins['donnees'] = chemin_donnees
+
+    # Créer les métadonnées
+    metadata = {
+        'id': id_acte,
+        'date_generation': datetime.now().isoformat(),
+        'statut': 'brouillon',
+        'version': 1,
+        'historique': [
+            {
+                'date': datetime.now().isoformat(),
+                'action': 'creation',
+                'description': 'Génération initiale'
+            }
+        ]
+    }
+    chemin_metadata = dossier_acte / 'metadata.json'
+    with open(chemin_metadata, 'w', encoding='utf-8') as f:
+        json.dump(metadata, f, ensure_ascii=False, indent=2)
+    chemins['metadata'] = chemin_metadata
+
+    return chemins
+
+
+def _resoudre_template(template: str):
+    """Retourne (dossier_templates, nom_template) pour un chemin ou un nom de template."""
+    template_path = Path(template)
+    if template_path.is_absolute():
+        return template_path.parent, template_path.name
+    return Path(__file__).parent.parent.parent / 'templates', template
+
 
 def assembler_acte(template: str, donnees: Dict[str, Any], output_dir: str,
                    zones_grisees: bool = False, acte_id: str = None) -> Dict[str, Path]:
@@ -780,15 +978,7 @@ def assembler_acte(template: str, donnees: Dict[str, Any], output_dir: str,
     Returns:
         Dictionnaire avec les chemins des fichiers générés
     """
-    template_path = Path(template)
-
-    # Déterminer le dossier des templates
-    if template_path.is_absolute():
-        dossier_templates = template_path.parent
-        nom_template = template_path.name
-    else:
-        dossier_templates = Path(__file__).parent.parent.parent / 'templates'
-        nom_template = template
+    dossier_templates, nom_template = _resoudre_template(template)
 
     # Créer l'assembleur et générer
     assembleur = AssembleurActe(dossier_templates, zones_grisees=zones_grisees)
@@ -805,6 +995,35 @@ def assembler_acte(template: str, donnees: Dict[str, Any], output_dir: str,
     )
 
 
+def assembler_acte_flux(template: str, donnees: Dict[str, Any], output_dir: str,
+                        chemin_docx: Path, zones_grisees: bool = False, acte_id: str = None,
+                        progression: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Path]:
+    """
+    Fonction de convénience pour assembler et exporter un acte en mode pipeline.
+
+    Args:
+        template: Chemin vers le template ou nom du fichier
+        donnees: Données à injecter
+        output_dir: Dossier de sortie
+        chemin_docx: Fichier DOCX de sortie
+        zones_grisees: Si True, marque les variables pour fond gris
+        acte_id: Identifiant de l'acte (auto-généré si non fourni)
+        progression: Callback appelé à chaque section H2 convertie
+
+    Returns:
+        Dictionnaire avec les chemins des fichiers générés (dont 'docx')
+    """
+    dossier_templates, nom_template = _resoudre_template(template)
+    assembleur = AssembleurActe(dossier_templates, zones_grisees=zones_grisees)
+    return assembleur.exporter_flux(
+        nom_template, donnees,
+        dossier_sortie=Path(output_dir),
+        chemin_docx=Path(chemin_docx),
+        id_acte=acte_id,
+        progression=progression
+    )
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Assemble un acte notarial à partir d'un template et de données"
@@ -812,13 +1031,11 @@ def main():
     parser.add_argument(
         '--template', '-t',
         type=str,
-        required=True,
         help="Nom du fichier template (ex: vente_lots_copropriete.md)"
     )
     parser.add_argument(
         '--donnees', '-d',
         type=Path,
-        required=True,
         help="Chemin vers le fichier de données JSON"
     )
     parser.add_argument(
@@ -842,9 +1059,25 @@ def main():
         action='store_true',
         help="Marquer les variables pour affichage avec fond gris dans le DOCX final"
     )
+    parser.add_argument(
+        '--precompiler',
+        action='store_true',
+        help="Compiler tous les templates en bytecode Jinja2 (étape de build)"
+    )
 
     args = parser.parse_args()
 
+    if args.precompiler:
+        rapport = precompiler_templates(args.dossier_templates)
+        print(f"[OK] {rapport['templates']} templates compiles en {rapport['duree_ms']} ms "
+              f"-> {BYTECODE_CACHE_DIR}")
+        for erreur in rapport['erreurs']:
+            print(f"[ERREUR] {erreur}")
+        return 1 if rapport['erreurs'] else 0
+
+    if not args.template or not args.donnees:
+        parser.error("--template et --donnees sont requis (sauf avec --precompiler)")
+
     # Vérifications
     if not args.donnees.exists():
         print(f"[ERREUR] Fichier de donnees non trouve: {args.donnees}")
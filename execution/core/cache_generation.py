@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+cache_generation.py
+-------------------
+Cache adressé par contenu des actes générés (Markdown + DOCX).
+
+Cliquer plusieurs fois sur "Générer" avec le même dossier refaisait
+assemblage et export DOCX à chaque fois. La clé d'un acte est l'empreinte
+canonique de (données enrichies, template, version des templates/clauses,
+zones grisées): si elle est déjà connue, les fichiers stockés sont recopiés
+vers la sortie demandée au lieu d'être régénérés.
+
+- Stockage disque borné en taille, éviction LRU (mtime de l'entrée)
+- Durée de vie bornée (TTL depuis l'écriture): les entrées contiennent les
+  données clients en clair, elles ne sont pas conservées indéfiniment
+- Toute suppression (éviction, expiration, vidage) passe par
+  secure_delete_dir, comme le nettoyage des fichiers temporaires
+- Version des templates = empreinte des (chemin, taille, mtime) de
+  templates/ et clauses/ et du code d'assemblage/export: modifier un
+  fichier suffit à rendre les anciennes entrées inaccessibles
+- invalider_cache_templates() vide le cache; la suppression d'un dossier
+  aussi (invalider_cache_generation): les entrées sont adressées par
+  contenu, on ne sait pas lesquelles lui appartiennent
+
+Usage:
+    from execution.core.cache_generation import cle_generation, get_cache_generation
+
+    cache = get_cache_generation()
+    cle = cle_generation(donnees_enrichies, "promesse_vente_lots_copropriete.md", zones_grisees=False)
+    if cache and cache.restaurer(cle, chemin_md, chemin_docx):
+        ...  # fichiers recopiés, rien à générer
+    else:
+        ...  # générer, puis cache.ecrire(cle, chemin_md, chemin_docx)
+
+Variables d'environnement:
+    NOTAIRE_CACHE_GENERATION      0 pour désactiver (défaut: 1)
+    NOTAIRE_CACHE_GENERATION_DIR  Dossier du cache (défaut: outputs/.cache_generation)
+    NOTAIRE_CACHE_GENERATION_MO   Taille maximale en Mo (défaut: 500)
+    NOTAIRE_CACHE_GENERATION_TTL_H  Durée de vie d'une entrée en heures (défaut: 24)
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+from execution.security.secure_delete import secure_delete_dir
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+DOSSIER_DEFAUT = PROJECT_ROOT / "outputs" / ".cache_generation"
+
+# Sources dont dépend le contenu d'un acte (hors données)
+SOURCES_TEMPLATES = (PROJECT_ROOT / "templates", PROJECT_ROOT / "clauses")
+SOURCES_CODE = (
+    Path(__file__).parent / "assembler_acte.py",
+    Path(__file__).parent / "exporter_docx.py",
+)
+
+FICHIER_MD = "acte.md"
+FICHIER_DOCX = "acte.docx"
+
+
+def version_templates(sources: Iterable[Path] = SOURCES_TEMPLATES,
+                      code: Iterable[Path] = SOURCES_CODE) -> str:
+    """
+    Empreinte des templates, clauses et du code de rendu.
+
+    Basée sur (chemin, taille, mtime) plutôt que sur le contenu: ~1 ms pour
+    l'arborescence complète, recalculée à chaque génération.
+    """
+    empreinte = hashlib.sha256()
+    for racine in sources:
+        for dossier, sous_dossiers, fichiers in os.walk(racine):
+            sous_dossiers.sort()
+            for nom in sorted(fichiers):
+                chemin = os.path.join(dossier, nom)
+                try:
+                    st = os.stat(chemin)
+                except OSError:
+                    continue
+                empreinte.update(f"{chemin}|{st.st_size}|{st.st_mtime_ns}\n".encode("utf-8"))
+    for chemin in code:
+        try:
+            st = os.stat(chemin)
+        except OSError:
+            continue
+        empreinte.update(f"{chemin}|{st.st_size}|{st.st_mtime_ns}\n".encode("utf-8"))
+    return empreinte.hexdigest()
+
+
+def cle_generation(donnees: Dict[str, Any], template: str, zones_grisees: bool,
+                   version: Optional[str] = None) -> str:
+    """Clé canonique d'un acte: mêmes entrées → même clé, quel que soit l'ordre des champs."""
+    canonique = json.dumps(
+        {
+            "donnees": donnees,
+            "template": str(template),
+            "version": version or version_templates(),
+            "zones_grisees": bool(zones_grisees),
+        },
+        ensure_ascii=False, sort_keys=True, separators=(",", ":"), default=str,
+    )
+    return hashlib.sha256(canonique.encode("utf-8")).hexdigest()
+
+
+class CacheGeneration:
+    """
+    Stockage disque des actes générés, une entrée par clé.
+
+    Chaque entrée est un dossier `<cle>/` contenant acte.md et acte.docx,
+    écrit dans un dossier temporaire puis renommé (jamais d'entrée partielle
+    visible, même avec plusieurs workers). Le mtime du dossier sert d'horloge
+    LRU: il est rafraîchi à chaque lecture. Le mtime de acte.md (jamais
+    rafraîchi) date l'écriture, pour le TTL.
+
+    Args:
+        dossier: Racine du cache
+        max_octets: Taille maximale cumulée des entrées
+        ttl_secondes: Durée de vie d'une entrée depuis son écriture
+    """
+
+    def __init__(self, dossier: Optional[Path] = None, max_octets: int = 500 * 1024 * 1024,
+                 ttl_secondes: float = 24 * 3600):
+        self.dossier = Path(dossier or DOSSIER_DEFAUT)
+        self.max_octets = max_octets
+        self.ttl_secondes = ttl_secondes
+        self._verrou = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "ecritures": 0, "evictions": 0, "expirations": 0}
+
+    def _entree(self, cle: str) -> Path:
+        return self.dossier / cle
+
+    def _expiree(self, entree: Path, maintenant: Optional[float] = None) -> bool:
+        ecrite = (entree / FICHIER_MD).stat().st_mtime
+        return (maintenant or time.time()) - ecrite > self.ttl_secondes
+
+    def restaurer(self, cle: str, chemin_md: Path, chemin_docx: Path) -> bool:
+        """
+        Recopie l'acte stocké sous `cle` vers les chemins demandés.
+
+        Returns:
+            True si l'entrée existait (fichiers recopiés), False sinon
+        """
+        entree = self._entree(cle)
+        source_md, source_docx = entree / FICHIER_MD, entree / FICHIER_DOCX
+        try:
+            if self._expiree(entree):
+                secure_delete_dir(entree)
+                self.stats["expirations"] += 1
+                self.stats["misses"] += 1
+                return False
+            Path(chemin_md).parent.mkdir(parents=True, exist_ok=True)
+            Path(chemin_docx).parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(source_md, chemin_md)
+            shutil.copyfile(source_docx, chemin_docx)
+            os.utime(entree)
+        except FileNotFoundError:
+            self.stats["misses"] += 1
+            return False
+        except OSError as e:
+            logger.warning(f"Lecture du cache de génération impossible ({cle[:12]}): {e}")
+            self.stats["misses"] += 1
+            return False
+        self.stats["hits"] += 1
+        return True
+
+    def ecrire(self, cle: str, chemin_md: Path, chemin_docx: Path) -> bool:
+        """Stocke un acte généré. Les erreurs d'écriture ne font jamais échouer la génération."""
+        entree = self._entree(cle)
+        if entree.exists():
+            return True
+        temporaire = self.dossier / f".tmp-{uuid.uuid4().hex}"
+        try:
+            temporaire.mkdir(parents=True)
+            shutil.copyfile(chemin_md, temporaire / FICHIER_MD)
+            shutil.copyfile(chemin_docx, temporaire / FICHIER_DOCX)
+            try:
+                os.replace(temporaire, entree)
+            except OSError:
+                # Un autre worker a écrit la même clé entre-temps
+                secure_delete_dir(temporaire)
+                return entree.exists()
+        except OSError as e:
+            logger.warning(f"Écriture du cache de génération impossible: {e}")
+            secure_delete_dir(temporaire)
+            return False
+        self.stats["ecritures"] += 1
+        self._evincer()
+        return True
+
+    def _evincer(self) -> None:
+        """Supprime les entrées expirées, puis les moins récemment utilisées au-delà de max_octets."""
+        with self._verrou:
+            entrees = []
+            total = 0
+            maintenant = time.time()
+            for entree in self.dossier.iterdir():
+                if entree.name.startswith(".tmp-") or not entree.is_dir():
+                    continue
+                try:
+                    if self._expiree(entree, maintenant):
+                        secure_delete_dir(entree)
+                        self.stats["expirations"] += 1
+                        continue
+                    taille = sum(f.stat().st_size for f in entree.iterdir())
+                    entrees.append((entree.stat().st_mtime, taille, entree))
+                except OSError:
+                    continue
+                total += taille
+            entrees.sort(key=lambda e: e[0])
+            for _, taille, entree in entrees:
+                if total <= self.max_octets:
+                    break
+                secure_delete_dir(entree)
+                total -= taille
+                self.stats["evictions"] += 1
+
+    def taille(self) -> int:
+        """Taille cumulée des entrées, en octets."""
+        if not self.dossier.exists():
+            return 0
+        return sum(f.stat().st_size for f in self.dossier.glob("*/*") if f.is_file())
+
+    def vider(self) -> None:
+        """Supprime toutes les entrées (suppression sécurisée)."""
+        with self._verrou:
+            if not self.dossier.exists():
+                return
+            for entree in self.dossier.iterdir():
+                if entree.is_dir():
+                    secure_delete_dir(entree)
+
+
+_instance: Optional[CacheGeneration] = None
+_instance_verrou = threading.Lock()
+
+
+def get_cache_generation() -> Optional[CacheGeneration]:
+    """Retourne le cache partagé du process (None si NOTAIRE_CACHE_GENERATION=0)."""
+    global _instance
+    if os.getenv("NOTAIRE_CACHE_GENERATION", "1") == "0":
+        return None
+    with _instance_verrou:
+        if _instance is None:
+            _instance = CacheGeneration(
+                dossier=Path(os.getenv("NOTAIRE_CACHE_GENERATION_DIR", str(DOSSIER_DEFAUT))),
+                max_octets=int(float(os.getenv("NOTAIRE_CACHE_GENERATION_MO", "500")) * 1024 * 1024),
+                ttl_secondes=float(os.getenv("NOTAIRE_CACHE_GENERATION_TTL_H", "24")) * 3600,
+            )
+        return _instance
+
+
+def invalider_cache_generation() -> None:
+    """Vide le cache de génération (invalider_cache_templates, suppression d'un dossier)."""
+    cache = get_cache_generation()
+    if cache is not None:
+        cache.vider()
+
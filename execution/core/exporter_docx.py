@@ -23,8 +23,15 @@ Base sur l'analyse des originaux RTF:
 """
 
 import argparse
+import copy
+import hashlib
+import os
 import re
+import threading
+from collections import OrderedDict
 from pathlib import Path
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional
 from html.parser import HTMLParser
 from docx import Document
 from docx.shared import Pt, Mm, Inches, RGBColor
@@ -39,8 +46,9 @@ from docx.oxml import OxmlElement
 # CONFIGURATION GLOBALE
 # =============================================================================
 
-# Option pour conserver les zones grisees sur les variables remplies
-# TOUJOURS actif pour correspondre aux trames originales des notaires
+# Valeur par defaut des zones grisees sur les variables remplies
+# (actif pour correspondre aux trames originales des notaires).
+# Constante: le reglage d'un export passe par ContexteExport, jamais par ce module.
 ZONES_GRISEES_ACTIVES = True
 
 # Marqueurs pour identifier les variables remplies (inseres par assembler_acte.py)
@@ -49,6 +57,101 @@ MARQUEUR_VAR_START = "<<<VAR_START>>>"
 MARQUEUR_VAR_END = "<<<VAR_END>>>"
 
 
+@dataclass
+class ContexteExport:
+    """
+    Parametres et etat propres a un export DOCX.
+
+    Transmis a toutes les fonctions de conversion a la place d'un etat global:
+    plusieurs exports (avec et sans zones grisees) peuvent tourner en parallele
+    dans un meme processus. Les styles sont portes par le Document de l'export.
+    """
+    zones_grisees: bool = ZONES_GRISEES_ACTIVES
+    # Header de premiere page ({FIRST_PAGE_HEADER_START} ... {FIRST_PAGE_HEADER_END})
+    in_first_page_header: bool = False
+    first_page_header_content: List[str] = field(default_factory=list)
+
+
+# =============================================================================
+# CACHE DES SECTIONS CONVERTIES
+# =============================================================================
+
+# Lignes dont la conversion depend d'un etat hors de la section (encadre,
+# bloc HTML, header de premiere page): jamais mises en cache
+_MARQUEURS_NON_CACHABLES = ('BOX_START}', 'BOX_END}', 'FIRST_PAGE_HEADER', '<div', '</div>')
+
+
+class CacheSectionsDocx:
+    """
+    Cache LRU des sections H2 deja converties en XML Word.
+
+    La cle est l'empreinte du Markdown de la section (et du reglage zones
+    grisees): apres la correction d'un champ, seules les sections dont le
+    texte a change repassent par python-docx, les autres sont recopiees
+    telles quelles dans le document. Memes unites que split_markdown_sections
+    de l'API document-review.
+
+    Args:
+        max_sections: Nombre maximal de sections conservees
+    """
+
+    def __init__(self, max_sections: int = 2048):
+        self.max_sections = max_sections
+        self._entrees: "OrderedDict[str, tuple]" = OrderedDict()
+        self._verrou = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0}
+
+    @staticmethod
+    def cle(lignes: List[str], contexte: ContexteExport) -> str:
+        empreinte = hashlib.sha256(b'1' if contexte.zones_grisees else b'0')
+        empreinte.update('\n'.join(lignes).encode('utf-8'))
+        return empreinte.hexdigest()
+
+    def lire(self, cle: str) -> Optional[tuple]:
+        with self._verrou:
+            elements = self._entrees.get(cle)
+            if elements is None:
+                self.stats['misses'] += 1
+                return None
+            self._entrees.move_to_end(cle)
+            self.stats['hits'] += 1
+            return elements
+
+    def ecrire(self, cle: str, elements: list):
+        # Copie: le cache ne doit pas suivre les modifications du document source
+        copie = tuple(copy.deepcopy(element) for element in elements)
+        with self._verrou:
+            self._entrees[cle] = copie
+            self._entrees.move_to_end(cle)
+            while len(self._entrees) > self.max_sections:
+                self._entrees.popitem(last=False)
+
+    def vider(self):
+        with self._verrou:
+            self._entrees.clear()
+
+
+_cache_sections: Optional[CacheSectionsDocx] = None
+_cache_sections_verrou = threading.Lock()
+
+
+def get_cache_sections_docx() -> Optional[CacheSectionsDocx]:
+    """
+    Retourne le cache de sections partage du processus.
+
+    NOTAIRE_CACHE_SECTIONS_DOCX fixe le nombre de sections conservees
+    (defaut: 2048, 0 pour desactiver le cache).
+    """
+    global _cache_sections
+    with _cache_sections_verrou:
+        if _cache_sections is None:
+            taille = int(os.getenv('NOTAIRE_CACHE_SECTIONS_DOCX', '2048'))
+            if taille <= 0:
+                return None
+            _cache_sections = CacheSectionsDocx(taille)
+        return _cache_sections
+
+
 def appliquer_fond_gris(run):
     """
     Applique un fond grise (shading) a un run Word.
@@ -436,12 +539,7 @@ def detecter_tableau_aplati(lignes: list, index: int) -> tuple:
     ligne = lignes[index].strip()
 
     # Verifier si c'est un mot-cle d'en-tete connu
-    est_entete_potentiel = any(
-        ligne.lower() == kw.lower() or ligne.lower().startswith(kw.lower())
-        for kw in MOTS_CLES_ENTETE_TABLEAU
-    )
-
-    if not est_entete_potentiel:
+    if not _est_entete_tableau_aplati(ligne):
         return False, index, None
 
     # Collecter les lignes non-vides consecutives (avec lignes vides entre elles)
@@ -774,7 +872,7 @@ def est_valeur_numerique(texte: str) -> bool:
     return False
 
 
-def ajouter_tableau_word(doc: Document, donnees: dict):
+def ajouter_tableau_word(doc: Document, donnees: dict, contexte: Optional[ContexteExport] = None):
     """Ajoute un tableau Word depuis les donnees Markdown."""
     lignes = donnees['lignes']
     alignements = donnees['alignements']
@@ -857,7 +955,7 @@ def ajouter_tableau_word(doc: Document, donnees: dict):
                     para.alignment = WD_ALIGN_PARAGRAPH.LEFT
 
             # Texte
-            ajouter_texte_formate(para, cell_text)
+            ajouter_texte_formate(para, cell_text, contexte=contexte)
 
             # En-tete en gras
             if i == 0:
@@ -877,9 +975,10 @@ def ajouter_tableau_word(doc: Document, donnees: dict):
 class NotarialHTMLParser(HTMLParser):
     """Parser HTML specialise pour les actes notariaux."""
 
-    def __init__(self, doc: Document):
+    def __init__(self, doc: Document, contexte: Optional[ContexteExport] = None):
         super().__init__()
         self.doc = doc
+        self.contexte = contexte or ContexteExport()
         self.current_paragraph = None
         self.current_div_class = None
         self.text_buffer = ""
@@ -938,7 +1037,7 @@ class NotarialHTMLParser(HTMLParser):
                             run.italic = fmt['italic']
                             run.underline = fmt['underline']
                             appliquer_police(run)
-                            if ZONES_GRISEES_ACTIVES:
+                            if self.contexte.zones_grisees:
                                 appliquer_fond_gris(run)
                     else:
                         # Pas de fin trouvée, ajouter tel quel
@@ -1408,16 +1507,19 @@ def traiter_formatage_markdown(texte: str):
     return segments
 
 
-def ajouter_texte_formate(paragraph, texte: str, force_bold=None):
+def ajouter_texte_formate(paragraph, texte: str, force_bold=None,
+                          contexte: Optional[ContexteExport] = None):
     """
     Ajoute du texte avec formatage Markdown a un paragraphe.
-    Applique un fond gris aux variables si ZONES_GRISEES_ACTIVES est True.
+    Applique un fond gris aux variables si les zones grisees du contexte sont actives.
 
     Args:
         paragraph: Le paragraphe Word
         texte: Le texte à ajouter
         force_bold: Si True, force le bold (pour titres). Si None, utilise le formatage Markdown.
+        contexte: Contexte de l'export (defaut: zones grisees actives)
     """
+    zones_grisees = (contexte or ContexteExport()).zones_grisees
     segments = traiter_formatage_markdown(texte)
     for text, fmt in segments:
         if text:
@@ -1431,7 +1533,7 @@ def ajouter_texte_formate(paragraph, texte: str, force_bold=None):
                 run.underline = fmt['underline']
                 appliquer_police(run)
                 # Appliquer fond gris si c'est une zone variable et l'option est activee
-                if ZONES_GRISEES_ACTIVES and fmt.get('zone_grisee', False):
+                if zones_grisees and fmt.get('zone_grisee', False):
                     appliquer_fond_gris(run)
 
 
@@ -1545,145 +1647,383 @@ def appliquer_bordures_tableau(table):
     tblPr.append(tblBorders)
 
 
-def convertir_contenu_vers_docx(contenu: str, doc: Document):
-    """Convertit le contenu HTML/Markdown vers Word."""
-
-    # Nettoyer les caracteres de controle invalides pour XML
-    contenu = nettoyer_texte_xml(contenu)
+# Placeholders protégeant les marqueurs de zones grisées pendant le traitement HTML:
+# les triples chevrons <<< >>> sont interprétés comme HTML invalide par le parser
+PLACEHOLDER_START = "___ZONEVAR_DEBUT___"
+PLACEHOLDER_END = "___ZONEVAR_FIN___"
 
-    # CORRECTION 3: Supprimer tous les commentaires HTML
-    contenu = re.sub(r'<!--.*?-->', '', contenu, flags=re.DOTALL)
-    contenu = re.sub(r'\n\s*\n\s*\n', '\n\n', contenu)
 
-    # Supprimer les balises <u> et </u> du HTML source
+def _preparer_ligne(ligne: str) -> str:
+    """Nettoyage par ligne: balises <u> retirées, marqueurs de zones grisées protégés."""
     # Le soulignement n'est appliqué que via __text__ en Markdown
-    contenu = re.sub(r'</?u>', '', contenu)
+    ligne = re.sub(r'</?u>', '', ligne)
+    ligne = ligne.replace(MARQUEUR_VAR_START, PLACEHOLDER_START)
+    return ligne.replace(MARQUEUR_VAR_END, PLACEHOLDER_END)
 
-    # CORRECTION: Protéger les marqueurs de zones grisées pendant tout le traitement HTML
-    # Les triples chevrons <<< >>> sont interprétés comme HTML invalide par le parser
-    # On utilise des placeholders qui ne ressemblent pas à du HTML
-    PLACEHOLDER_START = "___ZONEVAR_DEBUT___"
-    PLACEHOLDER_END = "___ZONEVAR_FIN___"
-    contenu = contenu.replace(MARQUEUR_VAR_START, PLACEHOLDER_START)
-    contenu = contenu.replace(MARQUEUR_VAR_END, PLACEHOLDER_END)
 
-    has_html = '<div' in contenu or '<strong>' in contenu or '<br' in contenu
+def _est_entete_tableau_aplati(ligne: str) -> bool:
+    """Vrai si la ligne (strippée) peut ouvrir un tableau aplati."""
+    return any(
+        ligne.lower() == kw.lower() or ligne.lower().startswith(kw.lower())
+        for kw in MOTS_CLES_ENTETE_TABLEAU
+    )
 
-    lignes = contenu.split('\n')
-    i = 0
-    parser = NotarialHTMLParser(doc) if has_html else None
-    html_buffer = ""
-    in_html_block = False
-    in_first_page_header = False
-    first_page_header_started = False
-    first_page_header_content = []  # Collecter le contenu du header premiere page
-    in_box = False
-    box_table = None
-
-    while i < len(lignes):
-        ligne = lignes[i]
-        ligne_strip = ligne.strip()
-
-        # Detecter debut/fin de box (encadré)
-        if 'BOX_START}' in ligne_strip:
-            in_box = True
-            # Créer un tableau avec une seule cellule pour faire l'encadré
-            box_table = doc.add_table(rows=1, cols=1)
-            box_table.alignment = WD_TABLE_ALIGNMENT.CENTER
-            # Appliquer les bordures
-            appliquer_bordures_tableau(box_table)
-            i += 1
-            continue
-        if 'BOX_END}' in ligne_strip:
-            in_box = False
-            box_table = None
-            i += 1
-            continue
 
-        # Detecter debut/fin de header de premiere page
-        if '{FIRST_PAGE_HEADER_START}' in ligne_strip:
-            in_first_page_header = True
-            first_page_header_started = True
-            first_page_header_content = []  # Reset le buffer
-            i += 1
-            continue
-        if '{FIRST_PAGE_HEADER_END}' in ligne_strip:
-            in_first_page_header = False
-            # Analyser le contenu collecte et l'ajouter au vrai header Word
-            # Format attendu: reference (ligne 1), initiales (ligne 2), date (ligne 3+)
-            reference = ""
-            initiales = ""
-            date_str = ""
-            for idx, line in enumerate(first_page_header_content):
-                if idx == 0:
-                    reference = line
-                elif idx == 1:
-                    initiales = line
-                else:
-                    date_str = line
+class ConvertisseurMarkdownDocx:
+    """
+    Convertit du contenu HTML/Markdown vers Word, ligne par ligne.
+
+    Peut etre alimente par fragments (ex: Template.generate() de Jinja2) via
+    alimenter()/terminer(): seules les lignes pas encore converties restent en
+    memoire. Une ligne n'est convertie que lorsque tout ce dont elle depend est
+    connu (fin d'un commentaire HTML, fin d'un tableau), ce qui donne le meme
+    document que convertir_contenu_vers_docx() sur le contenu complet.
+
+    Args:
+        doc: Document Word cible
+        contexte: Contexte de l'export (zones grisees, header de premiere page)
+        progression: Callback optionnel appele a chaque section H2 ('## '),
+            memes unites que split_markdown_sections de l'API document-review
+        cache: Cache optionnel des sections converties (CacheSectionsDocx).
+            La conversion se fait alors section par section: une section
+            deja vue est recopiee depuis le cache au lieu d'etre reconvertie.
+    """
+
+    def __init__(self, doc: Document, contexte: Optional[ContexteExport] = None,
+                 progression: Optional[Callable[[Dict[str, Any]], None]] = None,
+                 cache: Optional[CacheSectionsDocx] = None):
+        self.doc = doc
+        self.contexte = contexte or ContexteExport()
+        self.progression = progression
+        self.cache = cache
+        self.nb_sections = 0
+        self.stats_sections = {'converties': 0, 'cache': 0}
+
+        # Texte pas encore decoupe en lignes
+        self._brut = ""      # pas encore debarrasse des commentaires HTML
+        self._net = ""       # commentaires retires, en attente de fin de ligne
+        self._blancs = []    # lignes blanches consecutives en attente de compactage
+        self._lignes = []    # lignes pretes, en attente de conversion
+        self._index = 0
+
+        # Etat de la conversion
+        self.parser = None
+        self.html_buffer = ""
+        self.in_html_block = False
+        self.in_box = False
+        self.box_table = None
+
+    # -------------------------------------------------------------------------
+    # Alimentation
+    # -------------------------------------------------------------------------
+
+    def alimenter(self, fragment: str):
+        """Ajoute un fragment de texte brut et convertit ce qui peut l'etre."""
+        if not fragment:
+            return
+        # Nettoyer les caracteres de controle invalides pour XML
+        self._brut += nettoyer_texte_xml(fragment)
+        self._retirer_commentaires(final=False)
+
+        fin = self._net.rfind('\n')
+        if fin != -1:
+            for ligne in self._net[:fin].split('\n'):
+                self._empiler_ligne(ligne)
+            self._net = self._net[fin + 1:]
+        self._convertir(final=False)
+
+    def terminer(self):
+        """Signale la fin du flux et convertit les lignes restantes."""
+        self._retirer_commentaires(final=True)
+        for ligne in self._net.split('\n')[:-1]:
+            self._empiler_ligne(ligne)
+        self._vider_blancs()
+        # Derniere ligne (sans '\n' final): jamais compactee
+        self._lignes.append(_preparer_ligne(self._net.split('\n')[-1]))
+        self._net = ""
+        self._convertir(final=True)
+
+    def convertir_lignes(self, lignes: list):
+        """Convertit des lignes deja pretraitees (contenu complet)."""
+        self._lignes = lignes
+        self._index = 0
+        self._convertir(final=True)
+
+    def _retirer_commentaires(self, final: bool):
+        """Equivalent incremental de re.sub(r'<!--.*?-->', '', contenu, flags=re.DOTALL)."""
+        texte = self._brut
+        while True:
+            debut = texte.find('<!--')
+            if debut == -1:
+                break
+            fin = texte.find('-->', debut + 4)
+            if fin == -1:
+                break
+            self._net += texte[:debut]
+            texte = texte[fin + 3:]
+
+        if final:
+            self._net += texte
+            self._brut = ""
+            return
+
+        # Commentaire non ferme ou amorce '<', '<!', '<!-' en fin de fragment: attendre la suite
+        debut = texte.find('<!--')
+        if debut == -1:
+            debut = len(texte)
+            for n in (3, 2, 1):
+                if texte.endswith('<!--'[:n]):
+                    debut = len(texte) - n
                     break
-            # Configurer le header de premiere page avec l'espace vide + contenu
-            configurer_header_premiere_page(doc, lignes_vides=20)
-            ajouter_contenu_header_premiere_page(doc, reference, initiales, date_str)
-            i += 1
-            continue
+        self._net += texte[:debut]
+        self._brut = texte[debut:]
+
+    def _empiler_ligne(self, ligne: str):
+        """Empile une ligne terminee par '\\n' (compacte les suites de lignes blanches)."""
+        if not ligne.strip():
+            self._blancs.append(ligne)
+            return
+        self._vider_blancs()
+        self._lignes.append(_preparer_ligne(ligne))
+
+    def _vider_blancs(self):
+        # Equivalent de re.sub(r'\n\s*\n\s*\n', '\n\n', contenu): plusieurs lignes
+        # blanches consecutives deviennent une seule ligne vide
+        if len(self._blancs) == 1:
+            self._lignes.append(_preparer_ligne(self._blancs[0]))
+        elif self._blancs:
+            self._lignes.append("")
+        self._blancs = []
+
+    # -------------------------------------------------------------------------
+    # Conversion
+    # -------------------------------------------------------------------------
+
+    def _fin_tableau_connue(self, i: int) -> bool:
+        """Vrai si les lignes necessaires a la detection de tableau en i sont disponibles."""
+        lignes = self._lignes
+        ligne = lignes[i].strip()
+
+        if ligne.startswith('|'):
+            j = i + 1
+            while j < len(lignes) and lignes[j].strip().startswith('|'):
+                j += 1
+            if j >= len(lignes):
+                return False
+
+        if _est_entete_tableau_aplati(ligne):
+            # Memes conditions d'arret que detecter_tableau_aplati
+            j = i
+            lignes_vides_consecutives = 0
+            while j < len(lignes) and lignes_vides_consecutives <= 2:
+                courante = lignes[j].strip()
+                j += 1
+                if not courante:
+                    lignes_vides_consecutives += 1
+                    continue
+                if (courante.startswith('#') or len(courante) > 80
+                        or re.search(r'\.\s+[A-Z]', courante)
+                        or (courante.endswith('.') and len(courante) > 50)):
+                    return True
+                lignes_vides_consecutives = 0
+            return lignes_vides_consecutives > 2
 
-        # Collecter ligne header de premiere page (reference, initiales, date)
-        if in_first_page_header and ligne_strip:
-            first_page_header_content.append(ligne_strip)
-            i += 1
-            continue
+        return True
+
+    def _convertir(self, final: bool):
+        if self.cache is None:
+            self._convertir_lignes(final)
+            return
+        # Une section s'arrete a la ligne '## ' suivante: les detections de
+        # tableau s'arretent aussi sur un titre, le decoupage ne change rien
+        while self._lignes:
+            fin = next((j for j in range(1, len(self._lignes))
+                        if self._lignes[j].lstrip().startswith('## ')), None)
+            if fin is None:
+                if not final:
+                    return
+                fin = len(self._lignes)
+            lignes, reste = self._lignes[:fin], self._lignes[fin:]
+            self._convertir_section(lignes)
+            self._lignes = reste
+
+    def _etat_neutre(self) -> bool:
+        return not (self.in_box or self.in_html_block or self.contexte.in_first_page_header)
+
+    def _convertir_section(self, lignes: list):
+        """Convertit une section H2 complete, ou la recopie depuis le cache."""
+        cle = None
+        if self._etat_neutre() and not any(
+                marqueur in ligne for ligne in lignes for marqueur in _MARQUEURS_NON_CACHABLES):
+            cle = CacheSectionsDocx.cle(lignes, self.contexte)
+
+        body = self.doc.element.body
+        sect_pr = body.sectPr
+        elements = self.cache.lire(cle) if cle else None
+        if elements is not None:
+            for element in elements:
+                copie = copy.deepcopy(element)
+                if sect_pr is not None:
+                    sect_pr.addprevious(copie)
+                else:
+                    body.append(copie)
+            if self.progression:
+                for ligne in lignes:
+                    if ligne.strip().startswith('## '):
+                        self._signaler_section(ligne.strip()[3:])
+            self.stats_sections['cache'] += 1
+            return
+
+        avant = len(body) - (1 if sect_pr is not None else 0)
+        self._lignes, self._index = lignes, 0
+        self._convertir_lignes(final=True)
+        self.stats_sections['converties'] += 1
+        if cle and self._etat_neutre():
+            apres = len(body) - (1 if sect_pr is not None else 0)
+            self.cache.ecrire(cle, list(body)[avant:apres])
+
+    def _convertir_lignes(self, final: bool):
+        doc = self.doc
+        contexte = self.contexte
+        lignes = self._lignes
+        i = self._index
+
+        while i < len(lignes):
+            ligne = lignes[i]
+            ligne_strip = ligne.strip()
+
+            # Detecter debut/fin de box (encadré)
+            if 'BOX_START}' in ligne_strip:
+                self.in_box = True
+                # Créer un tableau avec une seule cellule pour faire l'encadré
+                self.box_table = doc.add_table(rows=1, cols=1)
+                self.box_table.alignment = WD_TABLE_ALIGNMENT.CENTER
+                # Appliquer les bordures
+                appliquer_bordures_tableau(self.box_table)
+                i += 1
+                continue
+            if 'BOX_END}' in ligne_strip:
+                self.in_box = False
+                self.box_table = None
+                i += 1
+                continue
+
+            # Detecter debut/fin de header de premiere page
+            if '{FIRST_PAGE_HEADER_START}' in ligne_strip:
+                contexte.in_first_page_header = True
+                contexte.first_page_header_content = []  # Reset le buffer
+                i += 1
+                continue
+            if '{FIRST_PAGE_HEADER_END}' in ligne_strip:
+                contexte.in_first_page_header = False
+                # Analyser le contenu collecte et l'ajouter au vrai header Word
+                # Format attendu: reference (ligne 1), initiales (ligne 2), date (ligne 3+)
+                reference = ""
+                initiales = ""
+                date_str = ""
+                for idx, line in enumerate(contexte.first_page_header_content):
+                    if idx == 0:
+                        reference = line
+                    elif idx == 1:
+                        initiales = line
+                    else:
+                        date_str = line
+                        break
+                # Configurer le header de premiere page avec l'espace vide + contenu
+                configurer_header_premiere_page(doc, lignes_vides=20)
+                ajouter_contenu_header_premiere_page(doc, reference, initiales, date_str)
+                i += 1
+                continue
+
+            # Collecter ligne header de premiere page (reference, initiales, date)
+            if contexte.in_first_page_header and ligne_strip:
+                contexte.first_page_header_content.append(ligne_strip)
+                i += 1
+                continue
+
+            # Ignorer lignes vides
+            if not ligne_strip:
+                i += 1
+                continue
+
+            # Flux incomplet: attendre la fin d'un eventuel tableau
+            if not final and not self._fin_tableau_connue(i):
+                break
 
-        # Ignorer lignes vides
-        if not ligne_strip:
+            # CORRECTION 2: Detecter tableaux Markdown (format standard avec |)
+            est_tableau, fin_idx, donnees = detecter_tableau_markdown(lignes, i)
+            if est_tableau:
+                ajouter_tableau_word(doc, donnees, contexte)
+                i = fin_idx
+                continue
+
+            # CORRECTION 6: Detecter tableaux "aplatis" (convertis depuis DOC sans delimiteurs)
+            est_tableau_aplati, fin_idx_aplati, donnees_aplati = detecter_tableau_aplati(lignes, i)
+            if est_tableau_aplati:
+                ajouter_tableau_word(doc, donnees_aplati, contexte)
+                i = fin_idx_aplati
+                continue
+
+            # Traiter blocs HTML
+            if '<div' in ligne_strip:
+                if self.parser is None:
+                    self.parser = NotarialHTMLParser(doc, contexte)
+                self.in_html_block = True
+                self.html_buffer = ligne + "\n"
+                i += 1
+                continue
+
+            if self.in_html_block:
+                self.html_buffer += ligne + "\n"
+                if '</div>' in ligne_strip:
+                    self.parser.feed(self.html_buffer)
+                    self.html_buffer = ""
+                    self.in_html_block = False
+                i += 1
+                continue
+
+            # Ligne markdown simple
+            # Si on est dans une box, ajouter le contenu dans la cellule du tableau
+            if self.in_box and self.box_table:
+                cell = self.box_table.rows[0].cells[0]
+                traiter_ligne_markdown_dans_conteneur(ligne_strip, cell, contexte)
+            else:
+                traiter_ligne_markdown(ligne_strip, doc, contexte)
+                if self.progression and ligne_strip.startswith('## '):
+                    self._signaler_section(ligne_strip[3:])
             i += 1
-            continue
 
-        # CORRECTION 2: Detecter tableaux Markdown (format standard avec |)
-        est_tableau, fin_idx, donnees = detecter_tableau_markdown(lignes, i)
-        if est_tableau:
-            ajouter_tableau_word(doc, donnees)
-            i = fin_idx
-            continue
+        # Liberer les lignes deja converties
+        del lignes[:i]
+        self._index = 0
 
-        # CORRECTION 6: Detecter tableaux "aplatis" (convertis depuis DOC sans delimiteurs)
-        est_tableau_aplati, fin_idx_aplati, donnees_aplati = detecter_tableau_aplati(lignes, i)
-        if est_tableau_aplati:
-            ajouter_tableau_word(doc, donnees_aplati)
-            i = fin_idx_aplati
-            continue
+    def _signaler_section(self, titre: str):
+        titre = titre.replace(PLACEHOLDER_START, '').replace(PLACEHOLDER_END, '')
+        self.progression({'section': titre.strip(), 'index': self.nb_sections})
+        self.nb_sections += 1
 
-        # Traiter blocs HTML
-        if has_html and '<div' in ligne_strip:
-            in_html_block = True
-            html_buffer = ligne + "\n"
-            i += 1
-            continue
 
-        if in_html_block:
-            html_buffer += ligne + "\n"
-            if '</div>' in ligne_strip:
-                parser.feed(html_buffer)
-                html_buffer = ""
-                in_html_block = False
-            i += 1
-            continue
+def convertir_contenu_vers_docx(contenu: str, doc: Document, contexte: Optional[ContexteExport] = None,
+                                cache: Optional[CacheSectionsDocx] = None):
+    """Convertit le contenu HTML/Markdown vers Word (cache: voir ConvertisseurMarkdownDocx)."""
 
-        # Ligne markdown simple
-        # Si on est dans une box, ajouter le contenu dans la cellule du tableau
-        if in_box and box_table:
-            cell = box_table.rows[0].cells[0]
-            traiter_ligne_markdown_dans_conteneur(ligne_strip, cell)
-        else:
-            traiter_ligne_markdown(ligne_strip, doc)
-        i += 1
+    # Nettoyer les caracteres de controle invalides pour XML
+    contenu = nettoyer_texte_xml(contenu)
+
+    # CORRECTION 3: Supprimer tous les commentaires HTML
+    contenu = re.sub(r'<!--.*?-->', '', contenu, flags=re.DOTALL)
+    contenu = re.sub(r'\n\s*\n\s*\n', '\n\n', contenu)
 
+    lignes = [_preparer_ligne(ligne) for ligne in contenu.split('\n')]
+    ConvertisseurMarkdownDocx(doc, contexte, cache=cache).convertir_lignes(lignes)
 
-def traiter_ligne_markdown_dans_conteneur(ligne: str, cell):
+
+def traiter_ligne_markdown_dans_conteneur(ligne: str, cell, contexte: Optional[ContexteExport] = None):
     """
     Traite une ligne de Markdown et l'ajoute dans une cellule de tableau (pour les encadrés).
     Utilise les mêmes styles que traiter_ligne_markdown mais adapté pour un conteneur.
     """
+    contexte = contexte or ContexteExport()
     # Ignorer separateurs
     if ligne in ['---', '***', '___']:
         return
@@ -1714,7 +2054,7 @@ def traiter_ligne_markdown_dans_conteneur(ligne: str, cell):
                     elif niveau == 2:
                         run.font.small_caps = True
                     appliquer_police(run)
-                    if ZONES_GRISEES_ACTIVES and fmt.get('zone_grisee', False):
+                    if contexte.zones_grisees and fmt.get('zone_grisee', False):
                         appliquer_fond_gris(run)
         return
 
@@ -1725,10 +2065,10 @@ def traiter_ligne_markdown_dans_conteneur(ligne: str, cell):
     para.paragraph_format.space_before = Pt(0)
     para.paragraph_format.line_spacing = 1.0
     para.paragraph_format.first_line_indent = Mm(12.51)
-    ajouter_texte_formate(para, ligne)
+    ajouter_texte_formate(para, ligne, contexte=contexte)
 
 
-def traiter_ligne_markdown(ligne: str, doc: Document):
+def traiter_ligne_markdown(ligne: str, doc: Document, contexte: Optional[ContexteExport] = None):
     """
     Traite une ligne de Markdown et l'ajoute au document.
     Applique les styles selon l'analyse du RTF original:
@@ -1760,7 +2100,7 @@ def traiter_ligne_markdown(ligne: str, doc: Document):
         else:  # niveau 5+
             para = doc.add_paragraph(style='Heading 5')
         # Utiliser ajouter_texte_formate pour gérer les zones grisées (avec bold forcé pour titres)
-        ajouter_texte_formate(para, texte, force_bold=True)
+        ajouter_texte_formate(para, texte, force_bold=True, contexte=contexte)
         return
 
     # Listes a puces
@@ -1773,7 +2113,7 @@ def traiter_ligne_markdown(ligne: str, doc: Document):
         texte_liste = ligne[2:]
         run = para.add_run('- ')
         appliquer_police(run)
-        ajouter_texte_formate(para, texte_liste)
+        ajouter_texte_formate(para, texte_liste, contexte=contexte)
         return
 
     # Titres notariaux (texte en gras)
@@ -1787,7 +2127,7 @@ def traiter_ligne_markdown(ligne: str, doc: Document):
         # Titre principal → Heading 1 (bold, ALL CAPS, underline, centered)
         para = doc.add_paragraph(style='Heading 1')
         # Utiliser ajouter_texte_formate pour gérer les zones grisées dans les titres
-        ajouter_texte_formate(para, texte_clean, force_bold=True)
+        ajouter_texte_formate(para, texte_clean, force_bold=True, contexte=contexte)
         return
 
     # Sous-titres notariaux - detecter avec ou sans ** marqueurs
@@ -1796,7 +2136,7 @@ def traiter_ligne_markdown(ligne: str, doc: Document):
         # Sous-titre → Heading 2 (bold, small caps, underline)
         para = doc.add_paragraph(style='Heading 2')
         # Utiliser ajouter_texte_formate pour gérer les zones grisées dans les titres
-        ajouter_texte_formate(para, texte_clean, force_bold=True)
+        ajouter_texte_formate(para, texte_clean, force_bold=True, contexte=contexte)
         return
 
     # Paragraphe normal - EXACTEMENT comme l'original
@@ -1805,13 +2145,23 @@ def traiter_ligne_markdown(ligne: str, doc: Document):
     para.paragraph_format.space_after = Pt(0)  # Original: pas d'espace après
     para.paragraph_format.space_before = Pt(0)
     para.paragraph_format.first_line_indent = Mm(12.51)  # Original: 1.251cm
-    ajouter_texte_formate(para, ligne)
+    ajouter_texte_formate(para, ligne, contexte=contexte)
 
 
 # =============================================================================
 # EXPORT PRINCIPAL
 # =============================================================================
 
+def _creer_document() -> Document:
+    """Cree un document Word avec styles, marges et pagination des trames originales."""
+    doc = Document()
+    configurer_styles(doc)
+    configurer_marges(doc)
+    configurer_compatibilite(doc)  # CORRECTION 5
+    ajouter_pagination(doc)
+    return doc
+
+
 def exporter_docx(chemin_entree: Path, chemin_sortie: Path, zones_grisees: bool = False) -> bool:
     """
     Exporte un fichier HTML/Markdown vers DOCX.
@@ -1821,18 +2171,63 @@ def exporter_docx(chemin_entree: Path, chemin_sortie: Path, zones_grisees: bool
         chemin_sortie: Fichier DOCX de sortie
         zones_grisees: Si True, conserve les zones grisees sur les variables remplies
     """
-    global ZONES_GRISEES_ACTIVES
-    ZONES_GRISEES_ACTIVES = zones_grisees
-
     with open(chemin_entree, 'r', encoding='utf-8') as f:
         contenu = f.read()
 
-    doc = Document()
-    configurer_styles(doc)
-    configurer_marges(doc)
-    configurer_compatibilite(doc)  # CORRECTION 5
-    ajouter_pagination(doc)
-    convertir_contenu_vers_docx(contenu, doc)
+    doc = _creer_document()
+    convertir_contenu_vers_docx(
+        contenu, doc, ContexteExport(zones_grisees=zones_grisees), cache=get_cache_sections_docx()
+    )
+
+    chemin_sortie.parent.mkdir(parents=True, exist_ok=True)
+    doc.save(str(chemin_sortie))
+
+    return True
+
+
+def exporter_docx_flux(
+    fragments: Iterable[str],
+    chemin_sortie: Path,
+    zones_grisees: bool = False,
+    chemin_markdown: Optional[Path] = None,
+    progression: Optional[Callable[[Dict[str, Any]], None]] = None
+) -> bool:
+    """
+    Exporte vers DOCX un acte fourni par fragments, au fil du rendu.
+
+    Le document Word est construit pendant l'assemblage (ex: fragments issus de
+    AssembleurActe.assembler_flux), sans relire de fichier intermediaire ni
+    garder l'acte complet en memoire.
+
+    Args:
+        fragments: Fragments de texte HTML/Markdown, dans l'ordre
+        chemin_sortie: Fichier DOCX de sortie
+        zones_grisees: Si True, conserve les zones grisees sur les variables remplies
+        chemin_markdown: Si fourni, les fragments y sont recopies au fil de l'eau
+        progression: Callback appele a chaque section H2 convertie
+
+    Les sections H2 inchangees depuis un export precedent sont reprises du
+    cache de sections (get_cache_sections_docx) au lieu d'etre reconverties.
+    """
+    doc = _creer_document()
+    convertisseur = ConvertisseurMarkdownDocx(
+        doc, ContexteExport(zones_grisees=zones_grisees), progression=progression,
+        cache=get_cache_sections_docx()
+    )
+
+    copie = None
+    if chemin_markdown:
+        chemin_markdown.parent.mkdir(parents=True, exist_ok=True)
+        copie = open(chemin_markdown, 'w', encoding='utf-8')
+    try:
+        for fragment in fragments:
+            if copie:
+                copie.write(fragment)
+            convertisseur.alimenter(fragment)
+        convertisseur.terminer()
+    finally:
+        if copie:
+            copie.close()
 
     chemin_sortie.parent.mkdir(parents=True, exist_ok=True)
     doc.save(str(chemin_sortie))
@@ -0,0 +1,377 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+registre_schemas.py
+-------------------
+Registre des catalogues de questions (schemas/questions_*.json), partagé
+par le process.
+
+Chaque `CollecteurInteractif(...)` et chaque `load_state` relisaient et
+re-parsaient le schéma JSON (~150 Ko pour la promesse), puis les méthodes
+parcouraient toutes les sections pour retrouver une question. Le registre:
+
+- charge chaque schéma une fois, et le recharge si son (mtime, taille)
+  change (édition pendant que l'API tourne);
+- fige le contenu (`DictFige` / `ListeFigee`): une seule copie partagée
+  par tous les collecteurs, qu'aucun ne peut modifier par mégarde;
+- précalcule les index: id de question -> question, variable -> question,
+  id -> variable (sous-questions comprises), et pour chaque section une
+  fonction d'applicabilité compilée (condition + catégorie de bien).
+
+Usage:
+    from execution.core.registre_schemas import get_registre_schemas
+
+    catalogue = get_registre_schemas().catalogue("questions_promesse_vente.json")
+    catalogue.questions["promettant_nom"]
+    catalogue.sections_applicables(donnees)  # ['1_type_acte', '2_promettant', ...]
+"""
+
+import json
+import logging
+import re
+import threading
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+SCHEMAS_DIR = PROJECT_ROOT / "schemas"
+
+
+# =============================================================================
+# Contenu figé
+# =============================================================================
+
+def _lecture_seule(*_args, **_kwargs):
+    raise TypeError("Schéma partagé en lecture seule: copier (copy.deepcopy) avant de modifier")
+
+
+class DictFige(dict):
+    """dict en lecture seule. Reste un dict (isinstance, json.dumps); ses copies sont des dict normaux."""
+
+    __slots__ = ()
+    __setitem__ = __delitem__ = __ior__ = _lecture_seule
+    clear = pop = popitem = setdefault = update = _lecture_seule
+
+    def __reduce__(self):
+        return (dict, (dict(self),))
+
+    def copy(self) -> Dict:
+        return dict(self)
+
+
+class ListeFigee(list):
+    """list en lecture seule (mêmes garanties que DictFige)."""
+
+    __slots__ = ()
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _lecture_seule
+    append = extend = insert = pop = remove = clear = sort = reverse = _lecture_seule
+
+    def __reduce__(self):
+        return (list, (list(self),))
+
+    def copy(self) -> List:
+        return list(self)
+
+
+def figer(valeur: Any) -> Any:
+    """Copie figée (récursive) d'un contenu JSON."""
+    if isinstance(valeur, dict):
+        return DictFige((cle, figer(v)) for cle, v in valeur.items())
+    if isinstance(valeur, list):
+        return ListeFigee(figer(v) for v in valeur)
+    return valeur
+
+
+# =============================================================================
+# Conditions compilées
+# =============================================================================
+
+_RE_CONDITION_SECTION = re.compile(r'([\w.]+)\s*(==|!=|>|<)\s*(.+)')
+
+
+def _valeur(donnees: Any, chemin: Tuple[str, ...]) -> Any:
+    for cle in chemin:
+        if not isinstance(donnees, dict) or cle not in donnees:
+            return None
+        donnees = donnees[cle]
+    return donnees
+
+
+@lru_cache(maxsize=512)
+def compiler_condition_section(condition: str) -> Callable[[Dict], bool]:
+    """
+    Compile une condition de section (ex: "mobilier.existe == true").
+
+    Même sémantique que l'évaluation à la volée: condition non reconnue
+    (ex: "toujours") ou comparaison impossible -> applicable; valeur
+    absente -> non applicable.
+    """
+    match = _RE_CONDITION_SECTION.match(condition or "")
+    if not match:
+        return lambda donnees: True
+
+    var_path, op, attendu = match.groups()
+    attendu = attendu.strip().strip("'\"")
+    attendu_min = attendu.lower()
+    chemin = tuple(var_path.split('.'))
+
+    def applicable(donnees: Dict) -> bool:
+        actuelle = _valeur(donnees, chemin)
+        if actuelle is None:
+            return False
+        try:
+            if op == '==':
+                return str(actuelle).lower() == attendu_min
+            if op == '!=':
+                return str(actuelle).lower() != attendu_min
+            if op == '>':
+                return float(actuelle) > float(attendu)
+            return float(actuelle) < float(attendu)
+        except Exception:
+            return True
+
+    return applicable
+
+
+@lru_cache(maxsize=512)
+def compiler_condition_reponses(condition: str) -> Callable[[Dict], bool]:
+    """Compile une condition de question sur les réponses (ex: "financement_type != comptant")."""
+    if not condition or "!=" not in condition:
+        return lambda reponses: True
+    champ, valeur = (p.strip() for p in condition.split("!=", 1))
+    return lambda reponses: reponses.get(champ) != valeur
+
+
+def categorie_bien(donnees: Dict) -> str:
+    """
+    Catégorie de bien des données: copropriete, hors_copropriete ou terrain_a_batir.
+
+    1. _metadata.categorie_bien (choix explicite du notaire)
+    2. Détection automatique via bien.copropriete, bien.lotissement, bien.type_bien
+    """
+    categorie = _valeur(donnees, ('_metadata', 'categorie_bien'))
+    if categorie:
+        # IMPORTANT: vérifier 'hors' et 'terrain' AVANT 'copropri'
+        # car 'hors_copropriete' contient 'copropri' comme substring
+        cat_lower = str(categorie).lower()
+        if 'hors' in cat_lower or 'maison' in cat_lower:
+            return 'hors_copropriete'
+        if 'terrain' in cat_lower:
+            return 'terrain_a_batir'
+        return 'copropriete'
+
+    bien = _valeur(donnees, ('bien',)) or {}
+    type_bien = str(bien.get('type_bien', '')).lower()
+    copropriete = bien.get('copropriete')
+
+    if bien.get('lotissement') or type_bien in ('terrain', 'parcelle'):
+        return 'terrain_a_batir'
+    if copropriete is True or bien.get('lots'):
+        return 'copropriete'
+    if copropriete is False or type_bien in ('maison', 'villa', 'local_commercial', 'immeuble'):
+        return 'hors_copropriete'
+    return 'copropriete'
+
+
+# =============================================================================
+# Catalogue
+# =============================================================================
+
+def _sous_questions(question: Mapping) -> List[Mapping]:
+    """Sous-questions d'une question ({condition: [questions]} ou liste)."""
+    sous_q = question.get('sous_questions')
+    if isinstance(sous_q, dict):
+        listes = sous_q.values()
+    elif isinstance(sous_q, list):
+        listes = [sous_q]
+    else:
+        return []
+    return [sq for liste in listes if isinstance(liste, list) for sq in liste if isinstance(sq, dict)]
+
+
+@dataclass(frozen=True)
+class CatalogueQuestions:
+    """Schéma de questions figé et ses index (partagé, en lecture seule)."""
+    nom: str
+    schema: DictFige
+    sections: Tuple[Tuple[str, DictFige], ...]  # (clé, section), ordre de parcours
+    questions: Mapping[str, DictFige]  # id -> question (sous-questions comprises)
+    par_variable: Mapping[str, DictFige]  # variable -> question
+    variable_par_id: Mapping[str, str]
+    section_par_question: Mapping[str, str]
+    applicabilite: Mapping[str, Callable[[Dict, str], bool]]  # section -> f(donnees, categorie)
+    conditions_questions: Mapping[str, Callable[[Dict], bool]]  # id -> f(reponses)
+    signature: Optional[Tuple[int, int]] = None  # (mtime_ns, taille) du fichier source
+
+    @classmethod
+    def construire(cls, nom: str, contenu: Dict, signature: Optional[Tuple[int, int]] = None) -> "CatalogueQuestions":
+        schema = figer(contenu)
+        brutes = schema.get('sections', {})
+        if isinstance(brutes, dict):
+            # Clés préfixées par leur rang ("2_promettant"): l'ordre trié est l'ordre de collecte
+            sections = tuple((cle, brutes[cle]) for cle in sorted(brutes))
+        else:
+            sections = tuple((s.get('id', str(i)), s) for i, s in enumerate(brutes))
+
+        questions: Dict[str, DictFige] = {}
+        par_variable: Dict[str, DictFige] = {}
+        variable_par_id: Dict[str, str] = {}
+        section_par_question: Dict[str, str] = {}
+        applicabilite: Dict[str, Callable[[Dict, str], bool]] = {}
+        conditions_questions: Dict[str, Callable[[Dict], bool]] = {}
+
+        for cle, section in sections:
+            applicabilite[cle] = cls._compiler_section(section)
+            for question in section.get('questions', []):
+                for q in [question] + _sous_questions(question):
+                    qid, variable = q.get('id', ''), q.get('variable', '')
+                    if qid:
+                        questions.setdefault(qid, q)
+                        section_par_question.setdefault(qid, cle)
+                        if q.get('condition'):
+                            conditions_questions[qid] = compiler_condition_reponses(q['condition'])
+                    if variable:
+                        par_variable.setdefault(variable, q)
+                        if qid:
+                            variable_par_id[qid] = variable
+
+        return cls(
+            nom=nom,
+            schema=schema,
+            sections=sections,
+            questions=MappingProxyType(questions),
+            par_variable=MappingProxyType(par_variable),
+            variable_par_id=MappingProxyType(variable_par_id),
+            section_par_question=MappingProxyType(section_par_question),
+            applicabilite=MappingProxyType(applicabilite),
+            conditions_questions=MappingProxyType(conditions_questions),
+            signature=signature,
+        )
+
+    @staticmethod
+    def _compiler_section(section: Mapping) -> Callable[[Dict, str], bool]:
+        condition = section.get('condition', '')
+        condition_categorie = section.get('condition_categorie', '')
+        verifier = compiler_condition_section(condition) if condition else None
+
+        def applicable(donnees: Dict, categorie: str) -> bool:
+            if verifier is not None and not verifier(donnees):
+                return False
+            return not condition_categorie or condition_categorie == categorie
+
+        return applicable
+
+    def section(self, cle: str) -> Optional[DictFige]:
+        sections = self.schema.get('sections', {})
+        return sections.get(cle) if isinstance(sections, dict) else dict(self.sections).get(cle)
+
+    def section_applicable(self, cle: str, donnees: Dict, categorie: Optional[str] = None) -> bool:
+        verifier = self.applicabilite.get(cle)
+        if verifier is None:
+            return False
+        return verifier(donnees, categorie if categorie is not None else categorie_bien(donnees))
+
+    def sections_applicables(self, donnees: Dict) -> List[str]:
+        """Clés des sections applicables aux données, dans l'ordre de collecte."""
+        categorie = categorie_bien(donnees)
+        return [cle for cle, _ in self.sections if self.applicabilite[cle](donnees, categorie)]
+
+    def question_applicable(self, question_id: str, reponses: Dict) -> bool:
+        verifier = self.conditions_questions.get(question_id)
+        return verifier is None or verifier(reponses)
+
+
+# =============================================================================
+# Registre
+# =============================================================================
+
+class RegistreSchemas:
+    """
+    Catalogues chargés une fois par process, rechargés si le fichier change.
+
+    Args:
+        dossier: Dossier des schémas (défaut: schemas/)
+    """
+
+    def __init__(self, dossier: Optional[Path] = None):
+        self.dossier = Path(dossier or SCHEMAS_DIR)
+        self._catalogues: Dict[str, CatalogueQuestions] = {}
+        self._verrou = threading.Lock()
+        self._stats = {"chargements": 0, "rechargements": 0, "hits": 0}
+
+    def _chemin(self, nom: str) -> Path:
+        chemin = Path(nom)
+        return chemin if chemin.is_absolute() else self.dossier / nom
+
+    def catalogue(self, nom: str) -> CatalogueQuestions:
+        """
+        Catalogue du schéma `nom` (fichier de schemas/ ou chemin absolu).
+
+        Raises:
+            FileNotFoundError: schéma introuvable
+        """
+        chemin = self._chemin(nom)
+        try:
+            st = chemin.stat()
+        except OSError:
+            raise FileNotFoundError(f"Schema Q&R introuvable: {chemin}")
+        signature = (st.st_mtime_ns, st.st_size)
+
+        with self._verrou:
+            actuel = self._catalogues.get(nom)
+            if actuel is not None and actuel.signature == signature:
+                self._stats["hits"] += 1
+                return actuel
+
+        # Parse hors verrou: deux premiers appels concurrents parsent chacun, le dernier gagne
+        with open(chemin, 'r', encoding='utf-8') as f:
+            catalogue = CatalogueQuestions.construire(nom, json.load(f), signature)
+
+        with self._verrou:
+            self._stats["rechargements" if nom in self._catalogues else "chargements"] += 1
+            self._catalogues[nom] = catalogue
+        if actuel is not None:
+            logger.info(f"Schema {nom} modifie sur disque, recharge")
+        return catalogue
+
+    def depuis_donnees(self, nom: str, contenu: Dict) -> CatalogueQuestions:
+        """Catalogue d'un schéma défini en code (construit au premier appel)."""
+        with self._verrou:
+            actuel = self._catalogues.get(nom)
+            if actuel is not None and actuel.signature is None:
+                self._stats["hits"] += 1
+                return actuel
+        catalogue = CatalogueQuestions.construire(nom, contenu)
+        with self._verrou:
+            self._stats["chargements"] += 1
+            return self._catalogues.setdefault(nom, catalogue)
+
+    def invalider(self, nom: Optional[str] = None):
+        """Oublie un catalogue (ou tous): rechargé au prochain accès."""
+        with self._verrou:
+            if nom is None:
+                self._catalogues.clear()
+            else:
+                self._catalogues.pop(nom, None)
+
+    def statistiques(self) -> Dict[str, int]:
+        with self._verrou:
+            return {"catalogues": len(self._catalogues), **self._stats}
+
+
+_registre: Optional[RegistreSchemas] = None
+_registre_verrou = threading.Lock()
+
+
+def get_registre_schemas() -> RegistreSchemas:
+    """Retourne le registre partagé du process (créé au premier appel)."""
+    global _registre
+    with _registre_verrou:
+        if _registre is None:
+            _registre = RegistreSchemas()
+        return _registre
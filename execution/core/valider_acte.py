@@ -13,6 +13,11 @@ Fonctionnalités:
 - Vérifie la validité des références
 - Vérifie la logique juridique
 
+Les règles sont déclarées dans REGLES (chemins lus + catégories de bien):
+les données sont indexées une seule fois par chemin, seules les règles
+applicables sont évaluées, et `revalider()` ne rejoue que les règles qui
+dépendent des chemins modifiés (validation à chaque réponse Q&R).
+
 Usage:
     python valider_acte.py --donnees <donnees.json> --schema <schema.json> [--strict]
 
@@ -23,10 +28,11 @@ Exemple:
 
 import json
 import argparse
+import hashlib
 import re
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, List, Any, Tuple, Optional
+from typing import Dict, List, Any, Tuple, Optional, FrozenSet, Iterable
 from dataclasses import dataclass, field
 from enum import Enum
 
@@ -67,6 +73,197 @@ class RapportValidation:
         else:
             self.infos.append(resultat)
 
+    def resultats(self) -> List[ResultatValidation]:
+        """Tous les résultats, erreurs puis avertissements puis infos."""
+        return self.erreurs + self.avertissements + self.infos
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Format JSON (CLI --json, API)."""
+        def _liste(resultats):
+            return [{'code': r.code, 'message': r.message, 'chemin': r.chemin} for r in resultats]
+        return {
+            'valide': self.valide,
+            'erreurs': _liste(self.erreurs),
+            'avertissements': _liste(self.avertissements),
+            'infos': _liste(self.infos),
+        }
+
+
+# =============================================================================
+# REGISTRE DES RÈGLES
+# =============================================================================
+
+COPROPRIETE = "copropriete"
+HORS_COPROPRIETE = "hors_copropriete"
+TERRAIN_A_BATIR = "terrain_a_batir"
+
+BATI = frozenset({COPROPRIETE, HORS_COPROPRIETE})
+
+
+@dataclass(frozen=True)
+class Regle:
+    """
+    Règle de validation déclarative.
+
+    Attributes:
+        methode: Nom de la méthode `_valider_*` du ValidateurActe
+        chemins: Chemins lus par la règle (préfixes, ex: "bien.lots")
+        categories: Catégories de bien concernées (None = toutes)
+        si_present: Si True, la règle n'est évaluée que si l'un de ses
+            chemins existe (elle ne signale rien sur données absentes)
+    """
+    methode: str
+    chemins: Tuple[str, ...]
+    categories: Optional[FrozenSet[str]] = None
+    si_present: bool = True
+
+    def applicable(self, categorie: str, index: Dict[str, Any]) -> bool:
+        """La règle doit-elle être évaluée pour ces données?"""
+        if self.categories is not None and categorie not in self.categories:
+            return False
+        return not self.si_present or any(c in index for c in self.chemins)
+
+    def depend_de(self, chemins_modifies: Iterable[str]) -> bool:
+        """La règle lit-elle l'un des chemins modifiés (ou un parent/enfant)?"""
+        return any(
+            m == c or m.startswith(c + '.') or c.startswith(m + '.')
+            for m in chemins_modifies
+            for c in self.chemins
+        )
+
+
+# Ordre = ordre du rapport (identique à l'enchaînement historique)
+REGLES_BASE: Tuple[Regle, ...] = (
+    Regle('_valider_completude', ('acte', 'vendeurs', 'acquereurs', 'bien', 'prix'), si_present=False),
+    Regle('_valider_dates', ('acte.date', 'vendeurs', 'acquereurs')),
+    Regle('_valider_montants',
+          ('prix.montant', 'paiement', 'quotites_vendues', 'quotites_acquises', 'copropriete'),
+          si_present=False),
+    Regle('_valider_references', ('bien.cadastre', 'diagnostics.dpe')),
+    Regle('_valider_logique_juridique', ('paiement.prets', 'copropriete', 'vendeurs', 'acquereurs')),
+    Regle('_valider_personnes', ('vendeurs', 'acquereurs')),
+)
+
+REGLES: Tuple[Regle, ...] = REGLES_BASE + (
+    # Règles avancées
+    Regle('_valider_superficie_carrez', ('bien.lots',), frozenset({COPROPRIETE})),
+    Regle('_valider_diagnostics_dpe', ('diagnostics.dpe', 'diagnostics.audit_energetique'), BATI),
+    Regle('_valider_diagnostics_obligatoires',
+          ('bien.annee_construction', 'bien.annee_installation_electrique', 'diagnostics'), BATI),
+    Regle('_valider_coherence_adresse', ('bien.adresse',)),
+    Regle('_valider_coherence_financiere', ('prix.montant', 'paiement', 'bien.usage_futur')),
+    Regle('_valider_tantièmes', ('bien.lots',), frozenset({COPROPRIETE})),
+    # Règles métier v1.5.0
+    Regle('_valider_intervention_conjoint', ('vendeurs', 'promettants')),
+    Regle('_valider_diagnostics_validite', ('diagnostics', 'acte.date')),
+    Regle('_valider_coherence_dates_promesse',
+          ('delai_realisation', 'delais.date_realisation', 'acte.date', 'conditions_suspensives.pret')),
+    Regle('_valider_prix_coherent',
+          ('prix.montant', 'bien.superficie_carrez', 'bien.lots', 'bien.adresse.code_postal')),
+    Regle('_valider_dpe_energie', ('diagnostics.dpe', 'diagnostics.audit_energetique'), BATI),
+    # Règles métier v1.5.1
+    Regle('_valider_quotites_croisees',
+          ('vendeurs', 'promettants', 'acquereurs', 'beneficiaires', 'quotites_vendues', 'quotites_acquises')),
+    Regle('_valider_cadastre_coherent', ('bien.cadastre', 'bien.adresse.commune'), si_present=False),
+    Regle('_valider_impots_plus_value',
+          ('plus_value', 'bien.usage', 'bien.usage_actuel', 'origine_propriete', 'vendeurs', 'promettants')),
+)
+
+
+def indexer_chemins(donnees: Any) -> Dict[str, Any]:
+    """
+    Aplatit les données en index {chemin: valeur} (un seul parcours).
+
+    Les nœuds intermédiaires sont indexés aussi: "bien", "bien.lots",
+    "bien.lots.0", "bien.lots.0.numero"...
+    """
+    index: Dict[str, Any] = {}
+    pile = [("", donnees)]
+    while pile:
+        prefixe, valeur = pile.pop()
+        if isinstance(valeur, dict):
+            elements = valeur.items()
+        elif isinstance(valeur, list):
+            elements = enumerate(valeur)
+        else:
+            continue
+        for cle, sous_valeur in elements:
+            chemin = f"{prefixe}.{cle}" if prefixe else str(cle)
+            index[chemin] = sous_valeur
+            pile.append((chemin, sous_valeur))
+    return index
+
+
+def empreintes_chemins(index: Dict[str, Any]) -> Dict[str, bytes]:
+    """
+    Empreinte de chaque feuille d'un index de chemins ({chemin: hash}).
+
+    Les conteneurs vides comptent comme feuilles. Seul le hash est gardé:
+    le validateur mis en cache ne conserve pas les valeurs du dossier.
+    """
+    return {
+        chemin: hashlib.blake2b(repr(valeur).encode(), digest_size=8).digest()
+        for chemin, valeur in index.items()
+        if not isinstance(valeur, (dict, list)) or not valeur
+    }
+
+
+def chemins_differents(avant: Dict[str, bytes], apres: Dict[str, bytes]) -> List[str]:
+    """Chemins ajoutés, supprimés ou dont la valeur a changé entre deux empreintes."""
+    return [c for c in avant.keys() | apres.keys() if avant.get(c) != apres.get(c)]
+
+
+def normaliser_chemin(chemin: str) -> str:
+    """Convertit une variable Q&R en chemin pointé: "a[0].b" → "a.0.b", "a[].b" → "a.b"."""
+    return re.sub(r'\[(\d*)\]', lambda m: f".{m.group(1)}" if m.group(1) else "", chemin).strip('.')
+
+
+def detecter_categorie(donnees: Dict[str, Any]) -> str:
+    """
+    Catégorie de bien pour l'applicabilité des règles.
+
+    Même priorité que GestionnairePromesses.detecter_categorie_bien
+    (choix explicite, terrain, copropriété, hors copropriété), défaut
+    copropriété: dans le doute, toutes les règles sont évaluées.
+    """
+    explicite = donnees.get('_categorie_bien') or (donnees.get('_metadata') or {}).get('categorie_bien')
+    if explicite:
+        cat = str(explicite).lower()
+        if 'hors' in cat or 'maison' in cat:
+            return HORS_COPROPRIETE
+        if 'terrain' in cat:
+            return TERRAIN_A_BATIR
+        return COPROPRIETE
+
+    bien = donnees.get('bien') or {}
+    if not bien and donnees.get('biens'):
+        bien = donnees['biens'][0]
+    if not isinstance(bien, dict):
+        return COPROPRIETE
+    copro = donnees.get('copropriete') or {}
+
+    type_bien = str(bien.get('type_bien', '')).lower()
+    nature = str(bien.get('nature', '')).lower()
+    usage = str(bien.get('usage_actuel', '')).lower()
+    terrain = ("terrain", "parcelle", "lot a batir", "lot à bâtir", "terrain a batir", "terrain à bâtir")
+    if type_bien in terrain or nature in terrain or usage in terrain:
+        return TERRAIN_A_BATIR
+    if any(bien.get(k) for k in ('permis_amenager', 'cahier_charges_lotissement', 'viabilisation', 'constructibilite')):
+        return TERRAIN_A_BATIR
+
+    if bien.get('copropriete') is True or bien.get('lots') or bien.get('tantiemes') or bien.get('edd'):
+        return COPROPRIETE
+    if isinstance(copro, dict) and any(copro.get(k) for k in ('syndic', 'nom_syndic', 'immatriculation', 'reglement')):
+        return COPROPRIETE
+
+    maison = ("maison", "villa", "pavillon", "local_commercial", "local commercial",
+              "hangar", "entrepot", "entrepôt", "immeuble", "corps de ferme")
+    if bien.get('copropriete') is False or type_bien in maison or nature in maison:
+        return HORS_COPROPRIETE
+    if bien.get('surface_terrain') or bien.get('groupe_habitations') or bien.get('lotissement'):
+        return HORS_COPROPRIETE
+    return COPROPRIETE
+
 
 class ValidateurActe:
     """
@@ -82,6 +279,13 @@ class ValidateurActe:
         """
         self.schema = schema
         self.rapport = RapportValidation()
+        # État de la dernière validation (pour revalider)
+        self._regles_executees: Tuple[Regle, ...] = ()
+        self._resultats_regles: Dict[str, List[ResultatValidation]] = {}
+        self._categorie: Optional[str] = None
+        self._index: Optional[Dict[str, Any]] = None
+        self._donnees_indexees: Optional[Dict[str, Any]] = None
+        self._empreintes: Dict[str, bytes] = {}
 
     def valider(self, donnees: Dict[str, Any], strict: bool = True) -> RapportValidation:
         """
@@ -94,26 +298,88 @@ class ValidateurActe:
         Returns:
             Rapport de validation
         """
-        self.rapport = RapportValidation()
-
-        # 1. Validation de complétude
-        self._valider_completude(donnees)
-
-        # 2. Validation des dates
-        self._valider_dates(donnees)
+        # Complétude, dates, montants, références, logique juridique, personnes
+        return self._executer_regles(donnees, REGLES_BASE)
+
+    def revalider(
+        self,
+        donnees: Dict[str, Any],
+        chemins_modifies: Optional[Iterable[str]] = None,
+    ) -> RapportValidation:
+        """
+        Revalidation incrémentale après modification de quelques champs.
 
-        # 3. Validation des montants
-        self._valider_montants(donnees)
+        Seules les règles qui lisent l'un des chemins modifiés sont
+        rejouées; les résultats des autres règles sont repris de la
+        validation précédente. Sans validation préalable, ou si la catégorie
+        de bien a changé, toutes les règles sont réévaluées.
 
-        # 4. Validation des références
-        self._valider_references(donnees)
+        Args:
+            donnees: Données à jour
+            chemins_modifies: Chemins modifiés (ex: "prix.montant", "promettants[0].nom").
+                None: déduits en comparant les empreintes des valeurs à celles
+                de la validation précédente (modifications faites ailleurs
+                comprises)
 
-        # 5. Validation de la logique juridique
-        self._valider_logique_juridique(donnees)
+        Returns:
+            Rapport de validation (même contenu qu'une validation complète)
+        """
+        if not self._regles_executees:
+            return self.valider_complet(donnees)
+        if detecter_categorie(donnees) != self._categorie:
+            return self._executer_regles(donnees, self._regles_executees)
+
+        if chemins_modifies is None:
+            empreintes = empreintes_chemins(indexer_chemins(donnees))
+            chemins = chemins_differents(self._empreintes, empreintes)
+            self._empreintes = empreintes
+        else:
+            chemins = [normaliser_chemin(c) for c in chemins_modifies]
+        a_rejouer = {r.methode for r in self._regles_executees if r.depend_de(chemins)}
+        return self._executer_regles(donnees, self._regles_executees, a_rejouer)
+
+    def _executer_regles(
+        self,
+        donnees: Dict[str, Any],
+        regles: Tuple[Regle, ...],
+        a_rejouer: Optional[set] = None,
+    ) -> RapportValidation:
+        """
+        Évalue les règles applicables et assemble le rapport dans l'ordre du registre.
 
-        # 6. Validation des personnes
-        self._valider_personnes(donnees)
+        Args:
+            donnees: Données à valider
+            regles: Règles à considérer
+            a_rejouer: Méthodes à réévaluer (None = toutes); les autres
+                gardent leurs résultats précédents
+        """
+        if a_rejouer is None:
+            self._resultats_regles = {}
+            self._categorie = detecter_categorie(donnees)
+        self._regles_executees = regles
+
+        if a_rejouer is None or a_rejouer:
+            self._index = indexer_chemins(donnees)
+            self._donnees_indexees = donnees
+            self._empreintes = empreintes_chemins(self._index)
+            try:
+                for regle in regles:
+                    if a_rejouer is not None and regle.methode not in a_rejouer:
+                        continue
+                    if not regle.applicable(self._categorie, self._index):
+                        self._resultats_regles[regle.methode] = []
+                        continue
+                    self.rapport = RapportValidation()
+                    getattr(self, regle.methode)(donnees)
+                    self._resultats_regles[regle.methode] = self.rapport.resultats()
+            finally:
+                self._index = None
+                self._donnees_indexees = None
 
+        self.rapport = RapportValidation()
+        for regle in regles:
+            for resultat in self._resultats_regles.get(regle.methode, []):
+                self.rapport.ajouter(resultat)
         return self.rapport
 
     def _get_valeur(self, donnees: Dict, chemin: str) -> Tuple[bool, Any]:
@@ -127,6 +393,9 @@ class ValidateurActe:
         Returns:
             Tuple (trouvé, valeur)
         """
+        if self._index is not None and donnees is self._donnees_indexees and chemin in self._index:
+            return True, self._index[chemin]
+
         parties = chemin.split('.')
         valeur = donnees
         for partie in parties:
@@ -1427,30 +1696,8 @@ class ValidateurActe:
         Returns:
             Rapport de validation enrichi
         """
-        # Validation de base
-        self.valider(donnees, strict)
-
-        # Règles avancées (existantes)
-        self._valider_superficie_carrez(donnees)
-        self._valider_diagnostics_dpe(donnees)
-        self._valider_diagnostics_obligatoires(donnees)
-        self._valider_coherence_adresse(donnees)
-        self._valider_coherence_financiere(donnees)
-        self._valider_tantièmes(donnees)
-
-        # Règles métier v1.5.0
-        self._valider_intervention_conjoint(donnees)
-        self._valider_diagnostics_validite(donnees)
-        self._valider_coherence_dates_promesse(donnees)
-        self._valider_prix_coherent(donnees)
-        self._valider_dpe_energie(donnees)
-
-        # Règles métier v1.5.1
-        self._valider_quotites_croisees(donnees)
-        self._valider_cadastre_coherent(donnees)
-        self._valider_impots_plus_value(donnees)
-
-        return self.rapport
+        # Validation de base + règles avancées, filtrées par catégorie de bien
+        return self._executer_regles(donnees, REGLES)
 
 
 def afficher_rapport(rapport: RapportValidation):
@@ -1545,22 +1792,7 @@ def main():
 
     # Afficher
     if args.json:
-        resultat = {
-            'valide': rapport.valide,
-            'erreurs': [
-                {'code': e.code, 'message': e.message, 'chemin': e.chemin}
-                for e in rapport.erreurs
-            ],
-            'avertissements': [
-                {'code': w.code, 'message': w.message, 'chemin': w.chemin}
-                for w in rapport.avertissements
-            ],
-            'infos': [
-                {'code': i.code, 'message': i.message, 'chemin': i.chemin}
-                for i in rapport.infos
-            ]
-        }
-        print(json.dumps(resultat, ensure_ascii=False, indent=2))
+        print(json.dumps(rapport.to_dict(), ensure_ascii=False, indent=2))
     else:
         afficher_rapport(rapport)
 
@@ -102,7 +102,12 @@ class AgentDB:
 
         if SUPABASE_AVAILABLE and self.url and self.key:
             try:
-                self.client = create_client(self.url, self.key)
+                try:
+                    from execution.database.supabase_client import get_client_partage
+                    self.client = get_client_partage(self.url, self.key)
+                except ImportError:
+                    # Script lancé hors package (python execution/database/...)
+                    self.client = create_client(self.url, self.key)
                 self._offline = False
 
                 # Valider la clé API et récupérer l'etude_id
@@ -165,7 +170,10 @@ class AgentDB:
         limit: int = 10
     ) -> List[Dict]:
         """
-        Recherche des clients par nom (via hash sécurisé).
+        Recherche des clients par nom ou début de nom (via index aveugle).
+
+        Les lignes renvoyées restent chiffrées: SecureClientManager.search_clients
+        déchiffre et écarte les éventuels faux positifs.
 
         Args:
             nom: Nom à rechercher
@@ -184,20 +192,34 @@ class AgentDB:
             print("ERREUR: etude_id requis (via clé API ou paramètre)")
             return []
 
-        # Hash du nom pour recherche
-        nom_hash = self._hash_nom(nom)
-
         try:
-            result = (
+            query = (
                 self.client.table("clients")
                 .select("*")
                 .eq("etude_id", etude_id)
-                .eq("nom_hash", nom_hash)
                 .is_("deleted_at", "null")
                 .eq("anonymized", False)
-                .limit(limit)
-                .execute()
             )
+
+            # Index aveugle (préfixes HMAC) si une clé est configurée,
+            # sinon hash exact du nom complet. Les clients pas encore
+            # réindexés (blind_index vide) restent trouvables par nom_hash
+            try:
+                from execution.security.blind_index import BlindIndex
+                index = BlindIndex.from_env(etude_id)
+            except ImportError:
+                index = None
+            jetons = index.query(nom=nom).required if index else []
+            nom_hash = self._hash_nom(nom)
+            if jetons:
+                query = query.or_(
+                    f"blind_index.cs.{{{','.join(jetons)}}},"
+                    f"and(blind_index.eq.{{}},nom_hash.eq.{nom_hash})"
+                )
+            else:
+                query = query.eq("nom_hash", nom_hash)
+
+            result = query.limit(limit).execute()
             return result.data
         except Exception as e:
             print(f"ERREUR search_client: {e}")
@@ -469,7 +491,8 @@ class AgentDB:
     ) -> None:
         """Enregistre une action dans les logs d'audit.
 
-        Si Supabase est indisponible, ecrit dans un fichier local de fallback
+        L'insert est groupe en arriere-plan par l'ecrivain de telemetrie, qui
+        ecrit dans un fichier local de fallback si Supabase est indisponible
         pour ne jamais perdre de logs de securite.
         """
         log_entry = {
@@ -485,22 +508,19 @@ class AgentDB:
             self._write_local_audit_log(log_entry)
             return
 
-        try:
-            self.client.table("audit_logs").insert({
-                "action": action,
-                "resource_type": resource_type,
-                "etude_id": etude_id,
-                "resource_id": resource_id,
-                "details": details or {}
-            }).execute()
-        except Exception as e:
-            # Fallback: ecrire en local pour ne jamais perdre un log de securite
-            log_entry["supabase_error"] = str(e)
-            self._write_local_audit_log(log_entry)
-            print(f"[AUDIT] Echec Supabase, log sauvegarde localement: {action} {resource_type}")
+        from execution.database.telemetrie import get_telemetrie
+
+        get_telemetrie().enregistrer_audit({**log_entry, "created_at": log_entry["timestamp"]})
 
     def _write_local_audit_log(self, entry: Dict) -> None:
         """Ecrit un log d'audit dans un fichier local de fallback."""
+        try:
+            from execution.database.telemetrie import ecrire_audit_local
+            ecrire_audit_local(entry)
+            return
+        except ImportError:
+            pass
+
         try:
             log_dir = Path(__file__).parent.parent.parent / ".tmp" / "audit_logs"
             log_dir.mkdir(parents=True, exist_ok=True)
@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+etat_agent.py
+-------------
+Persistance incrémentale de l'agent_state des conversations de l'agent.
+
+Au lieu de réécrire tout `conversations.agent_state` (donnees_collectees
+comprises) à chaque tour:
+- chaque tour enregistre un patch JSON (RFC 6902: add/replace/remove) des
+  seuls champs modifiés dans `agent_state_deltas` (un tour sans changement
+  n'écrit rien);
+- tous les `seuil_compaction` versions, l'état complet est recompacté dans
+  `conversations.agent_state` (snapshot) et les patchs antérieurs purgés;
+- un LRU en mémoire garde les conversations actives: au tour suivant, seuls
+  les patchs postérieurs à la version en cache sont relus.
+
+Versionnement optimiste: la clé (conversation_id, version) est unique. Si
+un autre onglet a écrit entre-temps, le patch est rejoué sur la dernière
+version quand les chemins modifiés sont disjoints, sinon `ConflitVersion`.
+
+Seule une table `agent_state_deltas` absente (migration non appliquée)
+fait retomber sur l'écriture du snapshot complet. Toute autre erreur
+d'insertion (timeout...) est propagée: un snapshot écrit sans avancer
+`agent_state_version` serait écrasé par le rejeu des patchs plus anciens.
+
+Usage:
+    from execution.database.etat_agent import get_magasin_etat_agent
+
+    magasin = get_magasin_etat_agent()
+    etat = magasin.charger(supabase, conversation_id)
+    etat.donnees["progress_pct"] = 40
+    magasin.sauvegarder(supabase, etat)
+
+Variables d'environnement:
+    NOTAIRE_ETAT_AGENT_CACHE       Conversations gardées en mémoire (défaut: 256)
+    NOTAIRE_ETAT_AGENT_COMPACTION  Versions entre deux snapshots (défaut: 20)
+"""
+
+import copy
+import logging
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+TABLE_CONVERSATIONS = "conversations"
+TABLE_DELTAS = "agent_state_deltas"
+
+
+class ConflitVersion(RuntimeError):
+    """Levée quand un autre onglet a modifié les mêmes champs entre-temps."""
+
+    def __init__(self, conversation_id: str, version: int, chemins: List[str]):
+        super().__init__(
+            f"agent_state de {conversation_id} modifié en parallèle (version {version}): "
+            f"{', '.join(chemins[:5])}"
+        )
+        self.conversation_id = conversation_id
+        self.version = version
+        self.chemins = chemins
+
+
+# =============================================================================
+# Patchs JSON
+# =============================================================================
+
+def _echapper(cle: str) -> str:
+    return str(cle).replace("~", "~0").replace("/", "~1")
+
+
+def _segments(chemin: str) -> List[str]:
+    return [s.replace("~1", "/").replace("~0", "~") for s in chemin.split("/")[1:]]
+
+
+def calculer_patch(avant: Dict[str, Any], apres: Dict[str, Any], prefixe: str = "") -> List[Dict[str, Any]]:
+    """
+    Patch JSON transformant `avant` en `apres`. Les dictionnaires sont
+    comparés récursivement; les listes et scalaires modifiés sont remplacés.
+    """
+    patch = []
+    for cle in avant:
+        if cle not in apres:
+            patch.append({"op": "remove", "path": f"{prefixe}/{_echapper(cle)}"})
+    for cle, valeur in apres.items():
+        chemin = f"{prefixe}/{_echapper(cle)}"
+        if cle not in avant:
+            patch.append({"op": "add", "path": chemin, "value": copy.deepcopy(valeur)})
+        elif isinstance(valeur, dict) and isinstance(avant[cle], dict):
+            patch.extend(calculer_patch(avant[cle], valeur, chemin))
+        elif valeur != avant[cle] or type(valeur) is not type(avant[cle]):
+            patch.append({"op": "replace", "path": chemin, "value": copy.deepcopy(valeur)})
+    return patch
+
+
+def appliquer_patch(document: Dict[str, Any], patch: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Applique un patch de calculer_patch() sur `document` (modifié en place)."""
+    for operation in patch:
+        *parents, cle = _segments(operation["path"])
+        cible = document
+        for segment in parents:
+            cible = cible.setdefault(segment, {})
+        if operation["op"] == "remove":
+            cible.pop(cle, None)
+        else:
+            cible[cle] = copy.deepcopy(operation["value"])
+    return document
+
+
+def chemins_en_conflit(patch_a: List[Dict], patch_b: List[Dict]) -> List[str]:
+    """Chemins de patch_a égaux, parents ou enfants d'un chemin de patch_b."""
+    chemins_b = [operation["path"] for operation in patch_b]
+    conflits = []
+    for operation in patch_a:
+        a = operation["path"]
+        if any(a == b or b.startswith(a + "/") or a.startswith(b + "/") for b in chemins_b):
+            conflits.append(a)
+    return conflits
+
+
+# =============================================================================
+# Magasin
+# =============================================================================
+
+@dataclass
+class EtatAgent:
+    """agent_state d'une conversation et la version sur laquelle il repose."""
+    conversation_id: str
+    donnees: Dict[str, Any]
+    version: int = 0
+    base: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class _Entree:
+    donnees: Dict[str, Any]
+    version: int
+    version_snapshot: int
+
+
+def _est_conflit_cle(erreur: Exception) -> bool:
+    """Violation de la clé (conversation_id, version): version déjà écrite."""
+    return getattr(erreur, "code", None) == "23505" or "duplicate key" in str(erreur)
+
+
+def _est_table_absente(erreur: Exception) -> bool:
+    """Table agent_state_deltas inexistante (Postgres 42P01, cache de schéma PostgREST PGRST205)."""
+    if getattr(erreur, "code", None) in ("42P01", "PGRST205"):
+        return True
+    message = str(erreur)
+    return f'relation "{TABLE_DELTAS}" does not exist' in message \
+        or f"Could not find the table 'public.{TABLE_DELTAS}'" in message
+
+
+class MagasinEtatAgent:
+    """Chargement/sauvegarde incrémentale de agent_state, avec LRU en mémoire."""
+
+    def __init__(self, capacite: Optional[int] = None, seuil_compaction: Optional[int] = None):
+        self.capacite = capacite or int(os.getenv("NOTAIRE_ETAT_AGENT_CACHE", "256"))
+        self.seuil_compaction = seuil_compaction or int(os.getenv("NOTAIRE_ETAT_AGENT_COMPACTION", "20"))
+        self._cache: "OrderedDict[str, _Entree]" = OrderedDict()
+        self._verrou = threading.Lock()
+        self._verrous_conversation: Dict[str, threading.Lock] = {}
+
+    # ------------------------------------------------------------------ cache
+
+    def _lire_cache(self, conversation_id: str) -> Optional[_Entree]:
+        with self._verrou:
+            entree = self._cache.get(conversation_id)
+            if entree is not None:
+                self._cache.move_to_end(conversation_id)
+            return entree
+
+    def _ecrire_cache(self, conversation_id: str, entree: _Entree):
+        with self._verrou:
+            self._cache[conversation_id] = entree
+            self._cache.move_to_end(conversation_id)
+            while len(self._cache) > self.capacite:
+                ancien, _ = self._cache.popitem(last=False)
+                self._verrous_conversation.pop(ancien, None)
+
+    def _verrou_conversation(self, conversation_id: str) -> threading.Lock:
+        with self._verrou:
+            return self._verrous_conversation.setdefault(conversation_id, threading.Lock())
+
+    def oublier(self, conversation_id: str):
+        with self._verrou:
+            self._cache.pop(conversation_id, None)
+
+    # ---------------------------------------------------------------- lecture
+
+    def _lire_deltas(self, client, conversation_id: str, depuis: int) -> List[Dict[str, Any]]:
+        """Patchs de version >= depuis, dans l'ordre."""
+        resultat = client.table(TABLE_DELTAS).select("version, patch")\
+            .eq("conversation_id", conversation_id)\
+            .gte("version", depuis)\
+            .order("version")\
+            .execute()
+        return resultat.data or []
+
+    def _recharger(self, client, conversation_id: str) -> _Entree:
+        """Snapshot + patchs postérieurs."""
+        resultat = client.table(TABLE_CONVERSATIONS).select("agent_state, agent_state_version")\
+            .eq("id", conversation_id).limit(1).execute()
+        ligne = (resultat.data or [{}])[0]
+        donnees = ligne.get("agent_state") or {}
+        version_snapshot = ligne.get("agent_state_version") or 0
+        version = version_snapshot
+        try:
+            for delta in self._lire_deltas(client, conversation_id, version_snapshot + 1):
+                appliquer_patch(donnees, delta["patch"])
+                version = delta["version"]
+        except Exception as e:
+            logger.warning(f"[STATE] Patchs agent_state illisibles, snapshot seul: {e}")
+        return _Entree(donnees, version, version_snapshot)
+
+    def _actualiser(self, client, conversation_id: str) -> _Entree:
+        """Entrée à jour: cache + patchs récents, ou rechargement complet."""
+        entree = self._lire_cache(conversation_id)
+        if entree is not None:
+            try:
+                deltas = self._lire_deltas(client, conversation_id, entree.version)
+                # Suite contiguë depuis la version en cache, dont la ligne doit
+                # exister (sinon compactée entre-temps: rechargement complet)
+                versions = [delta["version"] for delta in deltas]
+                premiere = entree.version or 1
+                contigu = versions == list(range(premiere, premiere + len(versions)))
+                if contigu and (versions or entree.version == 0):
+                    donnees = copy.deepcopy(entree.donnees)
+                    version = entree.version
+                    for delta in deltas:
+                        if delta["version"] > version:
+                            appliquer_patch(donnees, delta["patch"])
+                            version = delta["version"]
+                    if version != entree.version:
+                        entree = _Entree(donnees, version, entree.version_snapshot)
+                        self._ecrire_cache(conversation_id, entree)
+                    return entree
+            except Exception as e:
+                logger.warning(f"[STATE] Validation du cache impossible: {e}")
+
+        entree = self._recharger(client, conversation_id)
+        self._ecrire_cache(conversation_id, entree)
+        return entree
+
+    def charger(self, client, conversation_id: str) -> EtatAgent:
+        """Charge l'agent_state courant (copie modifiable) et sa version."""
+        entree = self._actualiser(client, conversation_id)
+        return EtatAgent(
+            conversation_id=conversation_id,
+            donnees=copy.deepcopy(entree.donnees),
+            version=entree.version,
+            base=copy.deepcopy(entree.donnees),
+        )
+
+    # ------------------------------------------------------------- écriture
+
+    def sauvegarder(self, client, etat: EtatAgent) -> int:
+        """
+        Enregistre le patch base → donnees comme version suivante.
+
+        Returns:
+            Nouvelle version (inchangée si rien n'a changé)
+
+        Raises:
+            ConflitVersion: un autre onglet a modifié les mêmes champs
+            Exception: patch non écrit (erreur Supabase autre qu'une table absente)
+        """
+        patch = calculer_patch(etat.base, etat.donnees)
+        if not patch:
+            return etat.version
+
+        with self._verrou_conversation(etat.conversation_id):
+            for _ in range(3):
+                entree = self._lire_cache(etat.conversation_id)
+                if entree is None or entree.version != etat.version:
+                    entree = self._actualiser(client, etat.conversation_id)
+                if entree.version != etat.version:
+                    self._rebaser(client, etat, patch, entree)
+                version = etat.version + 1
+                try:
+                    client.table(TABLE_DELTAS).insert({
+                        "conversation_id": etat.conversation_id,
+                        "version": version,
+                        "patch": patch,
+                    }).execute()
+                except Exception as e:
+                    if _est_conflit_cle(e):
+                        # Écrite par un autre process: relire et rejouer
+                        self.oublier(etat.conversation_id)
+                        continue
+                    if not _est_table_absente(e):
+                        raise
+                    logger.warning(f"[STATE] Table des patchs absente, écriture du snapshot complet: {e}")
+                    return self._ecrire_snapshot(client, etat, version)
+
+                entree = _Entree(copy.deepcopy(etat.donnees), version, entree.version_snapshot)
+                self._ecrire_cache(etat.conversation_id, entree)
+                etat.version, etat.base = version, copy.deepcopy(etat.donnees)
+                if version - entree.version_snapshot >= self.seuil_compaction:
+                    self.compacter(client, etat.conversation_id)
+                return version
+
+        raise ConflitVersion(etat.conversation_id, etat.version, [op["path"] for op in patch])
+
+    def _rebaser(self, client, etat: EtatAgent, patch: List[Dict], entree: _Entree):
+        """Rejoue `patch` sur la dernière version si les chemins sont disjoints."""
+        intermediaire = calculer_patch(etat.base, entree.donnees)
+        conflits = chemins_en_conflit(patch, intermediaire)
+        if conflits:
+            raise ConflitVersion(etat.conversation_id, entree.version, conflits)
+        logger.info(
+            f"[STATE] Conversation {etat.conversation_id[:8]}: rebase v{etat.version} -> v{entree.version}"
+        )
+        etat.base = copy.deepcopy(entree.donnees)
+        etat.donnees = appliquer_patch(copy.deepcopy(entree.donnees), patch)
+        etat.version = entree.version
+
+    def _ecrire_snapshot(self, client, etat: EtatAgent, version: int) -> int:
+        """
+        Repli sans table de patchs: état complet (comportement historique).
+
+        La version avance comme pour un patch, et les patchs antérieurs
+        éventuels sont purgés: aucun ne peut être rejoué par-dessus.
+        """
+        client.table(TABLE_CONVERSATIONS).update({
+            "agent_state": etat.donnees,
+            "agent_state_version": version,
+        }).eq("id", etat.conversation_id).execute()
+        try:
+            client.table(TABLE_DELTAS).delete()\
+                .eq("conversation_id", etat.conversation_id)\
+                .lt("version", version + 1)\
+                .execute()
+        except Exception as e:
+            logger.debug(f"[STATE] Purge des patchs impossible: {e}")
+        self.oublier(etat.conversation_id)
+        etat.version, etat.base = version, copy.deepcopy(etat.donnees)
+        return version
+
+    def compacter(self, client, conversation_id: str) -> bool:
+        """Écrit l'état courant comme snapshot et purge les patchs antérieurs."""
+        entree = self._lire_cache(conversation_id)
+        if entree is None or entree.version <= entree.version_snapshot:
+            return False
+        try:
+            client.table(TABLE_CONVERSATIONS).update({
+                "agent_state": entree.donnees,
+                "agent_state_version": entree.version,
+            }).eq("id", conversation_id).lt("agent_state_version", entree.version).execute()
+            # La ligne de la version snapshot est gardée: elle permet aux
+            # autres process de valider leur cache (voir _actualiser)
+            client.table(TABLE_DELTAS).delete()\
+                .eq("conversation_id", conversation_id)\
+                .lt("version", entree.version)\
+                .execute()
+        except Exception as e:
+            logger.warning(f"[STATE] Compaction agent_state échouée: {e}")
+            return False
+        self._ecrire_cache(conversation_id, _Entree(entree.donnees, entree.version, entree.version))
+        return True
+
+    def statistiques(self) -> Dict[str, int]:
+        with self._verrou:
+            return {"conversations": len(self._cache), "capacite": self.capacite}
+
+
+_magasin: Optional[MagasinEtatAgent] = None
+_magasin_verrou = threading.Lock()
+
+
+def get_magasin_etat_agent() -> MagasinEtatAgent:
+    """Retourne le magasin partagé du process (créé au premier appel)."""
+    global _magasin
+    with _magasin_verrou:
+        if _magasin is None:
+            _magasin = MagasinEtatAgent()
+        return _magasin
@@ -46,6 +46,14 @@ except (ImportError, AttributeError, Exception) as e:
     create_client = None
     Client = None
 
+try:
+    from execution.database.recherche import get_index_recherche as _get_index_recherche
+    from execution.database.recherche import recherche_postgres as _recherche_postgres
+except ImportError:
+    # Script lancé hors package: pas d'index de recherche
+    _get_index_recherche = None
+    _recherche_postgres = None
+
 try:
     from rich.console import Console
     from rich.table import Table
@@ -121,7 +129,12 @@ class HistoriqueActes:
             return
 
         try:
-            self.client = create_client(self.url, self.key)
+            try:
+                from execution.database.supabase_client import get_client_partage
+                self.client = get_client_partage(self.url, self.key)
+            except ImportError:
+                # Script lancé hors package (python execution/database/...)
+                self.client = create_client(self.url, self.key)
         except Exception as e:
             console.print(f"[red]Erreur connexion Supabase: {e}[/red]")
             self._offline_mode = True
@@ -153,6 +166,8 @@ class HistoriqueActes:
 
         metadata["derniere_sauvegarde"] = datetime.now().isoformat()
 
+        self._indexer(reference, donnees)
+
         if self._offline_mode:
             return self._sauvegarder_offline(reference, type_acte, donnees, metadata, statut)
 
@@ -193,6 +208,17 @@ class HistoriqueActes:
             console.print(f"[red]Erreur sauvegarde: {e}[/red]")
             return None
 
+    def _indexer(self, reference: str, donnees: Dict) -> None:
+        """Met à jour l'index de recherche local (parties, adresse, lots, cadastre)."""
+        if _get_index_recherche is None:
+            return
+        index = _get_index_recherche()
+        if index is not None:
+            try:
+                index.indexer("acte", reference, donnees)
+            except Exception as e:
+                console.print(f"[yellow]Indexation impossible pour {reference}: {e}[/yellow]")
+
     def _sauvegarder_offline(
         self,
         reference: str,
@@ -308,13 +334,18 @@ class HistoriqueActes:
             console.print(f"[red]Erreur listage: {e}[/red]")
             return []
 
-    def rechercher(self, query: str, champs: List[str] = None) -> List[Acte]:
+    def rechercher(self, query: str, champs: List[str] = None, etude_id: Optional[str] = None) -> List[Acte]:
         """
-        Recherche dans les actes.
+        Recherche dans les actes, classée par pertinence.
+
+        Tolère accents et fautes de frappe sur les parties, l'adresse, les
+        lots, le cadastre et la référence (index local ou Postgres, voir
+        execution/database/recherche.py).
 
         Args:
             query: Terme de recherche
             champs: Champs à rechercher (défaut: reference, donnees)
+            etude_id: Étude dont les actes sont rendus (exigé par la RPC)
 
         Returns:
             Liste d'actes correspondants
@@ -322,7 +353,16 @@ class HistoriqueActes:
         if champs is None:
             champs = ["reference"]
 
+        index = _get_index_recherche() if _get_index_recherche else None
+
+        if self._offline_mode and index is not None:
+            references = index.references(query, "acte")
+            resultats = [Acte(**self._offline_storage[ref]) for ref in references if ref in self._offline_storage]
+            if resultats:
+                return resultats
+
         if self._offline_mode:
+            # Dernier recours: sous-chaîne dans tout le JSON (prix, dates...)
             resultats = []
             query_lower = query.lower()
             for ref, acte in self._offline_storage.items():
@@ -333,8 +373,20 @@ class HistoriqueActes:
             return resultats
 
         try:
-            # Recherche basique par référence
-            result = self.client.table("actes").select("*").ilike("reference", f"%{query}%").execute()
+            if index is not None and not _recherche_postgres():
+                # Index local, lignes rechargées dans l'ordre du classement
+                references = index.references(query, "acte")
+                if not references:
+                    return []
+                requete = self.client.table("actes").select("*").in_("reference", references)
+                if etude_id:
+                    requete = requete.eq("etude_id", etude_id)
+                result = requete.execute()
+                rang = {ref: i for i, ref in enumerate(references)}
+                result.data.sort(key=lambda row: rang.get(row.get("reference"), len(rang)))
+                lignes = result.data
+            else:
+                lignes = self._rechercher_postgres(query, etude_id)
 
             return [
                 Acte(
@@ -347,13 +399,39 @@ class HistoriqueActes:
                     donnees=row.get("donnees", {}),
                     metadata=row.get("metadata", {})
                 )
-                for row in result.data
+                for row in lignes
             ]
 
         except Exception as e:
             console.print(f"[red]Erreur recherche: {e}[/red]")
             return []
 
+    def _rechercher_postgres(self, query: str, etude_id: Optional[str]) -> List[Dict]:
+        """
+        Recherche pg_trgm/tsvector (RPC rechercher_actes), repli sur la référence.
+
+        La RPC ne rend que (id, reference, score) des actes de l'étude: les
+        lignes complètes sont rechargées par id, dans l'ordre du classement.
+        Sans étude, la RPC n'est pas appelée.
+        """
+        if etude_id:
+            try:
+                classement = self.client.rpc("rechercher_actes", {
+                    "p_etude_id": etude_id, "p_requete": query, "p_limite": 50
+                }).execute().data or []
+                ids = [row["id"] for row in classement]
+                if not ids:
+                    return []
+                result = self.client.table("actes").select("*").in_("id", ids).eq("etude_id", etude_id).execute()
+                rang = {id_: i for i, id_ in enumerate(ids)}
+                return sorted(result.data, key=lambda row: rang.get(row.get("id"), len(rang)))
+            except Exception as e:
+                console.print(f"[yellow]RPC rechercher_actes indisponible ({e}), recherche par référence[/yellow]")
+        requete = self.client.table("actes").select("*").ilike("reference", f"%{query}%")
+        if etude_id:
+            requete = requete.eq("etude_id", etude_id)
+        return requete.execute().data
+
     def supprimer_acte(self, reference: str) -> bool:
         """
         Supprime un acte par sa référence.
@@ -364,6 +442,10 @@ class HistoriqueActes:
         Returns:
             True si supprimé, False sinon
         """
+        index = _get_index_recherche() if _get_index_recherche else None
+        if index is not None:
+            index.retirer("acte", reference)
+
         if self._offline_mode:
             if reference in self._offline_storage:
                 del self._offline_storage[reference]
@@ -704,7 +786,7 @@ Exemples:
             console.print("[red]--query requis pour l'action search[/red]")
             sys.exit(1)
 
-        actes = historique.rechercher(args.query)
+        actes = historique.rechercher(args.query, etude_id=os.getenv("NOTAIRE_ETUDE_ID"))
         if args.json:
             print(json.dumps([asdict(a) for a in actes], ensure_ascii=False, indent=2))
         else:
@@ -0,0 +1,433 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+recherche.py
+------------
+Index de recherche plein texte et approximative sur les actes et les titres.
+
+Les notaires cherchent un dossier par nom de partie, adresse, numéro de lot
+ou référence cadastrale. Chaque document est réduit à ces champs, découpé
+en mots normalisés (minuscules, sans accents ni ponctuation) et indexé dans
+une base SQLite locale (mode WAL):
+- occurrences: mot → (document, champ)   (index inversé)
+- trigrammes:  trigramme → mot           (tolérance aux fautes de frappe)
+
+Une requête est découpée de la même façon; chaque mot est rapproché du
+vocabulaire par similarité de trigrammes (même mesure que pg_trgm) ou par
+préfixe, puis les documents sont classés par score moyen sur les mots de la
+requête. L'index est mis à jour document par document à chaque sauvegarde.
+
+Les mots ne sont conservés que tant qu'un document les contient: retirer
+ou réindexer un document (anonymisation RGPD comprise) efface le
+vocabulaire devenu orphelin, et les pages libérées sont écrasées
+(PRAGMA secure_delete).
+
+En ligne, la recherche peut être déléguée à Postgres (pg_trgm + tsvector,
+migration supabase/migrations/20261018_recherche_plein_texte.sql).
+
+Usage:
+    python -m execution.database.recherche chercher "dupont lyon"
+    python -m execution.database.recherche reindexer   # titres JSON locaux
+    python -m execution.database.recherche stats
+
+    from execution.database.recherche import get_index_recherche
+    index = get_index_recherche()
+    index.indexer("titre", "TITRE-001", donnees)
+    index.rechercher("Dupond rue Vendome", type_document="titre")
+
+Variables d'environnement:
+    NOTAIRE_INDEX_RECHERCHE     Chemin de l'index (défaut: .tmp/index_recherche/index.db,
+                                0 pour désactiver)
+    NOTAIRE_RECHERCHE_BACKEND   En ligne: 'postgres' (défaut, fonctions RPC) ou 'local'
+"""
+
+import argparse
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import unicodedata
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+CHEMIN_DEFAUT = PROJECT_ROOT / ".tmp" / "index_recherche" / "index.db"
+
+SEUIL_DEFAUT = 0.3  # pg_trgm.similarity_threshold
+
+# Clés JSON rattachées à chaque champ (à toute profondeur des données)
+CLES_PARTIES = {"nom", "prenoms", "prenom", "nom_naissance", "nom_usage", "denomination", "raison_sociale"}
+CLES_ADRESSE = {"adresse"}
+CLES_BIENS = {"lots", "cadastre"}
+
+
+# =============================================================================
+# NORMALISATION
+# =============================================================================
+
+def normaliser_mots(texte: Any) -> List[str]:
+    """Minuscules, sans accents ni ponctuation: 'Mme Dupré-Laval' → ['mme', 'dupre', 'laval']."""
+    texte = unicodedata.normalize("NFKD", str(texte or ""))
+    texte = "".join(c for c in texte if not unicodedata.combining(c)).lower()
+    return re.sub(r"[^a-z0-9]+", " ", texte).split()
+
+
+def trigrammes(mot: str) -> Set[str]:
+    """Trigrammes d'un mot, complété comme pg_trgm ('  mot ')."""
+    complete = f"  {mot} "
+    return {complete[i:i + 3] for i in range(len(complete) - 2)}
+
+
+def _feuilles(valeur: Any) -> Iterator[str]:
+    if isinstance(valeur, dict):
+        for v in valeur.values():
+            yield from _feuilles(v)
+    elif isinstance(valeur, list):
+        for v in valeur:
+            yield from _feuilles(v)
+    elif isinstance(valeur, (str, int, float)) and not isinstance(valeur, bool):
+        yield str(valeur)
+
+
+def _biens(cle: str, valeur: Any) -> Iterator[str]:
+    """Numéros de lot et références cadastrales ('AB', '123' et 'AB123')."""
+    elements = valeur if isinstance(valeur, list) else [valeur]
+    for element in elements:
+        if not isinstance(element, dict):
+            yield from _feuilles(element)
+            continue
+        numero = element.get("numero")
+        if numero is not None:
+            yield str(numero)
+        if cle == "cadastre" and element.get("section") and numero is not None:
+            yield str(element["section"])
+            yield f"{element['section']}{numero}"
+
+
+def champs_indexables(donnees: Any) -> Dict[str, List[str]]:
+    """
+    Extrait les champs recherchables des données d'un acte ou d'un titre.
+
+    Le parcours est générique (vendeurs, acquéreurs, propriétaires_actuels,
+    promettants... sont tous des listes de personnes portant un 'nom').
+
+    Returns:
+        {champ: [mots normalisés]} pour 'parties', 'adresse' et 'biens'
+    """
+    champs: Dict[str, List[str]] = {"parties": [], "adresse": [], "biens": []}
+
+    def parcourir(noeud: Any) -> None:
+        if isinstance(noeud, list):
+            for element in noeud:
+                parcourir(element)
+            return
+        if not isinstance(noeud, dict):
+            return
+        for cle, valeur in noeud.items():
+            if cle in CLES_PARTIES and isinstance(valeur, str):
+                champs["parties"].extend(normaliser_mots(valeur))
+            elif cle in CLES_ADRESSE:
+                for feuille in _feuilles(valeur):
+                    champs["adresse"].extend(normaliser_mots(feuille))
+            elif cle in CLES_BIENS:
+                for texte in _biens(cle, valeur):
+                    champs["biens"].extend(normaliser_mots(texte))
+            else:
+                parcourir(valeur)
+
+    parcourir(donnees)
+    return champs
+
+
+# =============================================================================
+# INDEX
+# =============================================================================
+
+@dataclass
+class ResultatRecherche:
+    """Un document trouvé, avec son score (0-1) et le champ le mieux apparié."""
+    type_document: str
+    reference: str
+    score: float
+    champ: str
+
+
+class IndexRecherche:
+    """
+    Index inversé + trigrammes dans une base SQLite (mode WAL).
+
+    Chaque (ré)indexation d'un document est une transaction: plusieurs
+    workers peuvent écrire dans le même index.
+
+    Args:
+        chemin: Fichier SQLite de l'index
+    """
+
+    def __init__(self, chemin: Path):
+        self.chemin = Path(chemin)
+        self.chemin.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._connexion().executescript("""
+            CREATE TABLE IF NOT EXISTS documents (
+                id INTEGER PRIMARY KEY, type TEXT NOT NULL, reference TEXT NOT NULL,
+                UNIQUE (type, reference)
+            );
+            CREATE TABLE IF NOT EXISTS mots (
+                id INTEGER PRIMARY KEY, mot TEXT NOT NULL UNIQUE, nb_trigrammes INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS trigrammes (
+                trigramme TEXT NOT NULL, mot_id INTEGER NOT NULL,
+                PRIMARY KEY (trigramme, mot_id)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS occurrences (
+                mot_id INTEGER NOT NULL, document_id INTEGER NOT NULL, champ TEXT NOT NULL,
+                PRIMARY KEY (mot_id, document_id, champ)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_occurrences_document ON occurrences(document_id);
+        """)
+
+    def _connexion(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.chemin, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            # Noms et adresses retirés de l'index ne restent pas lisibles dans le fichier
+            conn.execute("PRAGMA secure_delete=ON")
+            self._local.conn = conn
+        return conn
+
+    # ------------------------------------------------------------------
+    # Écriture
+    # ------------------------------------------------------------------
+
+    def indexer(self, type_document: str, reference: str, donnees: Any) -> None:
+        """(Ré)indexe un document: seules ses occurrences sont réécrites."""
+        champs = champs_indexables(donnees)
+        champs["reference"] = normaliser_mots(reference)
+
+        conn = self._connexion()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("INSERT OR IGNORE INTO documents (type, reference) VALUES (?, ?)",
+                         (type_document, reference))
+            (document_id,) = conn.execute(
+                "SELECT id FROM documents WHERE type = ? AND reference = ?", (type_document, reference)
+            ).fetchone()
+            anciens = self._mots_document(conn, document_id)
+            conn.execute("DELETE FROM occurrences WHERE document_id = ?", (document_id,))
+            lignes = {
+                (self._mot_id(conn, mot), document_id, champ)
+                for champ, mots in champs.items() for mot in mots
+            }
+            conn.executemany("INSERT INTO occurrences VALUES (?, ?, ?)", lignes)
+            self._purger_mots(conn, anciens)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    @staticmethod
+    def _mot_id(conn: sqlite3.Connection, mot: str) -> int:
+        ligne = conn.execute("SELECT id FROM mots WHERE mot = ?", (mot,)).fetchone()
+        if ligne:
+            return ligne[0]
+        tris = trigrammes(mot)
+        mot_id = conn.execute("INSERT INTO mots (mot, nb_trigrammes) VALUES (?, ?)",
+                              (mot, len(tris))).lastrowid
+        conn.executemany("INSERT INTO trigrammes VALUES (?, ?)", [(t, mot_id) for t in tris])
+        return mot_id
+
+    @staticmethod
+    def _mots_document(conn: sqlite3.Connection, document_id: int) -> List[int]:
+        return [mot_id for (mot_id,) in conn.execute(
+            "SELECT DISTINCT mot_id FROM occurrences WHERE document_id = ?", (document_id,)
+        )]
+
+    @staticmethod
+    def _purger_mots(conn: sqlite3.Connection, mot_ids: List[int]) -> None:
+        """Efface les mots (et leurs trigrammes) qu'aucun document ne contient plus."""
+        orphelins = [
+            (mot_id,) for mot_id in mot_ids
+            if conn.execute("SELECT 1 FROM occurrences WHERE mot_id = ? LIMIT 1", (mot_id,)).fetchone() is None
+        ]
+        conn.executemany("DELETE FROM trigrammes WHERE mot_id = ?", orphelins)
+        conn.executemany("DELETE FROM mots WHERE id = ?", orphelins)
+
+    def retirer(self, type_document: str, reference: str) -> None:
+        """Retire un document de l'index, avec les mots qu'il était seul à contenir."""
+        conn = self._connexion()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            ligne = conn.execute("SELECT id FROM documents WHERE type = ? AND reference = ?",
+                                 (type_document, reference)).fetchone()
+            if ligne:
+                anciens = self._mots_document(conn, ligne[0])
+                conn.execute("DELETE FROM occurrences WHERE document_id = ?", ligne)
+                conn.execute("DELETE FROM documents WHERE id = ?", ligne)
+                self._purger_mots(conn, anciens)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    # ------------------------------------------------------------------
+    # Lecture
+    # ------------------------------------------------------------------
+
+    def _mots_proches(self, conn: sqlite3.Connection, mot: str, seuil: float) -> Dict[int, float]:
+        """Vocabulaire proche d'un mot de la requête → {mot_id: similarité}."""
+        tris = sorted(trigrammes(mot))
+        proches: Dict[int, float] = {}
+        lignes = conn.execute(
+            f"SELECT t.mot_id, COUNT(*), m.nb_trigrammes FROM trigrammes t JOIN mots m ON m.id = t.mot_id "
+            f"WHERE t.trigramme IN ({','.join('?' * len(tris))}) GROUP BY t.mot_id",
+            tris
+        )
+        for mot_id, communs, nb in lignes:
+            similarite = communs / (len(tris) + nb - communs)
+            if similarite >= seuil:
+                proches[mot_id] = similarite
+        # Saisie partielle: 'dup' trouve 'dupont'
+        for mot_id, candidat in conn.execute(
+            "SELECT id, mot FROM mots WHERE mot >= ? AND mot < ?", (mot, mot + "\uffff")
+        ):
+            prefixe = 0.5 + 0.5 * len(mot) / len(candidat)
+            proches[mot_id] = max(proches.get(mot_id, 0.0), prefixe)
+        return proches
+
+    def rechercher(
+        self,
+        requete: str,
+        type_document: Optional[str] = None,
+        champs: Optional[Iterable[str]] = None,
+        limite: int = 50,
+        seuil: float = SEUIL_DEFAUT
+    ) -> List[ResultatRecherche]:
+        """
+        Recherche classée, tolérante aux accents et aux fautes de frappe.
+
+        Args:
+            requete: Texte libre ('Dupond Vendôme', 'AB 123', 'lot 12')
+            type_document: 'acte', 'titre'... (None: tous)
+            champs: Restreindre à certains champs (parties, adresse, biens, reference)
+            limite: Nombre maximum de résultats
+            seuil: Similarité minimale d'un mot (0-1)
+
+        Returns:
+            Résultats triés par score décroissant
+        """
+        mots = list(dict.fromkeys(normaliser_mots(requete)))
+        if not mots:
+            return []
+        conn = self._connexion()
+        filtre_champs = ""
+        parametres_champs: List[str] = []
+        if champs:
+            parametres_champs = list(champs)
+            filtre_champs = f" AND o.champ IN ({','.join('?' * len(parametres_champs))})"
+        filtre_type = " AND d.type = ?" if type_document else ""
+        parametres_type = [type_document] if type_document else []
+
+        # {document: {mot de la requête: (meilleure similarité, champ)}}
+        scores: Dict[Tuple[str, str], Dict[str, Tuple[float, str]]] = {}
+        for mot in mots:
+            proches = self._mots_proches(conn, mot, seuil)
+            if not proches:
+                continue
+            lignes = conn.execute(
+                f"SELECT d.type, d.reference, o.mot_id, o.champ FROM occurrences o "
+                f"JOIN documents d ON d.id = o.document_id "
+                f"WHERE o.mot_id IN ({','.join('?' * len(proches))}){filtre_champs}{filtre_type}",
+                [*proches, *parametres_champs, *parametres_type]
+            )
+            for type_doc, reference, mot_id, champ in lignes:
+                par_mot = scores.setdefault((type_doc, reference), {})
+                if proches[mot_id] > par_mot.get(mot, (0.0, ""))[0]:
+                    par_mot[mot] = (proches[mot_id], champ)
+
+        resultats = []
+        for (type_doc, reference), par_mot in scores.items():
+            score = sum(s for s, _ in par_mot.values()) / len(mots)
+            champ = max(par_mot.values())[1]
+            resultats.append(ResultatRecherche(type_doc, reference, round(score, 4), champ))
+        resultats.sort(key=lambda r: (-r.score, r.reference))
+        return resultats[:limite]
+
+    def references(self, requete: str, type_document: str, **kwargs) -> List[str]:
+        """Références des documents trouvés, dans l'ordre du classement."""
+        return [r.reference for r in self.rechercher(requete, type_document, **kwargs)]
+
+    def statistiques(self) -> Dict[str, Any]:
+        conn = self._connexion()
+        return {
+            "chemin": str(self.chemin),
+            "documents": dict(conn.execute("SELECT type, COUNT(*) FROM documents GROUP BY type").fetchall()),
+            "mots": conn.execute("SELECT COUNT(*) FROM mots").fetchone()[0],
+            "occurrences": conn.execute("SELECT COUNT(*) FROM occurrences").fetchone()[0],
+        }
+
+
+_index: Optional[IndexRecherche] = None
+_index_verrou = threading.Lock()
+
+
+def get_index_recherche() -> Optional[IndexRecherche]:
+    """Index partagé du process (None si NOTAIRE_INDEX_RECHERCHE=0)."""
+    global _index
+    chemin = os.getenv("NOTAIRE_INDEX_RECHERCHE", str(CHEMIN_DEFAUT))
+    if chemin == "0":
+        return None
+    with _index_verrou:
+        if _index is None or str(_index.chemin) != chemin:
+            _index = IndexRecherche(Path(chemin))
+        return _index
+
+
+def recherche_postgres() -> bool:
+    """En ligne, la recherche passe-t-elle par les fonctions RPC Postgres ?"""
+    return os.getenv("NOTAIRE_RECHERCHE_BACKEND", "postgres") == "postgres"
+
+
+# =============================================================================
+# CLI
+# =============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="Index de recherche actes / titres")
+    sous = parser.add_subparsers(dest="commande", required=True)
+
+    chercher = sous.add_parser("chercher", help="Rechercher dans l'index")
+    chercher.add_argument("requete")
+    chercher.add_argument("--type", default=None, help="acte, titre...")
+    chercher.add_argument("--limite", type=int, default=20)
+
+    sous.add_parser("reindexer", help="Réindexer les titres JSON locaux (.tmp/titres_propriete)")
+    sous.add_parser("stats", help="Contenu de l'index")
+
+    args = parser.parse_args()
+    index = get_index_recherche()
+    if index is None:
+        print("Index désactivé (NOTAIRE_INDEX_RECHERCHE=0)")
+        return 1
+
+    if args.commande == "chercher":
+        for r in index.rechercher(args.requete, args.type, limite=args.limite):
+            print(f"{r.score:.2f}  {r.type_document:<6} {r.reference}  ({r.champ})")
+    elif args.commande == "reindexer":
+        n = 0
+        for fichier in sorted((PROJECT_ROOT / ".tmp" / "titres_propriete").glob("*.json")):
+            data = json.loads(fichier.read_text(encoding="utf-8"))
+            index.indexer("titre", data.get("reference") or fichier.stem, data.get("donnees", {}))
+            n += 1
+        print(f"[OK] {n} titres réindexés")
+    else:
+        print(json.dumps(index.statistiques(), ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
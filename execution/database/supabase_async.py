@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+supabase_async.py
+-----------------
+Couche d'accès Supabase asynchrone, partagée par tout le process.
+
+Le client supabase-py synchrone bloque l'appelant à chaque `.execute()`
+(50-200 ms par aller-retour): dans un endpoint FastAPI, c'est toute la boucle
+asyncio qui attend. Ce module parle directement à PostgREST (`/rest/v1`) via
+un seul `httpx.AsyncClient`:
+- pool de connexions keep-alive (HTTP/2 si `h2` est installé)
+- méthodes `async` à `await` depuis les endpoints
+- API batch: insert/upsert multi-lignes en une requête (audit, feedbacks)
+
+Usage:
+    from execution.database.supabase_async import get_supabase_async
+
+    db = get_supabase_async()
+    if db.est_configure:
+        cles = await db.selectionner(
+            "agent_api_keys", "id, etude_id, etudes(nom)",
+            filtres={"key_hash": h, "revoked_at": None}
+        )
+        await db.inserer("audit_logs", [entree1, entree2, entree3])
+        await db.upserter("dossiers", lignes, on_conflict="etude_id,numero")
+
+Filtres: `{"col": valeur}` → `col=eq.valeur`, `{"col": None}` → `col=is.null`,
+`{"col": ("gte", "2025-01-01")}` → opérateur PostgREST explicite.
+
+Variables d'environnement:
+    SUPABASE_URL, SUPABASE_SERVICE_KEY (ou SUPABASE_KEY)
+    SUPABASE_POOL_MAX        Connexions max du pool (défaut: 20)
+    SUPABASE_POOL_KEEPALIVE  Connexions keep-alive conservées (défaut: 10)
+"""
+
+import asyncio
+import os
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+try:
+    import h2  # noqa: F401
+    HTTP2_DISPONIBLE = True
+except ImportError:
+    HTTP2_DISPONIBLE = False
+
+
+# Taille max d'un lot: PostgREST accepte de gros tableaux, mais on borne la
+# taille du corps JSON (et la durée de la transaction côté Postgres)
+TAILLE_LOT = 500
+
+Lignes = Union[Dict[str, Any], List[Dict[str, Any]]]
+
+
+class ErreurSupabase(Exception):
+    """Erreur renvoyée par PostgREST (statut HTTP >= 400)."""
+
+    def __init__(self, statut: int, message: str):
+        super().__init__(f"Supabase {statut}: {message}")
+        self.statut = statut
+
+
+def _valeur_filtre(valeur: Any) -> str:
+    """Traduit une valeur Python en expression de filtre PostgREST."""
+    if isinstance(valeur, tuple):
+        operateur, operande = valeur
+        return f"{operateur}.{_litteral(operande)}"
+    if valeur is None:
+        return "is.null"
+    if isinstance(valeur, bool):
+        return f"is.{_litteral(valeur)}"
+    return f"eq.{_litteral(valeur)}"
+
+
+def _litteral(valeur: Any) -> str:
+    if valeur is None:
+        return "null"
+    if isinstance(valeur, bool):
+        return "true" if valeur else "false"
+    if isinstance(valeur, (list, tuple, set)):
+        return "(" + ",".join(_element_liste(v) for v in valeur) + ")"
+    return str(valeur)
+
+
+def _element_liste(valeur: Any) -> str:
+    """Élément de `in.(...)`, entre guillemets: `,` `)` et `"` ne changent pas le filtre."""
+    if valeur is None or isinstance(valeur, bool):
+        return _litteral(valeur)
+    echappe = str(valeur).replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{echappe}"'
+
+
+def _parametres(filtres: Optional[Dict[str, Any]]) -> List[Tuple[str, str]]:
+    return [(col, _valeur_filtre(val)) for col, val in (filtres or {}).items()]
+
+
+def _decouper(lignes: List[Dict[str, Any]], taille: int) -> Iterable[List[Dict[str, Any]]]:
+    for i in range(0, len(lignes), taille):
+        yield lignes[i:i + taille]
+
+
+class SupabaseAsync:
+    """
+    Client PostgREST asynchrone avec pool de connexions partagé.
+
+    Le client httpx est créé à la première requête et recréé si la boucle
+    asyncio change (tests, scripts utilisant plusieurs `asyncio.run`).
+    """
+
+    def __init__(
+        self,
+        url: Optional[str] = None,
+        key: Optional[str] = None,
+        max_connexions: Optional[int] = None,
+        keepalive: Optional[int] = None,
+        timeout: float = 30.0,
+        transport: Optional["httpx.AsyncBaseTransport"] = None,
+    ):
+        self.url = (url or os.getenv("SUPABASE_URL") or "").rstrip("/")
+        self.key = key or os.getenv("SUPABASE_SERVICE_KEY") or os.getenv("SUPABASE_KEY")
+        self.max_connexions = max_connexions or int(os.getenv("SUPABASE_POOL_MAX", "20"))
+        self.keepalive = keepalive or int(os.getenv("SUPABASE_POOL_KEEPALIVE", "10"))
+        self.timeout = timeout
+        self._transport = transport
+        self._session: Optional["httpx.AsyncClient"] = None
+        self._boucle: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def est_configure(self) -> bool:
+        """True si httpx est installé et SUPABASE_URL/KEY sont définis."""
+        return httpx is not None and bool(self.url and self.key)
+
+    def _creer_session(self) -> "httpx.AsyncClient":
+        return httpx.AsyncClient(
+            base_url=f"{self.url}/rest/v1",
+            headers={
+                "apikey": self.key,
+                "Authorization": f"Bearer {self.key}",
+                "Content-Type": "application/json",
+            },
+            http2=HTTP2_DISPONIBLE,
+            limits=httpx.Limits(
+                max_connections=self.max_connexions,
+                max_keepalive_connections=self.keepalive,
+            ),
+            timeout=self.timeout,
+            transport=self._transport,
+        )
+
+    @property
+    def session(self) -> "httpx.AsyncClient":
+        if not self.est_configure:
+            raise ErreurSupabase(0, "SUPABASE_URL/SUPABASE_KEY non configurés")
+        boucle = asyncio.get_running_loop()
+        if self._session is None or self._boucle is not boucle:
+            # Les connexions d'un pool httpx sont liées à leur boucle
+            self._session = self._creer_session()
+            self._boucle = boucle
+        return self._session
+
+    async def _requete(
+        self,
+        methode: str,
+        table: str,
+        params: List[Tuple[str, str]],
+        json: Any = None,
+        prefer: Optional[List[str]] = None,
+    ) -> List[Dict[str, Any]]:
+        headers = {"Prefer": ",".join(prefer)} if prefer else None
+        reponse = await self.session.request(
+            methode, f"/{table}", params=params, json=json, headers=headers
+        )
+        if reponse.status_code >= 400:
+            raise ErreurSupabase(reponse.status_code, reponse.text[:500])
+        if not reponse.content:
+            return []
+        data = reponse.json()
+        return data if isinstance(data, list) else [data]
+
+    # =========================================================================
+    # LECTURE
+    # =========================================================================
+
+    async def selectionner(
+        self,
+        table: str,
+        colonnes: str = "*",
+        filtres: Optional[Dict[str, Any]] = None,
+        ordre: Optional[str] = None,
+        desc: bool = False,
+        limite: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """SELECT avec filtres d'égalité (ou opérateurs explicites)."""
+        params = [("select", colonnes.replace(" ", ""))] + _parametres(filtres)
+        if ordre:
+            params.append(("order", f"{ordre}.{'desc' if desc else 'asc'}"))
+        if limite is not None:
+            params.append(("limit", str(limite)))
+        return await self._requete("GET", table, params)
+
+    # =========================================================================
+    # ÉCRITURE
+    # =========================================================================
+
+    async def inserer(
+        self,
+        table: str,
+        lignes: Lignes,
+        retourner: bool = True,
+        taille_lot: int = TAILLE_LOT,
+    ) -> List[Dict[str, Any]]:
+        """
+        INSERT d'une ou plusieurs lignes (une requête par lot de `taille_lot`).
+
+        Les lignes peuvent avoir des clés différentes: les colonnes absentes
+        prennent leur valeur par défaut SQL (`Prefer: missing=default`).
+        """
+        return await self._ecrire_lots(table, lignes, retourner, taille_lot)
+
+    async def upserter(
+        self,
+        table: str,
+        lignes: Lignes,
+        on_conflict: Optional[str] = None,
+        retourner: bool = True,
+        taille_lot: int = TAILLE_LOT,
+    ) -> List[Dict[str, Any]]:
+        """INSERT ... ON CONFLICT DO UPDATE, multi-lignes."""
+        return await self._ecrire_lots(
+            table, lignes, retourner, taille_lot,
+            upsert=True, on_conflict=on_conflict,
+        )
+
+    async def _ecrire_lots(
+        self,
+        table: str,
+        lignes: Lignes,
+        retourner: bool,
+        taille_lot: int,
+        upsert: bool = False,
+        on_conflict: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        if isinstance(lignes, dict):
+            lignes = [lignes]
+        if not lignes:
+            return []
+
+        prefer = ["return=representation" if retourner else "return=minimal", "missing=default"]
+        if upsert:
+            prefer.append("resolution=merge-duplicates")
+
+        resultats: List[Dict[str, Any]] = []
+        for lot in _decouper(list(lignes), max(1, taille_lot)):
+            colonnes = sorted({col for ligne in lot for col in ligne})
+            params = [("columns", ",".join(colonnes))]
+            if on_conflict:
+                params.append(("on_conflict", on_conflict))
+            resultats.extend(await self._requete("POST", table, params, json=lot, prefer=prefer))
+        return resultats
+
+    async def mettre_a_jour(
+        self,
+        table: str,
+        valeurs: Dict[str, Any],
+        filtres: Dict[str, Any],
+        retourner: bool = False,
+    ) -> List[Dict[str, Any]]:
+        """UPDATE filtré (les filtres sont obligatoires: pas d'UPDATE global)."""
+        if not filtres:
+            raise ValueError("mettre_a_jour() exige au moins un filtre")
+        prefer = ["return=representation" if retourner else "return=minimal"]
+        return await self._requete("PATCH", table, _parametres(filtres), json=valeurs, prefer=prefer)
+
+    async def rpc(self, fonction: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        """Appelle une fonction SQL exposée par PostgREST (`/rpc/<fonction>`)."""
+        reponse = await self.session.post(f"/rpc/{fonction}", json=params or {})
+        if reponse.status_code >= 400:
+            raise ErreurSupabase(reponse.status_code, reponse.text[:500])
+        return reponse.json() if reponse.content else None
+
+    async def fermer(self):
+        """Ferme le pool de connexions."""
+        if self._session is not None:
+            try:
+                await self._session.aclose()
+            finally:
+                self._session = None
+                self._boucle = None
+
+
+_instance: Optional[SupabaseAsync] = None
+
+
+def get_supabase_async() -> SupabaseAsync:
+    """Retourne la couche d'accès partagée du process."""
+    global _instance
+    if _instance is None:
+        _instance = SupabaseAsync()
+    return _instance
+
+
+async def fermer_supabase_async():
+    """Ferme le pool partagé (shutdown de l'API)."""
+    global _instance
+    if _instance is not None:
+        await _instance.fermer()
+        _instance = None
@@ -36,7 +36,7 @@ Usage:
 import os
 import sys
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 # Configuration
 SCRIPT_DIR = Path(__file__).parent
@@ -64,6 +64,39 @@ except ImportError:
 
 
 _client_cache: Dict[bool, Optional[Client]] = {}
+_clients_partages: Dict[Tuple[str, str], Client] = {}
+
+
+def get_client_partage(url: str, key: str) -> Optional[Client]:
+    """
+    Retourne le client Supabase partagé pour (url, key).
+
+    Un seul client par couple url/clé dans tout le process: AgentDB,
+    HistoriqueActes et l'API réutilisent ainsi les mêmes connexions
+    keep-alive au lieu d'ouvrir chacun leur pool HTTP.
+    Pour les endpoints async, voir execution.database.supabase_async.
+    """
+    if create_client is None or not url or not key:
+        return None
+
+    cle = (url, key)
+    if cle in _clients_partages:
+        return _clients_partages[cle]
+
+    client = None
+    # Essayer avec ClientOptions (supabase-py >= 2.3)
+    if ClientOptions:
+        try:
+            options = ClientOptions(postgrest_client_timeout=30)
+            client = create_client(url, key, options=options)
+        except (TypeError, AttributeError):
+            # Version plus ancienne de supabase-py — fallback sans options
+            pass
+    if client is None:
+        client = create_client(url, key)
+    _clients_partages[cle] = client
+    return client
+
 
 def get_supabase_client(use_service_key: bool = True) -> Optional[Client]:
     """
@@ -95,17 +128,7 @@ def get_supabase_client(use_service_key: bool = True) -> Optional[Client]:
         return None
 
     try:
-        # Essayer avec ClientOptions (supabase-py >= 2.3)
-        if ClientOptions:
-            try:
-                options = ClientOptions(postgrest_client_timeout=30)
-                client = create_client(url, key, options=options)
-                _client_cache[use_service_key] = client
-                return client
-            except (TypeError, AttributeError):
-                # Version plus ancienne de supabase-py — fallback sans options
-                pass
-        client = create_client(url, key)
+        client = get_client_partage(url, key)
         _client_cache[use_service_key] = client
         return client
     except Exception as e:
@@ -364,6 +387,36 @@ class SupabaseManager:
             print(f"Erreur log_action: {e}")
             return None
 
+    def log_actions(self, entrees: List[Dict]) -> int:
+        """
+        Enregistre plusieurs actions d'audit en une seule requête.
+
+        Args:
+            entrees: Dicts avec les mêmes clés que log_action()
+
+        Returns:
+            Nombre de lignes insérées (0 en mode offline ou en erreur)
+        """
+        if self._offline_mode or not entrees:
+            return 0
+
+        try:
+            data = [
+                {
+                    "action": e["action"],
+                    "resource_type": e["resource_type"],
+                    "etude_id": e.get("etude_id"),
+                    "resource_id": e.get("resource_id"),
+                    "details": e.get("details") or {}
+                }
+                for e in entrees
+            ]
+            result = self.client.table("audit_logs").insert(data).execute()
+            return len(result.data or [])
+        except Exception as e:
+            print(f"Erreur log_actions: {e}")
+            return 0
+
     # =========================================================================
     # RGPD
     # =========================================================================
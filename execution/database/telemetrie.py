@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+telemetrie.py
+-------------
+Écrivain de télémétrie en arrière-plan: usage des clés API et logs d'audit.
+
+Les requêtes ne font plus que déposer un événement en mémoire (O(1), sans
+I/O). Un thread dédié vide les tampons toutes les `intervalle` secondes:
+- usage des clés: un seul `total_requests += n` par clé et par flush
+  (fonction SQL increment_api_key_usage)
+- audit_logs: un INSERT multi-lignes
+- fichiers JSONL locaux (executions, activité Q&R): écrits par lot
+
+Si Supabase est injoignable, les logs d'audit sont écrits dans
+`.tmp/audit_logs/audit_YYYYMMDD.jsonl` (jamais perdus); les compteurs
+d'usage sont conservés pour le flush suivant.
+
+Usage:
+    from execution.database.telemetrie import get_telemetrie
+
+    telemetrie = get_telemetrie()
+    telemetrie.enregistrer_usage_cle(api_key_id)
+    telemetrie.enregistrer_audit({"action": "agent_execute", "resource_type": "acte", ...})
+    telemetrie.arreter()  # flush final (shutdown)
+
+Variables d'environnement:
+    NOTAIRE_TELEMETRIE_INTERVALLE  Secondes entre deux flush (défaut: 5)
+"""
+
+import asyncio
+import atexit
+import json
+import logging
+import os
+import sys
+import threading
+from collections import defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from execution.database.supabase_async import ErreurSupabase, SupabaseAsync
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+AUDIT_LOCAL_DIR = PROJECT_ROOT / ".tmp" / "audit_logs"
+
+# Au-delà, un flush est déclenché sans attendre le timer
+SEUIL_FLUSH_AUDIT = 200
+
+COLONNES_AUDIT = ("action", "resource_type", "etude_id", "resource_id", "details", "created_at")
+
+
+def ecrire_audit_local(entree: Dict, dossier: Optional[Path] = None) -> None:
+    """Écrit un log d'audit dans le fichier local de fallback."""
+    try:
+        log_dir = dossier or AUDIT_LOCAL_DIR
+        log_dir.mkdir(parents=True, exist_ok=True)
+        log_file = log_dir / f"audit_{datetime.now(timezone.utc).strftime('%Y%m%d')}.jsonl"
+        with open(log_file, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entree, ensure_ascii=False, default=str) + "\n")
+    except Exception:
+        # Dernier recours: stderr pour ne jamais perdre silencieusement
+        print(f"[AUDIT CRITICAL] Impossible d'ecrire le log: {entree}", file=sys.stderr)
+
+
+class EcrivainTelemetrie:
+    """
+    Tampons thread-safe + thread de flush périodique.
+
+    Le thread possède sa propre boucle asyncio et son propre SupabaseAsync:
+    il ne partage pas de connexions avec la boucle de l'API.
+    """
+
+    def __init__(
+        self,
+        db: Optional[SupabaseAsync] = None,
+        intervalle: Optional[float] = None,
+        dossier_local: Optional[Path] = None,
+    ):
+        self.db = db or SupabaseAsync()
+        self.intervalle = intervalle if intervalle is not None else float(
+            os.getenv("NOTAIRE_TELEMETRIE_INTERVALLE", "5")
+        )
+        self.dossier_local = dossier_local or AUDIT_LOCAL_DIR
+        self._verrou = threading.Lock()
+        self._usages: Dict[str, int] = defaultdict(int)
+        self._derniers_usages: Dict[str, str] = {}
+        self._audits: List[Dict[str, Any]] = []
+        self._lignes_locales: Dict[Path, List[str]] = defaultdict(list)
+        self._reveil = threading.Event()
+        self._arret = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._rpc_disponible = True
+        self.stats = {"flushs": 0, "audits_envoyes": 0, "audits_locaux": 0, "usages_envoyes": 0}
+
+    # =========================================================================
+    # ENREGISTREMENT (chemin de requête: mémoire uniquement)
+    # =========================================================================
+
+    def enregistrer_usage_cle(self, api_key_id: str) -> None:
+        """Compte une requête authentifiée par la clé `api_key_id`."""
+        maintenant = datetime.now(timezone.utc).isoformat()
+        with self._verrou:
+            self._usages[api_key_id] += 1
+            self._derniers_usages[api_key_id] = maintenant
+        self._demarrer_si_besoin()
+
+    def enregistrer_audit(self, entree: Dict[str, Any]) -> None:
+        """Ajoute une ligne audit_logs (created_at = instant de l'événement)."""
+        ligne = {col: entree.get(col) for col in COLONNES_AUDIT}
+        ligne["details"] = ligne["details"] or {}
+        ligne["created_at"] = ligne["created_at"] or datetime.now(timezone.utc).isoformat()
+        with self._verrou:
+            self._audits.append(ligne)
+            plein = len(self._audits) >= SEUIL_FLUSH_AUDIT
+        self._demarrer_si_besoin()
+        if plein:
+            self._reveil.set()
+
+    def enregistrer_ligne_locale(self, fichier: Path, entree: Dict[str, Any]) -> None:
+        """Ajoute une ligne JSONL à écrire dans `fichier` au prochain flush."""
+        ligne = json.dumps(entree, ensure_ascii=False, default=str)
+        with self._verrou:
+            self._lignes_locales[Path(fichier)].append(ligne)
+        self._demarrer_si_besoin()
+
+    def en_attente(self) -> Dict[str, int]:
+        """Taille des tampons (diagnostic)."""
+        with self._verrou:
+            return {
+                "usages": sum(self._usages.values()),
+                "audits": len(self._audits),
+                "lignes_locales": sum(len(v) for v in self._lignes_locales.values()),
+            }
+
+    # =========================================================================
+    # FLUSH
+    # =========================================================================
+
+    def _extraire(self):
+        with self._verrou:
+            usages = [
+                {"id": cle, "n": n, "last_used_at": self._derniers_usages[cle]}
+                for cle, n in self._usages.items()
+            ]
+            audits, lignes = self._audits, self._lignes_locales
+            self._usages = defaultdict(int)
+            self._derniers_usages = {}
+            self._audits = []
+            self._lignes_locales = defaultdict(list)
+        return usages, audits, lignes
+
+    def _remettre_usages(self, usages: List[Dict[str, Any]]) -> None:
+        with self._verrou:
+            for u in usages:
+                self._usages[u["id"]] += u["n"]
+                self._derniers_usages[u["id"]] = max(
+                    u["last_used_at"], self._derniers_usages.get(u["id"], "")
+                )
+
+    async def vider(self) -> None:
+        """Envoie tout le contenu des tampons (un appel par type)."""
+        usages, audits, lignes = self._extraire()
+
+        for fichier, contenu in lignes.items():
+            try:
+                fichier.parent.mkdir(parents=True, exist_ok=True)
+                with open(fichier, "a", encoding="utf-8") as f:
+                    f.write("\n".join(contenu) + "\n")
+            except OSError as e:
+                logger.warning(f"Écriture {fichier} impossible: {e}")
+
+        if audits:
+            await self._vider_audits(audits)
+        if usages:
+            await self._vider_usages(usages)
+        self.stats["flushs"] += 1
+
+    async def _vider_audits(self, audits: List[Dict[str, Any]]) -> None:
+        if not self.db.est_configure:
+            self._audits_en_local(audits, "Supabase non configuré")
+            return
+        try:
+            await self.db.inserer("audit_logs", audits, retourner=False)
+            self.stats["audits_envoyes"] += len(audits)
+        except ErreurSupabase as e:
+            if 400 <= e.statut < 500 and e.statut not in (401, 403) and len(audits) > 1:
+                # Une ligne invalide fait échouer tout le lot: on isole les fautives
+                for ligne in audits:
+                    await self._vider_audits([ligne])
+            else:
+                self._audits_en_local(audits, str(e))
+        except Exception as e:
+            self._audits_en_local(audits, str(e))
+
+    def _audits_en_local(self, audits: List[Dict[str, Any]], erreur: str) -> None:
+        if self.db.est_configure:
+            print(f"[AUDIT] Echec Supabase, {len(audits)} log(s) sauvegarde(s) localement")
+        for ligne in audits:
+            ecrire_audit_local({**ligne, "supabase_error": erreur}, self.dossier_local)
+        self.stats["audits_locaux"] += len(audits)
+
+    async def _vider_usages(self, usages: List[Dict[str, Any]]) -> None:
+        if not self.db.est_configure:
+            return
+        try:
+            if self._rpc_disponible:
+                try:
+                    await self.db.rpc("increment_api_key_usage", {"p_usages": usages})
+                    self.stats["usages_envoyes"] += len(usages)
+                    return
+                except ErreurSupabase as e:
+                    if e.statut != 404:
+                        raise
+                    # Migration 20261017 non appliquée: lecture puis écriture
+                    logger.warning("increment_api_key_usage absente, mise à jour clé par clé")
+                    self._rpc_disponible = False
+
+            ids = [u["id"] for u in usages]
+            actuels = await self.db.selectionner(
+                "agent_api_keys", "id, total_requests", filtres={"id": ("in", ids)}
+            )
+            totaux = {k["id"]: k.get("total_requests") or 0 for k in actuels}
+            for u in usages:
+                if u["id"] in totaux:
+                    await self.db.mettre_a_jour(
+                        "agent_api_keys",
+                        {"total_requests": totaux[u["id"]] + u["n"], "last_used_at": u["last_used_at"]},
+                        filtres={"id": u["id"]},
+                    )
+            self.stats["usages_envoyes"] += len(usages)
+        except Exception as e:
+            logger.warning(f"Flush usage clés API échoué, nouvel essai au prochain flush: {e}")
+            self._remettre_usages(usages)
+
+    # =========================================================================
+    # THREAD
+    # =========================================================================
+
+    def _demarrer_si_besoin(self) -> None:
+        if self._thread is None and not self._arret.is_set():
+            self.demarrer()
+
+    def demarrer(self) -> None:
+        """Démarre le thread de flush (idempotent)."""
+        with self._verrou:
+            if self._thread is not None:
+                return
+            self._arret.clear()
+            self._thread = threading.Thread(
+                target=self._boucle, name="notaire-telemetrie", daemon=True
+            )
+            self._thread.start()
+
+    def _boucle(self) -> None:
+        boucle = asyncio.new_event_loop()
+        try:
+            while not self._arret.is_set():
+                self._reveil.wait(self.intervalle)
+                self._reveil.clear()
+                try:
+                    boucle.run_until_complete(self.vider())
+                except Exception as e:
+                    logger.warning(f"Flush télémétrie échoué: {e}")
+            # Flush final après arrêt
+            boucle.run_until_complete(self.vider())
+            boucle.run_until_complete(self.db.fermer())
+        finally:
+            boucle.close()
+
+    def arreter(self, timeout: float = 10.0) -> None:
+        """Flush final puis arrêt du thread (appelé au shutdown)."""
+        self._arret.set()
+        self._reveil.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        elif any(self.en_attente().values()):
+            asyncio.run(self.vider())
+
+
+_instance: Optional[EcrivainTelemetrie] = None
+_instance_verrou = threading.Lock()
+
+
+def get_telemetrie() -> EcrivainTelemetrie:
+    """Retourne l'écrivain partagé du process (flush garanti à la sortie)."""
+    global _instance
+    with _instance_verrou:
+        if _instance is None:
+            _instance = EcrivainTelemetrie()
+            atexit.register(_instance.arreter)
+        return _instance
+
+
+def arreter_telemetrie() -> None:
+    """Flush final de l'écrivain partagé (lifespan shutdown de l'API)."""
+    global _instance
+    with _instance_verrou:
+        instance, _instance = _instance, None
+    if instance is not None:
+        instance.arreter()
@@ -271,19 +271,22 @@ class ExtracteurV2:
         # 4. Personnes
         personnes = self.patterns.extraire_personnes(texte)
         vendeurs = []
+        # Régime matrimonial: même texte pour chaque personne, un seul passage
+        situation = None
+        if any(isinstance(p.valeur, dict) for p in personnes):
+            regimes = self.patterns.extraire_regime_matrimonial(texte)
+            if regimes:
+                regime = max(regimes, key=lambda r: r.confiance)
+                if isinstance(regime.valeur, dict):
+                    situation = regime.valeur
+                else:
+                    situation = {'statut': str(regime.valeur)}
         for p in personnes:
             if isinstance(p.valeur, dict):
                 personne = p.valeur.copy()
                 personne['type'] = 'physique'
-
-                # Extraire régime matrimonial
-                regimes = self.patterns.extraire_regime_matrimonial(texte)
-                if regimes:
-                    regime = max(regimes, key=lambda r: r.confiance)
-                    if isinstance(regime.valeur, dict):
-                        personne['situation_matrimoniale'] = regime.valeur
-                    else:
-                        personne['situation_matrimoniale'] = {'statut': str(regime.valeur)}
+                if situation is not None:
+                    personne['situation_matrimoniale'] = dict(situation)
 
                 vendeurs.append(personne)
 
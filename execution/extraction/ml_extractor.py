@@ -10,7 +10,9 @@ Ce module implémente:
 """
 
 import json
+import sqlite3
 import sys
+import threading
 from pathlib import Path
 from typing import Dict, List, Optional, Any, Tuple
 from dataclasses import dataclass, field, asdict
@@ -71,139 +73,272 @@ class CorrectionFrequente:
 
 
 class BaseApprentissage:
-    """Base de données des apprentissages."""
+    """
+    Base de données des apprentissages (SQLite, mode WAL).
+
+    Les extractions validées forment un journal en ajout seul; patterns,
+    corrections et statistiques par champ sont des compteurs mis à jour
+    ligne par ligne, indexés par (champ, pattern) et (champ, valeur_originale).
+    Chaque validation est une transaction `BEGIN IMMEDIATE`: plusieurs workers
+    (threads ou process) peuvent écrire dans la même base sans perdre de mise
+    à jour. Rien n'est chargé à la construction: les attributs `extractions`,
+    `patterns`, `corrections` et `stats` relisent la base à la demande.
+
+    Les anciens fichiers JSON (extractions_validees.json, ...) sont importés
+    une seule fois à la première ouverture.
+
+    Args:
+        data_dir: Dossier de la base (défaut: .tmp/ml_data)
+    """
 
     def __init__(self, data_dir: Optional[Path] = None):
         self.data_dir = data_dir or DATA_DIR
         self.data_dir.mkdir(parents=True, exist_ok=True)
 
+        self.chemin = self.data_dir / 'apprentissage.db'
         self.fichier_extractions = self.data_dir / 'extractions_validees.json'
         self.fichier_patterns = self.data_dir / 'patterns_appris.json'
         self.fichier_corrections = self.data_dir / 'corrections_frequentes.json'
         self.fichier_stats = self.data_dir / 'stats_extraction.json'
 
-        self._charger_donnees()
+        self._local = threading.local()
+        self._schema_verrou = threading.Lock()
+        self._schema_pret = False
+
+    def _connexion(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.chemin, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        if not self._schema_pret:
+            with self._schema_verrou:
+                if not self._schema_pret:
+                    self._creer_schema(conn)
+                    self._schema_pret = True
+        return conn
+
+    def _creer_schema(self, conn: sqlite3.Connection):
+        """Crée les tables puis importe les JSON historiques (une seule fois)."""
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS extractions (
+                id TEXT NOT NULL, date_validation TEXT NOT NULL, champ TEXT NOT NULL,
+                valeur_extraite TEXT, valeur_corrigee TEXT, contexte TEXT NOT NULL,
+                pattern_utilise TEXT NOT NULL, est_correcte INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS patterns (
+                champ TEXT NOT NULL, pattern TEXT NOT NULL,
+                nb_succes INTEGER NOT NULL, nb_echecs INTEGER NOT NULL,
+                derniere_utilisation TEXT NOT NULL,
+                exemples_succes TEXT NOT NULL, exemples_echecs TEXT NOT NULL,
+                PRIMARY KEY (champ, pattern)
+            );
+            CREATE TABLE IF NOT EXISTS corrections (
+                champ TEXT NOT NULL, valeur_originale TEXT NOT NULL,
+                valeur_correcte TEXT NOT NULL, nb_occurrences INTEGER NOT NULL,
+                PRIMARY KEY (champ, valeur_originale)
+            );
+            CREATE TABLE IF NOT EXISTS stats_champ (
+                champ TEXT PRIMARY KEY, total INTEGER NOT NULL, correctes INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS meta (cle TEXT PRIMARY KEY, valeur TEXT NOT NULL);
+        """)
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            deja = conn.execute("SELECT 1 FROM meta WHERE cle = 'migration_json'").fetchone()
+            if not deja:
+                self._migrer_json(conn)
+                conn.execute(
+                    "INSERT INTO meta (cle, valeur) VALUES ('migration_json', ?)",
+                    (datetime.now().isoformat(),)
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _migrer_json(self, conn: sqlite3.Connection):
+        """Importe le contenu des anciens fichiers JSON dans la base."""
+        def lire(fichier: Path):
+            if not fichier.exists():
+                return None
+            return json.loads(fichier.read_text(encoding='utf-8'))
+
+        extractions = lire(self.fichier_extractions) or []
+        conn.executemany(
+            "INSERT INTO extractions VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [self._ligne_extraction(ExtractionValidee(**e)) for e in extractions]
+        )
+        conn.executemany(
+            "INSERT OR REPLACE INTO patterns VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(p['champ'], p['pattern'], p.get('nb_succes', 0), p.get('nb_echecs', 0),
+              p.get('derniere_utilisation', ''),
+              json.dumps(p.get('exemples_succes', []), ensure_ascii=False),
+              json.dumps(p.get('exemples_echecs', []), ensure_ascii=False))
+             for p in lire(self.fichier_patterns) or []]
+        )
+        conn.executemany(
+            "INSERT OR REPLACE INTO corrections VALUES (?, ?, ?, ?)",
+            [(c['champ'], c['valeur_incorrecte'], c['valeur_correcte'], c.get('nb_occurrences', 0))
+             for c in lire(self.fichier_corrections) or []]
+        )
+        stats = lire(self.fichier_stats) or {}
+        conn.executemany(
+            "INSERT OR REPLACE INTO stats_champ VALUES (?, ?, ?)",
+            [(champ, s.get('total', 0), s.get('correctes', 0))
+             for champ, s in stats.get('par_champ', {}).items()]
+        )
+        if extractions or stats:
+            logger.info(f"Base d'apprentissage migrée depuis JSON ({len(extractions)} extractions)")
+
+    @staticmethod
+    def _ligne_extraction(extraction: ExtractionValidee) -> tuple:
+        return (
+            extraction.id, extraction.date_validation, extraction.champ,
+            json.dumps(extraction.valeur_extraite, ensure_ascii=False, default=str),
+            json.dumps(extraction.valeur_corrigee, ensure_ascii=False, default=str),
+            extraction.contexte, extraction.pattern_utilise, int(extraction.est_correcte)
+        )
 
-    def _charger_donnees(self):
-        """Charge les données depuis les fichiers JSON."""
-        # Extractions validées
-        if self.fichier_extractions.exists():
-            data = json.loads(self.fichier_extractions.read_text(encoding='utf-8'))
-            self.extractions = [ExtractionValidee(**e) for e in data]
-        else:
-            self.extractions = []
+    # ------------------------------------------------------------------
+    # Lecture
+    # ------------------------------------------------------------------
+
+    def pattern(self, pattern: str, champ: str) -> Optional[PatternAppris]:
+        """Pattern appris pour (champ, pattern), via l'index."""
+        ligne = self._connexion().execute(
+            "SELECT * FROM patterns WHERE champ = ? AND pattern = ?", (champ, pattern)
+        ).fetchone()
+        return self._pattern_depuis(ligne) if ligne else None
+
+    def correction(self, valeur_originale: str, champ: str) -> Optional[CorrectionFrequente]:
+        """Correction connue pour (champ, valeur_originale), via l'index."""
+        ligne = self._connexion().execute(
+            "SELECT * FROM corrections WHERE champ = ? AND valeur_originale = ?",
+            (champ, valeur_originale)
+        ).fetchone()
+        return self._correction_depuis(ligne) if ligne else None
+
+    @staticmethod
+    def _pattern_depuis(ligne: tuple) -> PatternAppris:
+        champ, pattern, nb_succes, nb_echecs, derniere, succes, echecs = ligne
+        return PatternAppris(
+            pattern=pattern, champ=champ, nb_succes=nb_succes, nb_echecs=nb_echecs,
+            derniere_utilisation=derniere,
+            exemples_succes=json.loads(succes), exemples_echecs=json.loads(echecs)
+        )
 
-        # Patterns appris
-        if self.fichier_patterns.exists():
-            data = json.loads(self.fichier_patterns.read_text(encoding='utf-8'))
-            self.patterns = [PatternAppris(**p) for p in data]
-        else:
-            self.patterns = []
+    @staticmethod
+    def _correction_depuis(ligne: tuple) -> CorrectionFrequente:
+        champ, valeur_originale, valeur_correcte, nb = ligne
+        return CorrectionFrequente(
+            valeur_incorrecte=valeur_originale, valeur_correcte=valeur_correcte,
+            champ=champ, nb_occurrences=nb
+        )
 
-        # Corrections fréquentes
-        if self.fichier_corrections.exists():
-            data = json.loads(self.fichier_corrections.read_text(encoding='utf-8'))
-            self.corrections = [CorrectionFrequente(**c) for c in data]
-        else:
-            self.corrections = []
+    @property
+    def extractions(self) -> List[ExtractionValidee]:
+        lignes = self._connexion().execute("SELECT * FROM extractions ORDER BY rowid").fetchall()
+        return [
+            ExtractionValidee(
+                id=i, date_validation=d, champ=c,
+                valeur_extraite=json.loads(ve), valeur_corrigee=json.loads(vc),
+                contexte=ctx, pattern_utilise=p, est_correcte=bool(ok)
+            )
+            for i, d, c, ve, vc, ctx, p, ok in lignes
+        ]
 
-        # Statistiques
-        if self.fichier_stats.exists():
-            self.stats = json.loads(self.fichier_stats.read_text(encoding='utf-8'))
-        else:
-            self.stats = {
-                'total_extractions': 0,
-                'extractions_correctes': 0,
-                'par_champ': {}
-            }
+    @property
+    def patterns(self) -> List[PatternAppris]:
+        lignes = self._connexion().execute("SELECT * FROM patterns ORDER BY rowid").fetchall()
+        return [self._pattern_depuis(l) for l in lignes]
 
-    def sauvegarder(self):
-        """Sauvegarde les données dans les fichiers JSON."""
-        # Extractions
-        data = [asdict(e) for e in self.extractions]
-        self.fichier_extractions.write_text(
-            json.dumps(data, ensure_ascii=False, indent=2),
-            encoding='utf-8'
-        )
+    @property
+    def corrections(self) -> List[CorrectionFrequente]:
+        lignes = self._connexion().execute("SELECT * FROM corrections ORDER BY rowid").fetchall()
+        return [self._correction_depuis(l) for l in lignes]
 
-        # Patterns
-        data = [asdict(p) for p in self.patterns]
-        self.fichier_patterns.write_text(
-            json.dumps(data, ensure_ascii=False, indent=2),
-            encoding='utf-8'
-        )
+    @property
+    def stats(self) -> Dict[str, Any]:
+        par_champ = {
+            champ: {'total': total, 'correctes': correctes}
+            for champ, total, correctes in self._connexion().execute(
+                "SELECT champ, total, correctes FROM stats_champ ORDER BY rowid"
+            )
+        }
+        return {
+            'total_extractions': sum(s['total'] for s in par_champ.values()),
+            'extractions_correctes': sum(s['correctes'] for s in par_champ.values()),
+            'par_champ': par_champ
+        }
 
-        # Corrections
-        data = [asdict(c) for c in self.corrections]
-        self.fichier_corrections.write_text(
-            json.dumps(data, ensure_ascii=False, indent=2),
-            encoding='utf-8'
-        )
+    # ------------------------------------------------------------------
+    # Écriture
+    # ------------------------------------------------------------------
 
-        # Stats
-        self.fichier_stats.write_text(
-            json.dumps(self.stats, ensure_ascii=False, indent=2),
-            encoding='utf-8'
-        )
+    def sauvegarder(self):
+        """Conservé pour compatibilité: chaque ajout est persisté immédiatement."""
 
     def ajouter_extraction(self, extraction: ExtractionValidee):
-        """Ajoute une extraction validée."""
-        self.extractions.append(extraction)
+        """Ajoute une extraction validée (une transaction, O(1))."""
+        conn = self._connexion()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT INTO extractions VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                self._ligne_extraction(extraction)
+            )
 
-        # Mettre à jour les stats
-        self.stats['total_extractions'] += 1
-        if extraction.est_correcte:
-            self.stats['extractions_correctes'] += 1
-
-        # Stats par champ
-        if extraction.champ not in self.stats['par_champ']:
-            self.stats['par_champ'][extraction.champ] = {
-                'total': 0, 'correctes': 0
-            }
-        self.stats['par_champ'][extraction.champ]['total'] += 1
-        if extraction.est_correcte:
-            self.stats['par_champ'][extraction.champ]['correctes'] += 1
+            # Stats par champ
+            conn.execute(
+                "INSERT INTO stats_champ (champ, total, correctes) VALUES (?, 1, ?) "
+                "ON CONFLICT(champ) DO UPDATE SET total = total + 1, "
+                "correctes = correctes + excluded.correctes",
+                (extraction.champ, int(extraction.est_correcte))
+            )
 
-        # Mettre à jour les patterns
-        self._mettre_a_jour_pattern(extraction)
+            # Mettre à jour les patterns
+            self._mettre_a_jour_pattern(conn, extraction)
 
-        # Mettre à jour les corrections fréquentes
-        if not extraction.est_correcte:
-            self._ajouter_correction(extraction)
+            # Mettre à jour les corrections fréquentes
+            if not extraction.est_correcte:
+                self._ajouter_correction(conn, extraction)
 
-        self.sauvegarder()
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
 
-    def _mettre_a_jour_pattern(self, extraction: ExtractionValidee):
+    def _mettre_a_jour_pattern(self, conn: sqlite3.Connection, extraction: ExtractionValidee):
         """Met à jour le pattern utilisé."""
-        pattern_existant = next(
-            (p for p in self.patterns
-             if p.pattern == extraction.pattern_utilise and p.champ == extraction.champ),
-            None
+        ligne = conn.execute(
+            "SELECT * FROM patterns WHERE champ = ? AND pattern = ?",
+            (extraction.champ, extraction.pattern_utilise)
+        ).fetchone()
+        pattern = self._pattern_depuis(ligne) if ligne else PatternAppris(
+            pattern=extraction.pattern_utilise, champ=extraction.champ
         )
 
-        if pattern_existant:
-            if extraction.est_correcte:
-                pattern_existant.nb_succes += 1
-                if len(pattern_existant.exemples_succes) < 10:
-                    pattern_existant.exemples_succes.append(extraction.contexte[:200])
-            else:
-                pattern_existant.nb_echecs += 1
-                if len(pattern_existant.exemples_echecs) < 10:
-                    pattern_existant.exemples_echecs.append(extraction.contexte[:200])
-            pattern_existant.derniere_utilisation = datetime.now().isoformat()
+        if extraction.est_correcte:
+            pattern.nb_succes += 1
+            if len(pattern.exemples_succes) < 10:
+                pattern.exemples_succes.append(extraction.contexte[:200])
         else:
-            nouveau_pattern = PatternAppris(
-                pattern=extraction.pattern_utilise,
-                champ=extraction.champ,
-                nb_succes=1 if extraction.est_correcte else 0,
-                nb_echecs=0 if extraction.est_correcte else 1,
-                derniere_utilisation=datetime.now().isoformat(),
-                exemples_succes=[extraction.contexte[:200]] if extraction.est_correcte else [],
-                exemples_echecs=[extraction.contexte[:200]] if not extraction.est_correcte else []
-            )
-            self.patterns.append(nouveau_pattern)
+            pattern.nb_echecs += 1
+            if len(pattern.exemples_echecs) < 10:
+                pattern.exemples_echecs.append(extraction.contexte[:200])
+        pattern.derniere_utilisation = datetime.now().isoformat()
+
+        conn.execute(
+            "INSERT OR REPLACE INTO patterns VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (pattern.champ, pattern.pattern, pattern.nb_succes, pattern.nb_echecs,
+             pattern.derniere_utilisation,
+             json.dumps(pattern.exemples_succes, ensure_ascii=False),
+             json.dumps(pattern.exemples_echecs, ensure_ascii=False))
+        )
 
-    def _ajouter_correction(self, extraction: ExtractionValidee):
+    def _ajouter_correction(self, conn: sqlite3.Connection, extraction: ExtractionValidee):
         """Ajoute une correction fréquente."""
         if extraction.valeur_corrigee is None:
             return
@@ -211,29 +346,29 @@ class BaseApprentissage:
         val_incorrecte = str(extraction.valeur_extraite)
         val_correcte = str(extraction.valeur_corrigee)
 
-        correction_existante = next(
-            (c for c in self.corrections
-             if c.valeur_incorrecte == val_incorrecte
-             and c.champ == extraction.champ),
-            None
-        )
+        existante = conn.execute(
+            "SELECT valeur_correcte FROM corrections WHERE champ = ? AND valeur_originale = ?",
+            (extraction.champ, val_incorrecte)
+        ).fetchone()
 
-        if correction_existante:
-            correction_existante.nb_occurrences += 1
+        if existante:
+            conn.execute(
+                "UPDATE corrections SET nb_occurrences = nb_occurrences + 1 "
+                "WHERE champ = ? AND valeur_originale = ?",
+                (extraction.champ, val_incorrecte)
+            )
             # Mettre à jour si la correction est différente
-            if correction_existante.valeur_correcte != val_correcte:
+            if existante[0] != val_correcte:
                 # Garder la plus fréquente
                 logger.warning(
                     f"Correction conflictuelle pour '{val_incorrecte}': "
-                    f"'{correction_existante.valeur_correcte}' vs '{val_correcte}'"
+                    f"'{existante[0]}' vs '{val_correcte}'"
                 )
         else:
-            self.corrections.append(CorrectionFrequente(
-                valeur_incorrecte=val_incorrecte,
-                valeur_correcte=val_correcte,
-                champ=extraction.champ,
-                nb_occurrences=1
-            ))
+            conn.execute(
+                "INSERT INTO corrections VALUES (?, ?, ?, 1)",
+                (extraction.champ, val_incorrecte, val_correcte)
+            )
 
 
 class MLExtractor:
@@ -253,11 +388,7 @@ class MLExtractor:
         Returns:
             Score de confiance entre 0 et 1
         """
-        pattern_appris = next(
-            (p for p in self.base.patterns
-             if p.pattern == pattern and p.champ == champ),
-            None
-        )
+        pattern_appris = self.base.pattern(pattern, champ)
 
         if pattern_appris:
             # Score basé sur le taux de succès historique
@@ -279,11 +410,7 @@ class MLExtractor:
         """
         val_str = str(valeur)
 
-        correction = next(
-            (c for c in self.base.corrections
-             if c.valeur_incorrecte == val_str and c.champ == champ),
-            None
-        )
+        correction = self.base.correction(val_str, champ)
 
         if correction and correction.nb_occurrences >= 2:
             logger.info(f"Correction automatique: '{val_str}' → '{correction.valeur_correcte}'")
@@ -550,16 +677,18 @@ class MLExtractor:
             stats['taux_succes_global'] = 0.0
 
         # Ajouter les stats des patterns
+        patterns = self.base.patterns
         stats['patterns'] = {
-            'total': len(self.base.patterns),
-            'efficaces': len([p for p in self.base.patterns if p.taux_succes >= 0.8]),
-            'a_ameliorer': len([p for p in self.base.patterns if p.taux_succes < 0.7])
+            'total': len(patterns),
+            'efficaces': len([p for p in patterns if p.taux_succes >= 0.8]),
+            'a_ameliorer': len([p for p in patterns if p.taux_succes < 0.7])
         }
 
         # Ajouter les stats des corrections
+        corrections = self.base.corrections
         stats['corrections'] = {
-            'total': len(self.base.corrections),
-            'frequentes': len([c for c in self.base.corrections if c.nb_occurrences >= 3])
+            'total': len(corrections),
+            'frequentes': len([c for c in corrections if c.nb_occurrences >= 3])
         }
 
         return stats
@@ -4,13 +4,35 @@ Processeur OCR pour les PDF scannés.
 
 Ce module permet d'extraire le texte des PDF scannés en utilisant
 pytesseract et pdf2image.
+
+Les pages sont rastérisées une à une (first_page/last_page) et traitées
+dans le pool de processus partagé (execution/utils/executeurs.py, spawn,
+taille bornée pour tout le process): la mémoire reste bornée à une image
+par worker et traiter_pdf_flux() rend chaque OCRPage dès qu'elle est
+prête. Pool saturé ou désactivé: la page est traitée sur place.
+
+Les résultats sont mis en cache par (empreinte du fichier, page, langue,
+dpi): re-téléverser ou relancer un même titre ne refait pas l'OCR. Le
+texte des titres est une donnée client: les pages expirent après un TTL
+et les suppressions écrasent les pages libérées (PRAGMA secure_delete).
+
+Variables d'environnement:
+    NOTAIRE_OCR_WORKERS       Pages en parallèle par PDF (défaut: taille du pool CPU)
+    NOTAIRE_CACHE_OCR         0 pour désactiver le cache (défaut: 1)
+    NOTAIRE_CACHE_OCR_DIR     Dossier du cache (défaut: .tmp/cache_ocr)
+    NOTAIRE_CACHE_OCR_TTL_H   Durée de vie d'une page en cache, en heures (défaut: 24)
 """
 
+import hashlib
 import os
+import sqlite3
 import sys
 import tempfile
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, BrokenExecutor, Future, wait
 from pathlib import Path
-from typing import Optional, List, Dict, Any, Tuple
+from typing import Optional, List, Dict, Any, Iterator, Tuple
 from dataclasses import dataclass
 import logging
 
@@ -21,6 +43,12 @@ if sys.platform == 'win32':
 
 logger = logging.getLogger(__name__)
 
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+CACHE_OCR_DIR_DEFAUT = PROJECT_ROOT / ".tmp" / "cache_ocr"
+
+# Purge des pages expirées au plus toutes les N secondes (à l'écriture)
+INTERVALLE_PURGE = 300
+
 
 @dataclass
 class OCRPage:
@@ -42,6 +70,152 @@ class OCRResult:
     temps_traitement: float
 
 
+def empreinte_fichier(chemin: str, taille_bloc: int = 1 << 20) -> str:
+    """Empreinte SHA-256 du contenu d'un fichier (indépendante de son nom)."""
+    empreinte = hashlib.sha256()
+    with open(chemin, 'rb') as f:
+        for bloc in iter(lambda: f.read(taille_bloc), b''):
+            empreinte.update(bloc)
+    return empreinte.hexdigest()
+
+
+class CacheOCR:
+    """
+    Cache SQLite (mode WAL) des pages déjà reconnues.
+
+    Clé: (empreinte du fichier, page, langue, dpi, prétraitement). Base
+    partagée par tous les workers du même hôte. Les pages expirent
+    `ttl_heures` après leur écriture (purgées périodiquement à l'écriture,
+    ou par purger()); supprimer(empreinte) retire un fichier donné.
+
+    Args:
+        cache_dir: Dossier du cache (défaut: NOTAIRE_CACHE_OCR_DIR ou .tmp/cache_ocr)
+        ttl_heures: Durée de vie d'une page (défaut: NOTAIRE_CACHE_OCR_TTL_H, 24)
+    """
+
+    def __init__(self, cache_dir: Optional[Path] = None, ttl_heures: Optional[float] = None):
+        self.cache_dir = Path(cache_dir or os.getenv("NOTAIRE_CACHE_OCR_DIR", str(CACHE_OCR_DIR_DEFAUT)))
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.chemin = self.cache_dir / "ocr.db"
+        if ttl_heures is None:
+            ttl_heures = float(os.getenv("NOTAIRE_CACHE_OCR_TTL_H", "24"))
+        self.ttl_secondes = ttl_heures * 3600
+        self.stats = {"hits": 0, "misses": 0, "ecritures": 0, "expirees": 0}
+        self._local = threading.local()
+        self._derniere_purge = 0.0
+        conn = self._connexion()
+        colonnes = {ligne[1] for ligne in conn.execute("PRAGMA table_info(pages)")}
+        if colonnes and "cree_a" not in colonnes:
+            # Ancien cache sans date d'écriture: pages conservées sans limite
+            conn.execute("DROP TABLE pages")
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS pages (
+                empreinte TEXT NOT NULL, page INTEGER NOT NULL, parametres TEXT NOT NULL,
+                texte TEXT NOT NULL, confiance REAL NOT NULL, cree_a REAL NOT NULL,
+                PRIMARY KEY (empreinte, parametres, page)
+            );
+            CREATE INDEX IF NOT EXISTS idx_pages_cree ON pages(cree_a);
+        """)
+
+    def _connexion(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.chemin, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            # Texte des titres: les pages supprimées ne restent pas dans les pages libres
+            conn.execute("PRAGMA secure_delete=ON")
+            self._local.conn = conn
+        return conn
+
+    def lire(self, empreinte: str, parametres: str, pages: List[int]) -> Dict[int, Tuple[str, float]]:
+        """Pages déjà reconnues (non expirées) parmi `pages` → {numero: (texte, confiance)}."""
+        try:
+            lignes = self._connexion().execute(
+                "SELECT page, texte, confiance FROM pages "
+                "WHERE empreinte = ? AND parametres = ? AND cree_a >= ?",
+                (empreinte, parametres, time.time() - self.ttl_secondes)
+            ).fetchall()
+        except sqlite3.Error as e:
+            logger.warning(f"Lecture du cache OCR impossible: {e}")
+            lignes = []
+        voulues = set(pages)
+        trouvees = {page: (texte, confiance) for page, texte, confiance in lignes if page in voulues}
+        self.stats["hits"] += len(trouvees)
+        self.stats["misses"] += len(voulues) - len(trouvees)
+        return trouvees
+
+    def ecrire(self, empreinte: str, parametres: str, page: int, texte: str, confiance: float) -> None:
+        maintenant = time.time()
+        try:
+            self._connexion().execute(
+                "INSERT OR REPLACE INTO pages (empreinte, page, parametres, texte, confiance, cree_a) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (empreinte, page, parametres, texte, confiance, maintenant)
+            )
+            self.stats["ecritures"] += 1
+            if maintenant - self._derniere_purge > INTERVALLE_PURGE:
+                self.purger()
+        except sqlite3.Error as e:
+            logger.warning(f"Écriture du cache OCR impossible: {e}")
+
+    def purger(self) -> int:
+        """Supprime les pages expirées. Retourne le nombre de pages supprimées."""
+        self._derniere_purge = time.time()
+        supprimees = self._connexion().execute(
+            "DELETE FROM pages WHERE cree_a < ?", (self._derniere_purge - self.ttl_secondes,)
+        ).rowcount
+        self.stats["expirees"] += supprimees
+        return supprimees
+
+    def supprimer(self, empreinte: str) -> int:
+        """Supprime toutes les pages d'un fichier (ex: titre supprimé ou anonymisé)."""
+        return self._connexion().execute("DELETE FROM pages WHERE empreinte = ?", (empreinte,)).rowcount
+
+    def vider(self) -> None:
+        self._connexion().execute("DELETE FROM pages")
+
+
+_cache_ocr: Optional[CacheOCR] = None
+_cache_ocr_verrou = threading.Lock()
+
+
+def get_cache_ocr() -> Optional[CacheOCR]:
+    """Retourne le cache OCR partagé du process (None si NOTAIRE_CACHE_OCR=0)."""
+    global _cache_ocr
+    if os.getenv("NOTAIRE_CACHE_OCR", "1") == "0":
+        return None
+    with _cache_ocr_verrou:
+        if _cache_ocr is None:
+            _cache_ocr = CacheOCR()
+        return _cache_ocr
+
+
+# Processeur propre à chaque worker du pool (évite de revérifier Tesseract par page)
+_processeur_worker: Optional['OCRProcessor'] = None
+
+
+def _ocr_page_worker(
+    pdf_path: str,
+    numero: int,
+    langue: str,
+    dpi: int,
+    tesseract_path: Optional[str],
+    pretraitement: bool
+) -> Tuple[int, str, float]:
+    """Rastérise puis reconnaît une page (exécuté dans un processus du pool)."""
+    global _processeur_worker
+    processeur = _processeur_worker
+    if processeur is None or (processeur.langue, processeur.dpi, processeur.tesseract_path) != (
+        langue, dpi, tesseract_path
+    ):
+        processeur = OCRProcessor(langue, dpi, tesseract_path, verifier_dependances=False)
+        _processeur_worker = processeur
+    image = processeur.rasteriser_page(pdf_path, numero)
+    texte, confiance = processeur.extraire_texte_page(image, pretraitement)
+    return numero, texte, confiance
+
+
 class OCRProcessor:
     """Processeur OCR pour PDF scannés."""
 
@@ -57,7 +231,9 @@ class OCRProcessor:
         self,
         langue: str = 'fra',
         dpi: int = 300,
-        tesseract_path: Optional[str] = None
+        tesseract_path: Optional[str] = None,
+        workers: Optional[int] = None,
+        verifier_dependances: bool = True
     ):
         """
         Initialise le processeur OCR.
@@ -66,11 +242,24 @@ class OCRProcessor:
             langue: Code langue Tesseract (fra, eng, etc.)
             dpi: Résolution pour la conversion PDF → Image
             tesseract_path: Chemin vers l'exécutable Tesseract (optionnel)
+            workers: Pages traitées en parallèle dans le pool CPU partagé
+                (défaut: NOTAIRE_OCR_WORKERS ou taille du pool; 1 =
+                traitement dans le thread courant)
+            verifier_dependances: Vérifier l'installation (désactivé dans
+                les workers du pool)
         """
         self.langue = langue
         self.dpi = dpi
         self.tesseract_path = tesseract_path
-        self._verifier_dependances()
+        # 0 = taille du pool CPU partagé (résolue au traitement)
+        self.workers = workers or int(os.getenv("NOTAIRE_OCR_WORKERS", "0"))
+        if verifier_dependances:
+            self._verifier_dependances()
+        else:
+            self._deps = {}
+            if tesseract_path:
+                import pytesseract
+                pytesseract.pytesseract.tesseract_cmd = tesseract_path
 
     def _verifier_dependances(self) -> Dict[str, bool]:
         """Vérifie que les dépendances OCR sont installées."""
@@ -274,6 +463,124 @@ class OCRProcessor:
             logger.error(f"Erreur OCR: {e}")
             return "", 0.0
 
+    def nombre_pages(self, pdf_path: str) -> int:
+        """Nombre de pages du PDF, sans le rastériser."""
+        try:
+            from pdf2image import pdfinfo_from_path
+            return int(pdfinfo_from_path(pdf_path)['Pages'])
+        except Exception:
+            import pdfplumber
+            with pdfplumber.open(pdf_path) as pdf:
+                return len(pdf.pages)
+
+    def rasteriser_page(self, pdf_path: str, numero: int):
+        """Rastérise une seule page (numérotée à partir de 1)."""
+        from pdf2image import convert_from_path
+
+        return convert_from_path(pdf_path, dpi=self.dpi, first_page=numero, last_page=numero)[0]
+
+    def traiter_pdf_flux(
+        self,
+        pdf_path: str,
+        pages: Optional[List[int]] = None,
+        pretraitement: bool = True,
+        utiliser_cache: bool = True
+    ) -> Iterator[OCRPage]:
+        """
+        Traite un PDF page par page et rend chaque OCRPage dès qu'elle est prête.
+
+        Les pages en cache sont rendues d'abord, les autres dans leur ordre
+        d'achèvement (trier sur `numero` si l'ordre importe).
+
+        Args:
+            pdf_path: Chemin du PDF
+            pages: Numéros des pages à traiter (None = toutes)
+            pretraitement: Appliquer le prétraitement d'image
+            utiliser_cache: Consulter/alimenter le cache OCR
+
+        Yields:
+            OCRPage, numérotée selon sa position dans le PDF
+        """
+        total = self.nombre_pages(pdf_path)
+        if pages:
+            a_traiter = sorted({i for i in pages if 0 < i <= total})
+        else:
+            a_traiter = list(range(1, total + 1))
+
+        cache = get_cache_ocr() if utiliser_cache else None
+        if cache is not None:
+            empreinte = empreinte_fichier(pdf_path)
+            parametres = f"{self.langue}|{self.dpi}|{int(pretraitement)}"
+            for numero, (texte, confiance) in sorted(cache.lire(empreinte, parametres, a_traiter).items()):
+                a_traiter.remove(numero)
+                yield self._page(numero, texte, confiance)
+
+        def resultat(numero: int, texte: str, confiance: float) -> OCRPage:
+            # ("", 0.0) = échec de extraire_texte_page (Tesseract ou pack de
+            # langue absent...): jamais mis en cache, la page sera retentée
+            if cache is not None and (texte or confiance):
+                cache.ecrire(empreinte, parametres, numero, texte, confiance)
+            return self._page(numero, texte, confiance)
+
+        if not a_traiter:
+            return
+
+        def sur_place(numero: int) -> OCRPage:
+            logger.info(f"OCR page {numero}/{total}...")
+            image = self.rasteriser_page(pdf_path, numero)
+            return resultat(numero, *self.extraire_texte_page(image, pretraitement))
+
+        pool = None
+        if self.workers != 1:
+            from execution.utils.executeurs import get_pool_execution
+            pool = get_pool_execution()
+        paralleles = min(self.workers or pool.processus_disponibles(), len(a_traiter)) if pool else 1
+        if paralleles <= 1:
+            for numero in a_traiter:
+                yield sur_place(numero)
+            return
+
+        # Au plus `paralleles` pages en vol dans le pool partagé: les
+        # processus sont communs à tout le process (ingestions concurrentes
+        # comprises); pool saturé -> la page suivante est traitée sur place
+        logger.info(f"OCR de {len(a_traiter)} page(s), {paralleles} en parallèle (DPI={self.dpi})...")
+        restantes = list(a_traiter)
+        en_vol: Dict[Future, int] = {}
+        try:
+            while restantes or en_vol:
+                while restantes and len(en_vol) < paralleles:
+                    future = pool.soumettre_processus(
+                        _ocr_page_worker, str(pdf_path), restantes[0], self.langue, self.dpi,
+                        self.tesseract_path, pretraitement
+                    )
+                    if future is None:
+                        break
+                    en_vol[future] = restantes.pop(0)
+                if not en_vol:
+                    yield sur_place(restantes.pop(0))
+                    continue
+                terminees, _ = wait(list(en_vol), return_when=FIRST_COMPLETED)
+                for future in terminees:
+                    numero = en_vol.pop(future)
+                    try:
+                        yield resultat(*future.result())
+                    except BrokenExecutor:
+                        # Processus tué (OOM...): page rejouée sur place
+                        yield sur_place(numero)
+        finally:
+            # Consommateur arrêté en cours de route: ne pas finir les pages restantes
+            for future in en_vol:
+                future.cancel()
+
+    def _page(self, numero: int, texte: str, confiance: float) -> OCRPage:
+        return OCRPage(
+            numero=numero,
+            texte=texte,
+            confiance=confiance,
+            langue=self.langue,
+            resolution=self.dpi
+        )
+
     def traiter_pdf(
         self,
         pdf_path: str,
@@ -292,7 +599,6 @@ class OCRProcessor:
             OCRResult avec le texte extrait
         """
         import time
-        from pdf2image import convert_from_path
 
         debut = time.time()
 
@@ -306,30 +612,10 @@ class OCRProcessor:
         est_scanne, raison = self.detecter_pdf_scanne(pdf_path)
         logger.info(f"Détection PDF: {raison}")
 
-        # Convertir PDF en images
-        logger.info(f"Conversion PDF → Images (DPI={self.dpi})...")
-        images = convert_from_path(pdf_path, dpi=self.dpi)
-
-        # Filtrer les pages si spécifié
-        if pages:
-            images = [images[i-1] for i in pages if 0 < i <= len(images)]
-
-        # Traiter chaque page
-        resultats_pages = []
-        textes = []
-
-        for i, image in enumerate(images, 1):
-            logger.info(f"OCR page {i}/{len(images)}...")
-            texte, confiance = self.extraire_texte_page(image, pretraitement)
-
-            resultats_pages.append(OCRPage(
-                numero=i,
-                texte=texte,
-                confiance=confiance,
-                langue=self.langue,
-                resolution=self.dpi
-            ))
-            textes.append(texte)
+        resultats_pages = sorted(
+            self.traiter_pdf_flux(pdf_path, pages=pages, pretraitement=pretraitement),
+            key=lambda p: p.numero
+        )
 
         # Calculer la confiance moyenne
         confiances = [p.confiance for p in resultats_pages if p.confiance > 0]
@@ -338,7 +624,7 @@ class OCRProcessor:
         temps_traitement = time.time() - debut
 
         return OCRResult(
-            texte_complet='\n\n'.join(textes),
+            texte_complet='\n\n'.join(p.texte for p in resultats_pages),
             pages=resultats_pages,
             confiance_moyenne=confiance_moyenne,
             est_scanne=est_scanne,
@@ -360,19 +646,19 @@ class OCRProcessor:
         Returns:
             Liste de (texte, confiance) pour chaque zone
         """
-        from pdf2image import convert_from_path
-        from PIL import Image
-
-        images = convert_from_path(pdf_path, dpi=self.dpi)
+        total = self.nombre_pages(pdf_path)
+        images = {}  # Seules les pages citées sont rastérisées
         resultats = []
 
         for zone in zones:
             page_num = zone.get('page', 1)
-            if page_num > len(images):
+            if page_num > total:
                 resultats.append(("", 0.0))
                 continue
 
-            image = images[page_num - 1]
+            if page_num not in images:
+                images[page_num] = self.rasteriser_page(pdf_path, page_num)
+            image = images[page_num]
 
             # Calculer les coordonnées en pixels
             x = int(zone['x'] * self.dpi / 72)
@@ -4,13 +4,29 @@ Patterns regex avancés pour l'extraction des titres de propriété.
 
 Ce module contient des patterns regex améliorés pour extraire avec précision
 les données des actes notariaux français.
+
+Les tables PATTERNS_* sont compilées une seule fois. Chaque pattern porte
+les littéraux sans lesquels il ne peut pas correspondre (ex: "crpcen",
+"notaire"): s'ils sont absents du texte (recherche de sous-chaîne sur le
+texte mis en minuscules une fois), le pattern n'est pas exécuté. Les
+résultats sont identiques à un re.finditer() par pattern.
+
+Micro-benchmark:
+    python -m execution.extraction.patterns_avances --benchmark [titre.txt]
 """
 
 import re
-from typing import Dict, List, Optional, Any, Tuple
+import threading
+from typing import Dict, List, Optional, Any, Iterator, Set, Tuple
 from dataclasses import dataclass
 from enum import Enum
 
+try:
+    from re import _parser as _sre_parse, _constants as _sre_constants
+except ImportError:  # Python < 3.11
+    import sre_parse as _sre_parse
+    import sre_constants as _sre_constants
+
 
 class TypePersonne(Enum):
     """Types de personnes dans un acte."""
@@ -36,9 +52,83 @@ class PatternResult:
     pattern_id: str
 
 
+# Caractères que re.IGNORECASE rapproche de lettres ASCII mais pas str.lower()
+_REPLI_CASSE = str.maketrans({'ı': 'i', 'ſ': 's', '\u212a': 'k'})
+
+
+def _litteraux_requis(sequence, min_len: int = 3) -> List[Set[str]]:
+    """
+    Littéraux obligatoires d'un pattern analysé, en forme normale conjonctive.
+
+    Chaque élément est un ensemble d'alternatives dont au moins une doit
+    apparaître dans le texte (ex: [{'notaire'}, {'mars', 'avril', ...}]).
+    Les parties optionnelles sont ignorées.
+    """
+    clauses: List[Set[str]] = []
+    courant: List[str] = []
+
+    def cloturer():
+        if len(courant) >= min_len:
+            clauses.append({''.join(courant)})
+        courant.clear()
+
+    for op, arg in sequence:
+        if op is _sre_constants.LITERAL:
+            courant.append(chr(arg))
+            continue
+        cloturer()
+        if op is _sre_constants.SUBPATTERN:
+            clauses.extend(_litteraux_requis(arg[-1], min_len))
+        elif op in (_sre_constants.MAX_REPEAT, _sre_constants.MIN_REPEAT) and arg[0] >= 1:
+            clauses.extend(_litteraux_requis(arg[2], min_len))
+        elif op is _sre_constants.BRANCH:
+            # Chaque branche doit fournir un littéral, sinon pas de contrainte
+            alternatives: Set[str] = set()
+            for branche in arg[1]:
+                sous_clauses = _litteraux_requis(branche, min_len)
+                if not sous_clauses:
+                    alternatives = set()
+                    break
+                alternatives |= max(sous_clauses, key=lambda c: min(map(len, c)))
+            if alternatives:
+                clauses.append(alternatives)
+    cloturer()
+    return clauses
+
+
+@dataclass
+class PatternCompile:
+    """Pattern d'une table PATTERNS_*, compilé avec ses littéraux requis."""
+    regex: 're.Pattern'
+    pattern_id: str
+    confiance: float
+    requis: List[Set[str]]
+    ignorer_casse: bool
+
+    @classmethod
+    def depuis(cls, pattern: str, pattern_id: str, confiance: float, flags: int) -> 'PatternCompile':
+        ignorer_casse = bool(flags & re.IGNORECASE)
+        try:
+            requis = _litteraux_requis(_sre_parse.parse(pattern, flags))
+        except Exception:
+            requis = []
+        if ignorer_casse:
+            requis = [{l.lower().translate(_REPLI_CASSE) for l in c} for c in requis]
+        return cls(re.compile(pattern, flags), pattern_id, confiance, requis, ignorer_casse)
+
+    def applicable(self, texte: str, texte_minuscules: str) -> bool:
+        """False si un littéral requis est absent: aucun match possible."""
+        cible = texte_minuscules if self.ignorer_casse else texte
+        return all(any(l in cible for l in clause) for clause in self.requis)
+
+
 class PatternsAvances:
     """Classe contenant tous les patterns regex avancés."""
 
+    _compiles: Dict[Tuple[str, int], Tuple[list, int, List[PatternCompile]]] = {}
+    _compiles_verrou = threading.Lock()
+    _dernier_texte: Tuple[Optional[str], str] = (None, '')
+
     # ========== DATES ==========
 
     MOIS_FR = {
@@ -255,205 +345,244 @@ class PatternsAvances:
         (r'immatricul[ée]\s+(?:au\s+registre\s+national\s+des\s+copropri[ée]t[ée]s\s+)?sous\s+le\s+n(?:uméro|°)\s*(\d+)', 'immatriculation_copro', 0.95),
     ]
 
+    @classmethod
+    def table_compilee(cls, nom_table: str, flags: int = 0) -> List[PatternCompile]:
+        """
+        Patterns compilés d'une table PATTERNS_* (compilés au premier appel).
+
+        Une table modifiée en place (ajout d'un pattern) est recompilée.
+        """
+        table = getattr(cls, nom_table)
+        cle = (f"{cls.__qualname__}.{nom_table}", flags)
+        entree = cls._compiles.get(cle)
+        if entree is None or entree[0] is not table or entree[1] != len(table):
+            with cls._compiles_verrou:
+                compiles = [PatternCompile.depuis(p, pid, conf, flags) for p, pid, conf in table]
+                entree = (table, len(table), compiles)
+                cls._compiles[cle] = entree
+        return entree[2]
+
+    @classmethod
+    def _minuscules(cls, texte: str) -> str:
+        """Texte replié en minuscules, mémorisé pour le dernier texte traité."""
+        dernier, minuscules = cls._dernier_texte
+        if dernier is not texte:
+            minuscules = texte.lower().translate(_REPLI_CASSE)
+            cls._dernier_texte = (texte, minuscules)
+        return minuscules
+
+    @classmethod
+    def rechercher(
+        cls,
+        nom_table: str,
+        texte: str,
+        flags: int = re.IGNORECASE
+    ) -> Iterator[Tuple['re.Match', str, float]]:
+        """
+        Itère (match, pattern_id, confiance) pour chaque pattern d'une table.
+
+        Même ordre et mêmes matchs que re.finditer() appliqué pattern par
+        pattern; les patterns dont un littéral requis manque sont sautés.
+        """
+        minuscules = cls._minuscules(texte) if flags & re.IGNORECASE else texte
+        for pattern in cls.table_compilee(nom_table, flags):
+            if not pattern.applicable(texte, minuscules):
+                continue
+            for match in pattern.regex.finditer(texte):
+                yield match, pattern.pattern_id, pattern.confiance
+
     @classmethod
     def extraire_date(cls, texte: str) -> List[PatternResult]:
         """Extrait toutes les dates du texte."""
         resultats = []
-        for pattern, pattern_id, confiance in cls.PATTERNS_DATE:
-            for match in re.finditer(pattern, texte, re.IGNORECASE):
-                resultats.append(PatternResult(
-                    valeur=match.group(0),
-                    confiance=confiance,
-                    source=match.group(0),
-                    pattern_id=pattern_id
-                ))
+        for match, pattern_id, confiance in cls.rechercher('PATTERNS_DATE', texte):
+            resultats.append(PatternResult(
+                valeur=match.group(0),
+                confiance=confiance,
+                source=match.group(0),
+                pattern_id=pattern_id
+            ))
         return resultats
 
     @classmethod
     def extraire_notaire(cls, texte: str) -> List[PatternResult]:
         """Extrait les informations du notaire."""
         resultats = []
-        for pattern, pattern_id, confiance in cls.PATTERNS_NOTAIRE:
-            for match in re.finditer(pattern, texte, re.IGNORECASE):
-                if pattern_id == 'notaire_simple':
-                    resultats.append(PatternResult(
-                        valeur={
-                            'prenom': match.group(1),
-                            'nom': match.group(2),
-                            'ville': match.group(3).strip()
-                        },
-                        confiance=confiance,
-                        source=match.group(0),
-                        pattern_id=pattern_id
-                    ))
-                elif pattern_id == 'crpcen':
-                    resultats.append(PatternResult(
-                        valeur={'crpcen': match.group(1)},
-                        confiance=confiance,
-                        source=match.group(0),
-                        pattern_id=pattern_id
-                    ))
-                else:
-                    resultats.append(PatternResult(
-                        valeur=match.group(0),
-                        confiance=confiance,
-                        source=match.group(0),
-                        pattern_id=pattern_id
-                    ))
+        for match, pattern_id, confiance in cls.rechercher('PATTERNS_NOTAIRE', texte):
+            if pattern_id == 'notaire_simple':
+                resultats.append(PatternResult(
+                    valeur={
+                        'prenom': match.group(1),
+                        'nom': match.group(2),
+                        'ville': match.group(3).strip()
+                    },
+                    confiance=confiance,
+                    source=match.group(0),
+                    pattern_id=pattern_id
+                ))
+            elif pattern_id == 'crpcen':
+                resultats.append(PatternResult(
+                    valeur={'crpcen': match.group(1)},
+                    confiance=confiance,
+                    source=match.group(0),
+                    pattern_id=pattern_id
+                ))
+            else:
+                resultats.append(PatternResult(
+                    valeur=match.group(0),
+                    confiance=confiance,
+                    source=match.group(0),
+                    pattern_id=pattern_id
+                ))
         return resultats
 
     @classmethod
     def extraire_publication(cls, texte: str) -> List[PatternResult]:
         """Extrait les références de publication."""
         resultats = []
-        for pattern, pattern_id, confiance in cls.PATTERNS_PUBLICATION:
-            for match in re.finditer(pattern, texte, re.IGNORECASE):
-                if pattern_id == 'publication_spf_complete':
-                    resultats.append(PatternResult(
-                        valeur={
-                            'spf': match.group(1).strip(),
-                            'date': match.group(2),
-                            'volume': match.group(3),
-                            'numero': match.group(4)
-                        },
-                        confiance=confiance,
-                        source=match.group(0),
-                        pattern_id=pattern_id
-                    ))
-                else:
-                    resultats.append(PatternResult(
-                        valeur=match.group(0),
-                        confiance=confiance,
-                        source=match.group(0),
-                        pattern_id=pattern_id
-                    ))
+        for match, pattern_id, confiance in cls.rechercher('PATTERNS_PUBLICATION', texte):
+            if pattern_id == 'publication_spf_complete':
+                resultats.append(PatternResult(
+                    valeur={
+                        'spf': match.group(1).strip(),
+                        'date': match.group(2),
+                        'volume': match.group(3),
+                        'numero': match.group(4)
+                    },
+                    confiance=confiance,
+                    source=match.group(0),
+                    pattern_id=pattern_id
+                ))
+            else:
+                resultats.append(PatternResult(
+                    valeur=match.group(0),
+                    confiance=confiance,
+                    source=match.group(0),
+                    pattern_id=pattern_id
+                ))
         return resultats
 
     @classmethod
     def extraire_personnes(cls, texte: str) -> List[PatternResult]:
         """Extrait les personnes physiques."""
         resultats = []
-        for pattern, pattern_id, confiance in cls.PATTERNS_PERSONNE_PHYSIQUE:
-            for match in re.finditer(pattern, texte):
-                if pattern_id == 'personne_complete':
-                    resultats.append(PatternResult(
-                        valeur={
-                            'civilite': match.group(1),
-                            'prenoms': match.group(2),
-                            'nom': match.group(3),
-                            'date_naissance': f"{match.group(4)} {match.group(5)} {match.group(6)}",
-                            'lieu_naissance': match.group(7).strip()
-                        },
-                        confiance=confiance,
-                        source=match.group(0),
-                        pattern_id=pattern_id
-                    ))
-                else:
-                    resultats.append(PatternResult(
-                        valeur={
-                            'civilite': match.group(1),
-                            'prenoms': match.group(2),
-                            'nom': match.group(3)
-                        },
-                        confiance=confiance,
-                        source=match.group(0),
-                        pattern_id=pattern_id
-                    ))
+        for match, pattern_id, confiance in cls.rechercher('PATTERNS_PERSONNE_PHYSIQUE', texte, flags=0):
+            if pattern_id == 'personne_complete':
+                resultats.append(PatternResult(
+                    valeur={
+                        'civilite': match.group(1),
+                        'prenoms': match.group(2),
+                        'nom': match.group(3),
+                        'date_naissance': f"{match.group(4)} {match.group(5)} {match.group(6)}",
+                        'lieu_naissance': match.group(7).strip()
+                    },
+                    confiance=confiance,
+                    source=match.group(0),
+                    pattern_id=pattern_id
+                ))
+            else:
+                resultats.append(PatternResult(
+                    valeur={
+                        'civilite': match.group(1),
+                        'prenoms': match.group(2),
+                        'nom': match.group(3)
+                    },
+                    confiance=confiance,
+                    source=match.group(0),
+                    pattern_id=pattern_id
+                ))
         return resultats
 
     @classmethod
     def extraire_lots(cls, texte: str) -> List[PatternResult]:
         """Extrait les lots de copropriété."""
         resultats = []
-        for pattern, pattern_id, confiance in cls.PATTERNS_LOT:
-            for match in re.finditer(pattern, texte, re.IGNORECASE):
-                if pattern_id == 'lot_complet':
-                    resultats.append(PatternResult(
-                        valeur={
-                            'numero': int(match.group(1)),
-                            'description': match.group(2).strip(),
-                            'tantiemes': {
-                                'valeur': int(match.group(3)),
-                                'base': int(match.group(4))
-                            }
-                        },
-                        confiance=confiance,
-                        source=match.group(0),
-                        pattern_id=pattern_id
-                    ))
-                elif pattern_id == 'lot_simple':
-                    resultats.append(PatternResult(
-                        valeur={'numero': int(match.group(1))},
-                        confiance=confiance,
-                        source=match.group(0),
-                        pattern_id=pattern_id
-                    ))
-                elif pattern_id == 'tantiemes':
-                    resultats.append(PatternResult(
-                        valeur={
-                            'valeur': int(match.group(1)),
-                            'base': int(match.group(2))
-                        },
-                        confiance=confiance,
-                        source=match.group(0),
-                        pattern_id=pattern_id
-                    ))
+        for match, pattern_id, confiance in cls.rechercher('PATTERNS_LOT', texte):
+            if pattern_id == 'lot_complet':
+                resultats.append(PatternResult(
+                    valeur={
+                        'numero': int(match.group(1)),
+                        'description': match.group(2).strip(),
+                        'tantiemes': {
+                            'valeur': int(match.group(3)),
+                            'base': int(match.group(4))
+                        }
+                    },
+                    confiance=confiance,
+                    source=match.group(0),
+                    pattern_id=pattern_id
+                ))
+            elif pattern_id == 'lot_simple':
+                resultats.append(PatternResult(
+                    valeur={'numero': int(match.group(1))},
+                    confiance=confiance,
+                    source=match.group(0),
+                    pattern_id=pattern_id
+                ))
+            elif pattern_id == 'tantiemes':
+                resultats.append(PatternResult(
+                    valeur={
+                        'valeur': int(match.group(1)),
+                        'base': int(match.group(2))
+                    },
+                    confiance=confiance,
+                    source=match.group(0),
+                    pattern_id=pattern_id
+                ))
         return resultats
 
     @classmethod
     def extraire_prix(cls, texte: str) -> List[PatternResult]:
         """Extrait les informations de prix."""
         resultats = []
-        for pattern, pattern_id, confiance in cls.PATTERNS_PRIX:
-            for match in re.finditer(pattern, texte, re.IGNORECASE):
-                montant_str = match.group(1).replace(' ', '').replace(',', '.')
-                try:
-                    montant = float(montant_str)
-                    result = {'montant': montant}
-                    if pattern_id == 'prix_complet':
-                        result['en_lettres'] = match.group(2)
-                    if pattern_id == 'prix_francs':
-                        result['devise'] = 'FRF'
-                    else:
-                        result['devise'] = 'EUR'
-                    resultats.append(PatternResult(
-                        valeur=result,
-                        confiance=confiance,
-                        source=match.group(0),
-                        pattern_id=pattern_id
-                    ))
-                except ValueError:
-                    pass
+        for match, pattern_id, confiance in cls.rechercher('PATTERNS_PRIX', texte):
+            montant_str = match.group(1).replace(' ', '').replace(',', '.')
+            try:
+                montant = float(montant_str)
+                result = {'montant': montant}
+                if pattern_id == 'prix_complet':
+                    result['en_lettres'] = match.group(2)
+                if pattern_id == 'prix_francs':
+                    result['devise'] = 'FRF'
+                else:
+                    result['devise'] = 'EUR'
+                resultats.append(PatternResult(
+                    valeur=result,
+                    confiance=confiance,
+                    source=match.group(0),
+                    pattern_id=pattern_id
+                ))
+            except ValueError:
+                pass
         return resultats
 
     @classmethod
     def extraire_regime_matrimonial(cls, texte: str) -> List[PatternResult]:
         """Extrait le régime matrimonial."""
         resultats = []
-        for pattern, pattern_id, confiance in cls.PATTERNS_REGIME_MATRIMONIAL:
-            for match in re.finditer(pattern, texte, re.IGNORECASE):
-                if pattern_id == 'regime_sous':
-                    regime = match.group(1).lower()
-                    resultats.append(PatternResult(
-                        valeur={'statut': 'marie', 'regime': regime},
-                        confiance=confiance,
-                        source=match.group(0),
-                        pattern_id=pattern_id
-                    ))
-                elif pattern_id in ['celibataire', 'divorce', 'veuf', 'pacs']:
-                    resultats.append(PatternResult(
-                        valeur={'statut': pattern_id},
-                        confiance=confiance,
-                        source=match.group(0),
-                        pattern_id=pattern_id
-                    ))
-                else:
-                    resultats.append(PatternResult(
-                        valeur=match.group(0),
-                        confiance=confiance,
-                        source=match.group(0),
-                        pattern_id=pattern_id
-                    ))
+        for match, pattern_id, confiance in cls.rechercher('PATTERNS_REGIME_MATRIMONIAL', texte):
+            if pattern_id == 'regime_sous':
+                regime = match.group(1).lower()
+                resultats.append(PatternResult(
+                    valeur={'statut': 'marie', 'regime': regime},
+                    confiance=confiance,
+                    source=match.group(0),
+                    pattern_id=pattern_id
+                ))
+            elif pattern_id in ['celibataire', 'divorce', 'veuf', 'pacs']:
+                resultats.append(PatternResult(
+                    valeur={'statut': pattern_id},
+                    confiance=confiance,
+                    source=match.group(0),
+                    pattern_id=pattern_id
+                ))
+            else:
+                resultats.append(PatternResult(
+                    valeur=match.group(0),
+                    confiance=confiance,
+                    source=match.group(0),
+                    pattern_id=pattern_id
+                ))
         return resultats
 
     @classmethod
@@ -469,44 +598,43 @@ class PatternsAvances:
             - nom_naissance: Nom de naissance si différent (pour l'épouse)
         """
         resultats = []
-        for pattern, pattern_id, confiance in cls.PATTERNS_CONJOINT:
-            for match in re.finditer(pattern, texte, re.IGNORECASE):
-                if pattern_id in ['conjoint_marie_a', 'conjoint_epoux_de', 'conjoint_son_epoux',
-                                  'conjoint_et_conjoint', 'partenaire_pacs', 'partenaire_son']:
-                    # Déterminer le type de conjoint
-                    type_conjoint = 'partenaire' if 'partenaire' in pattern_id else 'epoux'
-
-                    resultats.append(PatternResult(
-                        valeur={
-                            'prenoms': match.group(1).strip(),
-                            'nom': match.group(2).strip(),
-                            'type': type_conjoint
-                        },
-                        confiance=confiance,
-                        source=match.group(0),
-                        pattern_id=pattern_id
-                    ))
-                elif pattern_id == 'nom_naissance':
-                    resultats.append(PatternResult(
-                        valeur={'nom_naissance': match.group(1).strip()},
-                        confiance=confiance,
-                        source=match.group(0),
-                        pattern_id=pattern_id
-                    ))
-                elif pattern_id == 'epoux_designation':
-                    resultats.append(PatternResult(
-                        valeur={'nom_famille': match.group(1).strip()},
-                        confiance=confiance,
-                        source=match.group(0),
-                        pattern_id=pattern_id
-                    ))
-                elif pattern_id == 'conjoint_meme_domicile':
-                    resultats.append(PatternResult(
-                        valeur={'meme_domicile': True},
-                        confiance=confiance,
-                        source=match.group(0),
-                        pattern_id=pattern_id
-                    ))
+        for match, pattern_id, confiance in cls.rechercher('PATTERNS_CONJOINT', texte):
+            if pattern_id in ['conjoint_marie_a', 'conjoint_epoux_de', 'conjoint_son_epoux',
+                              'conjoint_et_conjoint', 'partenaire_pacs', 'partenaire_son']:
+                # Déterminer le type de conjoint
+                type_conjoint = 'partenaire' if 'partenaire' in pattern_id else 'epoux'
+
+                resultats.append(PatternResult(
+                    valeur={
+                        'prenoms': match.group(1).strip(),
+                        'nom': match.group(2).strip(),
+                        'type': type_conjoint
+                    },
+                    confiance=confiance,
+                    source=match.group(0),
+                    pattern_id=pattern_id
+                ))
+            elif pattern_id == 'nom_naissance':
+                resultats.append(PatternResult(
+                    valeur={'nom_naissance': match.group(1).strip()},
+                    confiance=confiance,
+                    source=match.group(0),
+                    pattern_id=pattern_id
+                ))
+            elif pattern_id == 'epoux_designation':
+                resultats.append(PatternResult(
+                    valeur={'nom_famille': match.group(1).strip()},
+                    confiance=confiance,
+                    source=match.group(0),
+                    pattern_id=pattern_id
+                ))
+            elif pattern_id == 'conjoint_meme_domicile':
+                resultats.append(PatternResult(
+                    valeur={'meme_domicile': True},
+                    confiance=confiance,
+                    source=match.group(0),
+                    pattern_id=pattern_id
+                ))
         return resultats
 
     @classmethod
@@ -534,3 +662,97 @@ extraire_prix = PatternsAvances.extraire_prix
 extraire_regime_matrimonial = PatternsAvances.extraire_regime_matrimonial
 extraire_conjoint = PatternsAvances.extraire_conjoint
 extraire_tout = PatternsAvances.extraire_tout
+
+
+# ========== MICRO-BENCHMARK ==========
+
+_TITRE_EXEMPLE = (
+    "Le 27 juin 2017, Maître Lionel MONJEAUD, notaire à VILLEURBANNE, CRPCEN n° 69123, "
+    "a reçu le présent acte.\n\n"
+    "Monsieur Thibault TARBOURIECH, de profession ingénieur, demeurant à LYON (69003), "
+    "15 rue de la république, marié sous le régime de la communauté légale.\n\n"
+    "Lot numéro 25 : un appartement de type T4, et les 125/10000èmes des parties communes.\n\n"
+    "Moyennant le prix de 193 000 € (cent quatre-vingt-treize mille euros), publié au SPF de "
+    "LYON 1er bureau le 24/07/2014 volume 2014P numéro 4164.\n\n"
+    "L'ACQUEREUR prendra le BIEN dans l'état où il se trouvera le jour de l'entrée en "
+    "jouissance, sans aucune garantie de la part du VENDEUR pour raison soit de l'état des "
+    "constructions, de leurs vices même cachés, soit de l'état du sol et du sous-sol.\n\n"
+)
+
+_TABLES = [
+    ('PATTERNS_DATE', re.IGNORECASE),
+    ('PATTERNS_NOTAIRE', re.IGNORECASE),
+    ('PATTERNS_PUBLICATION', re.IGNORECASE),
+    ('PATTERNS_PERSONNE_PHYSIQUE', 0),
+    ('PATTERNS_LOT', re.IGNORECASE),
+    ('PATTERNS_PRIX', re.IGNORECASE),
+    ('PATTERNS_REGIME_MATRIMONIAL', re.IGNORECASE),
+    ('PATTERNS_CONJOINT', re.IGNORECASE),
+]
+
+
+def benchmark(texte: str, repetitions: int = 5) -> Dict[str, float]:
+    """
+    Compare le balayage pattern par pattern (re.finditer sur les chaînes
+    brutes) au moteur compilé, sur les tables utilisées par extraire_tout().
+
+    Returns:
+        Meilleurs temps en millisecondes et nombre de correspondances
+    """
+    import time
+
+    def reference(t):
+        return [
+            (m.span(), pid)
+            for nom, flags in _TABLES
+            for pattern, pid, _ in getattr(PatternsAvances, nom)
+            for m in re.finditer(pattern, t, flags)
+        ]
+
+    def moteur(t):
+        return [
+            (m.span(), pid)
+            for nom, flags in _TABLES
+            for m, pid, _ in PatternsAvances.rechercher(nom, t, flags)
+        ]
+
+    if reference(texte) != moteur(texte):
+        raise AssertionError("Le moteur compilé diverge de la référence")
+
+    temps = {}
+    for nom, fonction in (('reference_ms', reference), ('moteur_ms', moteur)):
+        meilleur = float('inf')
+        for i in range(repetitions):
+            copie = texte + ' ' * (i + 1)  # nouvelle chaîne: pas de mémo entre tours
+            debut = time.perf_counter()
+            fonction(copie)
+            meilleur = min(meilleur, time.perf_counter() - debut)
+        temps[nom] = meilleur * 1000
+    temps['correspondances'] = len(reference(texte))
+    return temps
+
+
+if __name__ == '__main__':
+    import argparse
+    import sys
+    from pathlib import Path
+
+    parser = argparse.ArgumentParser(description='Patterns avancés des titres de propriété')
+    parser.add_argument('--benchmark', nargs='?', const='', metavar='FICHIER',
+                        help='Micro-benchmark (texte du titre, défaut: exemple de ~200 ko)')
+    parser.add_argument('--repetitions', type=int, default=5)
+    args = parser.parse_args()
+
+    if args.benchmark is None:
+        parser.print_help()
+        sys.exit(0)
+
+    if args.benchmark:
+        texte = Path(args.benchmark).read_text(encoding='utf-8')
+    else:
+        texte = _TITRE_EXEMPLE * (200_000 // len(_TITRE_EXEMPLE))
+    resultats = benchmark(texte, args.repetitions)
+    print(f"Texte: {len(texte) // 1024} ko, {resultats['correspondances']} correspondances")
+    print(f"  Référence (re.finditer par pattern): {resultats['reference_ms']:.1f} ms")
+    print(f"  Moteur compilé:                      {resultats['moteur_ms']:.1f} ms")
+    print(f"  Gain: x{resultats['reference_ms'] / resultats['moteur_ms']:.2f}")
@@ -33,12 +33,14 @@ import logging
 import os
 import sys
 from pathlib import Path
-from typing import Dict, List, Optional, Any, Tuple
+from typing import Dict, List, Optional, Any, Tuple, Callable
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
 import copy
 
+from execution.utils.profilage import etape, tracer
+
 # Configuration du logger
 logger = logging.getLogger(__name__)
 
@@ -144,6 +146,7 @@ class ResultatGeneration:
     warnings: List[str] = field(default_factory=list)
     duree_generation: float = 0.0
     metadata: Dict[str, Any] = field(default_factory=dict)
+    chronometrage: Dict[str, Any] = field(default_factory=dict)
 
 
 class GestionnairePromesses:
@@ -815,16 +818,43 @@ class GestionnairePromesses:
             print(f"[ERROR] Connexion Supabase échouée: {e}")
             return None
 
-    def rechercher_titre_par_adresse(self, adresse: str) -> List[Dict]:
-        """Recherche des titres par adresse dans Supabase."""
+    def _rechercher_titres_rpc(self, requete: str, champ: str, etude_id: Optional[str]) -> Optional[List[Dict]]:
+        """
+        Recherche classée pg_trgm/tsvector (RPC rechercher_titres), limitée
+        aux titres de l'étude.
+
+        Returns:
+            Titres (id, reference, proprietaires, bien, score) triés par
+            pertinence, ou None sans étude ou si la fonction n'est pas
+            déployée (migration 20261018_recherche_plein_texte.sql)
+        """
+        if not etude_id:
+            return None
+        try:
+            response = self.supabase.rpc("rechercher_titres", {
+                "p_etude_id": etude_id, "p_requete": requete, "p_champ": champ, "p_limite": 50
+            }).execute()
+            return response.data or []
+        except Exception as e:
+            logger.debug(f"RPC rechercher_titres indisponible: {e}")
+            return None
+
+    def rechercher_titre_par_adresse(self, adresse: str, etude_id: Optional[str] = None) -> List[Dict]:
+        """Recherche des titres de l'étude par adresse dans Supabase (tolère accents et fautes)."""
         if not self.supabase:
             return []
 
+        resultats = self._rechercher_titres_rpc(adresse, "adresse", etude_id)
+        if resultats is not None:
+            return resultats
+
         try:
-            response = self.supabase.table("titres_propriete")\
+            query = self.supabase.table("titres_propriete")\
                 .select("id, reference, proprietaires, bien")\
-                .ilike("bien->>adresse", f"%{adresse}%")\
-                .execute()
+                .ilike("bien->>adresse", f"%{adresse}%")
+            if etude_id:
+                query = query.eq("etude_id", etude_id)
+            response = query.execute()
             return response.data or []
         except AttributeError as e:
             # Client Supabase mal configuré
@@ -839,16 +869,22 @@ class GestionnairePromesses:
             print(f"[ERROR] Connexion Supabase échouée: {e}")
             return []
 
-    def rechercher_titre_par_proprietaire(self, nom: str) -> List[Dict]:
-        """Recherche des titres par nom de propriétaire."""
+    def rechercher_titre_par_proprietaire(self, nom: str, etude_id: Optional[str] = None) -> List[Dict]:
+        """Recherche des titres de l'étude par nom de propriétaire (tolère accents et fautes)."""
         if not self.supabase:
             return []
 
+        resultats = self._rechercher_titres_rpc(nom, "parties", etude_id)
+        if resultats is not None:
+            return resultats
+
         try:
             # Recherche dans le JSON des propriétaires
-            response = self.supabase.table("titres_propriete")\
-                .select("id, reference, proprietaires, bien")\
-                .execute()
+            query = self.supabase.table("titres_propriete")\
+                .select("id, reference, proprietaires, bien")
+            if etude_id:
+                query = query.eq("etude_id", etude_id)
+            response = query.execute()
 
             resultats = []
             for titre in response.data or []:
@@ -1120,7 +1156,11 @@ class GestionnairePromesses:
         donnees: Dict,
         type_force: Optional[TypePromesse] = None,
         output_dir: Optional[Path] = None,
-        force: bool = False
+        force: bool = False,
+        streaming: bool = False,
+        progression: Optional[Callable[[Dict[str, Any]], None]] = None,
+        exporteur: Optional[Callable[[Path, Path], Any]] = None,
+        utiliser_cache: bool = True
     ) -> ResultatGeneration:
         """
         Génère une promesse de vente.
@@ -1130,10 +1170,39 @@ class GestionnairePromesses:
             type_force: Forcer un type spécifique
             output_dir: Dossier de sortie
             force: Si True, génère même si données incomplètes (erreurs → warnings)
+            streaming: Si True, le rendu Jinja2 alimente directement le DOCX
+                (pas de relecture de acte.md, progression réelle par section)
+            progression: Callback appelé à chaque section H2 convertie (mode streaming)
+            exporteur: Remplace exporter_docx(md, docx) pour l'étape 7, ex. export
+                délégué à un pool de processus (ignoré en mode streaming)
+            utiliser_cache: Si True, un acte déjà généré avec les mêmes données
+                enrichies, le même template et les mêmes templates/clauses est
+                recopié depuis le cache de génération (assemblage et export évités)
 
         Returns:
-            ResultatGeneration avec fichiers générés
+            ResultatGeneration avec fichiers générés (chronometrage: durée par
+            étape - detection, validation, cadastre, render, export, upload)
         """
+        with tracer("promesse") as trace:
+            resultat = self._generer(
+                donnees, type_force, output_dir, force, streaming,
+                progression, exporteur, utiliser_cache
+            )
+        resultat.chronometrage = trace.en_dict()
+        return resultat
+
+    def _generer(
+        self,
+        donnees: Dict,
+        type_force: Optional[TypePromesse],
+        output_dir: Optional[Path],
+        force: bool,
+        streaming: bool,
+        progression: Optional[Callable[[Dict[str, Any]], None]],
+        exporteur: Optional[Callable[[Path, Path], Any]],
+        utiliser_cache: bool
+    ) -> ResultatGeneration:
+        """Corps de generer(), chronométré étape par étape."""
         import time
         start = time.time()
 
@@ -1141,6 +1210,7 @@ class GestionnairePromesses:
         warnings = []
 
         # 1. Détecter le type (3 niveaux: catégorie + type transaction + sous-type)
+        etape("detection")
         sous_type = None
         if type_force:
             type_promesse = type_force
@@ -1156,6 +1226,7 @@ class GestionnairePromesses:
             warnings.extend(detection.warnings)
 
         # 2. Valider les données
+        etape("validation")
         validation = self.valider(donnees, type_promesse)
         if not validation.valide:
             if not force:
@@ -1174,9 +1245,10 @@ class GestionnairePromesses:
         warnings.extend(validation.warnings)
 
         # 2b. Enrichir le cadastre via API gouvernementale
+        etape("cadastre")
         try:
-            from execution.services.cadastre_service import CadastreService
-            cadastre_svc = CadastreService()
+            from execution.services.cadastre_service import get_cadastre_service
+            cadastre_svc = get_cadastre_service()
             resultat_cadastre = cadastre_svc.enrichir_cadastre(donnees)
             donnees = resultat_cadastre["donnees"]
             rapport_cad = resultat_cadastre["rapport"]
@@ -1199,6 +1271,7 @@ class GestionnairePromesses:
             warnings.append(f"Paramètres cadastre invalides: {e}")
 
         # 3. Sélectionner les sections
+        etape("render")
         sections = self._get_sections_pour_type(type_promesse, donnees)
 
         # 4. Sélectionner le template (catégorie + type + sous-type viager)
@@ -1222,9 +1295,13 @@ class GestionnairePromesses:
         # 6. Générer le markdown via assembler_acte.py
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         output_name = f"promesse_{type_promesse.value}_{timestamp}"
+        fichier_docx = None
+        cache, cle_cache, depuis_cache, a_stocker = None, None, False, False
 
         try:
-            from execution.core.assembler_acte import assembler_acte
+            from execution.core.assembler_acte import (
+                assembler_acte, assembler_acte_flux, sauvegarder_metadonnees
+            )
 
             # Enrichir les données avec les sections actives et la catégorie
             donnees_enrichies = copy.deepcopy(donnees)
@@ -1317,13 +1394,42 @@ class GestionnairePromesses:
                 }
             donnees_enrichies["acte"] = acte
 
-            result_paths = assembler_acte(
-                template=template_path.name,
-                donnees=donnees_enrichies,
-                output_dir=str(output_dir),
-                acte_id=output_name
-            )
+            # Même dossier, même template, mêmes templates/clauses → même acte
+            if utiliser_cache:
+                from execution.core.cache_generation import cle_generation, get_cache_generation
+                cache = get_cache_generation()
+                if cache is not None:
+                    cle_cache = cle_generation(donnees_enrichies, template_path.name, zones_grisees=False)
+
+            chemin_docx_sortie = output_dir / f"{output_name}.docx"
+            if cle_cache and cache.restaurer(
+                cle_cache, output_dir / output_name / "acte.md", chemin_docx_sortie
+            ):
+                depuis_cache = True
+                result_paths = sauvegarder_metadonnees(donnees_enrichies, output_dir / output_name, output_name)
+                result_paths["acte"] = output_dir / output_name / "acte.md"
+                fichier_docx = chemin_docx_sortie
+            elif streaming:
+                # Pipeline: assemblage et export DOCX en un seul passage
+                result_paths = assembler_acte_flux(
+                    template=template_path.name,
+                    donnees=donnees_enrichies,
+                    output_dir=str(output_dir),
+                    chemin_docx=chemin_docx_sortie,
+                    acte_id=output_name,
+                    progression=progression
+                )
+                fichier_docx = result_paths.get("docx")
+            else:
+                result_paths = assembler_acte(
+                    template=template_path.name,
+                    donnees=donnees_enrichies,
+                    output_dir=str(output_dir),
+                    acte_id=output_name
+                )
             fichier_md = result_paths.get("acte") or output_dir / output_name / "acte.md"
+            # Les replis (_generer_markdown_simple) ne sont jamais mis en cache
+            a_stocker = cle_cache is not None and not depuis_cache
 
         except ImportError:
             # Fallback: génération simple si module non disponible
@@ -1403,13 +1509,15 @@ class GestionnairePromesses:
                     warnings=warnings
                 )
 
-        # 7. Exporter en DOCX
-        fichier_docx = None
+        # 7. Exporter en DOCX (déjà fait en mode streaming)
+        etape("export")
         try:
-            from execution.core.exporter_docx import exporter_docx
+            if fichier_docx is None:
+                if exporteur is None:
+                    from execution.core.exporter_docx import exporter_docx as exporteur
 
-            fichier_docx = output_dir / f"{output_name}.docx"
-            exporter_docx(fichier_md, fichier_docx)
+                fichier_docx = output_dir / f"{output_name}.docx"
+                exporteur(fichier_md, fichier_docx)
 
         except ImportError:
             # Module d'export non disponible (optionnel)
@@ -1427,7 +1535,12 @@ class GestionnairePromesses:
             logger.warning(f"Format markdown invalide: {e}")
             warnings.append(f"Format markdown invalide: {e}")
 
+        # 7b. Mémoriser l'acte pour les générations identiques suivantes
+        if a_stocker and fichier_docx and Path(fichier_docx).exists():
+            cache.ecrire(cle_cache, fichier_md, fichier_docx)
+
         # 8. Sauvegarder dans Supabase si configuré
+        etape("upload")
         if self.supabase:
             try:
                 self._sauvegarder_promesse_supabase(
@@ -1453,7 +1566,8 @@ class GestionnairePromesses:
                 "raison_type": raison,
                 "categorie_bien": categorie.value,
                 "template": str(template_path),
-                "timestamp": datetime.now().isoformat()
+                "timestamp": datetime.now().isoformat(),
+                "depuis_cache": depuis_cache
             }
         )
 
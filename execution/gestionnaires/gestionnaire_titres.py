@@ -23,6 +23,9 @@ Usage:
 
     # Lister tous les titres
     python gestionnaire_titres_propriete.py list
+
+    # Import en masse (dossier ou archive, reprise automatique)
+    python gestionnaire_titres_propriete.py batch --source archives_titres.zip --workers 8
 """
 
 import argparse
@@ -46,7 +49,10 @@ PROJECT_ROOT = SCRIPT_DIR.parent
 
 sys.path.insert(0, str(SCRIPT_DIR))
 
-from extraire_titre_propriete import extraire_donnees_titre
+try:
+    from execution.utils.extraire_titre import extraire_donnees_titre
+except ImportError:
+    from extraire_titre_propriete import extraire_donnees_titre
 
 try:
     from dotenv import load_dotenv
@@ -54,6 +60,13 @@ try:
 except ImportError:
     pass
 
+try:
+    from execution.database.recherche import get_index_recherche, recherche_postgres
+except ImportError:
+    # Script lancé hors package: pas d'index de recherche
+    get_index_recherche = None
+    recherche_postgres = None
+
 try:
     from supabase import create_client, Client
     HAS_SUPABASE = True
@@ -92,6 +105,7 @@ class TitrePropriete:
     donnees: Dict = field(default_factory=dict)
     metadata: Dict = field(default_factory=dict)
     fichier_source: Optional[str] = None
+    etude_id: Optional[str] = None
 
     @property
     def adresse_complete(self) -> str:
@@ -251,24 +265,33 @@ class GestionnaireTitres:
 
         return None
 
-    def _trouver_par_hash(self, hash_fichier: str) -> Optional[TitrePropriete]:
-        """Trouve un titre par le hash de son fichier source."""
+    def _trouver_par_hash(self, hash_fichier: str, etude_id: Optional[str] = None) -> Optional[TitrePropriete]:
+        """
+        Trouve un titre par le hash de son fichier source.
+
+        Avec `etude_id`, seuls les titres de cette étude comptent: le client
+        utilise la clé service, un titre d'une autre étude ne doit ni être
+        révélé ni bloquer l'import comme "doublon".
+        """
         if not hash_fichier:
             return None
 
         if self._offline_mode:
             for ref, data in self._offline_storage.items():
-                if data.get("donnees", {}).get("source", {}).get("hash_fichier") == hash_fichier:
+                if data.get("donnees", {}).get("source", {}).get("hash_fichier") == hash_fichier \
+                        and data.get("etude_id") == etude_id:
                     return TitrePropriete(**data)
             return None
 
         try:
-            # Recherche dans JSONB
-            result = self.client.table("titres_propriete").select("*").execute()
-            for row in result.data:
-                donnees = row.get("donnees", {})
-                if donnees.get("source", {}).get("hash_fichier") == hash_fichier:
-                    return self._row_to_titre(row)
+            # Filtre JSONB côté serveur (pas de lecture de toute la table)
+            query = self.client.table("titres_propriete").select("*") \
+                .eq("donnees->source->>hash_fichier", hash_fichier)
+            if etude_id:
+                query = query.eq("etude_id", etude_id)
+            result = query.limit(1).execute()
+            if result.data:
+                return self._row_to_titre(result.data[0])
         except Exception:
             pass
 
@@ -278,8 +301,25 @@ class GestionnaireTitres:
     # CRUD OPERATIONS
     # -------------------------------------------------------------------------
 
-    def _sauvegarder_titre(self, titre: TitrePropriete) -> Optional[str]:
-        """Sauvegarde un titre dans Supabase ou en local."""
+    def _index(self):
+        """Index de recherche local (None si désactivé)."""
+        return get_index_recherche() if get_index_recherche else None
+
+    def _indexer(self, titre: TitrePropriete) -> None:
+        """Met à jour l'index de recherche local pour ce titre."""
+        index = self._index()
+        if index is not None:
+            try:
+                index.indexer("titre", titre.reference, titre.donnees)
+            except Exception as e:
+                console.print(f"[yellow]Indexation impossible pour {titre.reference}: {e}[/yellow]")
+
+    def _sauvegarder_titre(self, titre: TitrePropriete, etude_id: Optional[str] = None) -> Optional[str]:
+        """Sauvegarde un titre dans Supabase ou en local (rattaché à `etude_id` si fourni)."""
+        etude_id = etude_id or titre.etude_id
+        titre.etude_id = etude_id
+        self._indexer(titre)
+
         if self._offline_mode:
             titre_id = f"offline_{titre.reference}"
             self._offline_storage[titre.reference] = {
@@ -290,7 +330,8 @@ class GestionnaireTitres:
                 "statut": titre.statut,
                 "donnees": titre.donnees,
                 "metadata": titre.metadata,
-                "fichier_source": titre.fichier_source
+                "fichier_source": titre.fichier_source,
+                "etude_id": etude_id
             }
 
             # Sauvegarder aussi en fichier JSON
@@ -302,7 +343,10 @@ class GestionnaireTitres:
 
         try:
             # Vérifie si existe
-            existing = self.client.table("titres_propriete").select("id").eq("reference", titre.reference).execute()
+            query = self.client.table("titres_propriete").select("id").eq("reference", titre.reference)
+            if etude_id:
+                query = query.eq("etude_id", etude_id)
+            existing = query.execute()
 
             data = {
                 "reference": titre.reference,
@@ -312,10 +356,12 @@ class GestionnaireTitres:
                 "fichier_source": titre.fichier_source,
                 "date_modification": datetime.now().isoformat()
             }
+            if etude_id:
+                data["etude_id"] = etude_id
 
             if existing.data:
                 # Update
-                result = self.client.table("titres_propriete").update(data).eq("reference", titre.reference).execute()
+                result = self.client.table("titres_propriete").update(data).eq("id", existing.data[0]["id"]).execute()
                 return existing.data[0]["id"]
             else:
                 # Insert
@@ -327,6 +373,58 @@ class GestionnaireTitres:
             console.print(f"[red]Erreur sauvegarde: {e}[/red]")
             return None
 
+    def sauvegarder_titres(
+        self,
+        titres: List[TitrePropriete],
+        taille_lot: int = 50,
+        etude_id: Optional[str] = None
+    ) -> List[Optional[str]]:
+        """
+        Sauvegarde plusieurs titres, par lots d'insertions Supabase.
+
+        Un lot refusé (ex: une référence déjà présente) est rejoué titre par
+        titre pour n'écarter que les lignes fautives.
+
+        Args:
+            titres: Titres à insérer
+            taille_lot: Nombre de lignes par requête
+            etude_id: Étude propriétaire (imports via l'API)
+
+        Returns:
+            Identifiants, dans l'ordre des titres (None si échec)
+        """
+        if self._offline_mode:
+            return [self._sauvegarder_titre(titre, etude_id=etude_id) for titre in titres]
+
+        ids: List[Optional[str]] = []
+        for debut in range(0, len(titres), taille_lot):
+            lot = titres[debut:debut + taille_lot]
+            maintenant = datetime.now().isoformat()
+            lignes = []
+            for titre in lot:
+                ligne = {
+                    "reference": titre.reference,
+                    "donnees": titre.donnees,
+                    "metadata": titre.metadata,
+                    "statut": titre.statut,
+                    "fichier_source": titre.fichier_source,
+                    "date_creation": titre.date_creation or maintenant,
+                    "date_modification": maintenant
+                }
+                if etude_id:
+                    ligne["etude_id"] = etude_id
+                lignes.append(ligne)
+            try:
+                result = self.client.table("titres_propriete").insert(lignes).execute()
+                par_reference = {row.get("reference"): row.get("id") for row in result.data or []}
+                ids.extend(par_reference.get(titre.reference) for titre in lot)
+                for titre in lot:
+                    self._indexer(titre)
+            except Exception as e:
+                console.print(f"[yellow]Lot refusé ({e}), insertion titre par titre[/yellow]")
+                ids.extend(self._sauvegarder_titre(titre, etude_id=etude_id) for titre in lot)
+        return ids
+
     def charger_titre(self, reference: str) -> Optional[TitrePropriete]:
         """Charge un titre par sa référence."""
         if self._offline_mode:
@@ -383,10 +481,25 @@ class GestionnaireTitres:
             console.print(f"[red]Erreur listage: {e}[/red]")
             return []
 
-    def rechercher_titres(self, query: str) -> List[TitrePropriete]:
-        """Recherche dans les titres (nom, adresse, référence)."""
+    def rechercher_titres(self, query: str, etude_id: Optional[str] = None) -> List[TitrePropriete]:
+        """
+        Recherche dans les titres, classée par pertinence.
+
+        Tolère accents et fautes de frappe sur les propriétaires, l'adresse,
+        les lots, le cadastre et la référence (index local ou Postgres, voir
+        execution/database/recherche.py). Avec `etude_id`, seuls les titres
+        de cette étude sont rendus; la RPC Postgres l'exige.
+        """
+        index = self._index()
+
+        if self._offline_mode and index is not None:
+            titres = [self.charger_titre(ref) for ref in index.references(query, "titre")]
+            titres = [t for t in titres if t is not None]
+            if titres:
+                return titres
+
         if self._offline_mode:
-            # Recherche simple en mémoire
+            # Dernier recours: sous-chaîne dans tout le JSON en mémoire
             resultats = []
             query_lower = query.lower()
             for ref, data in self._offline_storage.items():
@@ -400,17 +513,54 @@ class GestionnaireTitres:
             return resultats
 
         try:
-            # Recherche par référence
-            result = self.client.table("titres_propriete").select("*").ilike("reference", f"%{query}%").execute()
-            titres = [self._row_to_titre(row) for row in result.data]
-
-            # TODO: Ajouter recherche full-text dans donnees JSONB
-
-            return titres
+            if index is not None and not recherche_postgres():
+                # Index local, lignes rechargées dans l'ordre du classement
+                references = index.references(query, "titre")
+                if not references:
+                    return []
+                requete = self.client.table("titres_propriete").select("*") \
+                    .in_("reference", references)
+                if etude_id:
+                    requete = requete.eq("etude_id", etude_id)
+                result = requete.execute()
+                rang = {ref: i for i, ref in enumerate(references)}
+                result.data.sort(key=lambda row: rang.get(row.get("reference"), len(rang)))
+                lignes = result.data
+            else:
+                lignes = self._rechercher_postgres(query, etude_id)
+            return [self._row_to_titre(row) for row in lignes]
         except Exception as e:
             console.print(f"[red]Erreur recherche: {e}[/red]")
             return []
 
+    def _rechercher_postgres(self, query: str, etude_id: Optional[str]) -> List[Dict]:
+        """
+        Recherche pg_trgm/tsvector (RPC rechercher_titres), repli sur la référence.
+
+        La RPC ne rend que (id, reference, ..., score) des titres de l'étude:
+        les lignes complètes sont rechargées par id, dans l'ordre du classement.
+        Sans étude, la RPC n'est pas appelée.
+        """
+        if etude_id:
+            try:
+                classement = self.client.rpc("rechercher_titres", {
+                    "p_etude_id": etude_id, "p_requete": query, "p_limite": 50
+                }).execute().data or []
+                ids = [row["id"] for row in classement]
+                if not ids:
+                    return []
+                result = self.client.table("titres_propriete").select("*") \
+                    .in_("id", ids).eq("etude_id", etude_id).execute()
+                rang = {id_: i for i, id_ in enumerate(ids)}
+                return sorted(result.data, key=lambda row: rang.get(row.get("id"), len(rang)))
+            except Exception as e:
+                console.print(f"[yellow]RPC rechercher_titres indisponible ({e}), recherche par référence[/yellow]")
+        requete = self.client.table("titres_propriete").select("*") \
+            .ilike("reference", f"%{query}%")
+        if etude_id:
+            requete = requete.eq("etude_id", etude_id)
+        return requete.execute().data
+
     def _row_to_titre(self, row: Dict) -> TitrePropriete:
         """Convertit une ligne Supabase en TitrePropriete."""
         return TitrePropriete(
@@ -421,7 +571,8 @@ class GestionnaireTitres:
             statut=row.get("statut", "actif"),
             donnees=row.get("donnees", {}),
             metadata=row.get("metadata", {}),
-            fichier_source=row.get("fichier_source")
+            fichier_source=row.get("fichier_source"),
+            etude_id=row.get("etude_id")
         )
 
     # -------------------------------------------------------------------------
@@ -770,6 +921,7 @@ Actions disponibles:
   get       - Récupère un titre par référence
   search    - Recherche dans les titres
   convert   - Convertit un titre vers promesse ou vente
+  batch     - Importe un dossier ou une archive de titres (reprise automatique)
   schema    - Affiche le schéma SQL pour Supabase
 
 Exemples:
@@ -777,12 +929,13 @@ Exemples:
   python gestionnaire_titres_propriete.py list
   python gestionnaire_titres_propriete.py search -q "Tassin"
   python gestionnaire_titres_propriete.py convert -t TITRE-001 --type promesse -o promesse.json
+  python gestionnaire_titres_propriete.py batch -s archives/titres_2010_2020.zip --workers 8
         """
     )
 
     parser.add_argument(
         "action",
-        choices=["upload", "list", "get", "search", "convert", "schema"],
+        choices=["upload", "list", "get", "search", "convert", "batch", "schema"],
         help="Action à effectuer"
     )
 
@@ -816,6 +969,25 @@ Exemples:
         help="Fichier de sortie"
     )
 
+    parser.add_argument(
+        "--source", "-s",
+        type=str,
+        help="Dossier ou archive (.zip, .tar.gz) de titres (pour batch)"
+    )
+
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="Extractions en parallèle dans le pool partagé (pour batch, défaut: taille du pool)"
+    )
+
+    parser.add_argument(
+        "--lot",
+        type=int,
+        default=50,
+        help="Titres par insertion Supabase (pour batch, défaut: 50)"
+    )
+
     parser.add_argument(
         "--verbose", "-v",
         action="store_true",
@@ -879,7 +1051,7 @@ Exemples:
             console.print("[red]--query requis pour search[/red]")
             sys.exit(1)
 
-        titres = gestionnaire.rechercher_titres(args.query)
+        titres = gestionnaire.rechercher_titres(args.query, etude_id=os.getenv("NOTAIRE_ETUDE_ID"))
         console.print(f"\n[dim]Résultats pour '{args.query}':[/dim]\n")
         afficher_titres(titres)
 
@@ -907,6 +1079,31 @@ Exemples:
             console.print(f"[red]{e}[/red]")
             sys.exit(1)
 
+    elif args.action == "batch":
+        if not args.source:
+            console.print("[red]--source requis pour batch[/red]")
+            sys.exit(1)
+
+        from execution.gestionnaires.ingestion_titres import IngestionTitres
+
+        ingestion = IngestionTitres(gestionnaire, workers=args.workers, taille_lot=args.lot)
+        for evenement in ingestion.executer(Path(args.source)):
+            if evenement["type"] == "fichier":
+                style = {"insere": "green", "erreur": "red"}.get(evenement["statut"], "dim")
+                console.print(
+                    f"[{style}][{evenement['traites']}/{evenement['total']}] "
+                    f"{evenement['statut']}: {evenement['fichier']}[/{style}]"
+                )
+            elif evenement["type"] == "termine":
+                stats = evenement["stats"]
+                console.print(
+                    f"\n[green]✓ Import terminé:[/green] {stats['inseres']} inséré(s), "
+                    f"{stats['doublons']} doublon(s), {stats['deja_traites']} déjà traité(s), "
+                    f"{stats['erreurs']} erreur(s) en {stats['duree_s']:.0f}s"
+                )
+            elif args.verbose:
+                console.print(f"[dim]{evenement}[/dim]")
+
     elif args.action == "schema":
         console.print(Panel(
             SCHEMA_SQL_TITRES,
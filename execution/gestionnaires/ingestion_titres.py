@@ -0,0 +1,481 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ingestion_titres.py
+-------------------
+Import en masse de titres de propriété (reprise d'historique d'une étude).
+
+Pipeline:
+1. Inventaire d'un dossier ou d'une archive (.zip, .tar, .tar.gz)
+2. Déduplication par SHA-256 avant toute extraction: doublons dans le lot,
+   titres de l'étude déjà en base (GestionnaireTitres._trouver_par_hash),
+   fichiers déjà traités par un import interrompu (journal)
+3. Extraction dans le pool de processus partagé (executeurs.py)
+4. Insertion Supabase par lots
+
+Les archives sont bornées avant décompression (taille décompressée
+déclarée, nombre d'entrées) et les fichiers extraits comme l'archive
+téléversée sont supprimés avec secure_delete.
+
+Chaque étape produit des événements (dict) consommés au fil de l'eau par
+la CLI ou par le job /titres/batch. Le journal JSONL du job
+(.tmp/ingestion_titres/<job_id>.jsonl) rend la reprise automatique:
+relancer le même import saute les fichiers déjà insérés.
+
+Usage:
+    from execution.gestionnaires.ingestion_titres import IngestionTitres
+
+    ingestion = IngestionTitres(GestionnaireTitres(), workers=8)
+    for evenement in ingestion.executer(Path("archives/titres.zip")):
+        print(evenement)
+
+Variables d'environnement:
+    NOTAIRE_INGESTION_WORKERS       Extractions en vol par import (défaut: taille du pool partagé)
+    NOTAIRE_INGESTION_MAX_MO        Taille max d'une archive téléversée (défaut: 500)
+    NOTAIRE_INGESTION_MAX_DECOMPRESSE_MO
+                                    Taille décompressée max d'une archive (défaut: 2000)
+    NOTAIRE_INGESTION_MAX_FICHIERS  Entrées max d'une archive (défaut: 10000)
+    NOTAIRE_INGESTION_JOBS_TTL_H    Durée de conservation des jobs terminés (défaut: 24)
+    NOTAIRE_INGESTION_JOBS_MAX      Jobs terminés conservés au plus (défaut: 100)
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tarfile
+import threading
+import time
+import uuid
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, BrokenExecutor, Future, wait
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from execution.security.secure_delete import secure_delete_dir, secure_delete_file
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+DOSSIER_JOURNAUX = PROJECT_ROOT / ".tmp" / "ingestion_titres"
+
+EXTENSIONS_TITRES = {".pdf", ".docx", ".doc"}
+STATUTS_TERMINES = {"insere", "doublon"}
+
+TAILLE_MAX_ARCHIVE = int(os.getenv("NOTAIRE_INGESTION_MAX_MO", "500")) * 1024 * 1024
+TAILLE_MAX_DECOMPRESSEE = int(os.getenv("NOTAIRE_INGESTION_MAX_DECOMPRESSE_MO", "2000")) * 1024 * 1024
+ENTREES_MAX_ARCHIVE = int(os.getenv("NOTAIRE_INGESTION_MAX_FICHIERS", "10000"))
+DUREE_JOBS_TERMINES = float(os.getenv("NOTAIRE_INGESTION_JOBS_TTL_H", "24")) * 3600
+JOBS_TERMINES_MAX = int(os.getenv("NOTAIRE_INGESTION_JOBS_MAX", "100"))
+
+
+def calculer_hash(chemin: Path) -> str:
+    """SHA-256 du contenu (même empreinte que donnees['source']['hash_fichier'])."""
+    from execution.utils.extraire_titre import calculer_hash_fichier
+    return calculer_hash_fichier(chemin)
+
+
+def _verifier_volume(entrees: int, taille: int) -> None:
+    """Refuse une archive trop volumineuse une fois décompressée (zip bomb)."""
+    if entrees > ENTREES_MAX_ARCHIVE:
+        raise ValueError(f"Archive refusée: {entrees} entrées (max {ENTREES_MAX_ARCHIVE})")
+    if taille > TAILLE_MAX_DECOMPRESSEE:
+        raise ValueError(
+            f"Archive refusée: {taille // (1024 * 1024)} Mo décompressés "
+            f"(max {TAILLE_MAX_DECOMPRESSEE // (1024 * 1024)} Mo)"
+        )
+
+
+def _extraire_archive(archive: Path, destination: Path) -> None:
+    """
+    Décompresse une archive en refusant les chemins qui sortent de `destination`
+    et les archives dont le volume décompressé dépasse les limites.
+
+    Les tailles déclarées suffisent: zipfile s'arrête à ZipInfo.file_size
+    (contrôle CRC ensuite), tarfile lit exactement TarInfo.size.
+    """
+    racine = destination.resolve()
+
+    def verifier(nom: str) -> None:
+        cible = (racine / nom).resolve()
+        if racine != cible and racine not in cible.parents:
+            raise ValueError(f"Chemin hors archive refusé: {nom}")
+
+    if zipfile.is_zipfile(archive):
+        with zipfile.ZipFile(archive) as zf:
+            infos = zf.infolist()
+            _verifier_volume(len(infos), sum(info.file_size for info in infos))
+            for info in infos:
+                verifier(info.filename)
+            zf.extractall(racine)
+    elif tarfile.is_tarfile(archive):
+        with tarfile.open(archive) as tf:
+            membres = []
+            for membre in tf:
+                if membre.isfile() or membre.isdir():
+                    membres.append(membre)
+                    _verifier_volume(len(membres), sum(m.size for m in membres))
+            for membre in membres:
+                verifier(membre.name)
+            if hasattr(tarfile, "data_filter"):
+                tf.extractall(racine, members=membres, filter="data")
+            else:
+                tf.extractall(racine, members=membres)
+    else:
+        raise ValueError(f"Archive non reconnue: {archive.name}")
+
+
+def lister_fichiers(source: Path, dossier_extraction: Path) -> List[Path]:
+    """
+    Inventaire des titres d'une source.
+
+    Args:
+        source: Dossier (parcouru récursivement), archive ou fichier unique
+        dossier_extraction: Où décompresser une archive
+
+    Returns:
+        Fichiers PDF/DOCX, triés par chemin
+    """
+    source = Path(source)
+    if source.is_file() and source.suffix.lower() not in EXTENSIONS_TITRES:
+        dossier_extraction.mkdir(parents=True, exist_ok=True)
+        _extraire_archive(source, dossier_extraction)
+        source = dossier_extraction
+    if source.is_file():
+        return [source]
+    if not source.is_dir():
+        raise FileNotFoundError(f"Source introuvable: {source}")
+    return sorted(
+        p for p in source.rglob("*")
+        if p.is_file() and p.suffix.lower() in EXTENSIONS_TITRES and not p.name.startswith("~$")
+    )
+
+
+def _extraire_fichier(chemin: str) -> Tuple[str, Optional[Dict[str, Any]], Optional[str]]:
+    """Extraction d'un titre (exécutée dans un processus du pool)."""
+    from execution.utils.extraire_titre import extraire_donnees_titre
+    try:
+        return chemin, extraire_donnees_titre(Path(chemin)), None
+    except Exception as e:
+        return chemin, None, f"{type(e).__name__}: {e}"
+
+
+class JournalIngestion:
+    """
+    Journal JSONL d'un import: une ligne par fichier traité.
+
+    Append-only: une interruption ne perd au pire que la ligne en cours
+    d'écriture, ignorée à la relecture.
+    """
+
+    def __init__(self, chemin: Path):
+        self.chemin = Path(chemin)
+        self.chemin.parent.mkdir(parents=True, exist_ok=True)
+        self._verrou = threading.Lock()
+
+    def etats(self) -> Dict[str, Dict[str, Any]]:
+        """Dernier état connu par hash de fichier."""
+        etats: Dict[str, Dict[str, Any]] = {}
+        if not self.chemin.exists():
+            return etats
+        with open(self.chemin, encoding="utf-8") as f:
+            for ligne in f:
+                try:
+                    entree = json.loads(ligne)
+                except json.JSONDecodeError:
+                    continue
+                etats[entree["hash"]] = entree
+        return etats
+
+    def noter(self, hash_fichier: str, fichier: str, statut: str, **details) -> None:
+        entree = {"hash": hash_fichier, "fichier": fichier, "statut": statut,
+                  "date": datetime.now().isoformat(), **details}
+        with self._verrou, open(self.chemin, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entree, ensure_ascii=False) + "\n")
+
+
+class IngestionTitres:
+    """
+    Import en masse de titres de propriété.
+
+    Args:
+        gestionnaire: GestionnaireTitres (déduplication et stockage)
+        workers: Extractions en vol dans le pool partagé (1 = dans le
+            thread courant, 0/None = taille du pool)
+        taille_lot: Titres par insertion Supabase
+        etude_id: Étude propriétaire des titres (jobs API)
+        dossier_journaux: Dossier des journaux de reprise
+    """
+
+    def __init__(
+        self,
+        gestionnaire,
+        workers: Optional[int] = None,
+        taille_lot: int = 50,
+        etude_id: Optional[str] = None,
+        dossier_journaux: Optional[Path] = None
+    ):
+        self.gestionnaire = gestionnaire
+        self.workers = workers or int(os.getenv("NOTAIRE_INGESTION_WORKERS", "0"))
+        self.taille_lot = max(1, taille_lot)
+        self.etude_id = etude_id
+        self.dossier_journaux = Path(dossier_journaux or DOSSIER_JOURNAUX)
+
+    def job_id_pour(self, source: Path) -> str:
+        """Identifiant stable d'un import: même source → même journal → reprise."""
+        source = Path(source).resolve()
+        cle = calculer_hash(source) if source.is_file() else str(source)
+        return hashlib.sha256(f"{self.etude_id}|{cle}".encode("utf-8")).hexdigest()[:16]
+
+    def executer(self, source: Path, job_id: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Importe tous les titres de `source` et rend la progression.
+
+        Événements:
+            {"type": "inventaire", "total": n, "job_id": ...}
+            {"type": "fichier", "fichier": ..., "statut": "insere"|"doublon"|"deja_traite"|"erreur",
+             "traites": i, "total": n, ...}
+            {"type": "lot", "taille": k}
+            {"type": "termine", "stats": {...}}
+        """
+        debut = time.time()
+        source = Path(source)
+        job_id = job_id or self.job_id_pour(source)
+        journal = JournalIngestion(self.dossier_journaux / f"{job_id}.jsonl")
+        dossier_extraction = self.dossier_journaux / f"{job_id}_archive"
+        stats = {"total": 0, "inseres": 0, "doublons": 0, "deja_traites": 0, "erreurs": 0}
+
+        try:
+            fichiers = lister_fichiers(source, dossier_extraction)
+            stats["total"] = total = len(fichiers)
+            yield {"type": "inventaire", "job_id": job_id, "total": total}
+
+            traites = 0
+
+            def evenement(fichier: Path, statut: str, **details) -> Dict[str, Any]:
+                nonlocal traites
+                traites += 1
+                return {"type": "fichier", "fichier": fichier.name, "statut": statut,
+                        "traites": traites, "total": total, **details}
+
+            # 1. Déduplication avant extraction
+            deja = journal.etats()
+            vus: Dict[str, Path] = {}
+            a_extraire: Dict[str, Path] = {}
+            for fichier in fichiers:
+                hash_fichier = calculer_hash(fichier)
+                etat = deja.get(hash_fichier)
+                if etat and etat["statut"] in STATUTS_TERMINES:
+                    stats["deja_traites"] += 1
+                    yield evenement(fichier, "deja_traite", reference=etat.get("reference"))
+                    continue
+                if hash_fichier in vus:
+                    stats["doublons"] += 1
+                    yield evenement(fichier, "doublon", doublon_de=vus[hash_fichier].name)
+                    continue
+                vus[hash_fichier] = fichier
+                existant = self.gestionnaire._trouver_par_hash(hash_fichier, etude_id=self.etude_id)
+                if existant:
+                    stats["doublons"] += 1
+                    journal.noter(hash_fichier, fichier.name, "doublon", reference=existant.reference)
+                    yield evenement(fichier, "doublon", reference=existant.reference)
+                    continue
+                a_extraire[hash_fichier] = fichier
+
+            # 2. Extraction parallèle, 3. insertion par lots
+            par_chemin = {str(chemin): h for h, chemin in a_extraire.items()}
+            en_attente: List[Tuple[str, Path, Any]] = []
+
+            def inserer() -> Iterator[Dict[str, Any]]:
+                titres = [titre for _, _, titre in en_attente]
+                ids = self.gestionnaire.sauvegarder_titres(
+                    titres, taille_lot=self.taille_lot, etude_id=self.etude_id
+                )
+                yield {"type": "lot", "taille": len(titres)}
+                for (hash_fichier, fichier, titre), titre_id in zip(en_attente, ids):
+                    if titre_id:
+                        stats["inseres"] += 1
+                        journal.noter(hash_fichier, fichier.name, "insere",
+                                      reference=titre.reference, id=titre_id)
+                        yield evenement(fichier, "insere", reference=titre.reference)
+                    else:
+                        stats["erreurs"] += 1
+                        journal.noter(hash_fichier, fichier.name, "erreur", erreur="insertion refusée")
+                        yield evenement(fichier, "erreur", erreur="insertion refusée")
+                en_attente.clear()
+
+            for chemin, donnees, erreur in self._extraire(list(par_chemin)):
+                hash_fichier = par_chemin[chemin]
+                fichier = a_extraire[hash_fichier]
+                if erreur:
+                    stats["erreurs"] += 1
+                    journal.noter(hash_fichier, fichier.name, "erreur", erreur=erreur)
+                    yield evenement(fichier, "erreur", erreur=erreur)
+                    continue
+                en_attente.append((hash_fichier, fichier, self._titre(fichier, hash_fichier, donnees)))
+                if len(en_attente) >= self.taille_lot:
+                    yield from inserer()
+            if en_attente:
+                yield from inserer()
+        finally:
+            secure_delete_dir(dossier_extraction)
+
+        stats["duree_s"] = round(time.time() - debut, 1)
+        yield {"type": "termine", "job_id": job_id, "stats": stats}
+
+    def _extraire(self, chemins: List[str]) -> Iterator[Tuple[str, Optional[Dict], Optional[str]]]:
+        """
+        Extrait les fichiers, dans l'ordre d'achèvement.
+
+        Les processus sont ceux du pool partagé (spawn, nombre borné pour
+        tout le process): un import n'y garde que `workers` fichiers en vol,
+        et traite sur place quand le pool est saturé ou désactivé.
+        """
+        pool = None
+        if self.workers != 1:
+            from execution.utils.executeurs import get_pool_execution
+            pool = get_pool_execution()
+        paralleles = min(self.workers or pool.processus_disponibles(), len(chemins)) if pool else 1
+        if paralleles <= 1:
+            for chemin in chemins:
+                yield _extraire_fichier(chemin)
+            return
+
+        restants = list(chemins)
+        en_vol: Dict[Future, str] = {}
+        try:
+            while restants or en_vol:
+                while restants and len(en_vol) < paralleles:
+                    future = pool.soumettre_processus(_extraire_fichier, restants[0])
+                    if future is None:
+                        break
+                    en_vol[future] = restants.pop(0)
+                if not en_vol:
+                    yield _extraire_fichier(restants.pop(0))
+                    continue
+                terminees, _ = wait(list(en_vol), return_when=FIRST_COMPLETED)
+                for future in terminees:
+                    chemin = en_vol.pop(future)
+                    try:
+                        yield future.result()
+                    except BrokenExecutor:
+                        # Processus tué (OOM...): fichier rejoué sur place
+                        yield _extraire_fichier(chemin)
+        finally:
+            # Import interrompu: ne pas extraire ce qui ne sera pas inséré
+            for future in en_vol:
+                future.cancel()
+
+    def _titre(self, fichier: Path, hash_fichier: str, donnees: Dict[str, Any]):
+        """Construit le TitrePropriete et archive le fichier source (comme upload_titre)."""
+        from execution.gestionnaires.gestionnaire_titres import TitrePropriete
+
+        source = donnees.setdefault("source", {})
+        source["hash_fichier"] = hash_fichier
+        source["nom_fichier"] = fichier.name
+        # Horodatage seul insuffisant: plusieurs titres par seconde en import.
+        # L'étude entre dans la clé: un même fichier importé par deux études
+        # donne deux références distinctes
+        cle = hash_fichier
+        if self.etude_id:
+            cle = hashlib.sha256(f"{self.etude_id}|{hash_fichier}".encode("utf-8")).hexdigest()
+        reference = f"TITRE-{datetime.now().strftime('%Y%m%d')}-{cle[:10]}"
+        donnees["reference"] = reference
+
+        destination = self.gestionnaire.titres_dir / f"{reference}{fichier.suffix.lower()}"
+        shutil.copy2(fichier, destination)
+
+        maintenant = datetime.now().isoformat()
+        return TitrePropriete(
+            reference=reference,
+            date_creation=maintenant,
+            date_modification=maintenant,
+            statut="actif",
+            donnees=donnees,
+            fichier_source=str(destination),
+            metadata={
+                "source_originale": str(fichier),
+                "confiance": donnees.get("metadata", {}).get("confiance", 0),
+                "import": "batch"
+            },
+            etude_id=self.etude_id
+        )
+
+
+# =============================================================================
+# JOBS (API /titres/batch)
+# =============================================================================
+
+_jobs: Dict[str, Dict[str, Any]] = {}
+_jobs_verrou = threading.Lock()
+
+
+def _evincer_jobs() -> None:
+    """Retire les jobs terminés expirés, puis les plus anciens au-delà du plafond (sous _jobs_verrou)."""
+    maintenant = time.monotonic()
+    termines = sorted(
+        (job for job in _jobs.values() if job["etat"] != "en_cours"),
+        key=lambda job: job["fin_ts"],
+    )
+    for rang, job in enumerate(termines):
+        if maintenant - job["fin_ts"] > DUREE_JOBS_TERMINES or len(termines) - rang > JOBS_TERMINES_MAX:
+            del _jobs[job["job_id"]]
+
+
+def lancer_job(source: Path, etude_id: Optional[str] = None, workers: Optional[int] = None,
+               supprimer_source: bool = False) -> str:
+    """
+    Lance un import en tâche de fond et retourne son identifiant.
+
+    La progression est lisible via get_job(job_id) ("evenements" croît au
+    fil de l'import, "etat" passe de "en_cours" à "termine" ou "erreur").
+    """
+    from execution.gestionnaires.gestionnaire_titres import GestionnaireTitres
+
+    ingestion = IngestionTitres(GestionnaireTitres(), workers=workers, etude_id=etude_id)
+    job_id = ingestion.job_id_pour(source)
+
+    with _jobs_verrou:
+        _evincer_jobs()
+        job = _jobs.get(job_id)
+        if job and job["etat"] == "en_cours":
+            if supprimer_source:
+                secure_delete_file(source)
+            return job_id
+        _jobs[job_id] = job = {"job_id": job_id, "etude_id": etude_id, "etat": "en_cours",
+                               "evenements": [], "debut": datetime.now().isoformat()}
+
+    def executer():
+        etat = "erreur"
+        try:
+            for evenement in ingestion.executer(source, job_id=job_id):
+                job["evenements"].append(evenement)
+            etat = "termine"
+        except Exception as e:
+            logger.error(f"Import de titres {job_id} en échec: {e}", exc_info=True)
+            job["evenements"].append({"type": "erreur", "message": str(e)})
+        finally:
+            if supprimer_source:
+                secure_delete_file(source)
+            with _jobs_verrou:
+                job["fin_ts"] = time.monotonic()
+                job["fin"] = datetime.now().isoformat()
+                job["etat"] = etat
+
+    threading.Thread(target=executer, name=f"ingestion-{job_id}", daemon=True).start()
+    return job_id
+
+
+def get_job(job_id: str) -> Optional[Dict[str, Any]]:
+    """État d'un job d'import (None si inconnu de ce process ou évincé)."""
+    with _jobs_verrou:
+        _evincer_jobs()
+        return _jobs.get(job_id)
+
+
+def chemin_archive(nom: str) -> Path:
+    """Emplacement d'une archive téléversée, écrite au fil de l'eau par l'appelant."""
+    DOSSIER_JOURNAUX.mkdir(parents=True, exist_ok=True)
+    return DOSSIER_JOURNAUX / f"upload_{uuid.uuid4().hex}{Path(nom).suffix.lower()}"
@@ -39,6 +39,7 @@ from enum import Enum
 import logging
 
 from execution.security.secure_delete import secure_delete_file, secure_delete_dir
+from execution.utils.profilage import mesurer
 
 # Import du module d'historique Supabase
 try:
@@ -248,7 +249,8 @@ class OrchestratorNotaire:
         debut = time.time()
 
         try:
-            resultat = fonction(*args, **kwargs)
+            with mesurer(nom, pipeline="orchestrateur"):
+                resultat = fonction(*args, **kwargs)
             duree = int((time.time() - debut) * 1000)
 
             etape = ResultatEtape(
@@ -833,6 +835,33 @@ class OrchestratorNotaire:
             type_enum
         )
 
+        output = output or str(
+            self.project_root / 'outputs' / f'{type_acte}_{workflow_id}.docx'
+        )
+
+        # Étape 2b: Acte identique déjà généré (mêmes données, template et version)
+        cache, cle_cache = None, None
+        if options.get('cache', True):
+            from execution.core.cache_generation import cle_generation, get_cache_generation
+            cache = get_cache_generation()
+            template = self._template_pour(type_enum, donnees_enrichies)
+            if cache is not None and template:
+                cle_cache = cle_generation(donnees_enrichies, template, zones_grisees=True)
+                md_cache = self._enregistrer_temp(
+                    self.project_root / '.tmp' / f'{type_acte}_{workflow_id}'
+                ) / 'acte.md'
+                if cache.restaurer(cle_cache, md_cache, Path(output)):
+                    self.etapes.append(ResultatEtape(
+                        nom="Cache génération",
+                        statut=StatutEtape.SUCCES,
+                        message="Acte identique déjà généré, assemblage et export évités",
+                        donnees={"markdown": str(md_cache), "docx": output, "cle": cle_cache}
+                    ))
+                    self._log("Acte repris du cache de génération", "success")
+                    return self._finaliser_avec_conformite(
+                        workflow_id, type_acte, type_enum, debut, output
+                    )
+
         # Étape 3: Assembler
         tmp_json = self._enregistrer_temp(
             self.project_root / '.tmp' / f'{type_acte}_{workflow_id}.json'
@@ -862,10 +891,6 @@ class OrchestratorNotaire:
         md_path = etape_asm.donnees.get('markdown', str(tmp_md / 'acte.md'))
 
         # Étape 4: Export
-        output = output or str(
-            self.project_root / 'outputs' / f'{type_acte}_{workflow_id}.docx'
-        )
-
         etape_exp = self._executer_etape(
             "Export DOCX",
             self._exporter_docx,
@@ -873,20 +898,32 @@ class OrchestratorNotaire:
             output
         )
 
-        fichiers = [output] if etape_exp.statut == StatutEtape.SUCCES else []
+        if etape_exp.statut != StatutEtape.SUCCES:
+            return self._finaliser_workflow(workflow_id, type_acte, debut, [])
 
-        # Étape 5: Conformité
-        score = None
-        if fichiers:
-            etape_conf = self._executer_etape(
-                "Vérification conformité",
-                self._verifier_conformite,
-                output,
-                type_enum
-            )
-            score = etape_conf.donnees.get('score')
+        if cle_cache and Path(md_path).exists():
+            cache.ecrire(cle_cache, Path(md_path), Path(output))
 
-        return self._finaliser_workflow(workflow_id, type_acte, debut, fichiers, score)
+        return self._finaliser_avec_conformite(workflow_id, type_acte, type_enum, debut, output)
+
+    def _finaliser_avec_conformite(
+        self,
+        workflow_id: str,
+        type_acte: str,
+        type_enum: TypeActe,
+        debut: datetime,
+        output: str
+    ) -> ResultatWorkflow:
+        """Étape 5 (conformité du DOCX produit) puis finalisation."""
+        etape_conf = self._executer_etape(
+            "Vérification conformité",
+            self._verifier_conformite,
+            output,
+            type_enum
+        )
+        score = etape_conf.donnees.get('score')
+
+        return self._finaliser_workflow(workflow_id, type_acte, debut, [output], score)
 
     # =========================================================================
     # Méthodes d'optimisation des coûts (v2.1.0)
@@ -1227,6 +1264,15 @@ class OrchestratorNotaire:
 
         return {"alertes": alertes, "valide": len(alertes) == 0}
 
+    def _template_pour(self, type_acte: TypeActe, donnees: Dict[str, Any]) -> Optional[str]:
+        """Template utilisé pour un type d'acte (promesses: selon la catégorie de bien)."""
+        if type_acte == TypeActe.PROMESSE_VENTE:
+            try:
+                return self._get_promesse_template(donnees)
+            except Exception:
+                pass
+        return self.TEMPLATES.get(type_acte)
+
     def _get_promesse_template(self, donnees: Dict[str, Any]) -> str:
         """Sélectionne le template promesse selon catégorie + type + sous-type (v2.0.0)."""
         if GESTIONNAIRE_PROMESSES_DISPONIBLE and CategorieBien is not None:
@@ -1259,15 +1305,11 @@ class OrchestratorNotaire:
         output_path: str
     ) -> Dict[str, Any]:
         """Assemble le template avec les données."""
-        # Pour les promesses, sélection par catégorie de bien
-        if type_acte == TypeActe.PROMESSE_VENTE:
-            try:
-                donnees_json = json.loads(Path(donnees_path).read_text(encoding='utf-8'))
-                template = self._get_promesse_template(donnees_json)
-            except Exception:
-                template = self.TEMPLATES.get(type_acte)
-        else:
-            template = self.TEMPLATES.get(type_acte)
+        try:
+            donnees_json = json.loads(Path(donnees_path).read_text(encoding='utf-8'))
+        except Exception:
+            donnees_json = {}
+        template = self._template_pour(type_acte, donnees_json)
         script = self.project_root / 'execution' / 'core' / 'assembler_acte.py'
 
         # Créer le dossier de sortie
@@ -193,7 +193,14 @@ class QuestionnaireManager:
     """
 
     def __init__(self, type_acte: str = "promesse_vente", state: Optional[Dict] = None):
-        self.sections = SECTIONS_ESSENTIELLES
+        from execution.core.registre_schemas import get_registre_schemas
+
+        # Sections figees et index (id -> question, conditions compilees),
+        # construits une fois par process
+        self._catalogue = get_registre_schemas().depuis_donnees(
+            "sections_essentielles", {"sections": SECTIONS_ESSENTIELLES}
+        )
+        self.sections = [section for _, section in self._catalogue.sections]
         self.state = QuestionnaireState.deserialize(state) if state else QuestionnaireState(type_acte=type_acte)
 
     # =========================================================================
@@ -230,13 +237,7 @@ class QuestionnaireManager:
     # =========================================================================
 
     def _question_applicable(self, question: Dict) -> bool:
-        condition = question.get("condition")
-        if not condition:
-            return True
-        if "!=" in condition:
-            field_id, value = condition.split("!=")
-            return self.state.answers.get(field_id.strip()) != value.strip()
-        return True
+        return self._catalogue.question_applicable(question["id"], self.state.answers)
 
     # =========================================================================
     # Extraction intelligente depuis texte libre
@@ -584,11 +585,7 @@ IMPORTANT:
         return results
 
     def _find_question(self, question_id: str) -> Optional[Dict]:
-        for section in self.sections:
-            for q in section["questions"]:
-                if q["id"] == question_id:
-                    return q
-        return None
+        return self._catalogue.questions.get(question_id)
 
     def get_next_question(self) -> Optional[Dict[str, Any]]:
         """Retourne la prochaine question non repondue."""
@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+blind_index.py
+--------------
+Index aveugle (blind index) pour rechercher des clients chiffres sans
+dechiffrement en masse.
+
+Les PII restent chiffrees (AES-256-GCM). A cote, chaque client porte une
+liste de jetons HMAC-SHA256 calcules sur des valeurs normalisees
+(minuscules, sans accents):
+- w:<mot>      mot exact du nom / prenom
+- p:<prefixe>  prefixes de 2 a 8 caracteres (saisie partielle)
+- g:<trigram>  trigrammes (tolerance aux fautes de frappe)
+- y:<annee>    annee de naissance
+- c:<commune>, cp:<code postal>  commune de l'adresse
+
+Les jetons sont stockes dans la colonne indexee clients.blind_index
+(TEXT[], index GIN, migration 006). Une recherche calcule les jetons de la
+requete et filtre cote serveur (@> / &&); seuls les candidats sont
+dechiffres puis verifies (les jetons sont tronques a 64 bits).
+
+La cle est derivee de ENCRYPTION_MASTER_KEY (ou BLIND_INDEX_KEY si definie)
+puis specialisee par etude: les jetons de deux etudes ne sont pas
+comparables. Un jeton revele l'egalite de deux valeurs au sein d'une
+etude, jamais la valeur elle-meme.
+
+Usage:
+    from execution.security.blind_index import BlindIndex
+
+    index = BlindIndex.from_env().for_etude(etude_id)
+    tokens = index.tokens_for_client({"nom": "Dupont", "prenom": "Jean", ...})
+    requete = index.query(nom="dup", annee_naissance=1970)
+
+    # Benchmark (recherche indexee vs dechiffrement de toute la table)
+    python -m execution.security.blind_index benchmark --clients 2000
+"""
+
+import argparse
+import base64
+import hashlib
+import hmac
+import math
+import os
+import re
+import sys
+import time
+import unicodedata
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set
+
+# Ensure UTF-8 output on Windows
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+    sys.stderr.reconfigure(encoding='utf-8')
+
+VERSION = 1
+PREFIX_MIN = 2
+PREFIX_MAX = 8
+TOKEN_HEX = 16  # 64 bits: collisions rares, candidats verifies apres dechiffrement
+FUZZY_MIN_RATIO = 0.5  # part des trigrammes de la requete presents chez le candidat
+SIMILARITY_THRESHOLD = 0.3  # pg_trgm.similarity_threshold
+
+NAME_FIELDS = ('nom', 'prenom')
+INDEXED_FIELDS = NAME_FIELDS + ('date_naissance', 'adresse')
+
+_RE_CODE_POSTAL = re.compile(r'\b(\d{5})\b')
+_RE_ANNEE = re.compile(r'\b(1[89]\d{2}|20\d{2})\b')
+
+
+def normalize_words(value: Any) -> List[str]:
+    """Minuscules, sans accents ni ponctuation: 'Dupre-Lévy' -> ['dupre', 'levy']."""
+    texte = unicodedata.normalize('NFKD', str(value or ''))
+    texte = ''.join(c for c in texte if not unicodedata.combining(c)).lower()
+    return re.sub(r'[^a-z0-9]+', ' ', texte).split()
+
+
+def trigrams(word: str) -> Set[str]:
+    """Trigrammes d'un mot, complete comme pg_trgm ('  mot ')."""
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def word_similarity(query: str, candidate: str) -> float:
+    """1.0 si egal, 0.9 si prefixe, sinon similarite de trigrammes (Jaccard)."""
+    if query == candidate:
+        return 1.0
+    if candidate.startswith(query):
+        return 0.9
+    a, b = trigrams(query), trigrams(candidate)
+    return len(a & b) / len(a | b)
+
+
+def commune_from_address(adresse: str) -> Dict[str, str]:
+    """'12 rue X, 69006 Lyon' -> {'cp': '69006', 'commune': 'lyon'} (vide si pas de code postal)."""
+    match = None
+    for match in _RE_CODE_POSTAL.finditer(adresse or ''):
+        pass
+    if not match:
+        return {}
+    commune = ' '.join(normalize_words(adresse[match.end():]))
+    return {'cp': match.group(1), 'commune': commune} if commune else {'cp': match.group(1)}
+
+
+def birth_year(date_naissance: Any) -> Optional[str]:
+    """Annee de '1970-05-12', '12/05/1970', 1970... (None si absente)."""
+    match = _RE_ANNEE.search(str(date_naissance or ''))
+    return match.group(1) if match else None
+
+
+@dataclass
+class BlindQuery:
+    """
+    Requete sur l'index aveugle.
+
+    required: jetons tous presents (blind_index @> required)
+    any: jetons dont au moins min_any doivent etre presents (recherche approchee)
+    words: mots normalises du nom recherches, pour la verification apres dechiffrement
+    """
+    required: List[str] = field(default_factory=list)
+    any: List[str] = field(default_factory=list)
+    min_any: int = 0
+    words: List[str] = field(default_factory=list)
+    fuzzy: bool = False
+
+    @property
+    def empty(self) -> bool:
+        return not self.required and not self.any
+
+    def matches(self, tokens: Set[str]) -> bool:
+        """Filtre equivalent a celui du serveur, sur les jetons d'un client."""
+        if not tokens.issuperset(self.required):
+            return False
+        return not self.any or len(tokens.intersection(self.any)) >= self.min_any
+
+    def score(self, client: Dict[str, Any]) -> float:
+        """
+        Verifie un candidat dechiffre: moyenne, sur les mots recherches, de la
+        meilleure similarite avec les mots du nom (0 si un mot est absent).
+        """
+        if not self.words:
+            return 1.0
+        client_words = [w for f in NAME_FIELDS for w in normalize_words(client.get(f))]
+        if not client_words:
+            return 0.0
+        total = 0.0
+        for word in self.words:
+            best = max(word_similarity(word, w) for w in client_words)
+            if best < (SIMILARITY_THRESHOLD if self.fuzzy else 0.9):
+                return 0.0
+            total += best
+        return total / len(self.words)
+
+
+class BlindIndex:
+    """
+    Calcul des jetons HMAC de l'index aveugle.
+
+    Args:
+        key: Cle 256-bit (octets) dediee a l'index
+        etude_id: Etude a laquelle les jetons sont lies (None: cle de base)
+    """
+
+    def __init__(self, key: bytes, etude_id: str = None):
+        if len(key) < 32:
+            raise ValueError("La cle de l'index aveugle doit faire au moins 256 bits")
+        self._base_key = key
+        self.etude_id = etude_id
+        self._key = key if etude_id is None else hmac.new(
+            key, f"etude:{etude_id}".encode('utf-8'), hashlib.sha256
+        ).digest()
+
+    @classmethod
+    def from_master_key(cls, master_key: str, etude_id: str = None) -> 'BlindIndex':
+        """Derive la cle de l'index de la cle maitre (base64), sans la reutiliser telle quelle."""
+        raw = base64.b64decode(master_key)
+        key = hmac.new(raw, f"notaire-blind-index-v{VERSION}".encode('ascii'), hashlib.sha256).digest()
+        return cls(key, etude_id)
+
+    @classmethod
+    def from_env(cls, etude_id: str = None, master_key: str = None) -> Optional['BlindIndex']:
+        """
+        Index configure par BLIND_INDEX_KEY, sinon derive de la cle maitre
+        (parametre ou ENCRYPTION_MASTER_KEY). None si aucune cle.
+        """
+        dedicated = os.getenv("BLIND_INDEX_KEY")
+        if dedicated:
+            return cls(base64.b64decode(dedicated), etude_id)
+        master = master_key or os.getenv("ENCRYPTION_MASTER_KEY")
+        if master:
+            return cls.from_master_key(master, etude_id)
+        return None
+
+    def for_etude(self, etude_id: str) -> 'BlindIndex':
+        """Meme cle de base, jetons propres a l'etude."""
+        return BlindIndex(self._base_key, etude_id)
+
+    def token(self, value: str) -> str:
+        """Jeton HMAC-SHA256 tronque (hexadecimal)."""
+        return hmac.new(self._key, value.encode('utf-8'), hashlib.sha256).hexdigest()[:TOKEN_HEX]
+
+    # ------------------------------------------------------------------
+    # Jetons d'un client
+    # ------------------------------------------------------------------
+
+    def _word_terms(self, word: str) -> Set[str]:
+        terms = {f"w:{word}"}
+        terms.update(f"p:{word[:n]}" for n in range(PREFIX_MIN, min(len(word), PREFIX_MAX) + 1))
+        terms.update(f"g:{t}" for t in trigrams(word))
+        return terms
+
+    def terms_for_client(self, data: Dict[str, Any]) -> Set[str]:
+        """Termes en clair (avant HMAC) d'un client; utile aux tests uniquement."""
+        terms: Set[str] = set()
+        for name_field in NAME_FIELDS:
+            for word in normalize_words(data.get(name_field)):
+                terms |= self._word_terms(word)
+        year = birth_year(data.get('date_naissance'))
+        if year:
+            terms.add(f"y:{year}")
+        lieu = commune_from_address(data.get('adresse'))
+        if lieu.get('cp'):
+            terms.add(f"cp:{lieu['cp']}")
+        if lieu.get('commune'):
+            terms.add(f"c:{lieu['commune']}")
+        return terms
+
+    def tokens_for_client(self, data: Dict[str, Any]) -> List[str]:
+        """Jetons a stocker dans clients.blind_index (tries, sans doublon)."""
+        return sorted({self.token(t) for t in self.terms_for_client(data)})
+
+    # ------------------------------------------------------------------
+    # Jetons d'une requete
+    # ------------------------------------------------------------------
+
+    def query(
+        self,
+        nom: str = None,
+        prenom: str = None,
+        annee_naissance: Any = None,
+        commune: str = None,
+        fuzzy: bool = False
+    ) -> BlindQuery:
+        """
+        Construit la requete aveugle.
+
+        Sans fuzzy, chaque mot du nom doit etre le prefixe d'un mot du client
+        ('dup' trouve 'Dupont'); au-dela de 8 caracteres seul le prefixe est
+        filtre cote serveur, la suite est verifiee apres dechiffrement.
+        Avec fuzzy, les trigrammes tolerent les fautes ('Dupond' -> 'Dupont').
+
+        Args:
+            nom, prenom: Tout ou partie du nom / prenom
+            annee_naissance: Annee (ou date) de naissance
+            commune: Commune ou code postal de l'adresse
+            fuzzy: Recherche approchee
+        """
+        words = normalize_words(nom) + normalize_words(prenom)
+        result = BlindQuery(words=words, fuzzy=fuzzy)
+
+        if fuzzy and words:
+            grams = {f"g:{t}" for w in words for t in trigrams(w)}
+            result.any = sorted({self.token(g) for g in grams})
+            result.min_any = max(1, math.ceil(FUZZY_MIN_RATIO * len(result.any)))
+        else:
+            for word in words:
+                if len(word) < PREFIX_MIN:
+                    continue
+                result.required.append(self.token(f"p:{word[:PREFIX_MAX]}"))
+
+        year = birth_year(annee_naissance)
+        if year:
+            result.required.append(self.token(f"y:{year}"))
+        if commune:
+            if _RE_CODE_POSTAL.fullmatch(str(commune).strip()):
+                result.required.append(self.token(f"cp:{str(commune).strip()}"))
+            else:
+                result.required.append(self.token(f"c:{' '.join(normalize_words(commune))}"))
+        result.required = sorted(set(result.required))
+        return result
+
+
+# =============================================================================
+# BENCHMARK
+# =============================================================================
+
+def benchmark(nb_clients: int = 2000, repetitions: int = 20) -> Dict[str, Any]:
+    """
+    Compare une recherche par index aveugle a la recherche historique
+    (list_clients puis dechiffrement de chaque ligne), hors ligne.
+
+    Returns:
+        Temps moyens en ms et nombre de dechiffrements par recherche
+    """
+    import random
+    from .encryption_service import EncryptionService
+
+    noms = ['Dupont', 'Martin', 'Bernard', 'Thomas', 'Petit', 'Robert', 'Richard', 'Durand',
+            'Dubois', 'Moreau', 'Laurent', 'Simon', 'Michel', 'Lefebvre', 'Leroy', 'Roux']
+    prenoms = ['Jean', 'Marie', 'Pierre', 'Sophie', 'Luc', 'Anne', 'Paul', 'Claire']
+    villes = [('69006', 'Lyon'), ('75016', 'Paris'), ('13008', 'Marseille'), ('33000', 'Bordeaux')]
+
+    rng = random.Random(42)
+    key = EncryptionService.generate_master_key()
+    service = EncryptionService(master_key=key)
+    index = BlindIndex.from_master_key(key, "etude-benchmark")
+
+    lignes = []
+    debut = time.perf_counter()
+    for i in range(nb_clients):
+        cp, ville = rng.choice(villes)
+        client = {
+            'nom': f"{rng.choice(noms)}{'' if i % 3 else rng.choice(['-Lévy', 'el', 'ier'])}",
+            'prenom': rng.choice(prenoms),
+            'adresse': f"{i} rue de la Paix, {cp} {ville}",
+            'date_naissance': f"{rng.randint(1940, 2000)}-01-01",
+        }
+        lignes.append({
+            'nom_encrypted': service.encrypt(client['nom']),
+            'prenom_encrypted': service.encrypt(client['prenom']),
+            'blind_index': set(index.tokens_for_client(client)),
+        })
+    indexation_ms = (time.perf_counter() - debut) * 1000 / nb_clients
+
+    def recherche_historique(terme: str) -> int:
+        return sum(1 for l in lignes if service.decrypt(l['nom_encrypted']).lower().startswith(terme))
+
+    def recherche_aveugle(terme: str) -> int:
+        requete = index.query(nom=terme)
+        candidats = [l for l in lignes if requete.matches(l['blind_index'])]
+        return sum(
+            1 for l in candidats
+            if requete.score({'nom': service.decrypt(l['nom_encrypted'])}) > 0
+        )
+
+    termes = ['dup', 'martin', 'lefeb', 'rob']
+    resultats: Dict[str, Any] = {'clients': nb_clients, 'indexation_ms_par_client': round(indexation_ms, 3)}
+    for nom, fonction in (('historique', recherche_historique), ('aveugle', recherche_aveugle)):
+        debut = time.perf_counter()
+        for _ in range(repetitions):
+            trouves = [fonction(t) for t in termes]
+        resultats[f'{nom}_ms'] = round((time.perf_counter() - debut) * 1000 / (repetitions * len(termes)), 3)
+        resultats[f'{nom}_trouves'] = trouves
+    candidats = [sum(1 for l in lignes if index.query(nom=t).matches(l['blind_index'])) for t in termes]
+    resultats['dechiffrements_historique'] = nb_clients
+    resultats['dechiffrements_aveugle'] = round(sum(candidats) / len(termes), 1)
+    return resultats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Index aveugle des clients chiffres")
+    sub = parser.add_subparsers(dest='command', required=True)
+    bench = sub.add_parser('benchmark', help='Recherche indexee vs dechiffrement complet')
+    bench.add_argument('--clients', type=int, default=2000)
+    bench.add_argument('--repetitions', type=int, default=20)
+    args = parser.parse_args()
+
+    for cle, valeur in benchmark(args.clients, args.repetitions).items():
+        print(f"{cle:28} {valeur}")
@@ -11,11 +11,22 @@ Usage:
     # texte_anonyme = "Promesse [VENDEUR_1] vers [ACQUEREUR_1], [PRIX_1] euros"
 
     reponse_finale = anonymizer.deanonymiser(reponse_claude, mapping)
+
+    # Chat: historique anonymisé en cache par conversation
+    message, history, mapping = get_cache_anonymisation().anonymiser_conversation(
+        conversation_id, message, history
+    )
+
+Variables d'environnement:
+    NOTAIRE_ANONYMISATION_CACHE  Conversations gardées en cache (défaut: 256)
 """
 
+import os
 import re
 import sys
-from typing import Dict, List, Tuple, Optional
+import threading
+from collections import OrderedDict, deque
+from typing import Any, Dict, List, Tuple, Optional
 from dataclasses import dataclass, field
 
 # Encodage UTF-8 pour Windows
@@ -24,6 +35,86 @@ if sys.platform == "win32":
     sys.stderr.reconfigure(encoding='utf-8')
 
 
+class RemplaceurMultiple:
+    """
+    Remplacement multi-motifs en une seule passe (automate d'Aho-Corasick).
+
+    L'automate est construit une fois pour un jeu motif -> remplacement.
+    À chaque position, le motif le plus long commençant le plus à gauche
+    l'emporte, et le texte inséré n'est jamais re-balayé (contrairement à
+    une suite de str.replace, où un remplacement pouvait en déclencher un
+    autre).
+    """
+
+    def __init__(self, remplacements: Dict[str, str]):
+        self._remplacements = {motif: r for motif, r in remplacements.items() if motif}
+        self._transitions: List[Dict[str, int]] = [{}]
+        self._echecs: List[int] = [0]
+        self._sorties: List[List[int]] = [[]]  # longueurs des motifs finissant ici
+
+        for motif in self._remplacements:
+            etat = 0
+            for car in motif:
+                suivant = self._transitions[etat].get(car)
+                if suivant is None:
+                    suivant = len(self._transitions)
+                    self._transitions[etat][car] = suivant
+                    self._transitions.append({})
+                    self._echecs.append(0)
+                    self._sorties.append([])
+                etat = suivant
+            self._sorties[etat].append(len(motif))
+
+        # Liens d'échec en largeur: plus long suffixe propre qui est un préfixe
+        file = deque(self._transitions[0].values())
+        while file:
+            etat = file.popleft()
+            for car, suivant in self._transitions[etat].items():
+                file.append(suivant)
+                repli = self._echecs[etat]
+                while repli and car not in self._transitions[repli]:
+                    repli = self._echecs[repli]
+                cible = self._transitions[repli].get(car, 0)
+                self._echecs[suivant] = cible
+                if self._sorties[cible]:
+                    self._sorties[suivant] = self._sorties[suivant] + self._sorties[cible]
+
+    def __len__(self) -> int:
+        return len(self._remplacements)
+
+    def remplacer(self, texte: str) -> str:
+        """Applique tous les remplacements en un parcours linéaire du texte."""
+        if not self._remplacements or not texte:
+            return texte
+
+        transitions, echecs, sorties = self._transitions, self._echecs, self._sorties
+        plus_long: Dict[int, int] = {}  # début -> longueur du plus long motif
+        etat = 0
+        for fin, car in enumerate(texte):
+            while etat and car not in transitions[etat]:
+                etat = echecs[etat]
+            etat = transitions[etat].get(car, 0)
+            for longueur in sorties[etat]:
+                debut = fin - longueur + 1
+                if longueur > plus_long.get(debut, 0):
+                    plus_long[debut] = longueur
+
+        if not plus_long:
+            return texte
+
+        morceaux = []
+        position = 0
+        for debut in sorted(plus_long):
+            if debut < position:
+                continue  # chevauche un remplacement déjà retenu
+            fin = debut + plus_long[debut]
+            morceaux.append(texte[position:debut])
+            morceaux.append(self._remplacements[texte[debut:fin]])
+            position = fin
+        morceaux.append(texte[position:])
+        return "".join(morceaux)
+
+
 @dataclass
 class AnonymizationMapping:
     """Mapping d'anonymisation réversible."""
@@ -33,16 +124,43 @@ class AnonymizationMapping:
     prix: Dict[str, str] = field(default_factory=dict)
     dates: Dict[str, str] = field(default_factory=dict)
     notaires: Dict[str, str] = field(default_factory=dict)
+    # Automates compilés (sens -> (taille du mapping, remplaceur))
+    _remplaceurs: Dict[bool, Tuple[int, RemplaceurMultiple]] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+
+    def _categories(self) -> List[Dict[str, str]]:
+        return [self.vendeurs, self.acquereurs, self.adresses,
+                self.prix, self.dates, self.notaires]
+
+    def get_mapping(self) -> Dict[str, str]:
+        """Retourne toutes les catégories fusionnées (original -> placeholder)."""
+        fusion = {}
+        for category in self._categories():
+            fusion.update(category)
+        return fusion
 
     def get_reverse_mapping(self) -> Dict[str, str]:
         """Retourne le mapping inversé pour la dé-anonymisation."""
         reverse = {}
-        for category in [self.vendeurs, self.acquereurs, self.adresses,
-                        self.prix, self.dates, self.notaires]:
+        for category in self._categories():
             for original, anonyme in category.items():
                 reverse[anonyme] = original
         return reverse
 
+    def remplaceur(self, inverse: bool = False) -> RemplaceurMultiple:
+        """
+        Automate de (dé-)anonymisation, recompilé seulement si le mapping a
+        grandi depuis (les entrées ne sont jamais réécrites, seulement ajoutées).
+        """
+        taille = sum(len(category) for category in self._categories())
+        compile_ = self._remplaceurs.get(inverse)
+        if compile_ is None or compile_[0] != taille:
+            paires = self.get_reverse_mapping() if inverse else self.get_mapping()
+            compile_ = (taille, RemplaceurMultiple(paires))
+            self._remplaceurs[inverse] = compile_
+        return compile_[1]
+
 
 class ChatAnonymizer:
     """
@@ -127,18 +245,22 @@ class ChatAnonymizer:
         """Vérifie si le mot ne doit pas être anonymisé."""
         return mot.lower() in self.MOTS_EXCLUS or len(mot) < 3
 
-    def anonymiser(self, texte: str) -> Tuple[str, AnonymizationMapping]:
+    def anonymiser(
+        self, texte: str, mapping: Optional[AnonymizationMapping] = None
+    ) -> Tuple[str, AnonymizationMapping]:
         """
         Anonymise un texte et retourne le mapping.
 
         Args:
             texte: Texte original avec données sensibles
+            mapping: Mapping existant à compléter (conversation en cours);
+                les entités déjà connues gardent leur placeholder
 
         Returns:
             Tuple (texte_anonymisé, mapping)
         """
-        mapping = AnonymizationMapping()
-        texte_anonyme = texte
+        if mapping is None:
+            mapping = AnonymizationMapping()
 
         # 1. Détecter les transactions (X → Y)
         for match in self.PATTERNS['transaction'].finditer(texte):
@@ -213,17 +335,8 @@ class ChatAnonymizer:
                 self.compteurs['vendeur'] += 1
                 mapping.vendeurs[nom] = f"[PERSONNE_{self.compteurs['vendeur']}]"
 
-        # Appliquer les remplacements (par longueur décroissante pour éviter les conflits)
-        all_mappings = {}
-        all_mappings.update(mapping.vendeurs)
-        all_mappings.update(mapping.acquereurs)
-        all_mappings.update(mapping.adresses)
-        all_mappings.update(mapping.prix)
-        all_mappings.update(mapping.dates)
-        all_mappings.update(mapping.notaires)
-
-        for original, anonyme in sorted(all_mappings.items(), key=lambda x: -len(x[0])):
-            texte_anonyme = texte_anonyme.replace(original, anonyme)
+        # Appliquer les remplacements en une passe (le plus long motif l'emporte)
+        texte_anonyme = mapping.remplaceur().remplacer(texte)
 
         return texte_anonyme, mapping
 
@@ -238,19 +351,144 @@ class ChatAnonymizer:
         Returns:
             Texte avec données réelles
         """
-        reverse = mapping.get_reverse_mapping()
-
-        texte_final = texte
-        for anonyme, original in sorted(reverse.items(), key=lambda x: -len(x[0])):
-            texte_final = texte_final.replace(anonyme, original)
-
-        return texte_final
+        return mapping.remplaceur(inverse=True).remplacer(texte)
 
     def reset(self):
         """Réinitialise les compteurs pour une nouvelle session."""
         self.compteurs = {k: 0 for k in self.compteurs}
 
 
+# =============================================================================
+# Cache par conversation
+# =============================================================================
+
+@dataclass
+class SessionAnonymisation:
+    """État d'anonymisation d'une conversation: mapping cumulé et historique déjà traité."""
+    anonymizer: ChatAnonymizer = field(default_factory=ChatAnonymizer)
+    mapping: AnonymizationMapping = field(default_factory=AnonymizationMapping)
+    originaux: List[Tuple[str, Any]] = field(default_factory=list)  # (role, content) reçus
+    anonymises: List[Dict] = field(default_factory=list)
+    # Message courant du tour précédent: revient en tête de l'historique au tour suivant
+    en_attente: Optional[Tuple[Tuple[str, Any], str]] = None
+    verrou: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+
+class CacheAnonymisation:
+    """
+    Historiques anonymisés par conversation (LRU).
+
+    Chaque conversation garde un mapping cumulé: une même personne porte le
+    même placeholder dans tout l'historique et dans la réponse, et seuls les
+    messages nouveaux depuis le tour précédent sont anonymisés. Si
+    l'historique reçu ne prolonge plus celui en cache (message édité ou
+    supprimé), la session est reconstruite.
+    """
+
+    def __init__(self, capacite: Optional[int] = None):
+        if capacite is None:
+            capacite = int(os.getenv("NOTAIRE_ANONYMISATION_CACHE", "256"))
+        self.capacite = max(capacite, 1)
+        self._sessions: "OrderedDict[str, SessionAnonymisation]" = OrderedDict()
+        self._verrou = threading.Lock()
+        self._stats = {"messages_reutilises": 0, "messages_anonymises": 0, "reconstructions": 0}
+
+    def _session(self, conversation_id: Optional[str]) -> SessionAnonymisation:
+        if not conversation_id:
+            return SessionAnonymisation()
+        with self._verrou:
+            session = self._sessions.get(conversation_id)
+            if session is None:
+                session = self._sessions[conversation_id] = SessionAnonymisation()
+                while len(self._sessions) > self.capacite:
+                    self._sessions.popitem(last=False)
+            else:
+                self._sessions.move_to_end(conversation_id)
+            return session
+
+    def anonymiser_conversation(
+        self,
+        conversation_id: Optional[str],
+        message: str,
+        history: Optional[List[Dict]] = None,
+    ) -> Tuple[str, List[Dict], AnonymizationMapping]:
+        """
+        Anonymise le message courant et l'historique d'une conversation.
+
+        Returns:
+            Tuple (message_anonymisé, historique_anonymisé, mapping cumulé)
+        """
+        history = history or []
+        session = self._session(conversation_id)
+        with session.verrou:
+            cles = [(msg.get("role"), msg.get("content")) for msg in history]
+            if cles[:len(session.originaux)] != session.originaux:
+                with self._verrou:
+                    self._stats["reconstructions"] += 1
+                nouvelle = SessionAnonymisation()
+                session.anonymizer, session.mapping = nouvelle.anonymizer, nouvelle.mapping
+                session.originaux, session.anonymises, session.en_attente = [], [], None
+
+            reutilises = len(session.originaux)
+            nouveaux = 0
+            for cle, msg in zip(cles[reutilises:], history[reutilises:]):
+                if session.en_attente and session.en_attente[0] == cle:
+                    contenu = session.en_attente[1]
+                    session.en_attente = None
+                    reutilises += 1
+                elif isinstance(cle[1], str):
+                    contenu, _ = session.anonymizer.anonymiser(cle[1], session.mapping)
+                    nouveaux += 1
+                else:
+                    contenu = cle[1]
+                session.originaux.append(cle)
+                session.anonymises.append({**msg, "content": contenu})
+
+            message_anonyme, _ = session.anonymizer.anonymiser(message, session.mapping)
+            session.en_attente = (("user", message), message_anonyme)
+            historique = list(session.anonymises)
+
+        with self._verrou:
+            self._stats["messages_reutilises"] += reutilises
+            self._stats["messages_anonymises"] += nouveaux + 1
+        return message_anonyme, historique, session.mapping
+
+    def oublier(self, conversation_id: str):
+        """Retire une conversation du cache (suppression, fin de session)."""
+        with self._verrou:
+            self._sessions.pop(conversation_id, None)
+
+    def vider(self) -> int:
+        """
+        Retire toutes les conversations (effacement RGPD d'un client).
+
+        Le cache n'indexe pas les personnes: un nom effacé peut figurer dans
+        n'importe quelle session. Les suivantes sont reconstruites depuis
+        l'historique reçu.
+        """
+        with self._verrou:
+            nombre = len(self._sessions)
+            self._sessions.clear()
+            return nombre
+
+    def statistiques(self) -> Dict[str, int]:
+        with self._verrou:
+            return {"conversations": len(self._sessions), **self._stats}
+
+
+_cache_anonymisation: Optional[CacheAnonymisation] = None
+_cache_anonymisation_lock = threading.Lock()
+
+
+def get_cache_anonymisation() -> CacheAnonymisation:
+    """Retourne le cache d'anonymisation partagé du process."""
+    global _cache_anonymisation
+    with _cache_anonymisation_lock:
+        if _cache_anonymisation is None:
+            _cache_anonymisation = CacheAnonymisation()
+        return _cache_anonymisation
+
+
 # Test simple
 if __name__ == "__main__":
     anonymizer = ChatAnonymizer()
@@ -29,9 +29,10 @@ import json
 import os
 import secrets
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 # Ensure UTF-8 output on Windows
 if sys.platform == 'win32':
@@ -59,6 +60,9 @@ SENSITIVE_FIELDS = [
 # Champs qui ne doivent jamais etre logues
 REDACTED_FIELDS = SENSITIVE_FIELDS + ['password', 'secret', 'key', 'token', 'api_key']
 
+# Traitement en masse: valeurs par tache du pool
+BULK_CHUNK_SIZE = 2000
+
 
 @dataclass
 class EncryptedValue:
@@ -190,6 +194,118 @@ class EncryptionService:
 
         return plaintext_bytes.decode('utf-8')
 
+    def _bulk_workers(self, count: int, workers: Optional[int]) -> int:
+        """Nombre de threads pour un lot (1 si le lot tient en une tache)."""
+        if count <= BULK_CHUNK_SIZE:
+            return 1
+        if workers is None:
+            cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1)
+            workers = int(os.getenv("NOTAIRE_CRYPTO_WORKERS", "0")) or min(4, cpus)
+        return max(1, min(workers, -(-count // BULK_CHUNK_SIZE)))
+
+    def _map_chunks(self, function, values: List, workers: Optional[int]) -> List:
+        """Applique function a des tranches de values, en parallele si utile, dans l'ordre."""
+        workers = self._bulk_workers(len(values), workers)
+        if workers == 1:
+            return function(values)
+        chunks = [values[i:i + BULK_CHUNK_SIZE] for i in range(0, len(values), BULK_CHUNK_SIZE)]
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return [item for chunk in pool.map(function, chunks) for item in chunk]
+
+    def _encrypt_chunk(self, values: List[Optional[str]]) -> List[Optional[str]]:
+        # Un tirage d'alea pour tous les nonces, un horodatage et un en-tete
+        # JSON par tranche: seul AES-GCM reste par valeur
+        nonces = os.urandom(12 * len(values))
+        suffix = (f'", "k": {json.dumps(self.key_id)}, "v": {self.VERSION}, '
+                  f'"t": "{datetime.now(timezone.utc).isoformat()}"}}')
+        encrypt = self.aesgcm.encrypt
+        b64 = base64.b64encode
+        result = []
+        for i, value in enumerate(values):
+            if not value:
+                result.append(value)
+                continue
+            nonce = nonces[12 * i:12 * i + 12]
+            ciphertext = encrypt(nonce, value.encode('utf-8'), None)
+            result.append(
+                f'{{"c": "{b64(ciphertext).decode("ascii")}", "n": "{b64(nonce).decode("ascii")}{suffix}'
+            )
+        return result
+
+    def encrypt_many(self, values: Iterable[Optional[str]], workers: int = None) -> List[Optional[str]]:
+        """
+        Chiffre une serie de valeurs (import en masse).
+
+        Meme format que encrypt() (chaque valeur a son propre nonce), mais le
+        chiffreur, l'horodatage et l'enveloppe JSON sont partages par tranche
+        de BULK_CHUNK_SIZE valeurs, traitees par un pool de threads.
+
+        Args:
+            values: Chaines a chiffrer (None/vides conservees telles quelles)
+            workers: Threads (defaut: NOTAIRE_CRYPTO_WORKERS ou min(4, CPU))
+
+        Returns:
+            Valeurs chiffrees, dans l'ordre
+        """
+        return self._map_chunks(self._encrypt_chunk, list(values), workers)
+
+    def _envelope_fields(self, value: str) -> Optional[Tuple[str, str]]:
+        """
+        (ciphertext, nonce) d'une enveloppe au format de encrypt(), lus sans
+        json.loads. None si le format differe (la voie generale prend le relais).
+        """
+        if not value.startswith('{"c": "'):
+            return None
+        end_c = value.find('"', 7)
+        if end_c < 0 or not value.startswith('", "n": "', end_c):
+            return None
+        end_n = value.find('"', end_c + 9)
+        if end_n < 0 or value.find(f'"v": {self.VERSION}, "t"', end_n) < 0:
+            return None
+        return value[7:end_c], value[end_c + 9:end_n]
+
+    def _decrypt_chunk(self, values: List[Optional[str]], error_value: Optional[str]) -> List[Optional[str]]:
+        decrypt = self.aesgcm.decrypt
+        b64 = base64.b64decode
+        result = []
+        for value in values:
+            if not value:
+                result.append(value)
+                continue
+            try:
+                fields = self._envelope_fields(value)
+                if fields is None:
+                    result.append(self.decrypt(value))
+                    continue
+                result.append(decrypt(b64(fields[1]), b64(fields[0]), None).decode('utf-8'))
+            except Exception:
+                if error_value is None:
+                    raise
+                result.append(error_value)
+        return result
+
+    def decrypt_many(
+        self,
+        values: Iterable[Optional[str]],
+        workers: int = None,
+        error_value: Optional[str] = None
+    ) -> List[Optional[str]]:
+        """
+        Dechiffre une serie de valeurs produites par encrypt()/encrypt_many().
+
+        Args:
+            values: Valeurs chiffrees (None/vides et texte en clair conserves)
+            workers: Threads (defaut: NOTAIRE_CRYPTO_WORKERS ou min(4, CPU))
+            error_value: Valeur rendue pour une entree indechiffrable
+                         (None: l'exception est propagee)
+
+        Returns:
+            Valeurs en clair, dans l'ordre
+        """
+        return self._map_chunks(
+            lambda chunk: self._decrypt_chunk(chunk, error_value), list(values), workers
+        )
+
     def encrypt_dict(
         self,
         data: Dict[str, Any],
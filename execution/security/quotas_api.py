@@ -0,0 +1,478 @@
+"""
+Rate limiting et cache des clés API partagés entre workers.
+
+Avec plusieurs workers uvicorn ou conteneurs Modal, un dict par process
+multiplie la limite effective par N et chaque worker refait la requête
+Supabase pour chaque clé. Les deux structures reposent ici sur un backend
+interchangeable:
+
+- memoire:  dict du process (comportement historique, mono-worker)
+- sqlite:   fichier SQLite WAL partagé (plusieurs workers, un seul hôte)
+- redis:    tout serveur parlant le protocole Redis (RESP): Redis, Valkey,
+            KeyDB, Dragonfly... (plusieurs hôtes)
+
+Limiteur: seau à jetons (capacité = rate_limit_rpm, recharge continue de
+rpm/60 jetons par seconde). Mémoire O(1) par clé: (jetons, horodatage).
+
+Cache d'authentification: entrées indexées par hash de clé ET par
+api_key_id, pour qu'une révocation (revoquer(api_key_id)) soit visible de
+tous les workers immédiatement, sans attendre l'expiration du TTL.
+
+Configuration:
+    NOTAIRE_QUOTAS_BACKEND=memoire                      (défaut)
+    NOTAIRE_QUOTAS_BACKEND=sqlite:///.tmp/quotas.db
+    NOTAIRE_QUOTAS_BACKEND=redis://:motdepasse@hote:6379/0
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import unquote, urlparse
+
+logger = logging.getLogger(__name__)
+
+PREFIXE = "notaire:"
+
+
+def consommer_jeton(
+    etat: Optional[Tuple[float, float]],
+    capacite: float,
+    recharge: float,
+    maintenant: float,
+) -> Tuple[bool, Tuple[float, float]]:
+    """
+    Seau à jetons: retourne (autorisé, nouvel état (jetons, horodatage)).
+
+    Un seau absent est plein. Les jetons se rechargent au taux `recharge`
+    (jetons/seconde) sans dépasser `capacite`.
+    """
+    if etat is None:
+        jetons, dernier = capacite, maintenant
+    else:
+        jetons, dernier = etat
+    jetons = min(capacite, jetons + max(0.0, maintenant - dernier) * recharge)
+    if jetons >= 1:
+        return True, (jetons - 1, maintenant)
+    return False, (jetons, maintenant)
+
+
+# =============================================================================
+# BACKENDS
+# =============================================================================
+
+class BackendMemoire:
+    """Backend en mémoire du process (un seul worker)."""
+
+    nom = "memoire"
+    bloquant = False  # pur CPU sous verrou: appelable depuis la boucle asyncio
+
+    def __init__(self):
+        self._verrou = threading.Lock()
+        self._seaux: Dict[str, Tuple[float, float]] = {}
+        self._cache: Dict[str, Tuple[str, str, float]] = {}  # hash -> (id, json, expire)
+        self._index: Dict[str, str] = {}  # api_key_id -> hash
+
+    def consommer(self, cle: str, capacite: float, recharge: float) -> bool:
+        with self._verrou:
+            autorise, self._seaux[cle] = consommer_jeton(
+                self._seaux.get(cle), capacite, recharge, time.monotonic()
+            )
+            return autorise
+
+    def cache_lire(self, key_hash: str) -> Optional[Dict[str, Any]]:
+        with self._verrou:
+            entree = self._cache.get(key_hash)
+            if entree is None:
+                return None
+            if entree[2] < time.time():
+                self._supprimer(key_hash)
+                return None
+            return json.loads(entree[1])
+
+    def cache_ecrire(self, key_hash: str, api_key_id: str, donnees: Dict[str, Any], ttl: float):
+        with self._verrou:
+            self._cache[key_hash] = (api_key_id, json.dumps(donnees), time.time() + ttl)
+            self._index[api_key_id] = key_hash
+
+    def cache_revoquer(self, api_key_id: str) -> bool:
+        with self._verrou:
+            key_hash = self._index.get(api_key_id)
+            return self._supprimer(key_hash) if key_hash else False
+
+    def _supprimer(self, key_hash: str) -> bool:
+        entree = self._cache.pop(key_hash, None)
+        if entree:
+            self._index.pop(entree[0], None)
+        return entree is not None
+
+    def nettoyer(self, inactivite: float = 3600):
+        """Supprime les seaux inactifs et les entrées de cache expirées."""
+        with self._verrou:
+            limite = time.monotonic() - inactivite
+            for cle in [c for c, (_, t) in self._seaux.items() if t < limite]:
+                del self._seaux[cle]
+            maintenant = time.time()
+            for key_hash in [h for h, e in self._cache.items() if e[2] < maintenant]:
+                self._supprimer(key_hash)
+
+
+class BackendSQLite:
+    """
+    Backend SQLite (mode WAL) partagé par les workers d'un même hôte.
+
+    Chaque opération est une transaction `BEGIN IMMEDIATE`: la lecture et
+    l'écriture du seau sont atomiques entre processus.
+    """
+
+    nom = "sqlite"
+    bloquant = True
+
+    def __init__(self, chemin: Path):
+        self.chemin = Path(chemin)
+        self.chemin.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        with self._connexion() as conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS seaux (
+                    cle TEXT PRIMARY KEY, jetons REAL NOT NULL, horodatage REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS cache_cles (
+                    key_hash TEXT PRIMARY KEY, api_key_id TEXT NOT NULL,
+                    donnees TEXT NOT NULL, expire REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_cache_cles_id ON cache_cles(api_key_id);
+            """)
+
+    def _connexion(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.chemin, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def consommer(self, cle: str, capacite: float, recharge: float) -> bool:
+        conn = self._connexion()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            ligne = conn.execute(
+                "SELECT jetons, horodatage FROM seaux WHERE cle = ?", (cle,)
+            ).fetchone()
+            # Horloge murale: partagée entre processus (contrairement à monotonic)
+            autorise, (jetons, horodatage) = consommer_jeton(ligne, capacite, recharge, time.time())
+            conn.execute(
+                "INSERT INTO seaux (cle, jetons, horodatage) VALUES (?, ?, ?) "
+                "ON CONFLICT(cle) DO UPDATE SET jetons = excluded.jetons, horodatage = excluded.horodatage",
+                (cle, jetons, horodatage),
+            )
+            conn.execute("COMMIT")
+            return autorise
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def cache_lire(self, key_hash: str) -> Optional[Dict[str, Any]]:
+        ligne = self._connexion().execute(
+            "SELECT donnees FROM cache_cles WHERE key_hash = ? AND expire > ?",
+            (key_hash, time.time()),
+        ).fetchone()
+        return json.loads(ligne[0]) if ligne else None
+
+    def cache_ecrire(self, key_hash: str, api_key_id: str, donnees: Dict[str, Any], ttl: float):
+        self._connexion().execute(
+            "INSERT OR REPLACE INTO cache_cles (key_hash, api_key_id, donnees, expire) VALUES (?, ?, ?, ?)",
+            (key_hash, api_key_id, json.dumps(donnees), time.time() + ttl),
+        )
+
+    def cache_revoquer(self, api_key_id: str) -> bool:
+        curseur = self._connexion().execute(
+            "DELETE FROM cache_cles WHERE api_key_id = ?", (api_key_id,)
+        )
+        return curseur.rowcount > 0
+
+    def nettoyer(self, inactivite: float = 3600):
+        conn = self._connexion()
+        maintenant = time.time()
+        conn.execute("DELETE FROM seaux WHERE horodatage < ?", (maintenant - inactivite,))
+        conn.execute("DELETE FROM cache_cles WHERE expire < ?", (maintenant,))
+
+
+class ErreurRESP(Exception):
+    """Erreur renvoyée par le serveur (réponse `-ERR ...`)."""
+
+
+class ClientRESP:
+    """
+    Client minimal du protocole Redis (RESP2), sans dépendance.
+
+    Une connexion TCP persistante par client, protégée par un verrou;
+    reconnexion automatique (une tentative) si le serveur a coupé.
+    """
+
+    def __init__(self, hote: str = "localhost", port: int = 6379, db: int = 0,
+                 mot_de_passe: Optional[str] = None, timeout: float = 1.0):
+        self.hote, self.port, self.db = hote, port, db
+        self.mot_de_passe = mot_de_passe
+        self.timeout = timeout
+        self._verrou = threading.Lock()
+        self._socket: Optional[socket.socket] = None
+        self._flux = None
+
+    def _connecter(self):
+        connexion = socket.create_connection((self.hote, self.port), timeout=self.timeout)
+        flux = connexion.makefile("rb")
+        try:
+            if self.mot_de_passe:
+                self._echanger(connexion, flux, "AUTH", self.mot_de_passe)
+            if self.db:
+                self._echanger(connexion, flux, "SELECT", self.db)
+        except BaseException:
+            connexion.close()
+            raise
+        # Conservée seulement une fois AUTH/SELECT acceptés: un échec ne
+        # laisse jamais un socket non authentifié à réutiliser
+        self._socket, self._flux = connexion, flux
+
+    def fermer(self):
+        with self._verrou:
+            if self._socket is not None:
+                try:
+                    self._socket.close()
+                finally:
+                    self._socket = None
+                    self._flux = None
+
+    def _envoyer(self, *args) -> Any:
+        return self._echanger(self._socket, self._flux, *args)
+
+    @classmethod
+    def _echanger(cls, connexion: socket.socket, flux, *args) -> Any:
+        morceaux = [f"*{len(args)}\r\n".encode()]
+        for arg in args:
+            donnees = arg if isinstance(arg, bytes) else str(arg).encode()
+            morceaux.append(b"$%d\r\n%s\r\n" % (len(donnees), donnees))
+        connexion.sendall(b"".join(morceaux))
+        return cls._lire(flux)
+
+    @classmethod
+    def _lire(cls, flux) -> Any:
+        ligne = flux.readline()
+        if not ligne:
+            raise ConnectionError("Connexion fermée par le serveur")
+        prefixe, contenu = ligne[:1], ligne[1:-2]
+        if prefixe == b"+":
+            return contenu.decode()
+        if prefixe == b"-":
+            raise ErreurRESP(contenu.decode())
+        if prefixe == b":":
+            return int(contenu)
+        if prefixe == b"$":
+            taille = int(contenu)
+            if taille < 0:
+                return None
+            donnees = flux.read(taille + 2)
+            return donnees[:-2].decode()
+        if prefixe == b"*":
+            taille = int(contenu)
+            return None if taille < 0 else [cls._lire(flux) for _ in range(taille)]
+        raise ErreurRESP(f"Réponse RESP inattendue: {ligne!r}")
+
+    def commande(self, *args) -> Any:
+        with self._verrou:
+            for tentative in (1, 2):
+                try:
+                    if self._socket is None:
+                        self._connecter()
+                    return self._envoyer(*args)
+                except (OSError, ConnectionError):
+                    self._socket = None
+                    if tentative == 2:
+                        raise
+
+
+# Seau à jetons atomique côté serveur. L'horloge est celle du serveur (TIME):
+# pas de dérive entre workers situés sur des hôtes différents.
+SCRIPT_SEAU = """
+local capacite = tonumber(ARGV[1])
+local recharge = tonumber(ARGV[2])
+local t = redis.call('TIME')
+local maintenant = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local etat = redis.call('HMGET', KEYS[1], 'j', 't')
+local jetons = tonumber(etat[1])
+local dernier = tonumber(etat[2])
+if jetons == nil then
+    jetons = capacite
+    dernier = maintenant
+end
+jetons = math.min(capacite, jetons + math.max(0, maintenant - dernier) * recharge)
+local autorise = 0
+if jetons >= 1 then
+    jetons = jetons - 1
+    autorise = 1
+end
+redis.call('HSET', KEYS[1], 'j', tostring(jetons), 't', tostring(maintenant))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacite / recharge * 1000))
+return autorise
+"""
+SHA_SCRIPT_SEAU = hashlib.sha1(SCRIPT_SEAU.encode()).hexdigest()
+
+
+class BackendRedis:
+    """Backend sur serveur compatible Redis (plusieurs hôtes)."""
+
+    nom = "redis"
+    bloquant = True
+
+    def __init__(self, client: ClientRESP):
+        self.client = client
+
+    def consommer(self, cle: str, capacite: float, recharge: float) -> bool:
+        args = (1, f"{PREFIXE}seau:{cle}", capacite, recharge)
+        try:
+            return self.client.commande("EVALSHA", SHA_SCRIPT_SEAU, *args) == 1
+        except ErreurRESP as e:
+            if not str(e).startswith("NOSCRIPT"):
+                raise
+            return self.client.commande("EVAL", SCRIPT_SEAU, *args) == 1
+
+    def cache_lire(self, key_hash: str) -> Optional[Dict[str, Any]]:
+        brut = self.client.commande("GET", f"{PREFIXE}auth:{key_hash}")
+        return json.loads(brut) if brut else None
+
+    def cache_ecrire(self, key_hash: str, api_key_id: str, donnees: Dict[str, Any], ttl: float):
+        ttl_ms = max(1, int(ttl * 1000))
+        self.client.commande("SET", f"{PREFIXE}auth:{key_hash}", json.dumps(donnees), "PX", ttl_ms)
+        self.client.commande("SET", f"{PREFIXE}auth_id:{api_key_id}", key_hash, "PX", ttl_ms)
+
+    def cache_revoquer(self, api_key_id: str) -> bool:
+        key_hash = self.client.commande("GET", f"{PREFIXE}auth_id:{api_key_id}")
+        if not key_hash:
+            return False
+        supprimees = self.client.commande(
+            "DEL", f"{PREFIXE}auth:{key_hash}", f"{PREFIXE}auth_id:{api_key_id}"
+        )
+        return supprimees > 0
+
+    def nettoyer(self, inactivite: float = 3600):
+        # Les clés Redis expirent d'elles-mêmes (PEXPIRE / PX)
+        pass
+
+
+def creer_backend(url: Optional[str] = None):
+    """
+    Construit le backend décrit par `url` (ou NOTAIRE_QUOTAS_BACKEND).
+
+    memoire | sqlite:///chemin.db | redis://[:mdp@]hote[:port][/db]
+    """
+    url = url or os.getenv("NOTAIRE_QUOTAS_BACKEND", "memoire")
+    if url in ("memoire", "memory"):
+        return BackendMemoire()
+    if url.startswith("sqlite:///"):
+        return BackendSQLite(Path(url[len("sqlite:///"):]))
+    if url.startswith(("redis://", "valkey://")):
+        parsed = urlparse(url)
+        return BackendRedis(ClientRESP(
+            hote=parsed.hostname or "localhost",
+            port=parsed.port or 6379,
+            db=int(parsed.path.lstrip("/") or 0),
+            mot_de_passe=unquote(parsed.password) if parsed.password else None,
+        ))
+    raise ValueError(f"Backend de quotas inconnu: {url}")
+
+
+# =============================================================================
+# FAÇADES
+# =============================================================================
+
+async def _hors_boucle(backend, fn, *args):
+    """Appelle fn dans un thread si le backend fait des E/S (SQLite, socket)."""
+    if getattr(backend, "bloquant", True):
+        return await asyncio.to_thread(fn, *args)
+    return fn(*args)
+
+
+class RateLimiter:
+    """
+    Limite le nombre de requetes par cle API (seau à jetons).
+
+    `limit_rpm` requêtes de rafale, rechargées au rythme de
+    limit_rpm / window_seconds par seconde.
+    """
+
+    def __init__(self, default_rpm: int = 60, window_seconds: int = 60, backend=None):
+        self._default_rpm = default_rpm
+        self._window = window_seconds
+        self.backend = backend or BackendMemoire()
+
+    def check(self, key_id: str, limit_rpm: int = None) -> bool:
+        """
+        Verifie si la requete est autorisee.
+        Retourne True si OK, False si limite depassee.
+        """
+        limit = limit_rpm or self._default_rpm
+        try:
+            return self.backend.consommer(key_id, float(limit), limit / self._window)
+        except Exception as e:
+            # Backend partagé injoignable: on laisse passer plutôt que bloquer l'API
+            logger.warning(f"Rate limiter indisponible ({self.backend.nom}): {e}")
+            return True
+
+    async def check_async(self, key_id: str, limit_rpm: int = None) -> bool:
+        """check() sans bloquer la boucle asyncio."""
+        return await _hors_boucle(self.backend, self.check, key_id, limit_rpm)
+
+    def cleanup(self):
+        """Nettoie les entrees perimees (appeler periodiquement)."""
+        self.backend.nettoyer(inactivite=self._window * 2)
+
+
+class CacheClesAPI:
+    """Cache des contextes d'authentification, partagé via le backend."""
+
+    def __init__(self, ttl_seconds: int = 300, backend=None):
+        self.ttl = ttl_seconds
+        self.backend = backend or BackendMemoire()
+
+    def lire(self, key_hash: str) -> Optional[Dict[str, Any]]:
+        try:
+            return self.backend.cache_lire(key_hash)
+        except Exception as e:
+            logger.warning(f"Cache clés API indisponible ({self.backend.nom}): {e}")
+            return None
+
+    async def lire_async(self, key_hash: str) -> Optional[Dict[str, Any]]:
+        """lire() sans bloquer la boucle asyncio."""
+        return await _hors_boucle(self.backend, self.lire, key_hash)
+
+    def ecrire(self, key_hash: str, api_key_id: str, donnees: Dict[str, Any],
+               expire_dans: Optional[float] = None):
+        """Met en cache (TTL raccourci si la clé expire avant)."""
+        ttl = self.ttl if expire_dans is None else min(self.ttl, expire_dans)
+        if ttl <= 0:
+            return
+        try:
+            self.backend.cache_ecrire(key_hash, api_key_id, donnees, ttl)
+        except Exception as e:
+            logger.warning(f"Cache clés API indisponible ({self.backend.nom}): {e}")
+
+    async def ecrire_async(self, key_hash: str, api_key_id: str, donnees: Dict[str, Any],
+                           expire_dans: Optional[float] = None):
+        """ecrire() sans bloquer la boucle asyncio."""
+        await _hors_boucle(self.backend, self.ecrire, key_hash, api_key_id, donnees, expire_dans)
+
+    def revoquer(self, api_key_id: str) -> bool:
+        """Retire la clé du cache de tous les workers partageant le backend."""
+        return self.backend.cache_revoquer(api_key_id)
+
+    async def revoquer_async(self, api_key_id: str) -> bool:
+        """revoquer() sans bloquer la boucle asyncio."""
+        return await _hors_boucle(self.backend, self.revoquer, api_key_id)
@@ -25,7 +25,7 @@ import sys
 from dataclasses import dataclass, asdict, field
 from datetime import datetime, date, timezone
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from uuid import uuid4
 
 # Ensure UTF-8 output on Windows
@@ -40,6 +40,8 @@ from .encryption_service import (
     mask_pii,
     CRYPTO_AVAILABLE
 )
+from .blind_index import BlindIndex, INDEXED_FIELDS
+from .chat_anonymizer import get_cache_anonymisation
 
 # Try to import Supabase
 try:
@@ -168,6 +170,9 @@ class SecureClientManager:
                 "Verifiez que ENCRYPTION_MASTER_KEY est defini dans .env"
             ) from e
 
+        # Index aveugle (jetons HMAC propres a l'etude) pour la recherche
+        self.blind_index = BlindIndex.from_env(etude_id, master_key=encryption_key)
+
         # Initialiser le client Supabase
         self.url = os.getenv("SUPABASE_URL")
         self.key = os.getenv("SUPABASE_SERVICE_KEY") or os.getenv("SUPABASE_KEY")
@@ -207,21 +212,8 @@ class SecureClientManager:
         if warnings:
             console.print(f"[yellow]Donnees sensibles detectees: {warnings}[/yellow]")
 
-        # Chiffrer les champs sensibles
-        encrypted_data = self._encrypt_client_data(data)
-
-        # Ajouter metadata
-        encrypted_data.update({
-            "etude_id": self.etude_id,
-            "created_by": self.user_id,
-            "created_at": datetime.now(timezone.utc).isoformat(),
-            "updated_at": datetime.now(timezone.utc).isoformat(),
-            "source": data.get("source", "manual")
-        })
-
-        # Generer le hash pour recherche
-        if 'nom' in data and data['nom']:
-            encrypted_data["nom_hash"] = self._hash_for_search(data['nom'])
+        # Chiffrer les champs sensibles, ajouter metadata, hash et jetons
+        encrypted_data = self._prepare_client_rows([data])[0]
 
         if self._offline_mode:
             client_id = str(uuid4())
@@ -302,6 +294,12 @@ class SecureClientManager:
         if 'nom' in data and data['nom']:
             encrypted_data["nom_hash"] = self._hash_for_search(data['nom'])
 
+        # Jetons recalcules sur le client complet si un champ indexe change
+        if any(f in data for f in INDEXED_FIELDS):
+            current = self._indexed_values(client_id)
+            if current is not None:
+                encrypted_data["blind_index"] = self.blind_index.tokens_for_client({**current, **data})
+
         if self._offline_mode:
             if client_id in self._offline_storage:
                 self._offline_storage[client_id].update(encrypted_data)
@@ -330,55 +328,205 @@ class SecureClientManager:
     def search_clients(
         self,
         nom: str = None,
-        limit: int = 50
+        limit: int = 50,
+        prenom: str = None,
+        annee_naissance: Any = None,
+        commune: str = None,
+        fuzzy: bool = False
     ) -> List[ClientData]:
         """
-        Recherche des clients par champs hashes.
+        Recherche des clients via l'index aveugle, sans dechiffrement en masse.
+
+        Le filtre est applique sur les jetons HMAC (cote serveur en ligne);
+        seuls les candidats sont dechiffres, verifies et classes. Les clients
+        pas encore reindexes (blind_index vide) restent trouvables par
+        egalite exacte sur nom_hash, comme avant l'index aveugle.
 
         Args:
-            nom: Nom a rechercher (sera hashe)
+            nom: Nom ou debut de nom ('dup' trouve 'Dupont')
             limit: Nombre max de resultats
+            prenom: Prenom ou debut de prenom
+            annee_naissance: Annee (ou date) de naissance
+            commune: Commune ou code postal de l'adresse
+            fuzzy: Tolere les fautes de frappe ('Dupond' trouve 'Dupont')
 
         Returns:
-            Liste des clients correspondants
+            Liste des clients correspondants, les plus proches en premier
         """
+        query = self.blind_index.query(
+            nom=nom, prenom=prenom, annee_naissance=annee_naissance, commune=commune, fuzzy=fuzzy
+        )
+
         if self._offline_mode:
-            results = []
-            for client_id, data in list(self._offline_storage.items())[:limit]:
-                if nom:
-                    nom_hash = self._hash_for_search(nom)
-                    if data.get("nom_hash") == nom_hash:
-                        data_with_id = {**data, "id": client_id}
-                        results.append(self._to_client_object(data_with_id))
-                else:
-                    data_with_id = {**data, "id": client_id}
-                    results.append(self._to_client_object(data_with_id))
-            return results
+            rows = [
+                {**data, "id": client_id}
+                for client_id, data in self._offline_storage.items()
+                if not data.get("anonymized") and query.matches(set(data.get("blind_index") or []))
+            ]
+            rows += self._search_unindexed_rows(nom, limit)
+            return self._rank_candidates(self._unique_rows(rows), query, limit)
 
         try:
-            query = self.client.table("clients")\
-                .select("*")\
-                .eq("etude_id", self.etude_id)\
-                .is_("deleted_at", "null")\
-                .eq("anonymized", False)
-
-            if nom:
-                nom_hash = self._hash_for_search(nom)
-                query = query.eq("nom_hash", nom_hash)
-
-            result = query.limit(limit).execute()
+            rows = self._unique_rows(
+                self._search_blind_rows(query, limit) + self._search_unindexed_rows(nom, limit)
+            )
 
             self._log_audit("search", "client", None, {
-                "search_params": mask_pii({"nom": nom}),
-                "results_count": len(result.data) if result.data else 0
+                "search_params": mask_pii({"nom": nom, "prenom": prenom}),
+                "results_count": len(rows)
             })
 
-            return [self._to_client_object(row) for row in (result.data or [])]
+            return self._rank_candidates(rows, query, limit)
 
         except Exception as e:
             console.print(f"[red]Erreur recherche clients: {e}[/red]")
             return []
 
+    def _search_blind_rows(self, query, limit: int) -> List[Dict]:
+        """Candidats filtres par jetons cote serveur (RPC classee si recherche approchee)."""
+        # Marge pour les candidats ecartes a la verification
+        fetch = limit * 4 if query.words else limit
+
+        if query.any:
+            try:
+                result = self.client.rpc("search_clients_blind", {
+                    "p_etude_id": self.etude_id,
+                    "p_required": query.required,
+                    "p_any": query.any,
+                    "p_min_any": query.min_any,
+                    "p_limit": fetch
+                }).execute()
+                return result.data or []
+            except Exception as e:
+                console.print(f"[yellow]RPC search_clients_blind indisponible ({e})[/yellow]")
+
+        request = self.client.table("clients")\
+            .select("*")\
+            .eq("etude_id", self.etude_id)\
+            .is_("deleted_at", "null")\
+            .eq("anonymized", False)
+
+        if query.required:
+            request = request.contains("blind_index", query.required)
+        if query.any:
+            request = request.overlaps("blind_index", query.any)
+
+        result = request.limit(fetch).execute()
+        return result.data or []
+
+    def _search_unindexed_rows(self, nom: Optional[str], limit: int) -> List[Dict]:
+        """
+        Clients sans jetons (crees avant la migration 006, reindex_blind_index
+        pas encore lance): repli sur l'egalite exacte du hash du nom complet.
+        """
+        if not nom:
+            return []
+        nom_hash = self._hash_for_search(nom)
+
+        if self._offline_mode:
+            return [
+                {**data, "id": client_id}
+                for client_id, data in self._offline_storage.items()
+                if not data.get("anonymized") and not data.get("blind_index")
+                and data.get("nom_hash") == nom_hash
+            ]
+
+        result = self.client.table("clients")\
+            .select("*")\
+            .eq("etude_id", self.etude_id)\
+            .is_("deleted_at", "null")\
+            .eq("anonymized", False)\
+            .eq("nom_hash", nom_hash)\
+            .eq("blind_index", "{}")\
+            .limit(limit)\
+            .execute()
+        return result.data or []
+
+    @staticmethod
+    def _unique_rows(rows: List[Dict]) -> List[Dict]:
+        """Supprime les doublons (meme id) en gardant l'ordre."""
+        seen = set()
+        unique = []
+        for row in rows:
+            if row.get("id") not in seen:
+                seen.add(row.get("id"))
+                unique.append(row)
+        return unique
+
+    def _rank_candidates(self, rows: List[Dict], query, limit: int) -> List[ClientData]:
+        """Dechiffre les candidats, ecarte les faux positifs et classe par similarite."""
+        scored = []
+        for client in self._to_client_objects(rows):
+            score = query.score({"nom": client.nom, "prenom": client.prenom})
+            if score > 0:
+                scored.append((score, client))
+        scored.sort(key=lambda item: -item[0])
+        return [client for _, client in scored[:limit]]
+
+    def _indexed_values(self, client_id: str) -> Optional[Dict[str, Any]]:
+        """Valeurs en clair des champs indexes d'un client (pour recalculer ses jetons)."""
+        columns = ["nom_encrypted", "prenom_encrypted", "adresse_encrypted", "date_naissance"]
+        if self._offline_mode:
+            row = self._offline_storage.get(client_id)
+        else:
+            try:
+                result = self.client.table("clients")\
+                    .select(",".join(columns))\
+                    .eq("id", client_id)\
+                    .eq("etude_id", self.etude_id)\
+                    .execute()
+                row = result.data[0] if result.data else None
+            except Exception as e:
+                console.print(f"[red]Erreur lecture client: {e}[/red]")
+                row = None
+        if row is None:
+            return None
+        decrypted = self._decrypt_client_data({c: row.get(c) for c in columns})
+        return {f: decrypted.get(f) for f in INDEXED_FIELDS}
+
+    def reindex_blind_index(self, batch_size: int = 200) -> int:
+        """
+        Recalcule les jetons de tous les clients actifs de l'etude.
+
+        A lancer une fois apres la migration 006 (les clients existants
+        n'ont pas encore de jetons) ou apres un changement de BLIND_INDEX_KEY.
+
+        Returns:
+            Nombre de clients reindexes
+        """
+        if self._offline_mode:
+            for data in self._offline_storage.values():
+                if not data.get("anonymized"):
+                    plain = self._decrypt_client_data(data)
+                    data["blind_index"] = self.blind_index.tokens_for_client(plain)
+            return sum(1 for d in self._offline_storage.values() if not d.get("anonymized"))
+
+        total = 0
+        offset = 0
+        while True:
+            result = self.client.table("clients")\
+                .select("id,nom_encrypted,prenom_encrypted,adresse_encrypted,date_naissance")\
+                .eq("etude_id", self.etude_id)\
+                .eq("anonymized", False)\
+                .order("id")\
+                .range(offset, offset + batch_size - 1)\
+                .execute()
+            rows = result.data or []
+            for row in rows:
+                plain = self._decrypt_client_data(row)
+                self.client.table("clients")\
+                    .update({"blind_index": self.blind_index.tokens_for_client(plain)})\
+                    .eq("id", row["id"])\
+                    .eq("etude_id", self.etude_id)\
+                    .execute()
+            total += len(rows)
+            if len(rows) < batch_size:
+                break
+            offset += batch_size
+
+        self._log_audit("reindex", "client", None, {"count": total})
+        return total
+
     def list_clients(self, limit: int = 100, offset: int = 0) -> List[ClientData]:
         """
         Liste les clients de l'etude.
@@ -392,7 +540,7 @@ class SecureClientManager:
         """
         if self._offline_mode:
             clients = list(self._offline_storage.items())[offset:offset + limit]
-            return [self._to_client_object({**data, "id": cid}) for cid, data in clients]
+            return self._to_client_objects([{**data, "id": cid} for cid, data in clients])
 
         try:
             result = self.client.table("clients")\
@@ -404,7 +552,7 @@ class SecureClientManager:
                 .range(offset, offset + limit - 1)\
                 .execute()
 
-            return [self._to_client_object(row) for row in (result.data or [])]
+            return self._to_client_objects(result.data or [])
 
         except Exception as e:
             console.print(f"[red]Erreur liste clients: {e}[/red]")
@@ -537,6 +685,44 @@ class SecureClientManager:
             "content_type": "application/json"
         }
 
+    def export_clients(
+        self,
+        batch_size: int = 500,
+        progress: Optional[Callable[[int], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        Exporte tous les clients de l'etude en clair (portabilite, changement d'outil).
+
+        Les clients sont lus par pages de batch_size et dechiffres en masse
+        (un appel decrypt_many par page).
+
+        Args:
+            batch_size: Taille des pages lues
+            progress: Appelee apres chaque page avec le nombre de clients exportes
+
+        Returns:
+            Export JSON (meme en-tete que la portabilite Art. 20)
+        """
+        clients: List[Dict[str, Any]] = []
+        while True:
+            page = self.list_clients(limit=batch_size, offset=len(clients))
+            clients.extend(asdict(client) for client in page)
+            if progress:
+                progress(len(clients))
+            if len(page) < batch_size:
+                break
+
+        self._log_audit("export", "client", None, {"count": len(clients)})
+
+        return {
+            "format": "JSON",
+            "version": "1.0",
+            "gdpr_article": "Art. 20 - Droit a la portabilite",
+            "export_date": datetime.now(timezone.utc).isoformat(),
+            "etude_id": self.etude_id,
+            "clients": clients
+        }
+
     def _handle_opposition_request(self, client_id: str, request_id: str) -> Dict:
         """Marque le client comme opt-out du traitement IA (RGPD Art. 21)."""
         update_result = self.update_client(client_id, {
@@ -558,7 +744,7 @@ class SecureClientManager:
         return {"error": "Echec du traitement de l'opposition"}
 
     def _anonymize_client(self, client_id: str) -> bool:
-        """Anonymise les PII d'un client."""
+        """Anonymise les PII d'un client (et les sessions du chat qui les citent)."""
         anonymized_data = {
             "nom_encrypted": "ANONYMISE" if not self._encryption_enabled else self.encryption.encrypt("ANONYMISE"),
             "prenom_encrypted": "ANONYMISE" if not self._encryption_enabled else self.encryption.encrypt("ANONYMISE"),
@@ -566,6 +752,7 @@ class SecureClientManager:
             "telephone_encrypted": None,
             "adresse_encrypted": None,
             "nom_hash": self._hash_for_search("ANONYMISE"),
+            "blind_index": [],
             "genapi_id": None,
             "genapi_data": None,
             "ai_enrichments": {"anonymized_reason": "GDPR erasure request"},
@@ -578,6 +765,7 @@ class SecureClientManager:
         if self._offline_mode:
             if client_id in self._offline_storage:
                 self._offline_storage[client_id].update(anonymized_data)
+                get_cache_anonymisation().vider()
                 return True
             return False
 
@@ -592,6 +780,8 @@ class SecureClientManager:
                 self._log_audit("anonymize", "client", client_id, {
                     "reason": "GDPR erasure request"
                 })
+                # Mappings nom reel -> placeholder des conversations en cours
+                get_cache_anonymisation().vider()
                 return True
 
             return False
@@ -608,15 +798,22 @@ class SecureClientManager:
         self,
         file_path: str,
         mapping: Dict[str, List[str]] = None,
-        source: str = "genapi_import"
+        source: str = "genapi_import",
+        batch_size: int = 500,
+        progress: Optional[Callable[[Dict[str, Any]], None]] = None
     ) -> Dict[str, Any]:
         """
         Importe des clients depuis un CSV avec mapping automatique.
 
+        Le fichier est lu en flux et traite par lots de batch_size lignes
+        (chiffrement en masse + insertion groupee).
+
         Args:
             file_path: Chemin vers le fichier CSV
             mapping: Mapping optionnel des noms de colonnes
             source: Identifiant de la source
+            batch_size: Nombre de lignes par lot
+            progress: Appelee apres chaque lot avec les compteurs courants
 
         Returns:
             Resultats d'import
@@ -647,6 +844,7 @@ class SecureClientManager:
         try:
             with open(file_path, 'r', encoding='utf-8-sig') as f:
                 reader = csv.DictReader(f)
+                batch: List[Dict[str, Any]] = []
 
                 for row in reader:
                     results["total"] += 1
@@ -664,13 +862,13 @@ class SecureClientManager:
                         })
                         # Continuer quand meme, mais logger
 
-                    # Creer le client
-                    client_id = self.create_client(client_data)
+                    batch.append(client_data)
+                    if len(batch) >= batch_size:
+                        self._import_batch(batch, results, progress)
+                        batch = []
 
-                    if client_id:
-                        results["imported"] += 1
-                    else:
-                        results["duplicates"] += 1
+                if batch:
+                    self._import_batch(batch, results, progress)
 
             self._log_audit("import", "client", None, {
                 "file": file_path,
@@ -685,6 +883,57 @@ class SecureClientManager:
         except Exception as e:
             return {"error": str(e)}
 
+    def _import_batch(
+        self,
+        batch: List[Dict[str, Any]],
+        results: Dict[str, Any],
+        progress: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> None:
+        """
+        Chiffre et insere un lot de clients importes.
+
+        Un seul appel encrypt_many et un seul INSERT par lot. La table clients
+        n'ayant pas de cle unique exploitable pour un upsert, un lot rejete est
+        rejoue ligne a ligne: seules les lignes en echec sont comptees comme
+        doublons, comme le faisait create_client.
+
+        Chaque client insere a sa ligne d'audit "create" (comme create_client),
+        ecrites en un seul INSERT par lot.
+        """
+        rows = self._prepare_client_rows(batch)
+
+        if self._offline_mode:
+            for row in rows:
+                self._offline_storage[str(uuid4())] = row
+            results["imported"] += len(rows)
+        else:
+            created: List[Dict[str, Any]] = []
+            try:
+                inserted = self.client.table("clients").insert(rows).execute()
+                created = list(inserted.data or [])
+                results["duplicates"] += len(rows) - len(created)
+            except Exception:
+                for row in rows:
+                    try:
+                        data = self.client.table("clients").insert(row).execute().data
+                        if data:
+                            created.extend(data)
+                            continue
+                    except Exception:
+                        pass
+                    results["duplicates"] += 1
+            results["imported"] += len(created)
+            self._log_audit_many("create", "client", [
+                (row.get("id"), {"source": row.get("source")}) for row in created
+            ])
+
+        if progress:
+            progress({
+                "total": results["total"],
+                "imported": results["imported"],
+                "duplicates": results["duplicates"]
+            })
+
     def _map_import_row(
         self,
         row: Dict,
@@ -742,14 +991,65 @@ class SecureClientManager:
 
         return result
 
+    def _prepare_client_rows(self, datas: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Construit les lignes a inserer: PII chiffre, metadata, hash et jetons."""
+        rows = self._encrypt_clients_data(datas)
+        now = datetime.now(timezone.utc).isoformat()
+
+        for data, row in zip(datas, rows):
+            row.update({
+                "etude_id": self.etude_id,
+                "created_by": self.user_id,
+                "created_at": now,
+                "updated_at": now,
+                "source": data.get("source", "manual")
+            })
+            if data.get('nom'):
+                row["nom_hash"] = self._hash_for_search(data['nom'])
+            row["blind_index"] = self.blind_index.tokens_for_client(data)
+
+        return rows
+
+    def _encrypt_clients_data(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Chiffre les champs sensibles de plusieurs clients en un appel encrypt_many."""
+        results = [row.copy() for row in rows]
+        slots = [(result, field) for result in results for field in SENSITIVE_FIELDS if result.get(field)]
+        encrypted = self.encryption.encrypt_many(str(result[field]) for result, field in slots)
+        for (result, field), value in zip(slots, encrypted):
+            result[f"{field}_encrypted"] = value
+            del result[field]
+        return results
+
+    def _decrypt_clients_data(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Dechiffre les champs sensibles de plusieurs clients en un appel decrypt_many."""
+        results = [row.copy() for row in rows]
+        slots = [
+            (result, field) for result in results for field in SENSITIVE_FIELDS
+            if result.get(f"{field}_encrypted")
+        ]
+        decrypted = self.encryption.decrypt_many(
+            (result[f"{field}_encrypted"] for result, field in slots),
+            error_value="[ERREUR DECHIFFREMENT]"
+        )
+        for (result, field), value in zip(slots, decrypted):
+            result[field] = value
+            del result[f"{field}_encrypted"]
+        return results
+
     def _hash_for_search(self, value: str) -> str:
         """Cree un hash recherchable."""
         return self.encryption.hash_for_search(value)
 
     def _to_client_object(self, data: Dict[str, Any]) -> ClientData:
         """Convertit une ligne DB en objet ClientData avec dechiffrement."""
-        decrypted = self._decrypt_client_data(data)
+        return self._client_from_plain(self._decrypt_client_data(data))
+
+    def _to_client_objects(self, rows: List[Dict[str, Any]]) -> List[ClientData]:
+        """Convertit plusieurs lignes DB en ClientData (dechiffrement en masse)."""
+        return [self._client_from_plain(d) for d in self._decrypt_clients_data(rows)]
 
+    def _client_from_plain(self, decrypted: Dict[str, Any]) -> ClientData:
+        """Construit un ClientData depuis une ligne deja dechiffree."""
         return ClientData(
             id=decrypted.get("id"),
             etude_id=decrypted.get("etude_id", ""),
@@ -800,6 +1100,31 @@ class SecureClientManager:
         except Exception:
             pass  # Non-bloquant
 
+    def _log_audit_many(
+        self,
+        action: str,
+        resource_type: str,
+        entries: List[Tuple[Optional[str], Dict]]
+    ):
+        """Enregistre un evenement d'audit par (resource_id, details), en un seul insert."""
+        if self._offline_mode or not entries:
+            return
+
+        try:
+            self.client.table("audit_logs").insert([
+                {
+                    "user_id": self.user_id,
+                    "etude_id": self.etude_id,
+                    "action": action,
+                    "resource_type": resource_type,
+                    "resource_id": resource_id,
+                    "details": details or {}
+                }
+                for resource_id, details in entries
+            ]).execute()
+        except Exception:
+            pass  # Non-bloquant
+
     def _create_gdpr_request(
         self,
         client_id: str,
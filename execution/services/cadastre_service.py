@@ -26,25 +26,36 @@ Usage:
 
     # Enrichir automatiquement les données d'un dossier
     donnees = service.enrichir_cadastre(donnees_dossier)
+
+Cache: base SQLite (WAL) unique par hôte, partagée entre workers.
+Les parcelles d'un dossier sont recherchées en parallèle.
+
+Variables d'environnement:
+    NOTAIRE_CACHE_CADASTRE_DIR    Dossier du cache (défaut: .tmp/cache_cadastre)
+    NOTAIRE_CACHE_CADASTRE_MO     Taille maximale du cache en Mo (défaut: 100)
+    NOTAIRE_CADASTRE_CONCURRENCE  Requêtes parcelles simultanées (défaut: 8)
 """
 
 import json
+import os
 import re
+import sqlite3
 import sys
+import threading
 import time
-import hashlib
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 from urllib.parse import quote_plus, urlencode
 
-from execution.security.secure_delete import secure_delete_file
-
 try:
     import requests
 except ImportError:
     requests = None
 
+from execution.security.secure_delete import secure_delete_file
+
 # Encodage UTF-8 Windows
 if sys.platform == "win32":
     for stream in [sys.stdout, sys.stderr]:
@@ -56,67 +67,233 @@ if sys.platform == "win32":
 # CACHE LOCAL
 # =============================================================================
 
-class CacheLocal:
-    """Cache fichier JSON pour éviter les appels API redondants."""
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+CACHE_DIR_DEFAUT = PROJECT_ROOT / ".tmp" / "cache_cadastre"
+
+# Purge des entrées expirées au plus toutes les N secondes (à l'écriture)
+INTERVALLE_PURGE = 300
+
 
-    def __init__(self, cache_dir: Optional[Path] = None, ttl_heures: int = 24):
-        self.cache_dir = cache_dir or Path(".tmp/cache_cadastre")
+class CacheLocal:
+    """
+    Cache SQLite (mode WAL) pour éviter les appels API redondants.
+
+    Une seule base indexée `cache.db` par dossier, partagée par tous les
+    workers du même hôte (sections, parcelles, géocodages d'un worker servent
+    aux autres). Les entrées expirées sont purgées périodiquement à
+    l'écriture; au-delà de `max_octets`, les moins récemment lues partent.
+
+    Args:
+        cache_dir: Dossier du cache (défaut: NOTAIRE_CACHE_CADASTRE_DIR
+            ou .tmp/cache_cadastre à la racine du projet)
+        ttl_heures: Durée de validité des entrées
+        max_octets: Taille maximale des valeurs stockées
+            (défaut: NOTAIRE_CACHE_CADASTRE_MO, 100 Mo)
+    """
+
+    def __init__(self, cache_dir: Optional[Path] = None, ttl_heures: int = 24,
+                 max_octets: Optional[int] = None):
+        self.cache_dir = Path(cache_dir or os.getenv("NOTAIRE_CACHE_CADASTRE_DIR", str(CACHE_DIR_DEFAUT)))
         self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.chemin = self.cache_dir / "cache.db"
         self.ttl_secondes = ttl_heures * 3600
+        self.max_octets = max_octets if max_octets is not None else int(
+            float(os.getenv("NOTAIRE_CACHE_CADASTRE_MO", "100")) * 1024 * 1024
+        )
+        self.stats = {"hits": 0, "misses": 0, "ecritures": 0, "expirees": 0, "evictions": 0}
+        self._local = threading.local()
+        self._derniere_purge = 0.0
+        self._connexion().executescript("""
+            CREATE TABLE IF NOT EXISTS entrees (
+                cle TEXT PRIMARY KEY, valeur TEXT NOT NULL,
+                cree_a REAL NOT NULL, lu_a REAL NOT NULL, taille INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_entrees_cree ON entrees(cree_a);
+            CREATE INDEX IF NOT EXISTS idx_entrees_lu ON entrees(lu_a);
+        """)
+        self._effacer_ancien_cache()
+
+    def _effacer_ancien_cache(self) -> int:
+        """
+        Efface les fichiers `<md5>.json` de l'ancien cache (un par entrée).
 
-    def _cle_fichier(self, cle: str) -> Path:
-        h = hashlib.md5(cle.encode()).hexdigest()
-        return self.cache_dir / f"{h}.json"
+        Ils contiennent des adresses géocodées de clients et ne sont plus
+        lus depuis le passage à SQLite: écrasés puis supprimés.
+        """
+        effaces = 0
+        for fichier in self.cache_dir.glob("*.json"):
+            if re.fullmatch(r"[0-9a-f]{32}\.json", fichier.name) and secure_delete_file(fichier):
+                effaces += 1
+        return effaces
+
+    def _connexion(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.chemin, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            # Adresses géocodées des clients: les entrées expirées/évincées
+            # sont écrasées, pas laissées dans les pages libres
+            conn.execute("PRAGMA secure_delete=ON")
+            self._local.conn = conn
+        return conn
 
     def get(self, cle: str) -> Optional[dict]:
-        fichier = self._cle_fichier(cle)
-        if not fichier.exists():
-            return None
         try:
-            data = json.loads(fichier.read_text(encoding="utf-8"))
-            age = time.time() - data.get("_timestamp", 0)
-            if age > self.ttl_secondes:
-                secure_delete_file(fichier)
+            conn = self._connexion()
+            ligne = conn.execute(
+                "SELECT valeur, cree_a, lu_a FROM entrees WHERE cle = ?", (cle,)
+            ).fetchone()
+            if ligne is None:
+                self.stats["misses"] += 1
+                return None
+            valeur, cree_a, lu_a = ligne
+            maintenant = time.time()
+            if maintenant - cree_a > self.ttl_secondes:
+                conn.execute("DELETE FROM entrees WHERE cle = ?", (cle,))
+                self.stats["expirees"] += 1
+                self.stats["misses"] += 1
                 return None
-            return data.get("valeur")
-        except (json.JSONDecodeError, OSError):
+            # Horloge LRU: une écriture par minute au plus par entrée
+            if maintenant - lu_a > 60:
+                conn.execute("UPDATE entrees SET lu_a = ? WHERE cle = ?", (maintenant, cle))
+            self.stats["hits"] += 1
+            return json.loads(valeur)
+        except (sqlite3.Error, json.JSONDecodeError):
+            self.stats["misses"] += 1
             return None
 
     def set(self, cle: str, valeur: dict):
-        fichier = self._cle_fichier(cle)
+        texte = json.dumps(valeur, ensure_ascii=False, separators=(",", ":"))
+        maintenant = time.time()
         try:
-            fichier.write_text(
-                json.dumps({"_timestamp": time.time(), "valeur": valeur},
-                           ensure_ascii=False, indent=2),
-                encoding="utf-8",
+            self._connexion().execute(
+                "INSERT INTO entrees (cle, valeur, cree_a, lu_a, taille) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(cle) DO UPDATE SET valeur = excluded.valeur, cree_a = excluded.cree_a, "
+                "lu_a = excluded.lu_a, taille = excluded.taille",
+                (cle, texte, maintenant, maintenant, len(texte.encode("utf-8"))),
             )
-        except OSError:
+            self.stats["ecritures"] += 1
+            if maintenant - self._derniere_purge > INTERVALLE_PURGE:
+                self.purger()
+        except sqlite3.Error:
             pass
 
+    def purger(self) -> int:
+        """Supprime les entrées expirées puis, au-delà de max_octets, les moins récemment lues."""
+        conn = self._connexion()
+        self._derniere_purge = time.time()
+        supprimees = conn.execute(
+            "DELETE FROM entrees WHERE cree_a < ?", (self._derniere_purge - self.ttl_secondes,)
+        ).rowcount
+        self.stats["expirees"] += supprimees
+
+        total = conn.execute("SELECT COALESCE(SUM(taille), 0) FROM entrees").fetchone()[0]
+        if total > self.max_octets:
+            a_liberer = total - self.max_octets
+            cles = []
+            for cle, taille in conn.execute("SELECT cle, taille FROM entrees ORDER BY lu_a"):
+                cles.append((cle,))
+                a_liberer -= taille
+                if a_liberer <= 0:
+                    break
+            conn.executemany("DELETE FROM entrees WHERE cle = ?", cles)
+            self.stats["evictions"] += len(cles)
+            supprimees += len(cles)
+        return supprimees
+
+    def statistiques(self) -> Dict[str, Any]:
+        """Compteurs du process + taille de la base partagée."""
+        entrees, octets = self._connexion().execute(
+            "SELECT COUNT(*), COALESCE(SUM(taille), 0) FROM entrees"
+        ).fetchone()
+        return {**self.stats, "entrees": entrees, "octets": octets}
+
+
+# =============================================================================
+# REQUÊTES EN VOL
+# =============================================================================
+
+# Requêtes HTTP en cours, partagées par toutes les instances du process:
+# deux enrichissements simultanés du même dossier ne font qu'un appel
+_en_vol: Dict[Tuple, Future] = {}
+_en_vol_verrou = threading.Lock()
+
+
+def _dedoublonner(cle: Tuple, appel):
+    """Exécute `appel()` une seule fois pour des appels identiques simultanés."""
+    with _en_vol_verrou:
+        future = _en_vol.get(cle)
+        proprietaire = future is None
+        if proprietaire:
+            future = _en_vol[cle] = Future()
+    if not proprietaire:
+        return future.result()
+    try:
+        resultat = appel()
+        future.set_result(resultat)
+        return resultat
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _en_vol_verrou:
+            _en_vol.pop(cle, None)
+
 
 # =============================================================================
 # SERVICE CADASTRE
 # =============================================================================
 
 class CadastreService:
-    """Service d'accès aux données cadastrales via APIs gouvernementales."""
+    """
+    Service d'accès aux données cadastrales via APIs gouvernementales.
+
+    Les parcelles d'un dossier sont recherchées en parallèle (au plus
+    `concurrence` requêtes simultanées, défaut NOTAIRE_CADASTRE_CONCURRENCE
+    ou 8); les requêtes identiques en cours sont dédoublonnées.
+
+    Si un miroir local a été importé (miroir_cadastre.py), géocodage et
+    parcelles sont d'abord cherchés dans le miroir; le réseau n'est utilisé
+    qu'en cas d'absence. `miroir=False` force l'accès réseau.
+    """
 
     API_ADRESSE = "https://api-adresse.data.gouv.fr/search/"
     API_CADASTRE = "https://apicarto.ign.fr/api/cadastre"
+    # Score minimal d'un géocodage du miroir (le repli sur la voie vaut 0.6)
+    SCORE_MIN_MIROIR = 1.0
 
-    def __init__(self, cache_ttl_heures: int = 24, timeout: int = 10):
+    def __init__(self, cache_ttl_heures: int = 24, timeout: int = 10,
+                 concurrence: Optional[int] = None, miroir: Any = None):
         if requests is None:
             raise ImportError(
                 "Le module 'requests' est requis. Installer: pip install requests"
             )
         self.timeout = timeout
+        self.concurrence = max(1, concurrence or int(os.getenv("NOTAIRE_CADASTRE_CONCURRENCE", "8")))
         self.cache = CacheLocal(ttl_heures=cache_ttl_heures)
+        # Miroir Etalab/BAN local, consulté avant le cache et le réseau
+        if miroir is None:
+            from execution.services.miroir_cadastre import get_miroir
+            miroir = get_miroir()
+        self.miroir = miroir or None
         self.session = requests.Session()
+        adaptateur = requests.adapters.HTTPAdapter(pool_maxsize=self.concurrence)
+        self.session.mount("https://", adaptateur)
         self.session.headers.update({
             "User-Agent": "Notomai/1.7.0 (notaire-ai)",
             "Accept": "application/json",
         })
 
+    def _get_json(self, url: str, params: Dict[str, Any]) -> Dict:
+        """GET JSON dédoublonné avec les requêtes identiques en cours (lève en cas d'erreur)."""
+        def appel():
+            resp = self.session.get(url, params=params, timeout=self.timeout)
+            resp.raise_for_status()
+            return resp.json()
+
+        return _dedoublonner((url, tuple(sorted(params.items()))), appel)
+
     # =========================================================================
     # API ADRESSE (BAN) — Geocoding
     # =========================================================================
@@ -140,6 +317,13 @@ class CadastreService:
             }
             ou None si non trouvé
         """
+        if self.miroir:
+            resultat = self.miroir.geocoder(adresse)
+            # Repli du miroir sur la voie (numéro inconnu): coordonnées d'un
+            # autre numéro, pas un résultat fiable -> réseau
+            if resultat and resultat.get("score", 0) >= self.SCORE_MIN_MIROIR:
+                return resultat
+
         cle_cache = f"geocode:{adresse}"
         cached = self.cache.get(cle_cache)
         if cached:
@@ -147,11 +331,7 @@ class CadastreService:
 
         params = {"q": adresse, "limit": limit}
         try:
-            resp = self.session.get(
-                self.API_ADRESSE, params=params, timeout=self.timeout
-            )
-            resp.raise_for_status()
-            data = resp.json()
+            data = self._get_json(self.API_ADRESSE, params)
         except Exception as e:
             print(f"[WARN] Geocodage echoue pour '{adresse}': {e}")
             return None
@@ -186,6 +366,7 @@ class CadastreService:
         code_insee: str,
         section: str,
         numero: str,
+        prefixe: Optional[str] = None,
     ) -> Optional[Dict]:
         """Recherche une parcelle cadastrale par code_insee + section + numéro.
 
@@ -193,6 +374,7 @@ class CadastreService:
             code_insee: Code INSEE commune (5 chiffres, ex: "75102")
             section: Section cadastrale (2 caractères, ex: "AB")
             numero: Numéro parcelle (4 chiffres, ex: "0145")
+            prefixe: Préfixe de commune associée/absorbée (3 chiffres, ex: "001")
 
         Returns:
             {
@@ -207,11 +389,18 @@ class CadastreService:
             }
             ou None si non trouvé
         """
+        if self.miroir:
+            resultat = self.miroir.chercher_parcelle(code_insee, section, numero, prefixe)
+            if resultat:
+                return resultat
+
         # Normaliser le numéro (padding 4 chiffres)
         numero_norm = numero.lstrip("0").zfill(4)
         section_norm = section.upper().strip()
 
         cle_cache = f"parcelle:{code_insee}:{section_norm}:{numero_norm}"
+        if prefixe:
+            cle_cache += f":{prefixe}"
         cached = self.cache.get(cle_cache)
         if cached:
             return cached
@@ -221,14 +410,10 @@ class CadastreService:
             "section": section_norm,
             "numero": numero_norm,
         }
+        if prefixe:
+            params["com_abs"] = prefixe
         try:
-            resp = self.session.get(
-                f"{self.API_CADASTRE}/parcelle",
-                params=params,
-                timeout=self.timeout,
-            )
-            resp.raise_for_status()
-            data = resp.json()
+            data = self._get_json(f"{self.API_CADASTRE}/parcelle", params)
         except Exception as e:
             print(f"[WARN] Recherche parcelle echouee ({code_insee}/{section_norm}/{numero_norm}): {e}")
             return None
@@ -266,13 +451,10 @@ class CadastreService:
             return cached
 
         try:
-            resp = self.session.get(
+            data = self._get_json(
                 f"{self.API_CADASTRE}/division",
-                params={"code_insee": code_insee, "_limit": 500},
-                timeout=self.timeout,
+                {"code_insee": code_insee, "_limit": 500},
             )
-            resp.raise_for_status()
-            data = resp.json()
         except Exception as e:
             print(f"[WARN] Liste sections echouee ({code_insee}): {e}")
             return []
@@ -303,17 +485,14 @@ class CadastreService:
             return cached
 
         try:
-            resp = self.session.get(
+            data = self._get_json(
                 f"{self.API_CADASTRE}/parcelle",
-                params={
+                {
                     "code_insee": code_insee,
                     "section": section.upper(),
                     "_limit": 1000,
                 },
-                timeout=self.timeout,
             )
-            resp.raise_for_status()
-            data = resp.json()
         except Exception as e:
             print(f"[WARN] Parcelles section echouees ({code_insee}/{section}): {e}")
             return []
@@ -329,6 +508,25 @@ class CadastreService:
         self.cache.set(cle_cache, parcelles)
         return parcelles
 
+    def chercher_parcelles(
+        self, code_insee: str, references: List[Tuple[str, str]]
+    ) -> List[Optional[Dict]]:
+        """Recherche plusieurs parcelles en parallèle (résultats dans l'ordre des références).
+
+        Args:
+            code_insee: Code INSEE commune
+            references: [(section, numero), ...]
+        """
+        if len(references) <= 1 or self.concurrence == 1:
+            return [self.chercher_parcelle(code_insee, s, n) for s, n in references]
+        with ThreadPoolExecutor(
+            max_workers=min(self.concurrence, len(references)),
+            thread_name_prefix="cadastre",
+        ) as pool:
+            return list(pool.map(
+                lambda ref: self.chercher_parcelle(code_insee, ref[0], ref[1]), references
+            ))
+
     # =========================================================================
     # ENRICHISSEMENT AUTOMATIQUE
     # =========================================================================
@@ -399,13 +597,15 @@ class CadastreService:
         # ── Étape 2: Enrichir les parcelles existantes ──
         cadastre = bien.get("cadastre", [])
         if cadastre and code_insee:
-            for i, parcelle in enumerate(cadastre):
-                section = parcelle.get("section", "")
-                numero = parcelle.get("numero", "")
-                if not section or not numero:
-                    continue
-
-                resultat_api = self.chercher_parcelle(code_insee, section, numero)
+            a_chercher = [
+                p for p in cadastre if p.get("section", "") and p.get("numero", "")
+            ]
+            resultats = self.chercher_parcelles(
+                code_insee, [(p["section"], p["numero"]) for p in a_chercher]
+            )
+            for parcelle, resultat_api in zip(a_chercher, resultats):
+                section = parcelle["section"]
+                numero = parcelle["numero"]
                 if resultat_api:
                     rapport["parcelles_trouvees"] += 1
                     rapport["parcelles_validees"] += 1
@@ -413,7 +613,7 @@ class CadastreService:
                     # Enrichir avec données API
                     parcelle["code_insee"] = code_insee
                     parcelle["verifie"] = True
-                    parcelle["source"] = "api_cadastre"
+                    parcelle["source"] = resultat_api.get("source", "api_cadastre")
                     if resultat_api.get("surface_m2"):
                         parcelle["surface_m2"] = resultat_api["surface_m2"]
                     if resultat_api.get("feuille"):
@@ -565,6 +765,19 @@ class CadastreService:
         return f"{ha:02d} ha {a:02d} a {ca:02d} ca"
 
 
+_service: Optional[CadastreService] = None
+_service_verrou = threading.Lock()
+
+
+def get_cadastre_service() -> CadastreService:
+    """Service partagé du process (session HTTP et connexions au cache réutilisées)."""
+    global _service
+    with _service_verrou:
+        if _service is None:
+            _service = CadastreService()
+        return _service
+
+
 # =============================================================================
 # CLI
 # =============================================================================
@@ -0,0 +1,517 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+miroir_cadastre.py
+------------------
+Miroir local du cadastre Etalab et de la Base Adresse Nationale (BAN).
+
+Les extraits départementaux publiés par Etalab sont importés dans un index
+SQLite compact:
+- parcelles: (code_insee, prefixe, section, numero) → contenance, géométrie
+  (le préfixe distingue les communes associées/déléguées: "000" sinon)
+  (cadastre-XX-parcelles.json[.gz], https://cadastre.data.gouv.fr/datasets/cadastre-etalab)
+- adresses:  (code_postal, numero, voie normalisée) → code_insee, coordonnées
+  (adresses-XX.csv[.gz], https://adresse.data.gouv.fr/data/ban/adresses/latest/csv)
+
+CadastreService interroge le miroir avant le réseau: sur les départements
+importés, géocodage et validation des parcelles ne font plus aucun appel
+HTTP (résultats déterministes, utilisables hors ligne et en test).
+
+Usage:
+    python -m execution.services.miroir_cadastre importer \\
+        --parcelles cadastre-69-parcelles.json.gz --adresses adresses-69.csv.gz
+    python -m execution.services.miroir_cadastre stats
+
+    from execution.services.miroir_cadastre import get_miroir
+    miroir = get_miroir()  # None si aucun miroir importé
+    miroir.chercher_parcelle("69290", "AH", "68")
+    miroir.geocoder("170 rue Joliot Curie 69800 Saint-Priest")
+
+Variables d'environnement:
+    NOTAIRE_MIROIR_CADASTRE  Chemin de la base (défaut: .tmp/miroir_cadastre/miroir.db,
+                             0 pour désactiver)
+"""
+
+import argparse
+import csv
+import gzip
+import io
+import json
+import logging
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+import unicodedata
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+CHEMIN_DEFAUT = PROJECT_ROOT / ".tmp" / "miroir_cadastre" / "miroir.db"
+
+TAILLE_LOT = 10_000
+
+# Abréviations courantes des types de voie (saisie notaire → libellé BAN)
+ABREVIATIONS = {
+    "r": "rue", "av": "avenue", "ave": "avenue", "bd": "boulevard", "bld": "boulevard",
+    "boul": "boulevard", "pl": "place", "imp": "impasse", "ch": "chemin", "chem": "chemin",
+    "rte": "route", "all": "allee", "crs": "cours", "sq": "square", "pas": "passage",
+    "qu": "quai", "fg": "faubourg", "fbg": "faubourg", "res": "residence", "lot": "lotissement",
+    "st": "saint", "ste": "sainte", "gal": "general", "mal": "marechal", "pdt": "president",
+}
+MOTS_VIDES = {"de", "du", "des", "la", "le", "les", "l", "d", "a", "au", "aux", "et"}
+INDICES_REPETITION = {"bis", "ter", "quater", "quinquies", "b", "t", "q"}
+
+_RE_NUMERO = re.compile(r"^(\d+)([a-z]*)$")
+_RE_CODE_POSTAL = re.compile(r"^\d{5}$")
+
+
+# =============================================================================
+# NORMALISATION
+# =============================================================================
+
+def normaliser_mots(texte: str) -> List[str]:
+    """Minuscules, sans accents ni ponctuation, abréviations développées, mots vides retirés."""
+    texte = unicodedata.normalize("NFKD", texte or "")
+    texte = "".join(c for c in texte if not unicodedata.combining(c)).lower()
+    mots = re.sub(r"[^a-z0-9]+", " ", texte).split()
+    return [ABREVIATIONS.get(m, m) for m in mots if m not in MOTS_VIDES]
+
+
+def normaliser_section(section: str) -> str:
+    """'a', 'A', '0A' → '0A' (sections Etalab sur 2 caractères)."""
+    return str(section or "").upper().strip().zfill(2)
+
+
+def normaliser_prefixe(prefixe: Any) -> str:
+    """'', None, '1' → '000', '001' (préfixe Etalab sur 3 chiffres)."""
+    return str(prefixe or "").strip().zfill(3)
+
+
+def normaliser_numero(numero: Any) -> str:
+    """'68', '0068', 68 → '0068' (même convention que CadastreService)."""
+    return str(numero or "").strip().lstrip("0").zfill(4)
+
+
+def _normaliser_repetition(rep: str) -> str:
+    rep = (rep or "").lower().strip()
+    return {"b": "bis", "t": "ter", "q": "quater"}.get(rep, rep)
+
+
+def cle_adresse(code_postal: str, numero: str, rep: str, voie: str) -> str:
+    """Clé d'index d'une adresse (numero vide: clé de la voie)."""
+    numero = str(numero or "").lstrip("0")
+    return f"{code_postal}|{numero}{_normaliser_repetition(rep)}|{' '.join(normaliser_mots(voie))}"
+
+
+def analyser_adresse(adresse: str) -> Optional[Tuple[str, str, str, str]]:
+    """
+    Découpe une adresse libre en (code_postal, numero, repetition, voie).
+
+    "12 bis av. de la Paix, 75002 Paris" → ("75002", "12", "bis", "avenue paix")
+    Retourne None sans code postal (le miroir ne sait pas répondre).
+    """
+    mots = normaliser_mots(adresse)
+    positions = [i for i, m in enumerate(mots) if _RE_CODE_POSTAL.match(m)]
+    if not positions:
+        return None
+    i_cp = positions[-1]
+    avant = mots[:i_cp]
+    numero = rep = ""
+    if avant:
+        m = _RE_NUMERO.match(avant[0])
+        if m:
+            numero, rep = m.group(1).lstrip("0"), m.group(2)
+            avant = avant[1:]
+            if not rep and avant and avant[0] in INDICES_REPETITION:
+                rep, avant = avant[0], avant[1:]
+    return mots[i_cp], numero, _normaliser_repetition(rep), " ".join(avant)
+
+
+def _decouper_insee(code_insee: str) -> Tuple[str, str]:
+    """Code INSEE → (code_dep, code_com); DOM (97x) sur 3 chiffres."""
+    if code_insee.startswith("97"):
+        return code_insee[:3], code_insee[3:]
+    return code_insee[:2], code_insee[2:]
+
+
+# =============================================================================
+# LECTURE DES EXTRAITS
+# =============================================================================
+
+def _ouvrir_texte(fichier: Path) -> io.TextIOBase:
+    if str(fichier).endswith(".gz"):
+        return gzip.open(fichier, "rt", encoding="utf-8")
+    return open(fichier, "r", encoding="utf-8")
+
+
+def iterer_features(flux: io.TextIOBase, taille_bloc: int = 1 << 20) -> Iterator[Dict]:
+    """
+    Itère les Features d'un GeoJSON sans le charger entièrement.
+
+    Accepte une FeatureCollection (format Etalab) ou un Feature par ligne.
+    """
+    decodeur = json.JSONDecoder()
+    tampon = flux.read(taille_bloc)
+    while len(tampon) < 4096:
+        bloc = flux.read(taille_bloc)
+        if not bloc:
+            break
+        tampon += bloc
+    debut = tampon.lstrip()[:4096]
+    if '"FeatureCollection"' in debut or '"features"' in debut:
+        i = tampon.find('"features"')
+        while i == -1:
+            bloc = flux.read(taille_bloc)
+            if not bloc:
+                return
+            tampon += bloc
+            i = tampon.find('"features"')
+        pos = tampon.index("[", i) + 1
+    else:
+        pos = 0
+
+    while True:
+        # Séparateurs entre deux features
+        while True:
+            while pos < len(tampon) and tampon[pos] in " \t\r\n,":
+                pos += 1
+            if pos < len(tampon):
+                break
+            bloc = flux.read(taille_bloc)
+            if not bloc:
+                return
+            tampon, pos = bloc, 0
+        if tampon[pos] in "]}":
+            return
+        try:
+            feature, fin = decodeur.raw_decode(tampon, pos)
+        except json.JSONDecodeError:
+            bloc = flux.read(taille_bloc)
+            if not bloc:
+                raise
+            tampon, pos = tampon[pos:] + bloc, 0
+            continue
+        yield feature
+        pos = fin
+        if pos > taille_bloc:
+            tampon, pos = tampon[pos:], 0
+
+
+# =============================================================================
+# MIROIR
+# =============================================================================
+
+class MiroirCadastre:
+    """
+    Index SQLite des parcelles et adresses importées.
+
+    Lecture seule pendant le service: une connexion par thread, partageable
+    entre workers (mode WAL).
+
+    Args:
+        chemin: Fichier de la base
+    """
+
+    def __init__(self, chemin: Optional[Path] = None):
+        self.chemin = Path(chemin or CHEMIN_DEFAUT)
+        self.chemin.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self.stats = {"hits": 0, "misses": 0}
+        conn = self._connexion()
+        colonnes = {ligne[1] for ligne in conn.execute("PRAGMA table_info(parcelles)")}
+        ancien_schema = bool(colonnes) and "prefixe" not in colonnes
+        if ancien_schema:
+            # Ancien schéma sans préfixe: les parcelles des communes associées
+            # s'écrasaient entre elles, l'index est à réimporter
+            logger.warning("Miroir cadastre sans préfixe de commune associée: parcelles à réimporter")
+            conn.execute("DROP TABLE parcelles")
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS parcelles (
+                code_insee TEXT NOT NULL, prefixe TEXT NOT NULL, section TEXT NOT NULL,
+                numero TEXT NOT NULL, contenance INTEGER, geometrie BLOB,
+                PRIMARY KEY (code_insee, section, numero, prefixe)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS adresses (
+                cle TEXT PRIMARY KEY, code_insee TEXT NOT NULL, code_postal TEXT,
+                ville TEXT, latitude REAL, longitude REAL, label TEXT
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS imports (
+                fichier TEXT PRIMARY KEY, type TEXT NOT NULL, lignes INTEGER NOT NULL, date REAL NOT NULL
+            );
+        """)
+        if ancien_schema:
+            conn.execute("DELETE FROM imports WHERE type = 'parcelles'")
+
+    def _connexion(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.chemin, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # =========================================================================
+    # IMPORT
+    # =========================================================================
+
+    def _inserer_par_lots(self, requete: str, lignes: Iterable[tuple]) -> int:
+        conn = self._connexion()
+        total = 0
+        lot = []
+        conn.execute("BEGIN")
+        try:
+            for ligne in lignes:
+                lot.append(ligne)
+                if len(lot) >= TAILLE_LOT:
+                    conn.executemany(requete, lot)
+                    total += len(lot)
+                    lot = []
+            if lot:
+                conn.executemany(requete, lot)
+                total += len(lot)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return total
+
+    def _noter_import(self, fichier: Path, type_import: str, lignes: int) -> None:
+        self._connexion().execute(
+            "INSERT OR REPLACE INTO imports (fichier, type, lignes, date) VALUES (?, ?, ?, ?)",
+            (Path(fichier).name, type_import, lignes, time.time()),
+        )
+
+    def importer_parcelles(self, fichier: Path, geometries: bool = True) -> int:
+        """
+        Importe un extrait cadastre-XX-parcelles.json[.gz] (Etalab).
+
+        Args:
+            fichier: Extrait départemental (FeatureCollection ou GeoJSON ligne à ligne)
+            geometries: Conserver les géométries (compressées); False pour un
+                index minimal (validation + contenance uniquement)
+
+        Returns:
+            Nombre de parcelles importées
+        """
+        def lignes():
+            with _ouvrir_texte(fichier) as flux:
+                for feature in iterer_features(flux):
+                    props = feature.get("properties") or {}
+                    code_insee = str(props.get("commune") or "")
+                    if not code_insee or not props.get("section") or not props.get("numero"):
+                        continue
+                    geometrie = None
+                    if geometries and feature.get("geometry"):
+                        geometrie = zlib.compress(
+                            json.dumps(feature["geometry"], separators=(",", ":")).encode("utf-8")
+                        )
+                    contenance = props.get("contenance")
+                    yield (
+                        code_insee,
+                        normaliser_prefixe(props.get("prefixe")),
+                        normaliser_section(props["section"]),
+                        normaliser_numero(props["numero"]),
+                        int(contenance) if contenance not in (None, "") else None,
+                        geometrie,
+                    )
+
+        total = self._inserer_par_lots(
+            "INSERT OR REPLACE INTO parcelles (code_insee, prefixe, section, numero, contenance, geometrie) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            lignes(),
+        )
+        self._noter_import(fichier, "parcelles", total)
+        return total
+
+    def importer_adresses(self, fichier: Path) -> int:
+        """
+        Importe un extrait adresses-XX.csv[.gz] (BAN, séparateur ';').
+
+        Chaque adresse est indexée par (code postal, numéro, voie); la première
+        adresse de chaque voie sert aussi de repli quand le numéro est inconnu.
+
+        Returns:
+            Nombre d'adresses importées
+        """
+        def lignes():
+            with _ouvrir_texte(fichier) as flux:
+                for row in csv.DictReader(flux, delimiter=";"):
+                    code_postal = row.get("code_postal") or ""
+                    voie = row.get("nom_voie") or ""
+                    if not code_postal or not voie or not row.get("code_insee"):
+                        continue
+                    try:
+                        lat, lon = float(row["lat"]), float(row["lon"])
+                    except (KeyError, TypeError, ValueError):
+                        continue
+                    numero, rep = row.get("numero") or "", row.get("rep") or ""
+                    ville = row.get("nom_commune") or ""
+                    label = " ".join(p for p in (numero, rep, voie, code_postal, ville) if p)
+                    valeurs = (row["code_insee"], code_postal, ville, lat, lon, label)
+                    yield (cle_adresse(code_postal, numero, rep, voie),) + valeurs
+                    yield (cle_adresse(code_postal, "", "", voie),) + valeurs
+
+        conn = self._connexion()
+        avant = conn.execute("SELECT COUNT(*) FROM adresses").fetchone()[0]
+        self._inserer_par_lots(
+            "INSERT OR IGNORE INTO adresses "
+            "(cle, code_insee, code_postal, ville, latitude, longitude, label) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            lignes(),
+        )
+        total = conn.execute("SELECT COUNT(*) FROM adresses").fetchone()[0] - avant
+        self._noter_import(fichier, "adresses", total)
+        return total
+
+    # =========================================================================
+    # CONSULTATION
+    # =========================================================================
+
+    def chercher_parcelle(self, code_insee: str, section: str, numero: Any,
+                          prefixe: Optional[str] = None) -> Optional[Dict]:
+        """
+        Même format que CadastreService.chercher_parcelle, ou None si absente du miroir.
+
+        Sans `prefixe`, une référence présente dans plusieurs communes
+        associées est ambiguë: None (le réseau tranche, comme sans miroir).
+        """
+        section_norm, numero_norm = normaliser_section(section), normaliser_numero(numero)
+        requete = ("SELECT prefixe, contenance, geometrie FROM parcelles "
+                   "WHERE code_insee = ? AND section = ? AND numero = ?")
+        params: Tuple = (code_insee, section_norm, numero_norm)
+        if prefixe is not None:
+            requete += " AND prefixe = ?"
+            params += (normaliser_prefixe(prefixe),)
+        lignes = self._connexion().execute(requete + " LIMIT 2", params).fetchall()
+        if len(lignes) != 1:
+            self.stats["misses"] += 1
+            return None
+        self.stats["hits"] += 1
+        prefixe_trouve, contenance, geometrie = lignes[0]
+        code_dep, code_com = _decouper_insee(code_insee)
+        return {
+            "section": str(section).upper().strip(),
+            "numero": numero_norm,
+            "feuille": "",
+            "code_dep": code_dep,
+            "code_com": code_com,
+            "code_insee": code_insee,
+            "prefixe": prefixe_trouve,
+            "geometry": json.loads(zlib.decompress(geometrie)) if geometrie else None,
+            "surface_m2": contenance,
+            "source": "miroir_etalab",
+        }
+
+    def geocoder(self, adresse: str) -> Optional[Dict]:
+        """Même format que CadastreService.geocoder_adresse, ou None si absente du miroir."""
+        analyse = analyser_adresse(adresse)
+        if analyse is None:
+            self.stats["misses"] += 1
+            return None
+        code_postal, numero, rep, voie = analyse
+        conn = self._connexion()
+        cles = [f"{code_postal}|{numero}{rep}|{voie}"]
+        if rep:
+            cles.append(f"{code_postal}|{numero}|{voie}")
+        cles.append(f"{code_postal}||{voie}")
+        for rang, cle in enumerate(cles):
+            ligne = conn.execute(
+                "SELECT code_insee, code_postal, ville, latitude, longitude, label FROM adresses WHERE cle = ?",
+                (cle,),
+            ).fetchone()
+            if ligne:
+                self.stats["hits"] += 1
+                code_insee, cp, ville, lat, lon, label = ligne
+                return {
+                    "code_insee": code_insee,
+                    "code_postal": cp,
+                    "ville": ville,
+                    "district": "",
+                    "latitude": lat,
+                    "longitude": lon,
+                    "label": label,
+                    # Repli sur la voie: position approximative
+                    "score": 1.0 if rang < len(cles) - 1 else 0.6,
+                    "source": "miroir_ban",
+                }
+        self.stats["misses"] += 1
+        return None
+
+    def statistiques(self) -> Dict[str, Any]:
+        conn = self._connexion()
+        return {
+            **self.stats,
+            "parcelles": conn.execute("SELECT COUNT(*) FROM parcelles").fetchone()[0],
+            "adresses": conn.execute("SELECT COUNT(*) FROM adresses").fetchone()[0],
+            "imports": [
+                {"fichier": f, "type": t, "lignes": n, "date": d}
+                for f, t, n, d in conn.execute("SELECT fichier, type, lignes, date FROM imports ORDER BY date")
+            ],
+        }
+
+
+_miroir: Optional[MiroirCadastre] = None
+_miroir_verrou = threading.Lock()
+
+
+def get_miroir() -> Optional[MiroirCadastre]:
+    """Miroir partagé du process, ou None si aucun miroir n'a été importé."""
+    global _miroir
+    chemin = os.getenv("NOTAIRE_MIROIR_CADASTRE", str(CHEMIN_DEFAUT))
+    if chemin == "0":
+        return None
+    with _miroir_verrou:
+        if _miroir is None or str(_miroir.chemin) != chemin:
+            if not Path(chemin).exists():
+                return None
+            _miroir = MiroirCadastre(Path(chemin))
+        return _miroir
+
+
+# =============================================================================
+# CLI
+# =============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="Miroir local cadastre Etalab + BAN")
+    sous = parser.add_subparsers(dest="commande", required=True)
+
+    imp = sous.add_parser("importer", help="Importer des extraits départementaux")
+    imp.add_argument("--parcelles", type=Path, nargs="*", default=[],
+                     help="cadastre-XX-parcelles.json[.gz]")
+    imp.add_argument("--adresses", type=Path, nargs="*", default=[], help="adresses-XX.csv[.gz]")
+    imp.add_argument("--sans-geometries", action="store_true",
+                     help="Ne pas conserver les géométries (index minimal)")
+    imp.add_argument("--base", type=Path, default=None, help="Base cible (défaut: miroir partagé)")
+
+    stats = sous.add_parser("stats", help="Contenu du miroir")
+    stats.add_argument("--base", type=Path, default=None)
+
+    args = parser.parse_args()
+    chemin = args.base or Path(os.getenv("NOTAIRE_MIROIR_CADASTRE", str(CHEMIN_DEFAUT)))
+    miroir = MiroirCadastre(chemin)
+
+    if args.commande == "importer":
+        for fichier in args.parcelles:
+            debut = time.time()
+            n = miroir.importer_parcelles(fichier, geometries=not args.sans_geometries)
+            print(f"[OK] {fichier.name}: {n} parcelles ({time.time() - debut:.1f}s)")
+        for fichier in args.adresses:
+            debut = time.time()
+            n = miroir.importer_adresses(fichier)
+            print(f"[OK] {fichier.name}: {n} entrées d'adresse ({time.time() - debut:.1f}s)")
+        print(f"Miroir: {chemin} ({chemin.stat().st_size / 1024 / 1024:.1f} Mo)")
+    else:
+        print(json.dumps(miroir.statistiques(), ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
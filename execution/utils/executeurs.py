@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+executeurs.py
+-------------
+Pools d'exécution bornés pour sortir les générations bloquantes de la boucle
+asyncio de l'API.
+
+Deux pools:
+- I/O (threads): pipeline de génération (Jinja2, Supabase, cadastre HTTP)
+- CPU (processus): construction python-docx, qui tient le GIL plusieurs
+  secondes sur les gros actes
+
+Les deux pools sont bornés: au-delà de `workers + file_max` tâches admises,
+`PoolSature` est levée immédiatement (l'API répond 503) au lieu d'empiler
+des requêtes qui expireront côté client.
+
+Usage:
+    from execution.utils.executeurs import get_pool_execution
+
+    pool = get_pool_execution()
+    resultat = await pool.executer_io(gestionnaire.generer, donnees,
+                                      exporteur=pool.exporteur_docx())
+    print(pool.statistiques())
+
+Variables d'environnement:
+    NOTAIRE_IO_WORKERS    Threads du pool I/O (défaut: 4)
+    NOTAIRE_CPU_WORKERS   Processus du pool CPU (défaut: nb CPU, max 4;
+                          0 = export DOCX dans le thread appelant)
+    NOTAIRE_FILE_MAX      Tâches en attente admises par pool (défaut: 8)
+"""
+
+import asyncio
+import functools
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import BrokenExecutor, Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+
+class PoolSature(RuntimeError):
+    """Levée quand un pool a atteint sa capacité (workers + file d'attente)."""
+
+    def __init__(self, nom: str, capacite: int):
+        super().__init__(f"Pool {nom} saturé ({capacite} tâches admises)")
+        self.nom = nom
+        self.capacite = capacite
+
+
+def _entier_env(nom: str, defaut: int) -> int:
+    try:
+        return max(0, int(os.getenv(nom, defaut)))
+    except ValueError:
+        return defaut
+
+
+def _exporter_docx_processus(chemin_md: Path, chemin_docx: Path, zones_grisees: bool) -> str:
+    """Point d'entrée du pool CPU (fonction module-level, donc picklable)."""
+    from execution.core.exporter_docx import exporter_docx
+    exporter_docx(chemin_md, chemin_docx, zones_grisees=zones_grisees)
+    return str(chemin_docx)
+
+
+def _initialiser_processus():
+    """Charge python-docx une fois par processus plutôt qu'à chaque export."""
+    # Pas de pool CPU imbriqué: une tâche du pool (OCR d'un titre...) qui
+    # demande get_pool_execution() travaille sur place
+    os.environ["NOTAIRE_CPU_WORKERS"] = "0"
+    try:
+        import execution.core.exporter_docx  # noqa: F401
+    except ImportError:
+        pass
+
+
+class _PoolBorne:
+    """Executor + compteur d'admission.
+
+    Les executors traitent leur file en FIFO: sur `admises` tâches, les
+    `workers` premières tournent et le reste attend.
+    """
+
+    def __init__(self, nom: str, workers: int, file_max: int,
+                 fabrique: Callable[[], Executor]):
+        self.nom = nom
+        self.workers = workers
+        self.capacite = workers + file_max
+        self._fabrique = fabrique
+        self._executor: Optional[Executor] = None
+        self._verrou = threading.Lock()
+        self.admises = 0
+        self.terminees = 0
+        self.rejetees = 0
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            self._executor = self._fabrique()
+        return self._executor
+
+    def est_sature(self) -> bool:
+        with self._verrou:
+            return self.admises >= self.capacite
+
+    def _liberer(self, *_):
+        with self._verrou:
+            self.admises -= 1
+            self.terminees += 1
+
+    def soumettre(self, fn: Callable, *args, **kwargs) -> Future:
+        """Soumet `fn` et retourne le Future concurrent (lève PoolSature)."""
+        with self._verrou:
+            if self.admises >= self.capacite:
+                self.rejetees += 1
+                raise PoolSature(self.nom, self.capacite)
+            self.admises += 1
+        try:
+            future = self.executor.submit(fn, *args, **kwargs)
+        except Exception:
+            self._liberer()
+            raise
+        future.add_done_callback(self._liberer)
+        return future
+
+    def statistiques(self) -> Dict[str, int]:
+        with self._verrou:
+            return {
+                "workers": self.workers,
+                "capacite": self.capacite,
+                "en_cours": min(self.admises, self.workers),
+                "file_attente": max(0, self.admises - self.workers),
+                "terminees": self.terminees,
+                "rejetees": self.rejetees,
+            }
+
+    def arreter(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+class PoolExecution:
+    """Pools I/O (threads) et CPU (processus) bornés pour l'API."""
+
+    def __init__(
+        self,
+        io_workers: Optional[int] = None,
+        cpu_workers: Optional[int] = None,
+        file_max: Optional[int] = None,
+    ):
+        io_workers = io_workers if io_workers is not None else _entier_env("NOTAIRE_IO_WORKERS", 4)
+        cpu_workers = (
+            cpu_workers if cpu_workers is not None
+            else _entier_env("NOTAIRE_CPU_WORKERS", min(4, os.cpu_count() or 1))
+        )
+        file_max = file_max if file_max is not None else _entier_env("NOTAIRE_FILE_MAX", 8)
+
+        self.io = _PoolBorne(
+            "io", max(1, io_workers), file_max,
+            lambda: ThreadPoolExecutor(max_workers=max(1, io_workers),
+                                       thread_name_prefix="notaire-io"),
+        )
+        self.cpu: Optional[_PoolBorne] = None
+        if cpu_workers > 0:
+            # spawn: un fork depuis un process multi-thread (uvicorn + pool I/O)
+            # peut hériter de verrous tenus
+            self.cpu = _PoolBorne(
+                "cpu", cpu_workers, file_max,
+                lambda: ProcessPoolExecutor(
+                    max_workers=cpu_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_initialiser_processus,
+                ),
+            )
+
+    def est_sature(self) -> bool:
+        return self.io.est_sature()
+
+    async def executer_io(self, fn: Callable, *args, **kwargs) -> Any:
+        """Exécute `fn` dans le pool I/O sans bloquer la boucle (lève PoolSature)."""
+        future = self.io.soumettre(functools.partial(fn, *args, **kwargs))
+        return await asyncio.wrap_future(future)
+
+    async def executer_cpu(self, fn: Callable, *args) -> Any:
+        """Exécute `fn` (picklable) dans le pool CPU, ou I/O si désactivé."""
+        if self.cpu is None:
+            return await self.executer_io(fn, *args)
+        future = self.cpu.soumettre(fn, *args)
+        return await asyncio.wrap_future(future)
+
+    def exporter_docx(
+        self,
+        chemin_md: Union[str, Path],
+        chemin_docx: Union[str, Path],
+        zones_grisees: bool = False,
+    ) -> str:
+        """
+        Export DOCX synchrone délégué au pool CPU.
+
+        Appelée depuis un thread du pool I/O: le thread attend le processus
+        mais la boucle asyncio et les autres threads gardent le GIL libre.
+        Sans pool CPU (ou s'il est saturé), l'export se fait sur place.
+        """
+        args = (Path(chemin_md), Path(chemin_docx), zones_grisees)
+        if self.cpu is None:
+            return _exporter_docx_processus(*args)
+        try:
+            future = self.cpu.soumettre(_exporter_docx_processus, *args)
+        except PoolSature:
+            logger.warning("Pool CPU saturé, export DOCX dans le thread appelant")
+            return _exporter_docx_processus(*args)
+        except (OSError, NotImplementedError, BrokenExecutor) as e:
+            # Environnement sans multiprocessing (sandbox): repli définitif
+            self._desactiver_cpu(e)
+            return _exporter_docx_processus(*args)
+        try:
+            return future.result()
+        except BrokenExecutor as e:
+            # Processus tué (OOM...): l'export est rejoué sur place
+            self._desactiver_cpu(e)
+            return _exporter_docx_processus(*args)
+
+    def soumettre_processus(self, fn: Callable, *args) -> Optional[Future]:
+        """
+        Soumet `fn` (picklable) au pool CPU depuis un thread de travail.
+
+        Retourne None si le pool CPU est désactivé, saturé ou indisponible:
+        l'appelant exécute alors sur place, comme exporter_docx. Les
+        processus restent ceux du pool partagé (spawn, nombre borné pour
+        tout le process), quel que soit le nombre d'appelants.
+        """
+        if self.cpu is None:
+            return None
+        try:
+            return self.cpu.soumettre(fn, *args)
+        except PoolSature:
+            return None
+        except (OSError, NotImplementedError, BrokenExecutor) as e:
+            self._desactiver_cpu(e)
+            return None
+
+    def processus_disponibles(self) -> int:
+        """Nombre de processus du pool CPU (0 si désactivé)."""
+        return self.cpu.workers if self.cpu is not None else 0
+
+    def _desactiver_cpu(self, erreur: Exception):
+        logger.warning(f"Pool CPU indisponible ({erreur}), exécution sur place")
+        if self.cpu is not None:
+            self.cpu.arreter()
+            self.cpu = None
+
+    def exporteur_docx(self, zones_grisees: bool = False) -> Callable[..., str]:
+        """Callable `(chemin_md, chemin_docx)` pour GestionnairePromesses.generer()."""
+        return functools.partial(self.exporter_docx, zones_grisees=zones_grisees)
+
+    def statistiques(self) -> Dict[str, Any]:
+        """Profondeur de file et tâches en cours, par pool (pour /health)."""
+        return {
+            "sature": self.est_sature(),
+            "io": self.io.statistiques(),
+            "cpu": self.cpu.statistiques() if self.cpu else None,
+        }
+
+    def arreter(self):
+        self.io.arreter()
+        if self.cpu:
+            self.cpu.arreter()
+
+
+_pool: Optional[PoolExecution] = None
+_pool_verrou = threading.Lock()
+
+
+def get_pool_execution() -> PoolExecution:
+    """Retourne le pool partagé du process (créé au premier appel)."""
+    global _pool
+    with _pool_verrou:
+        if _pool is None:
+            _pool = PoolExecution()
+        return _pool
+
+
+def arreter_pool_execution():
+    """Arrête le pool partagé (shutdown de l'API)."""
+    global _pool
+    with _pool_verrou:
+        if _pool is not None:
+            _pool.arreter()
+            _pool = None
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+profilage.py
+------------
+Chronométrage par étape du pipeline de génération et métriques Prometheus.
+
+- `tracer(nom)` ouvre une trace pour une requête (contextvar: une trace par
+  tâche asyncio / par thread du pool). Les traces imbriquées réutilisent la
+  trace englobante.
+- `mesurer(etape)` chronomètre un bloc: la durée est ajoutée à la trace
+  courante et à l'histogramme `notaire_etape_duree_secondes`.
+- `etape(nom)` fait de même sans bloc `with`: l'étape court jusqu'au
+  prochain `etape()` ou à la fin de la trace (fonctions longues à
+  retours multiples).
+- `get_registre_metriques().exposer()` produit le texte servi par /metrics.
+- Profilage à la demande: si NOTAIRE_PROFIL_SEUIL_MS est défini, la trace
+  racine tourne sous cProfile et les requêtes plus lentes que le seuil
+  laissent un fichier .prof (lisible avec `python -m pstats` ou snakeviz).
+
+Usage:
+    from execution.utils.profilage import mesurer, tracer
+
+    with tracer("promesse") as trace:
+        with mesurer("render"):
+            ...
+    print(trace.en_dict())  # {"total_ms": ..., "etapes": {"render": ...}}
+
+Variables d'environnement:
+    NOTAIRE_PROFIL_SEUIL_MS  Seuil de sauvegarde des profils (défaut: désactivé)
+    NOTAIRE_PROFIL_DIR       Dossier des profils (défaut: .tmp/profils)
+"""
+
+import contextvars
+import cProfile
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+
+# Bornes des histogrammes (secondes): de la détection (ms) à l'export d'un
+# gros acte (dizaines de secondes)
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+@dataclass
+class Trace:
+    """Durées des étapes d'une requête (ms, dans l'ordre d'exécution)."""
+    nom: str
+    etapes: List[Tuple[str, float]] = field(default_factory=list)
+    debut: float = field(default_factory=time.perf_counter)
+    duree_ms: Optional[float] = None
+    profil: Optional[str] = None
+    tour: Optional[Tuple[str, float]] = None
+
+    def ajouter(self, etape: str, duree_ms: float):
+        """Ajoute une durée (ex. étapes mesurées dans un autre thread)."""
+        self.etapes.append((etape, duree_ms))
+
+    def fusionner(self, chronometrage: Dict):
+        """Reprend les étapes d'un `en_dict()` produit ailleurs (ex. pool I/O)."""
+        for etape, duree in (chronometrage or {}).get("etapes", {}).items():
+            self.ajouter(etape, duree)
+
+    def durees(self) -> Dict[str, float]:
+        """Durée cumulée par étape (ms)."""
+        resultat: Dict[str, float] = {}
+        for etape, duree in self.etapes:
+            resultat[etape] = round(resultat.get(etape, 0.0) + duree, 1)
+        return resultat
+
+    def total_ms(self) -> float:
+        if self.duree_ms is not None:
+            return self.duree_ms
+        return round((time.perf_counter() - self.debut) * 1000, 1)
+
+    def en_dict(self) -> Dict:
+        """Ventilation pour les réponses API et les événements SSE."""
+        resultat = {"total_ms": self.total_ms(), "etapes": self.durees()}
+        if self.profil:
+            resultat["profil"] = self.profil
+        return resultat
+
+
+class RegistreMetriques:
+    """Histogrammes de durée et compteurs d'erreurs, au format texte Prometheus."""
+
+    def __init__(self, buckets: Tuple[float, ...] = BUCKETS):
+        self.buckets = buckets
+        self._verrou = threading.Lock()
+        # (pipeline, etape) -> [compteurs par borne..., somme, nombre]
+        self._histogrammes: Dict[Tuple[str, str], List[float]] = {}
+        self._erreurs: Dict[Tuple[str, str], int] = {}
+
+    def observer(self, pipeline: str, etape: str, secondes: float):
+        with self._verrou:
+            serie = self._histogrammes.get((pipeline, etape))
+            if serie is None:
+                serie = self._histogrammes[(pipeline, etape)] = [0] * (len(self.buckets) + 2)
+            for i, borne in enumerate(self.buckets):
+                if secondes <= borne:
+                    serie[i] += 1
+            serie[-2] += secondes
+            serie[-1] += 1
+
+    def erreur(self, pipeline: str, etape: str):
+        with self._verrou:
+            self._erreurs[(pipeline, etape)] = self._erreurs.get((pipeline, etape), 0) + 1
+
+    def statistiques(self) -> Dict[str, Dict[str, float]]:
+        """Nombre et durée moyenne (ms) par `pipeline.etape`."""
+        with self._verrou:
+            return {
+                f"{pipeline}.{etape}": {
+                    "nombre": int(serie[-1]),
+                    "moyenne_ms": round(serie[-2] / serie[-1] * 1000, 1) if serie[-1] else 0.0,
+                }
+                for (pipeline, etape), serie in sorted(self._histogrammes.items())
+            }
+
+    def exposer(self, jauges: Optional[Dict[str, float]] = None,
+                compteurs: Optional[Dict[str, float]] = None) -> str:
+        """
+        Texte d'exposition Prometheus (format 0.0.4).
+
+        `jauges` sont des valeurs instantanées (gauge); `compteurs` des
+        totaux monotones (counter, nom suffixé par `_total`).
+        """
+        lignes = [
+            "# HELP notaire_etape_duree_secondes Durée des étapes de génération",
+            "# TYPE notaire_etape_duree_secondes histogram",
+        ]
+        with self._verrou:
+            histogrammes = sorted(self._histogrammes.items())
+            erreurs = sorted(self._erreurs.items())
+
+        for (pipeline, etape), serie in histogrammes:
+            labels = f'pipeline="{_echapper(pipeline)}",etape="{_echapper(etape)}"'
+            for borne, compte in zip(self.buckets, serie):
+                lignes.append(f'notaire_etape_duree_secondes_bucket{{{labels},le="{borne}"}} {compte}')
+            lignes.append(f'notaire_etape_duree_secondes_bucket{{{labels},le="+Inf"}} {serie[-1]}')
+            lignes.append(f"notaire_etape_duree_secondes_sum{{{labels}}} {serie[-2]:.6f}")
+            lignes.append(f"notaire_etape_duree_secondes_count{{{labels}}} {serie[-1]}")
+
+        lignes += [
+            "# HELP notaire_etape_erreurs_total Étapes terminées par une exception",
+            "# TYPE notaire_etape_erreurs_total counter",
+        ]
+        for (pipeline, etape), nombre in erreurs:
+            lignes.append(
+                f'notaire_etape_erreurs_total{{pipeline="{_echapper(pipeline)}",etape="{_echapper(etape)}"}} {nombre}'
+            )
+
+        for nom, valeur in sorted((jauges or {}).items()):
+            lignes.append(f"# TYPE {nom} gauge")
+            lignes.append(f"{nom} {valeur}")
+        for nom, valeur in sorted((compteurs or {}).items()):
+            nom = nom if nom.endswith("_total") else f"{nom}_total"
+            lignes.append(f"# TYPE {nom} counter")
+            lignes.append(f"{nom} {valeur}")
+
+        return "\n".join(lignes) + "\n"
+
+
+def _echapper(valeur: str) -> str:
+    return valeur.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+_trace_courante: contextvars.ContextVar[Optional[Trace]] = contextvars.ContextVar(
+    "notaire_trace", default=None
+)
+
+_registre: Optional[RegistreMetriques] = None
+_registre_verrou = threading.Lock()
+
+
+def get_registre_metriques() -> RegistreMetriques:
+    """Retourne le registre partagé du process (créé au premier appel)."""
+    global _registre
+    with _registre_verrou:
+        if _registre is None:
+            _registre = RegistreMetriques()
+        return _registre
+
+
+def trace_courante() -> Optional[Trace]:
+    return _trace_courante.get()
+
+
+def _seuil_profil_ms() -> Optional[float]:
+    valeur = os.getenv("NOTAIRE_PROFIL_SEUIL_MS")
+    if not valeur:
+        return None
+    try:
+        return float(valeur)
+    except ValueError:
+        return None
+
+
+def _sauvegarder_profil(profileur: cProfile.Profile, trace: Trace) -> Optional[str]:
+    dossier = Path(os.getenv("NOTAIRE_PROFIL_DIR") or PROJECT_ROOT / ".tmp" / "profils")
+    try:
+        dossier.mkdir(parents=True, exist_ok=True)
+        chemin = dossier / f"{trace.nom}_{datetime.now():%Y%m%d_%H%M%S_%f}_{int(trace.total_ms())}ms.prof"
+        profileur.dump_stats(str(chemin))
+        return str(chemin)
+    except OSError as e:
+        logger.warning(f"Profil non sauvegardé: {e}")
+        return None
+
+
+@contextmanager
+def tracer(nom: str) -> Iterator[Trace]:
+    """
+    Ouvre la trace d'une requête. Si une trace est déjà active dans le
+    contexte, elle est réutilisée (les étapes remontent à la requête).
+    """
+    englobante = _trace_courante.get()
+    if englobante is not None:
+        try:
+            yield englobante
+        finally:
+            _terminer_tour(englobante)
+        return
+
+    trace = Trace(nom=nom)
+    jeton = _trace_courante.set(trace)
+
+    seuil = _seuil_profil_ms()
+    profileur = None
+    if seuil is not None:
+        profileur = cProfile.Profile()
+        try:
+            profileur.enable()
+        except ValueError:
+            # Un autre profileur est déjà actif dans ce thread
+            profileur = None
+
+    try:
+        yield trace
+    finally:
+        if profileur is not None:
+            profileur.disable()
+        _terminer_tour(trace)
+        trace.duree_ms = round((time.perf_counter() - trace.debut) * 1000, 1)
+        _trace_courante.reset(jeton)
+        get_registre_metriques().observer(nom, "total", trace.duree_ms / 1000)
+        if profileur is not None and trace.duree_ms >= seuil:
+            trace.profil = _sauvegarder_profil(profileur, trace)
+            if trace.profil:
+                logger.info(f"Requête lente ({trace.duree_ms} ms), profil: {trace.profil}")
+
+
+def _enregistrer(trace: Optional[Trace], pipeline: Optional[str], etape: str, secondes: float):
+    if trace is not None:
+        trace.ajouter(etape, round(secondes * 1000, 1))
+    get_registre_metriques().observer(pipeline or (trace.nom if trace else "hors_trace"), etape, secondes)
+
+
+def _terminer_tour(trace: Trace):
+    if trace.tour is not None:
+        nom, debut = trace.tour
+        trace.tour = None
+        _enregistrer(trace, None, nom, time.perf_counter() - debut)
+
+
+def etape(nom: str):
+    """Termine l'étape en cours de la trace courante et démarre `nom`."""
+    trace = _trace_courante.get()
+    if trace is None:
+        return
+    _terminer_tour(trace)
+    trace.tour = (nom, time.perf_counter())
+
+
+@contextmanager
+def mesurer(etape: str, pipeline: Optional[str] = None, trace: Optional[Trace] = None) -> Iterator[None]:
+    """
+    Chronomètre un bloc. La durée va dans la trace (défaut: trace courante,
+    si présente) et dans l'histogramme du registre, étiqueté par pipeline
+    (défaut: nom de la trace) et étape.
+    """
+    trace = trace or _trace_courante.get()
+    debut = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        get_registre_metriques().erreur(pipeline or (trace.nom if trace else "hors_trace"), etape)
+        raise
+    finally:
+        _enregistrer(trace, pipeline, etape, time.perf_counter() - debut)
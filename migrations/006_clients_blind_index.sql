@@ -0,0 +1,62 @@
+-- ============================================================================
+-- MIGRATION 006: Index aveugle pour la recherche de clients chiffres
+-- Date: 2026-10-18
+-- Description: Jetons HMAC-SHA256 (prefixes et trigrammes du nom/prenom,
+--              annee de naissance, commune) calcules par l'application
+--              (execution/security/blind_index.py). Permet de rechercher
+--              les clients cote serveur sans dechiffrer la table.
+--
+-- Apres migration: les clients existants n'ont pas encore de jetons.
+-- Lancer une fois par etude SecureClientManager(etude_id).reindex_blind_index()
+-- (la cle n'est connue que de l'application).
+-- ============================================================================
+
+ALTER TABLE clients
+    ADD COLUMN IF NOT EXISTS blind_index TEXT[] NOT NULL DEFAULT '{}';
+
+COMMENT ON COLUMN clients.blind_index IS
+    'Jetons HMAC tronques (64 bits) par etude - recherche sans dechiffrement, valeurs non reversibles';
+
+-- Filtres @> (tous les jetons) et && (au moins un) sur les clients actifs
+CREATE INDEX IF NOT EXISTS idx_clients_blind_index ON clients
+    USING GIN (blind_index)
+    WHERE deleted_at IS NULL AND anonymized = false;
+
+-- ============================================================================
+-- Recherche approchee classee: clients de l'etude portant tous les jetons
+-- p_required et au moins p_min_any jetons de p_any, tries par nombre de
+-- jetons communs. SECURITY INVOKER: les politiques RLS s'appliquent.
+-- ============================================================================
+
+CREATE OR REPLACE FUNCTION search_clients_blind(
+    p_etude_id UUID,
+    p_required TEXT[],
+    p_any TEXT[],
+    p_min_any INTEGER DEFAULT 1,
+    p_limit INTEGER DEFAULT 50
+)
+RETURNS SETOF clients
+LANGUAGE sql
+STABLE
+SECURITY INVOKER
+AS $$
+    SELECT c.*
+    FROM clients c
+    CROSS JOIN LATERAL (
+        SELECT count(*) AS communs FROM unnest(c.blind_index) AS j WHERE j = ANY (p_any)
+    ) score
+    WHERE c.etude_id = p_etude_id
+      AND c.deleted_at IS NULL
+      AND c.anonymized = false
+      AND c.blind_index @> coalesce(p_required, '{}')
+      AND c.blind_index && p_any
+      AND score.communs >= p_min_any
+    ORDER BY score.communs DESC, c.created_at DESC
+    LIMIT p_limit;
+$$;
+
+GRANT EXECUTE ON FUNCTION search_clients_blind(UUID, TEXT[], TEXT[], INTEGER, INTEGER)
+    TO authenticated, service_role;
+
+-- Les donnees anonymisees (RGPD Art. 17) ne doivent plus etre retrouvables
+UPDATE clients SET blind_index = '{}' WHERE anonymized = true AND blind_index <> '{}';
@@ -0,0 +1,32 @@
+-- =============================================================================
+-- Migration: Incrément groupé de l'usage des clés API
+-- Date: 2026-10-17
+-- Description: Fonction appelée par l'écrivain de télémétrie de l'API
+--              (execution/database/telemetrie.py) pour appliquer en une
+--              requête les compteurs agrégés sur l'intervalle de flush:
+--              total_requests += n, last_used_at = max(last_used_at, vu).
+-- =============================================================================
+
+CREATE OR REPLACE FUNCTION increment_api_key_usage(p_usages JSONB)
+RETURNS INTEGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    nb_maj INTEGER;
+BEGIN
+    UPDATE agent_api_keys k
+    SET total_requests = COALESCE(k.total_requests, 0) + u.n,
+        last_used_at = GREATEST(COALESCE(k.last_used_at, u.last_used_at), u.last_used_at)
+    FROM jsonb_to_recordset(p_usages) AS u(id UUID, n INTEGER, last_used_at TIMESTAMPTZ)
+    WHERE k.id = u.id;
+
+    GET DIAGNOSTICS nb_maj = ROW_COUNT;
+    RETURN nb_maj;
+END;
+$$;
+
+-- Réservée au backend (clé service)
+REVOKE ALL ON FUNCTION increment_api_key_usage(JSONB) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION increment_api_key_usage(JSONB) TO service_role;
@@ -0,0 +1,37 @@
+-- =============================================================================
+-- Migration: Persistance incrémentale de conversations.agent_state
+-- Date: 2026-10-18
+-- Description: L'agent (execution/database/etat_agent.py) n'écrit plus
+--              l'agent_state complet à chaque tour mais un patch JSON des
+--              champs modifiés, numéroté par version. agent_state reste le
+--              snapshot, recompacté périodiquement (agent_state_version =
+--              dernière version incluse).
+--              La clé (conversation_id, version) assure le versionnement
+--              optimiste: deux onglets ne peuvent pas écrire la même version.
+-- =============================================================================
+
+ALTER TABLE conversations
+    ADD COLUMN IF NOT EXISTS agent_state_version BIGINT NOT NULL DEFAULT 0;
+
+CREATE TABLE IF NOT EXISTS agent_state_deltas (
+    conversation_id UUID NOT NULL REFERENCES conversations(id) ON DELETE CASCADE,
+    version BIGINT NOT NULL,
+    patch JSONB NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (conversation_id, version)
+);
+
+ALTER TABLE agent_state_deltas ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "agent_state_deltas_via_conversation" ON agent_state_deltas
+    FOR ALL USING (
+        conversation_id IN (
+            SELECT id FROM conversations
+            WHERE etude_id = current_setting('app.etude_id', true)::UUID
+        )
+    );
+
+COMMENT ON TABLE agent_state_deltas IS
+    'Patchs JSON (RFC 6902) de agent_state par tour, postérieurs au snapshot conversations.agent_state';
+COMMENT ON COLUMN conversations.agent_state_version IS
+    'Version de agent_state incluse dans le snapshot (patchs suivants dans agent_state_deltas)';
@@ -0,0 +1,187 @@
+-- =============================================================================
+-- Migration: Recherche plein texte et approximative (actes, titres)
+-- Date: 2026-10-18
+-- Description: Colonnes de recherche normalisées (minuscules, sans accents)
+--              maintenues par trigger, index GIN pg_trgm + tsvector, et
+--              fonctions RPC classées utilisées par HistoriqueActes.rechercher,
+--              GestionnaireTitres.rechercher_titres et
+--              GestionnairePromesses.rechercher_titre_par_adresse/proprietaire.
+--              Équivalent Postgres de l'index local execution/database/recherche.py.
+-- =============================================================================
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE EXTENSION IF NOT EXISTS unaccent;
+
+-- unaccent() n'est pas IMMUTABLE: enveloppe utilisable dans les index
+CREATE OR REPLACE FUNCTION recherche_normaliser(p_texte TEXT)
+RETURNS TEXT
+LANGUAGE sql
+IMMUTABLE PARALLEL SAFE
+AS $$
+    SELECT trim(regexp_replace(
+        lower(public.unaccent('public.unaccent'::regdictionary, coalesce(p_texte, ''))),
+        '[^a-z0-9]+', ' ', 'g'
+    ))
+$$;
+
+-- Valeurs texte sous les clés données, à toute profondeur du document
+CREATE OR REPLACE FUNCTION recherche_extraire(p_doc JSONB, p_cles TEXT[])
+RETURNS TEXT
+LANGUAGE sql
+IMMUTABLE PARALLEL SAFE
+AS $$
+    SELECT recherche_normaliser(string_agg(f #>> '{}', ' '))
+    FROM unnest(p_cles) AS k,
+         jsonb_path_query(p_doc, ('strict $.**."' || k || '"')::jsonpath) AS v,
+         jsonb_path_query(v, 'strict $.**') AS f
+    WHERE jsonb_typeof(f) IN ('string', 'number')
+$$;
+
+-- Trigger commun: les colonnes JSON absentes d'une table sont ignorées
+CREATE OR REPLACE FUNCTION recherche_maj_colonnes()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_ligne JSONB := to_jsonb(NEW);
+    v_doc JSONB := jsonb_build_array(v_ligne->'donnees', v_ligne->'proprietaires', v_ligne->'bien');
+BEGIN
+    NEW.recherche_parties := coalesce(recherche_extraire(v_doc,
+        ARRAY['nom', 'prenoms', 'prenom', 'nom_naissance', 'nom_usage', 'denomination', 'raison_sociale']), '');
+    NEW.recherche_adresse := coalesce(recherche_extraire(v_doc, ARRAY['adresse']), '');
+    NEW.recherche_biens := coalesce(recherche_extraire(v_doc, ARRAY['lots', 'cadastre']), '');
+    NEW.recherche_tout := concat_ws(' ', recherche_normaliser(NEW.reference),
+        NEW.recherche_parties, NEW.recherche_adresse, NEW.recherche_biens);
+    RETURN NEW;
+END;
+$$;
+
+-- Colonnes, trigger et index sur actes et titres_propriete (si présentes)
+DO $$
+DECLARE
+    v_table TEXT;
+BEGIN
+    FOREACH v_table IN ARRAY ARRAY['actes', 'titres_propriete'] LOOP
+        CONTINUE WHEN to_regclass('public.' || v_table) IS NULL;
+
+        EXECUTE format('ALTER TABLE %I
+            ADD COLUMN IF NOT EXISTS recherche_parties TEXT NOT NULL DEFAULT '''',
+            ADD COLUMN IF NOT EXISTS recherche_adresse TEXT NOT NULL DEFAULT '''',
+            ADD COLUMN IF NOT EXISTS recherche_biens TEXT NOT NULL DEFAULT '''',
+            ADD COLUMN IF NOT EXISTS recherche_tout TEXT NOT NULL DEFAULT ''''', v_table);
+
+        EXECUTE format('DROP TRIGGER IF EXISTS trg_%s_recherche ON %I', v_table, v_table);
+        EXECUTE format('CREATE TRIGGER trg_%s_recherche BEFORE INSERT OR UPDATE ON %I
+            FOR EACH ROW EXECUTE FUNCTION recherche_maj_colonnes()', v_table, v_table);
+
+        EXECUTE format('CREATE INDEX IF NOT EXISTS idx_%s_recherche_tout_trgm ON %I
+            USING GIN (recherche_tout gin_trgm_ops)', v_table, v_table);
+        EXECUTE format('CREATE INDEX IF NOT EXISTS idx_%s_recherche_parties_trgm ON %I
+            USING GIN (recherche_parties gin_trgm_ops)', v_table, v_table);
+        EXECUTE format('CREATE INDEX IF NOT EXISTS idx_%s_recherche_adresse_trgm ON %I
+            USING GIN (recherche_adresse gin_trgm_ops)', v_table, v_table);
+        EXECUTE format('CREATE INDEX IF NOT EXISTS idx_%s_recherche_biens_trgm ON %I
+            USING GIN (recherche_biens gin_trgm_ops)', v_table, v_table);
+        EXECUTE format('CREATE INDEX IF NOT EXISTS idx_%s_recherche_fts ON %I
+            USING GIN (to_tsvector(''simple'', recherche_tout))', v_table, v_table);
+
+        -- Remplissage des lignes existantes (le trigger calcule les colonnes)
+        EXECUTE format('UPDATE %I SET recherche_tout = recherche_tout', v_table);
+    END LOOP;
+END;
+$$;
+
+-- -----------------------------------------------------------------------------
+-- Fonctions RPC: résultats classés (similarité de mots pg_trgm + rang tsvector)
+-- p_champ: NULL (tout), 'parties', 'adresse' ou 'biens'.
+-- Filtre p_etude_id obligatoire, comme search_clients_blind (migration 006):
+-- les appelants utilisent la clé service, que RLS ne restreint pas. Seules
+-- les colonnes utiles au classement et à l'affichage sont renvoyées; les
+-- appelants qui ont besoin du document complet le relisent par id, filtré
+-- sur leur étude.
+-- -----------------------------------------------------------------------------
+
+DROP FUNCTION IF EXISTS rechercher_titres(TEXT, TEXT, INTEGER);
+DROP FUNCTION IF EXISTS rechercher_actes(TEXT, TEXT, INTEGER);
+DROP FUNCTION IF EXISTS recherche_requete(TEXT, TEXT);
+
+CREATE OR REPLACE FUNCTION recherche_requete(p_table TEXT, p_champ TEXT, p_colonnes TEXT)
+RETURNS TEXT
+LANGUAGE plpgsql
+IMMUTABLE
+AS $$
+DECLARE
+    v_colonne TEXT := CASE p_champ
+        WHEN 'parties' THEN 'recherche_parties'
+        WHEN 'adresse' THEN 'recherche_adresse'
+        WHEN 'biens' THEN 'recherche_biens'
+        ELSE 'recherche_tout'
+    END;
+BEGIN
+    -- Colonne en clair (pas de CASE dans le WHERE) pour que l'index GIN serve
+    RETURN format(
+        'SELECT %s,
+                word_similarity($1, t.%I)
+              + ts_rank(to_tsvector(''simple'', t.recherche_tout), plainto_tsquery(''simple'', $1)) AS score
+         FROM %I t
+         WHERE t.etude_id = $3
+           AND ($1 <%% t.%I OR to_tsvector(''simple'', t.recherche_tout) @@ plainto_tsquery(''simple'', $1))
+         ORDER BY score DESC, t.reference
+         LIMIT $2',
+        p_colonnes, v_colonne, p_table, v_colonne
+    );
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION rechercher_titres(
+    p_etude_id UUID,
+    p_requete TEXT,
+    p_champ TEXT DEFAULT NULL,
+    p_limite INTEGER DEFAULT 50
+)
+RETURNS TABLE (id UUID, reference TEXT, proprietaires JSONB, bien JSONB, score REAL)
+LANGUAGE plpgsql
+STABLE
+SECURITY INVOKER
+AS $$
+BEGIN
+    RETURN QUERY EXECUTE recherche_requete(
+        'titres_propriete', p_champ, 't.id, t.reference::TEXT, t.proprietaires, t.bien'
+    ) USING recherche_normaliser(p_requete), p_limite, p_etude_id;
+END;
+$$;
+
+GRANT EXECUTE ON FUNCTION rechercher_titres(UUID, TEXT, TEXT, INTEGER) TO authenticated, service_role;
+
+-- actes: seulement si la table porte une étude (sinon pas de filtre possible)
+DO $$
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM information_schema.columns
+        WHERE table_schema = 'public' AND table_name = 'actes' AND column_name = 'etude_id'
+    ) THEN
+        EXECUTE $f$
+            CREATE OR REPLACE FUNCTION rechercher_actes(
+                p_etude_id UUID,
+                p_requete TEXT,
+                p_champ TEXT DEFAULT NULL,
+                p_limite INTEGER DEFAULT 50
+            )
+            RETURNS TABLE (id UUID, reference TEXT, score REAL)
+            LANGUAGE plpgsql
+            STABLE
+            SECURITY INVOKER
+            AS $body$
+            BEGIN
+                RETURN QUERY EXECUTE recherche_requete('actes', p_champ, 't.id, t.reference::TEXT')
+                    USING recherche_normaliser(p_requete), p_limite, p_etude_id;
+            END;
+            $body$
+        $f$;
+        EXECUTE 'GRANT EXECUTE ON FUNCTION rechercher_actes(UUID, TEXT, TEXT, INTEGER) TO authenticated, service_role';
+    END IF;
+END;
+$$;
+
+COMMENT ON FUNCTION rechercher_titres(UUID, TEXT, TEXT, INTEGER) IS
+    'Recherche classée dans les titres d''une étude, tolérante aux accents et fautes de frappe (parties, adresse, lots, cadastre, référence)';
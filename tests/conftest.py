@@ -7,6 +7,7 @@ Configuration et fixtures pytest pour les tests du projet NotaireAI.
 """
 
 import json
+import os
 import sys
 from pathlib import Path
 
@@ -24,6 +25,14 @@ EXEMPLES_DIR = PROJECT_ROOT / "exemples"
 FIXTURES_DIR = Path(__file__).parent / "fixtures"
 TMP_DIR = PROJECT_ROOT / ".tmp" / "tests"
 
+# Les tests doivent réellement générer: pas de cache de génération partagé
+# (les tests du cache utilisent leur propre dossier temporaire)
+os.environ.setdefault("NOTAIRE_CACHE_GENERATION", "0")
+# Ni index de recherche partagé (les tests de recherche pointent vers tmp_path)
+os.environ.setdefault("NOTAIRE_INDEX_RECHERCHE", "0")
+# Ni miroir cadastre importé localement (les tests du miroir utilisent tmp_path)
+os.environ.setdefault("NOTAIRE_MIROIR_CADASTRE", "0")
+
 
 @pytest.fixture(scope="session")
 def project_root():
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+test_anthropic_context.py
+-------------------------
+Tests de l'assemblage du contexte de l'agent Anthropic: directives memoisees,
+budget d'historique, prefixe cacheable stable et rapport par requete.
+"""
+
+import asyncio
+import json
+import os
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+import execution.anthropic_context as anthropic_context
+from execution.anthropic_context import ContextBuilder, estimate_tokens, fit_history
+
+
+def _historique(n, taille=40):
+    return [
+        {"role": "user" if i % 2 == 0 else "assistant", "content": f"message {i} " + "x" * taille}
+        for i in range(n)
+    ]
+
+
+class MessagesStub:
+    """API Messages locale: enregistre les requetes, simule le cache du fournisseur."""
+
+    def __init__(self):
+        self.requetes = []
+        self._prefixes = set()
+
+    async def create(self, **kwargs):
+        self.requetes.append(kwargs)
+        # Prefixe cache = tout ce qui precede le dernier breakpoint des messages
+        messages = kwargs["messages"]
+        fin = max((i for i, m in enumerate(messages) if isinstance(m["content"], list)
+                   and any("cache_control" in b for b in m["content"])), default=-1)
+        prefixe = json.dumps([kwargs["system"], kwargs["tools"], messages[:fin + 1]], sort_keys=True, default=str)
+        lu = len(prefixe) // 4 if prefixe in self._prefixes else 0
+        self._prefixes.add(prefixe)
+        return SimpleNamespace(
+            stop_reason="end_turn",
+            content=[SimpleNamespace(type="text", text="Bien note.")],
+            usage=SimpleNamespace(input_tokens=50, output_tokens=5,
+                                  cache_read_input_tokens=lu,
+                                  cache_creation_input_tokens=0 if lu else len(prefixe) // 4),
+        )
+
+
+@pytest.fixture
+def builder(monkeypatch):
+    builder = ContextBuilder(history_budget=2000, trim_step=4)
+    monkeypatch.setattr(anthropic_context, "_context_builder", builder)
+    return builder
+
+
+@pytest.fixture
+def agent():
+    from execution.anthropic_agent import AnthropicAgent
+
+    agent = AnthropicAgent()
+    agent._client = SimpleNamespace(messages=MessagesStub())
+    return agent
+
+
+class TestHistorique:
+    """Budget de tokens, coupe par paliers, resume local."""
+
+    def test_sous_le_budget(self):
+        fenetre = fit_history(_historique(6), budget=10_000, step=4)
+        assert fenetre.dropped == 0 and len(fenetre.messages) == 6
+
+    def test_coupe_par_paliers_stable(self):
+        historique = _historique(40, taille=400)
+        fenetre = fit_history(historique, budget=2000, step=4)
+
+        assert fenetre.dropped % 4 == 0 and fenetre.tokens <= 2000 + 800
+        assert fenetre.messages[0]["role"] == "user"
+        assert fenetre.messages[0]["content"].startswith(anthropic_context.SUMMARY_HEADER)
+        # Tours suivants: le point de coupe n'avance que par paliers, et tant
+        # qu'il ne bouge pas les messages retenus gardent le meme prefixe
+        precedente, inchangees = fenetre, 0
+        for tour in range(1, 8):
+            suivante = fit_history(historique + _historique(2 * tour, taille=400), budget=2000, step=4)
+            assert suivante.dropped >= precedente.dropped and suivante.dropped % 4 == 0
+            if suivante.dropped == precedente.dropped:
+                inchangees += 1
+                assert suivante.messages[:len(precedente.messages)] == precedente.messages
+            precedente = suivante
+        assert inchangees >= 3
+
+    def test_max_messages(self):
+        fenetre = fit_history(_historique(12), budget=10_000, step=4, max_messages=6)
+        assert fenetre.dropped == 8
+
+    def test_estimation(self):
+        assert estimate_tokens("") == 0
+        assert estimate_tokens("a" * 35) == 10
+        assert estimate_tokens([{"type": "text", "text": "abc"}]) > 0
+
+
+class TestDirectives:
+    """Directives filtrees memoisees, invalidees par mtime."""
+
+    def test_memoisation_et_invalidation(self, builder, agent, tmp_path):
+        fichier = tmp_path / "creer_acte.md"
+        fichier.write_text("# Vente\n## Workflow\netape\n## Historique\nv1\n", encoding="utf-8")
+
+        with patch.object(type(agent), "_directive_path", lambda self, f: fichier if f == "creer_acte.md" else None), \
+                patch.object(type(agent), "_read_directive_file", autospec=True,
+                             side_effect=lambda self, f: fichier.read_text(encoding="utf-8") if f == "creer_acte.md" else "") as lecture:
+            texte, hit = agent._cached_directive("vente")
+            assert hit is False and "etape" in texte and "v1" not in texte
+            assert agent._cached_directive("vente") == (texte, True)
+            assert lecture.call_count == 2  # creer_acte.md + workflow_notaire.md, une seule fois
+
+            fichier.write_text("# Vente\n## Workflow\netape modifiee\n", encoding="utf-8")
+            stat = fichier.stat()
+            os.utime(fichier, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+            texte, hit = agent._cached_directive("vente")
+            assert hit is False and "etape modifiee" in texte
+
+        assert agent._cached_directive("inconnu") == ("", None)
+
+
+class TestPrefixeCacheable:
+    """Deux tours via le stub: prefixe identique, contexte de session hors prefixe."""
+
+    def test_deux_tours(self, builder, agent):
+        agent_state = {"type_acte": "vente", "progress_pct": 10}
+        historique = _historique(4)
+
+        with patch.object(type(agent), "_pre_process_message", return_value={}), \
+                patch.object(type(agent), "_load_agent_state", side_effect=lambda c: dict(agent_state)), \
+                patch.object(type(agent), "_save_agent_state", return_value=True), \
+                patch("execution.anthropic_agent.ANONYMIZER_AVAILABLE", False):
+            premiere = asyncio.run(agent.process_message("Le prix est fixe", conversation_id="c1",
+                                                         history=historique))
+            agent_state["progress_pct"] = 30
+            seconde = asyncio.run(agent.process_message("Et la date ?", conversation_id="c1",
+                                                        history=historique))
+
+        r1, r2 = agent._client.messages.requetes
+        assert json.dumps(r1["system"]) == json.dumps(r2["system"])
+        assert r1["tools"] == r2["tools"] and r1["messages"][:-1] == r2["messages"][:-1]
+        assert all("Progression" not in b["text"] for b in r2["system"])
+        assert "30%" in r2["messages"][-1]["content"][0]["text"]
+        assert "cache_control" in r2["messages"][-2]["content"][-1]
+
+        assert premiere.context_stats["prompt_cache_hit"] is False
+        assert seconde.context_stats["prompt_cache_hit"] is True
+        assert seconde.context_stats["directive_cache"] == "hit"
+        assert seconde.context_stats["history_kept"] == 4
+        assert builder.stats()["requests"] == 2 and builder.stats()["prompt_cache_hits"] == 1
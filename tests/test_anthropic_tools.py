@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+test_anthropic_tools.py
+-----------------------
+Tests du dispatch concurrent des outils de l'agent Anthropic.
+"""
+
+import asyncio
+import time
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+from execution.anthropic_tools import ToolCall, ToolExecutor, group_tool_calls
+
+
+def _appels(*noms):
+    return [ToolCall(id=f"t{i}", name=nom, input={}) for i, nom in enumerate(noms)]
+
+
+@pytest.fixture
+def executor():
+    executor = ToolExecutor(etude_id="test")
+
+    def lecture(tool_input, agent_state):
+        time.sleep(0.2)
+        return {"vu": agent_state.get("valeur")}
+
+    def ecriture(tool_input, agent_state):
+        agent_state["valeur"] = tool_input.get("valeur")
+        return {"ok": True}
+
+    executor._exec_search_clauses = lecture
+    executor._exec_validate_deed_data = lecture
+    executor._exec_submit_answers = ecriture
+    return executor
+
+
+class TestGroupement:
+    """Lectures consecutives groupees, outils mutants en barriere."""
+
+    def test_groupes(self):
+        groupes = group_tool_calls(_appels(
+            "search_clauses", "validate_deed_data", "submit_answers",
+            "get_questions", "generate_document", "submit_feedback",
+        ))
+        assert [[c.name for c in g] for g in groupes] == [
+            ["search_clauses", "validate_deed_data"],
+            ["submit_answers"],
+            ["get_questions"],
+            ["generate_document"],
+            ["submit_feedback"],
+        ]
+
+
+class TestExecution:
+    """Parallélisme, ordre des résultats, délais."""
+
+    def test_lectures_en_parallele(self, executor):
+        appels = [ToolCall(id=f"t{n}", name="search_clauses", input={"n": n}) for n in range(3)]
+
+        debut = time.perf_counter()
+        resultats = asyncio.run(executor.execute_group(appels, {}))
+
+        assert time.perf_counter() - debut < 0.5  # max et non somme (0.6 s)
+        assert [r.call.id for r in resultats] == ["t0", "t1", "t2"]
+        assert all(r.duree_ms >= 190 for r in resultats)
+
+    def test_ecriture_visible_par_lecture_suivante(self, executor):
+        agent_state = {}
+        appels = [
+            ToolCall(id="a", name="submit_answers", input={"valeur": 42}),
+            ToolCall(id="b", name="validate_deed_data", input={}),
+        ]
+
+        async def tour():
+            resultats = []
+            for groupe in group_tool_calls(appels):
+                resultats += await executor.execute_group(groupe, agent_state)
+            return resultats
+
+        resultats = asyncio.run(tour())
+        assert resultats[1].result == {"vu": 42}
+
+    def test_delai_depasse(self, executor):
+        with patch.dict("execution.anthropic_tools.TOOL_TIMEOUTS", {"search_clauses": 0.05}):
+            resultat, = asyncio.run(executor.execute_group(_appels("search_clauses"), {}))
+
+        assert resultat.timeout is True
+        assert "Delai depasse" in resultat.result["error"]
+        assert resultat.to_tool_result()["tool_use_id"] == "t0"
+
+
+class TestBoucleAgent:
+    """process_message: un tour à plusieurs outils dure le plus lent, pas la somme."""
+
+    def test_tour_multi_outils(self, executor):
+        from execution.anthropic_agent import AnthropicAgent
+
+        bloc = lambda i: SimpleNamespace(type="tool_use", id=f"t{i}", name="search_clauses", input={"n": i})
+        reponses = [
+            SimpleNamespace(stop_reason="tool_use", content=[bloc(0), bloc(1), bloc(2)]),
+            SimpleNamespace(stop_reason="end_turn", content=[SimpleNamespace(type="text", text="Voici.")]),
+        ]
+        envois = []
+
+        async def create(**kwargs):
+            envois.append(kwargs["messages"][-1])
+            return reponses.pop(0)
+
+        agent = AnthropicAgent()
+        agent._client = SimpleNamespace(messages=SimpleNamespace(create=create))
+
+        with patch("execution.anthropic_tools.ToolExecutor", return_value=executor):
+            debut = time.perf_counter()
+            reponse = asyncio.run(agent.process_message("clause de non concurrence"))
+
+        assert time.perf_counter() - debut < 0.5
+        assert [r["tool_use_id"] for r in envois[1]["content"]] == ["t0", "t1", "t2"]
+        assert [t["tool"] for t in reponse.tool_timings] == ["search_clauses"] * 3
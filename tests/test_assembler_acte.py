@@ -21,8 +21,12 @@ from execution.core.assembler_acte import (
     format_nombre,
     format_date,
     date_en_lettres,
-    assembler_acte
+    assembler_acte,
+    AssembleurActe,
+    precompiler_templates,
+    invalider_cache_templates,
 )
+import execution.core.assembler_acte as module_assembleur
 
 
 class TestNombreEnLettres:
@@ -285,3 +289,54 @@ class TestTantiemes:
 
         # La somme doit être proche du total (tolérance pour arrondis)
         assert abs(somme - total_declare) <= 5, f"Somme tantièmes ({somme}) != total déclaré ({total_declare})"
+
+
+class TestPrecompilationTemplates:
+    """Tests du bundle de bytecode Jinja2 et du warm-up."""
+
+    @pytest.fixture
+    def dossier_templates(self, tmp_path, monkeypatch):
+        racine = tmp_path / "projet"
+        (racine / "templates" / "sections").mkdir(parents=True)
+        (racine / "templates" / "_archive").mkdir()
+        (racine / "clauses").mkdir()
+        (racine / "templates" / "acte.md").write_text(
+            "# ACTE\n{{ 'constante' }} {{ montant }}\n{% include 'sections/section_a.md' %}",
+            encoding="utf-8"
+        )
+        (racine / "templates" / "sections" / "section_a.md").write_text("Section {{ nom }}", encoding="utf-8")
+        (racine / "templates" / "_archive" / "vieux.md").write_text("{% if %}", encoding="utf-8")
+        (racine / "clauses" / "clause.md").write_text("Clause", encoding="utf-8")
+
+        monkeypatch.setattr(module_assembleur, "BYTECODE_CACHE_DIR", tmp_path / "bytecode")
+        invalider_cache_templates()
+        yield racine / "templates"
+        invalider_cache_templates()
+
+    def test_precompile_les_deux_variantes(self, dossier_templates, tmp_path):
+        rapport = precompiler_templates(dossier_templates)
+
+        # acte.md + sections/section_a.md + clause.md, x2 variantes, archives ignorées
+        assert rapport["templates"] == 6
+        assert rapport["erreurs"] == []
+        assert list((tmp_path / "bytecode" / "standard").glob("*.cache"))
+        assert list((tmp_path / "bytecode" / "zones_grisees").glob("*.cache"))
+
+    def test_bytecode_reutilise_apres_invalidation(self, dossier_templates):
+        precompiler_templates(dossier_templates)
+        invalider_cache_templates()
+
+        # Un nouvel Environment recharge depuis le bytecode et rend à l'identique
+        assembleur = AssembleurActe(dossier_templates, zones_grisees=True)
+        acte = assembleur.assembler("acte.md", {"montant": 100, "nom": "A"})
+        assert "<<<VAR_START>>>constante<<<VAR_END>>>" in acte
+
+        standard = AssembleurActe(dossier_templates, zones_grisees=False)
+        assert "<<<VAR_START>>>" not in standard.assembler("acte.md", {"montant": 100, "nom": "A"})
+
+    def test_erreur_syntaxe_signalee(self, dossier_templates):
+        (dossier_templates / "casse.md").write_text("{% if %}", encoding="utf-8")
+
+        rapport = precompiler_templates(dossier_templates)
+
+        assert any(e.startswith("casse.md") for e in rapport["erreurs"])
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+test_cache_generation.py
+------------------------
+Tests unitaires pour cache_generation.py - Cache adressé par contenu des
+actes générés (Markdown + DOCX).
+"""
+
+import os
+import shutil
+import time
+
+import pytest
+
+import execution.core.cache_generation as module_cache
+from execution.core.cache_generation import (
+    CacheGeneration,
+    cle_generation,
+    version_templates,
+)
+
+
+def _acte(tmp_path, nom, contenu="# ACTE\n", taille_docx=10):
+    md = tmp_path / f"{nom}.md"
+    docx = tmp_path / f"{nom}.docx"
+    md.write_text(contenu, encoding="utf-8")
+    docx.write_bytes(b"x" * taille_docx)
+    return md, docx
+
+
+class TestCle:
+    """Clé canonique (données, template, version, zones grisées)."""
+
+    def test_ordre_des_champs_indifferent(self):
+        """Même contenu dans un ordre différent → même clé."""
+        a = cle_generation({"prix": 1, "bien": {"a": 1, "b": 2}}, "t.md", False, version="v1")
+        b = cle_generation({"bien": {"b": 2, "a": 1}, "prix": 1}, "t.md", False, version="v1")
+        assert a == b
+
+    def test_chaque_entree_compte(self):
+        """Données, template, version et zones grisées changent la clé."""
+        base = cle_generation({"prix": 1}, "t.md", False, version="v1")
+        assert cle_generation({"prix": 2}, "t.md", False, version="v1") != base
+        assert cle_generation({"prix": 1}, "u.md", False, version="v1") != base
+        assert cle_generation({"prix": 1}, "t.md", True, version="v1") != base
+        assert cle_generation({"prix": 1}, "t.md", False, version="v2") != base
+
+    def test_version_suit_les_fichiers(self, tmp_path):
+        """Modifier un template change la version."""
+        (tmp_path / "sections").mkdir()
+        template = tmp_path / "sections" / "prix.md"
+        template.write_text("{{ prix }}", encoding="utf-8")
+        avant = version_templates([tmp_path], [])
+        assert version_templates([tmp_path], []) == avant
+
+        template.write_text("{{ prix }} euros", encoding="utf-8")
+        assert version_templates([tmp_path], []) != avant
+
+
+class TestStockage:
+    """Entrées disque, LRU et invalidation."""
+
+    def test_ecrire_puis_restaurer(self, tmp_path):
+        """Les fichiers stockés sont recopiés vers la sortie demandée."""
+        cache = CacheGeneration(tmp_path / "cache")
+        md, docx = _acte(tmp_path, "source", "# PROMESSE\n")
+        assert cache.restaurer("k1", tmp_path / "out" / "acte.md", tmp_path / "out.docx") is False
+
+        cache.ecrire("k1", md, docx)
+        assert cache.restaurer("k1", tmp_path / "out" / "acte.md", tmp_path / "out.docx") is True
+        assert (tmp_path / "out" / "acte.md").read_text(encoding="utf-8") == "# PROMESSE\n"
+        assert (tmp_path / "out.docx").read_bytes() == docx.read_bytes()
+        assert cache.stats["hits"] == 1 and cache.stats["misses"] == 1
+
+    def test_eviction_lru(self, tmp_path):
+        """Au-delà de la taille maximale, l'entrée la moins récemment lue part."""
+        cache = CacheGeneration(tmp_path / "cache", max_octets=250)
+        for cle in ("a", "b"):
+            cache.ecrire(cle, *_acte(tmp_path, cle, taille_docx=100))
+        # 'a' est relue: 'b' devient la moins récente
+        ancien = time.time() - 60
+        os.utime(cache.dossier / "b", (ancien, ancien))
+        cache.restaurer("a", tmp_path / "a_out.md", tmp_path / "a_out.docx")
+
+        cache.ecrire("c", *_acte(tmp_path, "c", taille_docx=100))
+
+        assert sorted(p.name for p in cache.dossier.iterdir()) == ["a", "c"]
+        assert cache.stats["evictions"] == 1
+
+    def test_expiration(self, tmp_path, monkeypatch):
+        """Une entrée plus vieille que le TTL est effacée (secure delete), même relue récemment."""
+        suppressions = []
+        monkeypatch.setattr(module_cache, "secure_delete_dir",
+                            lambda p: suppressions.append(p.name) or shutil.rmtree(p))
+        cache = CacheGeneration(tmp_path / "cache", ttl_secondes=3600)
+        for cle in ("a", "b"):
+            cache.ecrire(cle, *_acte(tmp_path, cle))
+            ancien = time.time() - 7200
+            os.utime(cache.dossier / cle / "acte.md", (ancien, ancien))
+
+        assert cache.restaurer("a", tmp_path / "o.md", tmp_path / "o.docx") is False
+        cache.ecrire("c", *_acte(tmp_path, "c"))
+
+        assert sorted(p.name for p in cache.dossier.iterdir()) == ["c"]
+        assert sorted(suppressions) == ["a", "b"] and cache.stats["expirations"] == 2
+
+    def test_vider_suppression_securisee(self, tmp_path, monkeypatch):
+        """vider() passe par secure_delete_dir."""
+        suppressions = []
+        monkeypatch.setattr(module_cache, "secure_delete_dir", suppressions.append)
+        cache = CacheGeneration(tmp_path / "cache")
+        cache.ecrire("k1", *_acte(tmp_path, "k1"))
+        cache.vider()
+        assert suppressions == [cache.dossier / "k1"]
+
+    def test_invalider_cache_templates(self, tmp_path, monkeypatch):
+        """invalider_cache_templates() vide le cache de génération."""
+        from execution.core.assembler_acte import invalider_cache_templates
+        cache = CacheGeneration(tmp_path / "cache")
+        cache.ecrire("k1", *_acte(tmp_path, "k1"))
+        monkeypatch.setenv("NOTAIRE_CACHE_GENERATION", "1")
+        monkeypatch.setattr(module_cache, "_instance", cache)
+
+        invalider_cache_templates()
+
+        assert cache.restaurer("k1", tmp_path / "o.md", tmp_path / "o.docx") is False
+
+    def test_desactive(self, monkeypatch):
+        """NOTAIRE_CACHE_GENERATION=0 → pas de cache."""
+        monkeypatch.setenv("NOTAIRE_CACHE_GENERATION", "0")
+        assert module_cache.get_cache_generation() is None
+
+
+class TestGestionnairePromesses:
+    """Deux clics sur "Générer" avec le même dossier → un seul assemblage/export."""
+
+    def test_deuxieme_generation_depuis_le_cache(self, tmp_path, monkeypatch, donnees_promesse_exemple):
+        from execution.gestionnaires.gestionnaire_promesses import GestionnairePromesses
+        from execution.services import cadastre_service
+
+        monkeypatch.setattr(
+            cadastre_service.CadastreService, "enrichir_cadastre",
+            lambda self, donnees: {"donnees": donnees, "rapport": {"cadastre_enrichi": False}}
+        )
+        monkeypatch.setenv("NOTAIRE_CACHE_GENERATION", "1")
+        monkeypatch.setattr(module_cache, "_instance", CacheGeneration(tmp_path / "cache"))
+
+        exports = []
+
+        def exporteur(md, docx):
+            exports.append(md)
+            docx.write_bytes(b"DOCX " + md.read_bytes()[:20])
+
+        gestionnaire = GestionnairePromesses(supabase_client=None)
+        premier = gestionnaire.generer(
+            donnees_promesse_exemple, output_dir=tmp_path / "out", force=True, exporteur=exporteur
+        )
+        time.sleep(1.1)  # nom de sortie horodaté à la seconde
+        second = gestionnaire.generer(
+            donnees_promesse_exemple, output_dir=tmp_path / "out", force=True, exporteur=exporteur
+        )
+
+        assert premier.succes and second.succes
+        assert len(exports) == 1
+        assert premier.metadata["depuis_cache"] is False
+        assert second.metadata["depuis_cache"] is True
+        assert second.fichier_docx != premier.fichier_docx
+        with open(second.fichier_md, encoding="utf-8") as f2, open(premier.fichier_md, encoding="utf-8") as f1:
+            assert f2.read() == f1.read()
+        assert (tmp_path / "out" / os.path.basename(second.fichier_docx)).read_bytes().startswith(b"DOCX ")
+
+        # Sans cache: régénération complète
+        gestionnaire.generer(
+            donnees_promesse_exemple, output_dir=tmp_path / "out", force=True,
+            exporteur=exporteur, utiliser_cache=False
+        )
+        assert len(exports) == 2
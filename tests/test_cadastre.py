@@ -12,6 +12,7 @@ from unittest.mock import patch, MagicMock
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
 from execution.services.cadastre_service import CadastreService, CacheLocal
+import execution.services.cadastre_service as module_cadastre
 
 
 # =============================================================================
@@ -82,6 +83,145 @@ class TestCacheLocal:
         result = cache.get("test_key")
         assert result is None
 
+    def test_partage_entre_workers(self, tmp_path):
+        """Deux instances sur le même dossier (deux workers) partagent la base."""
+        worker_a = CacheLocal(cache_dir=tmp_path / "cache", ttl_heures=1)
+        worker_b = CacheLocal(cache_dir=tmp_path / "cache", ttl_heures=1)
+        worker_a.set("sections:69290", [{"section": "AH"}])
+        assert worker_b.get("sections:69290") == [{"section": "AH"}]
+        assert list((tmp_path / "cache").glob("*.json")) == []
+
+    def test_compteurs(self, tmp_path):
+        cache = CacheLocal(cache_dir=tmp_path / "cache", ttl_heures=1)
+        cache.get("absent")
+        cache.set("k", {"a": 1})
+        cache.get("k")
+        stats = cache.statistiques()
+        assert (stats["hits"], stats["misses"], stats["ecritures"]) == (1, 1, 1)
+        assert stats["entrees"] == 1 and stats["octets"] > 0
+
+    def test_suppression_securisee(self, tmp_path):
+        """Les entrées supprimées ne restent pas lisibles dans le fichier."""
+        cache = CacheLocal(cache_dir=tmp_path / "cache", ttl_heures=1)
+        conn = cache._connexion()
+        assert conn.execute("PRAGMA secure_delete").fetchone()[0] == 1
+
+        cache.set("adresse", {"label": "12 rue Secrete-Client 69001 Lyon"})
+        conn.execute("DELETE FROM entrees")
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        assert b"Secrete-Client" not in cache.chemin.read_bytes()
+
+    def test_ancien_cache_json_efface(self, tmp_path):
+        """Les fichiers <md5>.json de l'ancien cache sont effacés à l'ouverture."""
+        dossier = tmp_path / "cache"
+        dossier.mkdir()
+        ancien = dossier / "0123456789abcdef0123456789abcdef.json"
+        ancien.write_text(json.dumps({"label": "12 rue Secrete-Client 69001 Lyon"}))
+        autre = dossier / "config.json"
+        autre.write_text("{}")
+
+        with patch("execution.services.cadastre_service.secure_delete_file",
+                   wraps=module_cadastre.secure_delete_file) as effacer:
+            CacheLocal(cache_dir=dossier, ttl_heures=1)
+
+        effacer.assert_called_once_with(ancien)
+        assert not ancien.exists() and autre.exists()
+
+    def test_purge_ttl_et_taille(self, tmp_path):
+        """purger() retire les expirées puis les moins récemment lues au-delà de max_octets."""
+        cache = CacheLocal(cache_dir=tmp_path / "cache", ttl_heures=1, max_octets=20)
+        conn = cache._connexion()
+        cache.set("expiree", {"v": 0})
+        conn.execute("UPDATE entrees SET cree_a = cree_a - 7200 WHERE cle = 'expiree'")
+        for i, cle in enumerate(("ancienne", "recente")):
+            cache.set(cle, {"v": "x" * 10})
+            conn.execute("UPDATE entrees SET lu_a = ? WHERE cle = ?", (1000 + i, cle))
+
+        assert cache.purger() == 2
+        assert cache.get("recente") == {"v": "x" * 10}
+        assert cache.get("ancienne") is None
+        assert cache.stats["evictions"] == 1 and cache.stats["expirees"] == 1
+
+
+# =============================================================================
+# TESTS CONCURRENCE
+# =============================================================================
+
+class TestConcurrence:
+    """Fan-out des parcelles et dédoublonnage des requêtes en vol."""
+
+    @pytest.fixture
+    def service(self, tmp_path):
+        svc = CadastreService(cache_ttl_heures=0, concurrence=4)
+        svc.cache = CacheLocal(cache_dir=tmp_path / "cache", ttl_heures=1)
+        return svc
+
+    @staticmethod
+    def _reponse_parcelle(params):
+        reponse = MagicMock()
+        reponse.raise_for_status = MagicMock()
+        reponse.json.return_value = {"features": [{
+            "properties": {"section": params["section"], "numero": params["numero"]},
+            "geometry": None,
+        }]}
+        return reponse
+
+    def test_parcelles_en_parallele(self, service):
+        """Les parcelles sont cherchées simultanément, résultats dans l'ordre."""
+        import threading
+        import time
+        en_cours, max_simultanes = [0], [0]
+        verrou = threading.Lock()
+
+        def get(url, params=None, **kwargs):
+            with verrou:
+                en_cours[0] += 1
+                max_simultanes[0] = max(max_simultanes[0], en_cours[0])
+            time.sleep(0.05)
+            with verrou:
+                en_cours[0] -= 1
+            return self._reponse_parcelle(params)
+
+        references = [("AH", str(n)) for n in range(1, 9)]
+        with patch.object(service.session, "get", side_effect=get):
+            resultats = service.chercher_parcelles("69290", references)
+
+        assert [r["numero"] for r in resultats] == [n.zfill(4) for _, n in references]
+        assert max_simultanes[0] == 4
+
+    def test_requetes_identiques_dedoublonnees(self, service):
+        """Deux recherches simultanées de la même parcelle → un seul appel HTTP."""
+        import threading
+        import time
+        appels = []
+
+        def get(url, params=None, **kwargs):
+            appels.append(params)
+            time.sleep(0.1)
+            return self._reponse_parcelle(params)
+
+        resultats = []
+        with patch.object(service.session, "get", side_effect=get):
+            threads = [
+                threading.Thread(target=lambda: resultats.append(
+                    service.chercher_parcelle("69290", "AH", "68")))
+                for _ in range(3)
+            ]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+
+        assert len(appels) == 1
+        assert [r["numero"] for r in resultats] == ["0068"] * 3
+
+    def test_erreur_propagee_aux_attentes(self, service):
+        """Un échec HTTP n'est pas mis en cache: l'appel suivant réessaie."""
+        with patch.object(service.session, "get", side_effect=ConnectionError("down")) as get:
+            assert service.chercher_parcelle("69290", "AH", "68") is None
+            assert service.chercher_parcelle("69290", "AH", "68") is None
+        assert get.call_count == 2
+
 
 # =============================================================================
 # TESTS GEOCODAGE (avec mock)
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+test_chat_anonymizer.py
+-----------------------
+Tests unitaires pour chat_anonymizer.py - remplacement en une passe et
+cache d'historique par conversation.
+"""
+
+from unittest.mock import patch
+
+from execution.security.chat_anonymizer import (
+    AnonymizationMapping, CacheAnonymisation, ChatAnonymizer, RemplaceurMultiple
+)
+
+
+class TestRemplaceurMultiple:
+    """Automate d'Aho-Corasick: plus long motif à gauche, une seule passe."""
+
+    def test_plus_long_motif(self):
+        remplaceur = RemplaceurMultiple({"Martin": "[P1]", "Jean Martin": "[P2]", "Mar": "[X]"})
+        assert remplaceur.remplacer("Jean Martin et Martin, Marc") == "[P2] et [P1], [X]c"
+
+    def test_motifs_imbriques(self):
+        # "cd" doit être trouvé alors que "bcd", plus long, finit au même endroit
+        remplaceur = RemplaceurMultiple({"ab": "X", "bcd": "Y", "cd": "Z"})
+        assert remplaceur.remplacer("abcd") == "XZ"
+        assert remplaceur.remplacer("zbcd") == "zY"
+
+    def test_pas_de_remplacement_en_cascade(self):
+        # Avec des str.replace successifs, "A" -> "B" puis "B" -> "C" donnait "CC"
+        remplaceur = RemplaceurMultiple({"A": "B", "B": "C"})
+        assert remplaceur.remplacer("AB") == "BC"
+        assert RemplaceurMultiple({}).remplacer("AB") == "AB"
+
+    def test_automate_compile_une_fois(self):
+        mapping = AnonymizationMapping(vendeurs={"Martin": "[VENDEUR_1]"})
+        premier = mapping.remplaceur()
+        assert mapping.remplaceur() is premier
+        mapping.acquereurs["Dupont"] = "[ACQUEREUR_1]"
+        assert mapping.remplaceur() is not premier
+        assert mapping.remplaceur(inverse=True).remplacer("[ACQUEREUR_1]") == "Dupont"
+
+
+class TestChatAnonymizer:
+    """Aller-retour anonymisation / dé-anonymisation."""
+
+    def test_aller_retour(self):
+        anonymizer = ChatAnonymizer()
+        texte = "Promesse Martin vers Dupont, 450 000 euros, signature le 15/03/2026 chez Maître Leblanc"
+
+        anonyme, mapping = anonymizer.anonymiser(texte)
+
+        for valeur in ("Martin", "Dupont", "450 000 euros", "15/03/2026", "Leblanc"):
+            assert valeur not in anonyme
+        assert "[VENDEUR_1]" in anonyme and "[ACQUEREUR_1]" in anonyme
+        assert anonymizer.deanonymiser(anonyme, mapping) == texte
+
+    def test_mapping_existant_complete(self):
+        anonymizer = ChatAnonymizer()
+        _, mapping = anonymizer.anonymiser("Vendeur: Martin")
+        anonyme, meme = anonymizer.anonymiser("Martin signe chez Maître Leblanc", mapping)
+        assert meme is mapping
+        assert anonyme == "[VENDEUR_1] signe chez Maître [NOTAIRE_1]"
+
+
+class TestCacheAnonymisation:
+    """Historique anonymisé une fois par conversation."""
+
+    def test_seuls_les_nouveaux_messages(self):
+        cache = CacheAnonymisation()
+        history = []
+        message = "Promesse Martin vers Dupont"
+
+        with patch.object(ChatAnonymizer, "anonymiser", autospec=True,
+                          side_effect=ChatAnonymizer.anonymiser) as espion:
+            anonyme, _, mapping = cache.anonymiser_conversation("conv-1", message, history)
+            history += [{"role": "user", "content": message},
+                        {"role": "assistant", "content": "Bien noté pour Martin."}]
+            _, historique, mapping2 = cache.anonymiser_conversation("conv-1", "Et le prix ?", history)
+
+            # Tour 2: réponse assistant + message courant; la question du tour 1 est reprise
+            assert espion.call_count == 3
+            assert historique[0]["content"] == anonyme
+            assert historique[1]["content"] == "Bien noté pour [VENDEUR_1]."
+            assert mapping2 is mapping
+
+            history.append({"role": "user", "content": "Et le prix ?"})
+            cache.anonymiser_conversation("conv-1", "450000 euros", history)
+            assert espion.call_count == 4
+
+        assert cache.statistiques()["messages_reutilises"] == 4
+
+    def test_historique_modifie(self):
+        cache = CacheAnonymisation()
+        cache.anonymiser_conversation("conv-1", "Suite", [{"role": "user", "content": "Vendeur: Martin"}])
+        history = [{"role": "user", "content": "Vendeur: Durand"}]
+
+        _, historique, mapping = cache.anonymiser_conversation("conv-1", "Suite", history)
+
+        assert historique[0]["content"] == "Vendeur: [VENDEUR_1]"
+        assert "Martin" not in mapping.vendeurs
+        assert cache.statistiques()["reconstructions"] == 1
+
+    def test_lru_et_contenus_structures(self):
+        cache = CacheAnonymisation(capacite=1)
+        blocs = [{"type": "tool_use", "id": "t1"}]
+        _, historique, _ = cache.anonymiser_conversation(
+            "conv-1", "ok", [{"role": "assistant", "content": blocs}]
+        )
+        assert historique[0]["content"] is blocs
+        cache.anonymiser_conversation("conv-2", "ok", [])
+        assert cache.statistiques()["conversations"] == 1
+
+    def test_oublier_et_vider(self):
+        """Suppression d'une conversation ou effacement RGPD: mappings retirés."""
+        cache = CacheAnonymisation()
+        _, _, mapping = cache.anonymiser_conversation("conv-1", "Vendeur: Martin", [])
+        cache.anonymiser_conversation("conv-2", "Vendeur: Durand", [])
+
+        cache.oublier("conv-1")
+        _, _, nouveau = cache.anonymiser_conversation("conv-1", "Bonjour", [])
+        assert nouveau is not mapping and "Martin" not in nouveau.vendeurs
+
+        assert cache.vider() == 2
+        assert cache.statistiques()["conversations"] == 0
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+test_etat_agent.py
+------------------
+Tests unitaires pour etat_agent.py - agent_state par patchs versionnés.
+"""
+
+import copy
+
+import pytest
+
+from execution.database.etat_agent import (
+    ConflitVersion, MagasinEtatAgent, appliquer_patch, calculer_patch
+)
+
+
+class SupabaseMemoire:
+    """Client Supabase minimal en mémoire (tables conversations + deltas)."""
+
+    def __init__(self):
+        self.tables = {"conversations": [], "agent_state_deltas": []}
+        self.requetes = []
+
+    def table(self, nom):
+        return _Requete(self, nom)
+
+
+class _Requete:
+    def __init__(self, client, table):
+        self.client, self.table, self.filtres = client, table, []
+        self.action, self.valeurs, self.tri = "select", None, None
+
+    def select(self, _colonnes):
+        return self
+
+    def insert(self, valeurs):
+        self.action, self.valeurs = "insert", valeurs
+        return self
+
+    def update(self, valeurs):
+        self.action, self.valeurs = "update", valeurs
+        return self
+
+    def delete(self):
+        self.action = "delete"
+        return self
+
+    def eq(self, colonne, valeur):
+        self.filtres.append(lambda l: l.get(colonne) == valeur)
+        return self
+
+    def gte(self, colonne, valeur):
+        self.filtres.append(lambda l: l.get(colonne, 0) >= valeur)
+        return self
+
+    def lt(self, colonne, valeur):
+        self.filtres.append(lambda l: l.get(colonne, 0) < valeur)
+        return self
+
+    def order(self, colonne):
+        self.tri = colonne
+        return self
+
+    def limit(self, _n):
+        return self
+
+    def execute(self):
+        lignes = self.client.tables[self.table]
+        self.client.requetes.append((self.table, self.action))
+        trouvees = [l for l in lignes if all(f(l) for f in self.filtres)]
+        if self.action == "insert":
+            cle = (self.valeurs["conversation_id"], self.valeurs["version"])
+            if any((l["conversation_id"], l["version"]) == cle for l in lignes):
+                raise Exception('duplicate key value violates unique constraint "agent_state_deltas_pkey"')
+            lignes.append(copy.deepcopy(self.valeurs))
+            trouvees = [self.valeurs]
+        elif self.action == "update":
+            for ligne in trouvees:
+                ligne.update(copy.deepcopy(self.valeurs))
+        elif self.action == "delete":
+            self.client.tables[self.table] = [l for l in lignes if l not in trouvees]
+        if self.tri:
+            trouvees = sorted(trouvees, key=lambda l: l[self.tri])
+        return type("Reponse", (), {"data": copy.deepcopy(trouvees)})()
+
+
+@pytest.fixture
+def supabase():
+    client = SupabaseMemoire()
+    client.tables["conversations"].append({"id": "conv-1", "agent_state": {}, "agent_state_version": 0})
+    return client
+
+
+class TestPatch:
+    """Calcul et application des patchs JSON."""
+
+    def test_aller_retour(self):
+        avant = {"progress_pct": 10, "donnees_collectees": {"bien": {"adresse": "1 rue A", "lots": [1]}, "a/b": 1}}
+        apres = {"progress_pct": 20, "donnees_collectees": {"bien": {"adresse": "1 rue A", "lots": [1, 2]}, "prix": 1}}
+
+        patch = calculer_patch(avant, apres)
+
+        assert sorted(op["path"] for op in patch) == [
+            "/donnees_collectees/a~1b", "/donnees_collectees/bien/lots",
+            "/donnees_collectees/prix", "/progress_pct",
+        ]
+        assert appliquer_patch(copy.deepcopy(avant), patch) == apres
+        assert calculer_patch(apres, apres) == []
+
+
+class TestMagasin:
+    """Patchs par tour, cache, compaction, conflits entre onglets."""
+
+    def test_patch_seulement(self, supabase):
+        magasin = MagasinEtatAgent()
+        etat = magasin.charger(supabase, "conv-1")
+        etat.donnees["donnees_collectees"] = {"bien": {"adresse": "x" * 5000}}
+        magasin.sauvegarder(supabase, etat)
+
+        etat.donnees["progress_pct"] = 40
+        assert magasin.sauvegarder(supabase, etat) == 2
+
+        deltas = supabase.tables["agent_state_deltas"]
+        assert deltas[-1]["patch"] == [{"op": "add", "path": "/progress_pct", "value": 40}]
+        # Snapshot non réécrit tant que le seuil de compaction n'est pas atteint
+        assert supabase.tables["conversations"][0]["agent_state"] == {}
+        # Tour sans changement: aucune écriture
+        ecritures = len(supabase.requetes)
+        assert magasin.sauvegarder(supabase, etat) == 2
+        assert len(supabase.requetes) == ecritures
+
+    def test_rechargement_autre_process(self, supabase):
+        etat = MagasinEtatAgent().charger(supabase, "conv-1")
+        etat.donnees.update({"progress_pct": 40, "type_acte": "vente"})
+        MagasinEtatAgent().sauvegarder(supabase, etat)
+
+        recharge = MagasinEtatAgent().charger(supabase, "conv-1")
+        assert recharge.donnees == {"progress_pct": 40, "type_acte": "vente"} and recharge.version == 1
+
+    def test_compaction(self, supabase):
+        magasin = MagasinEtatAgent(seuil_compaction=3)
+        etat = magasin.charger(supabase, "conv-1")
+        for i in range(4):
+            etat.donnees["progress_pct"] = i
+            magasin.sauvegarder(supabase, etat)
+
+        conversation = supabase.tables["conversations"][0]
+        assert conversation["agent_state_version"] == 3
+        assert [d["version"] for d in supabase.tables["agent_state_deltas"]] == [3, 4]
+        # Un autre process (cache vide ou périmé) relit snapshot + patchs
+        assert MagasinEtatAgent().charger(supabase, "conv-1").donnees == {"progress_pct": 3}
+
+    def test_onglets_champs_disjoints(self, supabase):
+        onglet_a, onglet_b = MagasinEtatAgent(), MagasinEtatAgent()
+        etat_a = onglet_a.charger(supabase, "conv-1")
+        etat_b = onglet_b.charger(supabase, "conv-1")
+
+        etat_a.donnees["categorie_bien"] = "copropriete"
+        onglet_a.sauvegarder(supabase, etat_a)
+        etat_b.donnees["progress_pct"] = 30
+        assert onglet_b.sauvegarder(supabase, etat_b) == 2
+
+        assert MagasinEtatAgent().charger(supabase, "conv-1").donnees == {
+            "categorie_bien": "copropriete", "progress_pct": 30
+        }
+
+    def test_onglets_meme_champ(self, supabase):
+        magasin = MagasinEtatAgent()
+        etat_a = magasin.charger(supabase, "conv-1")
+        etat_b = magasin.charger(supabase, "conv-1")
+
+        etat_a.donnees["donnees_collectees"] = {"prix": 100}
+        magasin.sauvegarder(supabase, etat_a)
+        etat_b.donnees["donnees_collectees"] = {"prix": 200}
+
+        with pytest.raises(ConflitVersion):
+            magasin.sauvegarder(supabase, etat_b)
+        assert magasin.charger(supabase, "conv-1").donnees == {"donnees_collectees": {"prix": 100}}
+
+
+class ErreurPostgrest(Exception):
+    def __init__(self, message, code):
+        super().__init__(message)
+        self.code = code
+
+
+class TestRepliSnapshot:
+    """Snapshot complet seulement si la table des patchs n'existe pas."""
+
+    def _insertions_en_echec(self, monkeypatch, erreur):
+        execute = _Requete.execute
+
+        def execute_en_echec(requete):
+            if requete.table == "agent_state_deltas" and requete.action == "insert":
+                raise erreur
+            return execute(requete)
+
+        monkeypatch.setattr(_Requete, "execute", execute_en_echec)
+
+    def test_timeout_ne_reecrit_pas_le_snapshot(self, supabase, monkeypatch):
+        """p=30 en v1, puis p=40 pendant un timeout: rien n'est écrit, rien n'est perdu."""
+        magasin = MagasinEtatAgent()
+        etat = magasin.charger(supabase, "conv-1")
+        etat.donnees["p"] = 30
+        assert magasin.sauvegarder(supabase, etat) == 1
+
+        self._insertions_en_echec(monkeypatch, ErreurPostgrest("canceling statement due to statement timeout", "57014"))
+        etat.donnees["p"] = 40
+        with pytest.raises(ErreurPostgrest):
+            magasin.sauvegarder(supabase, etat)
+        assert etat.version == 1
+        assert supabase.tables["conversations"][0]["agent_state"] == {}
+
+        monkeypatch.undo()
+        assert magasin.sauvegarder(supabase, etat) == 2
+        assert MagasinEtatAgent().charger(supabase, "conv-1").donnees == {"p": 40}
+
+    def test_table_absente(self, supabase, monkeypatch):
+        """Table absente: snapshot versionné, les patchs antérieurs ne sont plus rejoués."""
+        magasin = MagasinEtatAgent()
+        etat = magasin.charger(supabase, "conv-1")
+        etat.donnees["p"] = 30
+        magasin.sauvegarder(supabase, etat)
+
+        self._insertions_en_echec(monkeypatch, ErreurPostgrest(
+            "Could not find the table 'public.agent_state_deltas' in the schema cache", "PGRST205"
+        ))
+        etat.donnees["p"] = 40
+        assert magasin.sauvegarder(supabase, etat) == 2
+
+        conversation = supabase.tables["conversations"][0]
+        assert conversation["agent_state"] == {"p": 40} and conversation["agent_state_version"] == 2
+        assert supabase.tables["agent_state_deltas"] == []
+        assert MagasinEtatAgent().charger(supabase, "conv-1").donnees == {"p": 40}
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+test_executeurs.py
+------------------
+Tests unitaires pour executeurs.py - Pools d'exécution bornés de l'API.
+"""
+
+import asyncio
+import os
+import threading
+import time
+
+import pytest
+
+from execution.utils.executeurs import PoolExecution, PoolSature
+
+
+# =============================================================================
+# TESTS ADMISSION / SATURATION
+# =============================================================================
+
+class TestPoolBorne:
+    """Tests de la capacité workers + file d'attente."""
+
+    def test_saturation_leve_pool_sature(self):
+        """Au-delà de workers + file_max, la soumission est refusée."""
+        pool = PoolExecution(io_workers=1, cpu_workers=0, file_max=1)
+        bloque = threading.Event()
+        try:
+            f1 = pool.io.soumettre(bloque.wait)
+            f2 = pool.io.soumettre(bloque.wait)
+            assert pool.est_sature()
+
+            with pytest.raises(PoolSature):
+                pool.io.soumettre(bloque.wait)
+
+            stats = pool.statistiques()
+            assert stats["sature"] is True
+            assert stats["io"]["en_cours"] == 1
+            assert stats["io"]["file_attente"] == 1
+            assert stats["io"]["rejetees"] == 1
+            assert stats["cpu"] is None
+
+            bloque.set()
+            f1.result(timeout=5)
+            f2.result(timeout=5)
+            time.sleep(0.05)
+
+            stats = pool.statistiques()
+            assert stats["sature"] is False
+            assert stats["io"]["en_cours"] == 0
+            assert stats["io"]["terminees"] == 2
+        finally:
+            bloque.set()
+            pool.arreter()
+
+    def test_exception_libere_la_place(self):
+        """Une tâche en erreur libère son slot."""
+        pool = PoolExecution(io_workers=1, cpu_workers=0, file_max=0)
+
+        def echoue():
+            raise ValueError("boom")
+
+        try:
+            with pytest.raises(ValueError):
+                asyncio.run(pool.executer_io(echoue))
+            assert asyncio.run(pool.executer_io(lambda x: x * 2, 21)) == 42
+        finally:
+            pool.arreter()
+
+
+# =============================================================================
+# TESTS BOUCLE ASYNCIO
+# =============================================================================
+
+class TestBoucleNonBloquee:
+    """Les appels bloquants ne gèlent plus la boucle asyncio."""
+
+    def test_boucle_reste_reactive(self):
+        """Un tick asyncio s'exécute pendant un appel bloquant de 300 ms."""
+        pool = PoolExecution(io_workers=2, cpu_workers=0, file_max=2)
+
+        async def scenario():
+            ticks = []
+
+            async def heartbeat():
+                for _ in range(5):
+                    ticks.append(time.perf_counter())
+                    await asyncio.sleep(0.02)
+
+            debut = time.perf_counter()
+            await asyncio.gather(pool.executer_io(time.sleep, 0.3), heartbeat())
+            return debut, ticks
+
+        try:
+            debut, ticks = asyncio.run(scenario())
+            assert len(ticks) == 5
+            assert ticks[-1] - debut < 0.3
+        finally:
+            pool.arreter()
+
+
+# =============================================================================
+# TESTS POOL CPU
+# =============================================================================
+
+class TestPoolCpu:
+    """Export DOCX délégué à un processus séparé."""
+
+    def test_executer_cpu_dans_autre_processus(self):
+        """executer_cpu tourne hors du processus courant."""
+        pool = PoolExecution(io_workers=1, cpu_workers=1, file_max=1)
+        try:
+            pid = asyncio.run(pool.executer_cpu(os.getpid))
+            assert pid != os.getpid()
+        finally:
+            pool.arreter()
+
+    def test_soumettre_processus(self):
+        """Depuis un thread: processus du pool partagé, pas de pool imbriqué, None si saturé."""
+        pool = PoolExecution(io_workers=1, cpu_workers=1, file_max=0)
+        try:
+            assert pool.processus_disponibles() == 1
+            future = pool.soumettre_processus(os.getenv, "NOTAIRE_CPU_WORKERS")
+            assert future.result(timeout=60) == "0"
+
+            bloque = pool.soumettre_processus(time.sleep, 0.5)
+            assert pool.soumettre_processus(os.getpid) is None
+            bloque.result(timeout=60)
+        finally:
+            pool.arreter()
+        assert PoolExecution(io_workers=1, cpu_workers=0).soumettre_processus(os.getpid) is None
+
+    def test_sans_pool_cpu_repli_sur_io(self):
+        """cpu_workers=0: executer_cpu passe par le pool I/O."""
+        pool = PoolExecution(io_workers=1, cpu_workers=0, file_max=1)
+        try:
+            assert asyncio.run(pool.executer_cpu(os.getpid)) == os.getpid()
+        finally:
+            pool.arreter()
+
+    def test_exporteur_docx(self, tmp_path):
+        """L'exporteur produit le DOCX et remonte les erreurs de la tâche."""
+        pytest.importorskip("docx")
+        chemin_md = tmp_path / "acte.md"
+        chemin_md.write_text("# PROMESSE\n\n## Désignation\n\nUn appartement.\n", encoding="utf-8")
+        chemin_docx = tmp_path / "acte.docx"
+
+        pool = PoolExecution(io_workers=1, cpu_workers=1, file_max=1)
+        try:
+            exporteur = pool.exporteur_docx()
+            assert exporteur(chemin_md, chemin_docx) == str(chemin_docx)
+            assert chemin_docx.stat().st_size > 0
+
+            # Une erreur de la tâche n'est pas prise pour une panne du pool
+            with pytest.raises(FileNotFoundError):
+                exporteur(tmp_path / "absent.md", tmp_path / "absent.docx")
+            assert pool.cpu is not None
+        finally:
+            pool.arreter()
@@ -320,6 +320,185 @@ l'acquéreur {MARQUEUR_VAR_START}Mme MARTIN Marie{MARQUEUR_VAR_END}.
             pytest.skip("python-docx non installé")
 
 
+class TestExportFlux:
+    """Tests du convertisseur incrémental (mode pipeline assemblage → DOCX)."""
+
+    CONTENU = (
+        "<!-- commentaire\nsur plusieurs lignes -->\n"
+        "# ACTE\n\n\n\n"
+        f"## IDENTIFICATION\n\nLe vendeur {MARQUEUR_VAR_START}M. DUPONT{MARQUEUR_VAR_END} vend.\n\n"
+        "| Section | N° |\n|---|---|\n| AB | 12 |\n"
+        "## PRIX\n\n- Prix payé comptant\n"
+        "<div class=\"personne\"><strong>Mme MARTIN</strong></div>\n"
+        "Fin"
+    )
+
+    @staticmethod
+    def _xml(doc):
+        import io
+        import zipfile
+        tampon = io.BytesIO()
+        doc.save(tampon)
+        return zipfile.ZipFile(tampon).read('word/document.xml')
+
+    @pytest.mark.parametrize("taille", [1, 3, 7, 64])
+    def test_flux_identique_au_contenu_complet(self, taille):
+        """Quel que soit le découpage, le DOCX est identique à l'export en un bloc."""
+        from execution.core.exporter_docx import (
+            _creer_document, convertir_contenu_vers_docx, ConvertisseurMarkdownDocx
+        )
+        reference = _creer_document()
+        convertir_contenu_vers_docx(self.CONTENU, reference)
+
+        doc = _creer_document()
+        convertisseur = ConvertisseurMarkdownDocx(doc)
+        for i in range(0, len(self.CONTENU), taille):
+            convertisseur.alimenter(self.CONTENU[i:i + taille])
+        convertisseur.terminer()
+
+        assert self._xml(doc) == self._xml(reference)
+
+    def test_progression_par_section(self, tmp_path):
+        """Une notification par section H2, et copie du markdown au fil de l'eau."""
+        from execution.core.exporter_docx import exporter_docx_flux
+        evenements = []
+        chemin_md = tmp_path / "acte.md"
+        chemin_docx = tmp_path / "acte.docx"
+
+        exporter_docx_flux(
+            iter(self.CONTENU.splitlines(keepends=True)), chemin_docx,
+            chemin_markdown=chemin_md, progression=evenements.append
+        )
+
+        assert [e['section'] for e in evenements] == ["IDENTIFICATION", "PRIX"]
+        assert [e['index'] for e in evenements] == [0, 1]
+        assert chemin_md.read_text(encoding='utf-8') == self.CONTENU
+        assert chemin_docx.stat().st_size > 0
+
+
+class TestCacheSections:
+    """Réexport incrémental: seules les sections H2 modifiées sont reconverties."""
+
+    CONTENU = TestExportFlux.CONTENU
+
+    @staticmethod
+    def _exporter(contenu, cache, zones_grisees=False, taille=None, progression=None):
+        from execution.core.exporter_docx import (
+            _creer_document, ContexteExport, ConvertisseurMarkdownDocx
+        )
+        doc = _creer_document()
+        convertisseur = ConvertisseurMarkdownDocx(
+            doc, ContexteExport(zones_grisees=zones_grisees), progression=progression, cache=cache
+        )
+        taille = taille or len(contenu)
+        for i in range(0, len(contenu), taille):
+            convertisseur.alimenter(contenu[i:i + taille])
+        convertisseur.terminer()
+        return doc, convertisseur.stats_sections
+
+    @pytest.mark.parametrize("taille", [5, 64, None])
+    def test_identique_sans_cache(self, taille):
+        """Premier export et réexport depuis le cache donnent le même DOCX."""
+        from execution.core.exporter_docx import (
+            _creer_document, convertir_contenu_vers_docx, CacheSectionsDocx
+        )
+        reference = _creer_document()
+        convertir_contenu_vers_docx(self.CONTENU, reference)
+        cache = CacheSectionsDocx()
+
+        froid, stats_froid = self._exporter(self.CONTENU, cache, zones_grisees=True, taille=taille)
+        chaud, stats_chaud = self._exporter(self.CONTENU, cache, zones_grisees=True, taille=taille)
+
+        assert TestExportFlux._xml(froid) == TestExportFlux._xml(reference)
+        assert TestExportFlux._xml(chaud) == TestExportFlux._xml(reference)
+        assert stats_froid == {'converties': 3, 'cache': 0}
+        # La section PRIX contient un bloc <div>: toujours reconvertie
+        assert stats_chaud == {'converties': 1, 'cache': 2}
+
+    def test_seule_section_modifiee_reconvertie(self):
+        """Correction d'un champ → une seule section repasse par python-docx."""
+        from execution.core.exporter_docx import (
+            _creer_document, convertir_contenu_vers_docx, CacheSectionsDocx
+        )
+        contenu = self.CONTENU.replace('<div class="personne"><strong>Mme MARTIN</strong></div>\n', '')
+        corrige = contenu.replace("M. DUPONT", "M. DUPOND")
+        cache = CacheSectionsDocx()
+        self._exporter(contenu, cache)
+
+        doc, stats = self._exporter(corrige, cache)
+
+        from execution.core.exporter_docx import ContexteExport
+        reference = _creer_document()
+        convertir_contenu_vers_docx(corrige, reference, ContexteExport(zones_grisees=False))
+        assert TestExportFlux._xml(doc) == TestExportFlux._xml(reference)
+        assert stats == {'converties': 1, 'cache': 2}
+        assert cache.stats == {'hits': 2, 'misses': 4}
+
+    def test_zones_grisees_dans_la_cle(self):
+        """Une section convertie avec zones grisées n'est pas servie sans."""
+        from execution.core.exporter_docx import CacheSectionsDocx
+        cache = CacheSectionsDocx()
+        self._exporter(self.CONTENU, cache, zones_grisees=True)
+        doc, stats = self._exporter(self.CONTENU, cache, zones_grisees=False)
+        assert stats['cache'] == 0
+        assert b'D9D9D9' not in TestExportFlux._xml(doc)
+
+    def test_progression_depuis_le_cache(self):
+        """Les sections reprises du cache sont aussi notifiées."""
+        from execution.core.exporter_docx import CacheSectionsDocx
+        cache = CacheSectionsDocx()
+        self._exporter(self.CONTENU, cache)
+        evenements = []
+        self._exporter(self.CONTENU, cache, progression=evenements.append)
+        assert [e['section'] for e in evenements] == ["IDENTIFICATION", "PRIX"]
+
+    def test_taille_bornee(self):
+        """Au-delà de max_sections, les sections les plus anciennes sont évincées."""
+        from execution.core.exporter_docx import CacheSectionsDocx
+        cache = CacheSectionsDocx(max_sections=2)
+        self._exporter("## A\n\nun\n## B\n\ndeux\n## C\n\ntrois\n", cache)
+        assert len(cache._entrees) == 2
+        _, stats = self._exporter("## A\n\nun\n", cache)
+        assert stats == {'converties': 1, 'cache': 0}
+
+
+class TestExportConcurrent:
+    """Exports parallèles: chaque export porte son propre ContexteExport."""
+
+    def test_exports_paralleles_zones_grisees_isolees(self, tmp_path):
+        """Exports avec et sans zones grisées en parallèle → aucune contamination."""
+        from concurrent.futures import ThreadPoolExecutor
+        import zipfile
+        from execution.core.exporter_docx import exporter_docx
+
+        source = tmp_path / "acte.md"
+        source.write_text(
+            "# ACTE\n\n" + "\n\n".join(
+                f"Le vendeur {MARQUEUR_VAR_START}M. DUPONT {i}{MARQUEUR_VAR_END} vend." for i in range(200)
+            ),
+            encoding='utf-8'
+        )
+
+        def exporter(i):
+            zones = i % 2 == 0
+            sortie = tmp_path / f"acte_{i}.docx"
+            exporter_docx(source, sortie, zones_grisees=zones)
+            xml = zipfile.ZipFile(sortie).read('word/document.xml').decode('utf-8')
+            return zones, xml.count('w:fill="D9D9D9"')
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            resultats = list(pool.map(exporter, range(8)))
+
+        for zones, nb_fonds_gris in resultats:
+            assert nb_fonds_gris == (200 if zones else 0)
+
+    def test_contexte_par_defaut(self):
+        """Sans contexte explicite, les zones grisées sont actives (trames originales)."""
+        from execution.core.exporter_docx import ContexteExport, ZONES_GRISEES_ACTIVES
+        assert ContexteExport().zones_grisees is ZONES_GRISEES_ACTIVES is True
+        assert ContexteExport(zones_grisees=False).first_page_header_content == []
+
+
 # =============================================================================
 # TESTS DE FORMATAGE
 # =============================================================================
@@ -1361,6 +1361,23 @@ class TestExceptionsSpecifiques:
         except Exception as e:
             pytest.skip(f"Génération échouée (dependencies?): {e}")
 
+    def test_generer_streaming(self, gestionnaire, donnees_standard, tmp_path):
+        """Mode streaming → MD et DOCX produits en un passage, progression par section."""
+        output_dir = tmp_path / "outputs"
+        sections = []
+        try:
+            resultat = gestionnaire.generer(
+                donnees_standard, output_dir=str(output_dir), force=True,
+                streaming=True, progression=sections.append
+            )
+        except Exception as e:
+            pytest.skip(f"Génération échouée (dependencies?): {e}")
+
+        assert resultat.succes
+        assert resultat.fichier_docx and Path(resultat.fichier_docx).exists()
+        assert Path(resultat.fichier_md).exists()
+        assert sections and sections[0]["index"] == 0
+
 
 if __name__ == "__main__":
     pytest.main([__file__, "-v", "-s"])
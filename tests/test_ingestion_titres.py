@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+test_ingestion_titres.py
+------------------------
+Tests unitaires pour ingestion_titres.py - Import en masse de titres.
+
+L'extraction PDF/DOCX est simulée; le gestionnaire tourne en mode hors-ligne
+ou avec un faux client Supabase.
+"""
+
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock
+
+import pytest
+
+import execution.gestionnaires.gestionnaire_titres as module_titres
+import execution.gestionnaires.ingestion_titres as module_ingestion
+import execution.utils.executeurs as executeurs
+import execution.utils.extraire_titre as module_extraction
+from execution.gestionnaires.gestionnaire_titres import GestionnaireTitres
+from execution.gestionnaires.ingestion_titres import IngestionTitres, lancer_job, lister_fichiers
+from execution.utils.executeurs import PoolExecution
+
+
+@pytest.fixture
+def extractions(monkeypatch):
+    """Extraction simulée: enregistre les fichiers traités."""
+    traites = []
+
+    def extraire(filepath, verbose=False):
+        traites.append(filepath.name)
+        if "illisible" in filepath.name:
+            raise ValueError("PDF corrompu")
+        return {"source": {}, "metadata": {"confiance": 0.8}, "bien": {"lots": []}}
+
+    monkeypatch.setattr(module_extraction, "extraire_donnees_titre", extraire)
+    return traites
+
+
+@pytest.fixture
+def gestionnaire(tmp_path, monkeypatch):
+    monkeypatch.setattr(module_titres, "PROJECT_ROOT", tmp_path)
+    monkeypatch.setattr(module_titres, "HAS_SUPABASE", False)
+    return GestionnaireTitres()
+
+
+@pytest.fixture
+def dossier(tmp_path):
+    source = tmp_path / "historique"
+    (source / "2012").mkdir(parents=True)
+    (source / "titre_a.pdf").write_bytes(b"%PDF titre A")
+    (source / "titre_b.docx").write_bytes(b"PK titre B")
+    (source / "2012" / "copie_a.pdf").write_bytes(b"%PDF titre A")
+    (source / "2012" / "notes.txt").write_text("pas un titre")
+    return source
+
+
+@pytest.fixture
+def pool_partage(monkeypatch):
+    """Pool partagé dont le pool CPU est fait de threads (pas de spawn en test)."""
+    pool = PoolExecution(io_workers=1, cpu_workers=2, file_max=0)
+    pool.cpu._fabrique = lambda: ThreadPoolExecutor(max_workers=2)
+    monkeypatch.setattr(executeurs, "_pool", pool)
+    yield pool
+    pool.arreter()
+
+
+def _ingestion(gestionnaire, tmp_path, **kwargs):
+    return IngestionTitres(gestionnaire, workers=1, dossier_journaux=tmp_path / "journaux", **kwargs)
+
+
+class TestIngestion:
+    """Déduplication, extraction et insertion."""
+
+    def test_import_dossier(self, gestionnaire, dossier, tmp_path, extractions):
+        evenements = list(_ingestion(gestionnaire, tmp_path).executer(dossier))
+
+        assert evenements[0] == {"type": "inventaire", "job_id": evenements[0]["job_id"], "total": 3}
+        statuts = {e["fichier"]: e["statut"] for e in evenements if e["type"] == "fichier"}
+        assert statuts == {"copie_a.pdf": "insere", "titre_a.pdf": "doublon", "titre_b.docx": "insere"}
+        # Doublon détecté avant extraction
+        assert sorted(extractions) == ["copie_a.pdf", "titre_b.docx"]
+        assert evenements[-1]["stats"]["inseres"] == 2
+        assert len(gestionnaire.lister_titres()) == 2
+
+    def test_titre_deja_en_base(self, gestionnaire, dossier, tmp_path, extractions):
+        """Un titre importé avant (upload unitaire) n'est pas réextrait."""
+        list(_ingestion(gestionnaire, tmp_path).executer(dossier / "titre_a.pdf"))
+        extractions.clear()
+
+        evenements = list(_ingestion(gestionnaire, tmp_path).executer(dossier))
+
+        assert extractions == ["titre_b.docx"]
+        assert evenements[-1]["stats"]["doublons"] == 2
+
+    def test_reprise_apres_interruption(self, gestionnaire, dossier, tmp_path, extractions):
+        (dossier / "titre_c.pdf").write_bytes(b"%PDF titre C")
+        premier = _ingestion(gestionnaire, tmp_path, taille_lot=1).executer(dossier)
+        for evenement in premier:
+            if evenement.get("statut") == "insere":
+                break
+        premier.close()  # interruption après le premier titre inséré (copie_a.pdf)
+        assert extractions == ["copie_a.pdf"]
+        extractions.clear()
+        gestionnaire._offline_storage.clear()  # nouveau process: seul le journal compte
+
+        evenements = list(_ingestion(gestionnaire, tmp_path, taille_lot=1).executer(dossier))
+
+        stats = evenements[-1]["stats"]
+        assert sorted(extractions) == ["titre_b.docx", "titre_c.pdf"]
+        assert stats["deja_traites"] == 2  # copie_a.pdf et son double titre_a.pdf
+        assert stats["inseres"] == 2
+
+    def test_erreurs_reessayees(self, gestionnaire, tmp_path, extractions):
+        source = tmp_path / "lot"
+        source.mkdir()
+        (source / "illisible.pdf").write_bytes(b"%PDF ???")
+
+        evenements = list(_ingestion(gestionnaire, tmp_path).executer(source))
+        assert evenements[-1]["stats"]["erreurs"] == 1
+        list(_ingestion(gestionnaire, tmp_path).executer(source))
+        assert extractions == ["illisible.pdf", "illisible.pdf"]
+
+    def test_doublon_limite_a_l_etude(self, gestionnaire, dossier, tmp_path, extractions):
+        """Le même titre importé par une autre étude n'est pas un doublon."""
+        list(_ingestion(gestionnaire, tmp_path, etude_id="etude-a").executer(dossier / "titre_a.pdf"))
+        extractions.clear()
+
+        evenements = list(_ingestion(gestionnaire, tmp_path, etude_id="etude-b").executer(dossier / "titre_a.pdf"))
+
+        assert extractions == ["titre_a.pdf"]
+        assert evenements[-1]["stats"]["inseres"] == 1
+        etudes = sorted(t.etude_id for t in gestionnaire.lister_titres())
+        assert etudes == ["etude-a", "etude-b"]
+
+    def test_pool_partage(self, gestionnaire, dossier, tmp_path, extractions, pool_partage):
+        """L'extraction passe par le pool partagé, sans pool propre à l'import."""
+        evenements = list(IngestionTitres(gestionnaire, workers=2, dossier_journaux=tmp_path / "j")
+                          .executer(dossier))
+
+        assert evenements[-1]["stats"]["inseres"] == 2
+        assert pool_partage.cpu.statistiques()["terminees"] == 2
+
+    def test_pool_sature_extrait_sur_place(self, gestionnaire, dossier, tmp_path, extractions, pool_partage,
+                                           monkeypatch):
+        monkeypatch.setattr(pool_partage.cpu, "admises", pool_partage.cpu.capacite)
+
+        evenements = list(IngestionTitres(gestionnaire, dossier_journaux=tmp_path / "j").executer(dossier))
+
+        assert evenements[-1]["stats"]["inseres"] == 2
+        assert pool_partage.cpu.statistiques()["rejetees"] == 2
+
+
+class TestSuppressionSecurisee:
+    """Fichiers extraits et archive téléversée passent par secure_delete."""
+
+    def test_extraction_et_archive(self, gestionnaire, dossier, tmp_path, extractions, monkeypatch):
+        dossiers, fichiers = [], []
+        monkeypatch.setattr(module_ingestion, "secure_delete_dir", dossiers.append)
+        monkeypatch.setattr(module_ingestion, "secure_delete_file", fichiers.append)
+        monkeypatch.setattr(module_ingestion, "DOSSIER_JOURNAUX", tmp_path / "journaux")
+        monkeypatch.setattr(module_titres, "GestionnaireTitres", lambda: gestionnaire)
+        archive = tmp_path / "upload.zip"
+        with zipfile.ZipFile(archive, "w") as zf:
+            zf.write(dossier / "titre_b.docx", "titre_b.docx")
+
+        job_id = lancer_job(archive, etude_id="etude-a", workers=1, supprimer_source=True)
+        job = module_ingestion.get_job(job_id)
+        for _ in range(200):
+            if job["etat"] != "en_cours":
+                break
+            time.sleep(0.01)
+
+        assert job["etat"] == "termine"
+        assert dossiers == [tmp_path / "journaux" / f"{job_id}_archive"]
+        assert fichiers == [archive]
+
+
+class TestJobs:
+    """Les jobs terminés ne restent pas indéfiniment en mémoire."""
+
+    def test_eviction_ttl_et_plafond(self, monkeypatch):
+        maintenant = time.monotonic()
+        jobs = {
+            "en-cours": {"job_id": "en-cours", "etat": "en_cours"},
+            "expire": {"job_id": "expire", "etat": "termine", "fin_ts": maintenant - 7200},
+            "ancien": {"job_id": "ancien", "etat": "erreur", "fin_ts": maintenant - 20},
+            "recent": {"job_id": "recent", "etat": "termine", "fin_ts": maintenant - 10},
+        }
+        monkeypatch.setattr(module_ingestion, "_jobs", jobs)
+        monkeypatch.setattr(module_ingestion, "DUREE_JOBS_TERMINES", 3600)
+        monkeypatch.setattr(module_ingestion, "JOBS_TERMINES_MAX", 1)
+
+        assert module_ingestion.get_job("expire") is None
+        assert sorted(jobs) == ["en-cours", "recent"]
+
+
+class TestSources:
+    """Dossiers et archives."""
+
+    def test_archive_zip(self, dossier, tmp_path):
+        archive = tmp_path / "titres.zip"
+        with zipfile.ZipFile(archive, "w") as zf:
+            zf.write(dossier / "titre_a.pdf", "etude/titre_a.pdf")
+            zf.write(dossier / "titre_b.docx", "etude/titre_b.docx")
+        fichiers = lister_fichiers(archive, tmp_path / "extrait")
+        assert [f.name for f in fichiers] == ["titre_a.pdf", "titre_b.docx"]
+
+    def test_archive_chemin_hors_dossier(self, tmp_path):
+        archive = tmp_path / "piege.zip"
+        with zipfile.ZipFile(archive, "w") as zf:
+            zf.writestr("../../evasion.pdf", b"%PDF")
+        with pytest.raises(ValueError, match="hors archive"):
+            lister_fichiers(archive, tmp_path / "extrait")
+
+    def test_zip_bomb(self, tmp_path, monkeypatch):
+        """Taille décompressée et nombre d'entrées vérifiés avant extraction."""
+        archive = tmp_path / "bombe.zip"
+        with zipfile.ZipFile(archive, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+            zf.writestr("gros.pdf", b"\0" * 1_000_000)
+            zf.writestr("petit.pdf", b"%PDF")
+        assert archive.stat().st_size < 10_000
+
+        monkeypatch.setattr(module_ingestion, "TAILLE_MAX_DECOMPRESSEE", 500_000)
+        with pytest.raises(ValueError, match="décompressés"):
+            lister_fichiers(archive, tmp_path / "extrait")
+        assert not any((tmp_path / "extrait").iterdir())
+
+        monkeypatch.setattr(module_ingestion, "TAILLE_MAX_DECOMPRESSEE", 2_000_000)
+        monkeypatch.setattr(module_ingestion, "ENTREES_MAX_ARCHIVE", 1)
+        with pytest.raises(ValueError, match="entrées"):
+            lister_fichiers(archive, tmp_path / "extrait")
+
+
+class TestInsertionParLots:
+    """Insertion Supabase en lots, rejeu ligne à ligne si un lot échoue."""
+
+    def test_lots(self, gestionnaire):
+        client = MagicMock()
+        client.table.return_value.insert.side_effect = lambda lignes: MagicMock(
+            execute=lambda: MagicMock(data=[{"id": f"id-{l['reference']}", "reference": l["reference"]}
+                                            for l in lignes])
+        )
+        gestionnaire._offline_mode = False
+        gestionnaire.client = client
+        titres = [module_titres.TitrePropriete(reference=f"T{i}") for i in range(5)]
+
+        ids = gestionnaire.sauvegarder_titres(titres, taille_lot=2, etude_id="etude-1")
+
+        assert ids == [f"id-T{i}" for i in range(5)]
+        tailles = [len(c.args[0]) for c in client.table.return_value.insert.call_args_list]
+        assert tailles == [2, 2, 1]
+        assert client.table.return_value.insert.call_args_list[0].args[0][0]["etude_id"] == "etude-1"
+
+    def test_rejeu_ligne_a_ligne_garde_l_etude(self, gestionnaire):
+        """Un lot refusé est rejoué titre par titre, toujours rattaché à l'étude."""
+        client = MagicMock()
+        table = client.table.return_value
+
+        def inserer(donnees):
+            if isinstance(donnees, list):
+                return MagicMock(execute=MagicMock(side_effect=RuntimeError("duplicate key")))
+            return MagicMock(execute=lambda: MagicMock(data=[{"id": f"id-{donnees['reference']}"}]))
+
+        table.insert.side_effect = inserer
+        table.select.return_value.eq.return_value.eq.return_value.execute.return_value = MagicMock(data=[])
+        gestionnaire._offline_mode = False
+        gestionnaire.client = client
+        titres = [module_titres.TitrePropriete(reference=f"T{i}") for i in range(2)]
+
+        ids = gestionnaire.sauvegarder_titres(titres, etude_id="etude-1")
+
+        assert ids == ["id-T0", "id-T1"]
+        lignes = [c.args[0] for c in table.insert.call_args_list if isinstance(c.args[0], dict)]
+        assert [l["etude_id"] for l in lignes] == ["etude-1", "etude-1"]
+        table.select.return_value.eq.return_value.eq.assert_called_with("etude_id", "etude-1")
+
+    def test_recherche_par_hash_filtree_par_etude(self, gestionnaire):
+        client = MagicMock()
+        requete = client.table.return_value.select.return_value.eq.return_value
+        requete.eq.return_value.limit.return_value.execute.return_value = MagicMock(data=[])
+        gestionnaire._offline_mode = False
+        gestionnaire.client = client
+
+        assert gestionnaire._trouver_par_hash("abc", etude_id="etude-1") is None
+        requete.eq.assert_called_once_with("etude_id", "etude-1")
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+test_miroir_cadastre.py
+-----------------------
+Tests unitaires pour miroir_cadastre.py - Miroir local Etalab/BAN.
+
+Les extraits départementaux sont simulés par de petits fichiers gzip au
+format Etalab (FeatureCollection) et BAN (CSV ';').
+"""
+
+import gzip
+import io
+import json
+from unittest.mock import patch
+
+import pytest
+
+from execution.services.cadastre_service import CacheLocal, CadastreService
+from execution.services.miroir_cadastre import (
+    MiroirCadastre,
+    analyser_adresse,
+    iterer_features,
+)
+
+CARRE = {"type": "Polygon", "coordinates": [[[4.93, 45.71], [4.94, 45.71], [4.94, 45.72], [4.93, 45.71]]]}
+
+PARCELLES = {
+    "type": "FeatureCollection",
+    "features": [
+        {"type": "Feature", "id": "692900000AH0068", "geometry": CARRE,
+         "properties": {"id": "692900000AH0068", "commune": "69290", "prefixe": "000",
+                        "section": "AH", "numero": "68", "contenance": 2207}},
+        {"type": "Feature", "id": "69290000000A0012", "geometry": CARRE,
+         "properties": {"id": "692900000 0A0012", "commune": "69290", "prefixe": "000",
+                        "section": "0A", "numero": "12", "contenance": 530}},
+    ],
+}
+
+ADRESSES = (
+    "id;id_fantoir;numero;rep;nom_voie;code_postal;code_insee;nom_commune;"
+    "code_insee_ancienne_commune;nom_ancienne_commune;x;y;lon;lat\n"
+    "69290_1;;170;;Rue Joliot-Curie;69800;69290;Saint-Priest;;;0;0;4.9321;45.7012\n"
+    "69290_2;;12;bis;Avenue de la Paix;69800;69290;Saint-Priest;;;0;0;4.9400;45.7100\n"
+)
+
+
+@pytest.fixture
+def miroir(tmp_path):
+    fichier_parcelles = tmp_path / "cadastre-69-parcelles.json.gz"
+    with gzip.open(fichier_parcelles, "wt", encoding="utf-8") as f:
+        json.dump(PARCELLES, f)
+    fichier_adresses = tmp_path / "adresses-69.csv.gz"
+    with gzip.open(fichier_adresses, "wt", encoding="utf-8") as f:
+        f.write(ADRESSES)
+
+    m = MiroirCadastre(tmp_path / "miroir.db")
+    assert m.importer_parcelles(fichier_parcelles) == 2
+    assert m.importer_adresses(fichier_adresses) == 4  # 2 adresses + 2 voies
+    return m
+
+
+class TestLecture:
+    """Analyse des extraits et des adresses libres."""
+
+    @pytest.mark.parametrize("taille_bloc", [7, 64, 1 << 20])
+    def test_features_en_flux(self, taille_bloc):
+        """FeatureCollection lue par blocs, sans chargement complet."""
+        flux = io.StringIO(json.dumps(PARCELLES, indent=1))
+        ids = [f["id"] for f in iterer_features(flux, taille_bloc=taille_bloc)]
+        assert ids == ["692900000AH0068", "69290000000A0012"]
+
+    def test_features_une_par_ligne(self):
+        lignes = "\n".join(json.dumps(f) for f in PARCELLES["features"])
+        assert len(list(iterer_features(io.StringIO(lignes), taille_bloc=16))) == 2
+
+    def test_analyser_adresse(self):
+        assert analyser_adresse("12 bis av. de la Paix, 69800 Saint-Priest") == (
+            "69800", "12", "bis", "avenue paix"
+        )
+        assert analyser_adresse("12B Avenue de la Paix 69800") == ("69800", "12", "bis", "avenue paix")
+        assert analyser_adresse("rue sans code postal, Lyon") is None
+
+
+class TestConsultation:
+    """Parcelles et adresses servies par le miroir."""
+
+    def test_parcelle(self, miroir):
+        """Numéro et section normalisés comme CadastreService."""
+        parcelle = miroir.chercher_parcelle("69290", "ah", "0068")
+        assert parcelle["numero"] == "0068"
+        assert parcelle["surface_m2"] == 2207
+        assert parcelle["geometry"] == CARRE
+        assert parcelle["code_dep"] == "69" and parcelle["code_com"] == "290"
+        assert miroir.chercher_parcelle("69290", "A", "12")["surface_m2"] == 530
+        assert miroir.chercher_parcelle("69290", "ZZ", "1") is None
+
+    def test_geocodage(self, miroir):
+        """Accents, tirets et abréviations n'empêchent pas la correspondance."""
+        geo = miroir.geocoder("170 rue Joliot Curie 69800 Saint-Priest")
+        assert geo["code_insee"] == "69290"
+        assert (geo["latitude"], geo["longitude"]) == (45.7012, 4.9321)
+        assert geo["score"] == 1.0
+
+        assert miroir.geocoder("12 bis av de la paix 69800")["latitude"] == 45.71
+        # Numéro inconnu: repli sur la voie
+        assert miroir.geocoder("3 rue Joliot-Curie 69800 Saint-Priest")["score"] < 1.0
+        assert miroir.geocoder("1 rue Inconnue 69800 Saint-Priest") is None
+
+    def test_communes_associees(self, tmp_path):
+        """Même section/numéro sous deux préfixes: deux parcelles distinctes."""
+        associee = json.loads(json.dumps(PARCELLES["features"][0]))
+        associee["properties"].update(prefixe="001", contenance=999)
+        fichier = tmp_path / "parcelles.json"
+        fichier.write_text(json.dumps({"type": "FeatureCollection",
+                                       "features": PARCELLES["features"] + [associee]}), encoding="utf-8")
+        m = MiroirCadastre(tmp_path / "associees.db")
+
+        assert m.importer_parcelles(fichier) == 3
+        assert m.chercher_parcelle("69290", "AH", "68", prefixe="000")["surface_m2"] == 2207
+        assert m.chercher_parcelle("69290", "AH", "68", prefixe="1")["surface_m2"] == 999
+        # Sans préfixe: ambigu, le réseau tranche
+        assert m.chercher_parcelle("69290", "AH", "68") is None
+        assert m.chercher_parcelle("69290", "A", "12")["prefixe"] == "000"
+
+    def test_ancien_schema_sans_prefixe(self, tmp_path):
+        """Une base sans colonne prefixe est vidée de ses parcelles (à réimporter)."""
+        import sqlite3
+        chemin = tmp_path / "ancien.db"
+        with sqlite3.connect(chemin) as conn:
+            conn.executescript("""
+                CREATE TABLE parcelles (code_insee TEXT, section TEXT, numero TEXT,
+                    contenance INTEGER, geometrie BLOB, PRIMARY KEY (code_insee, section, numero));
+                INSERT INTO parcelles VALUES ('69290', 'AH', '0068', 1, NULL);
+            """)
+        m = MiroirCadastre(chemin)
+        assert m.statistiques()["parcelles"] == 0
+        assert m.chercher_parcelle("69290", "AH", "68") is None
+
+    def test_sans_geometries(self, tmp_path):
+        fichier = tmp_path / "parcelles.json"
+        fichier.write_text(json.dumps(PARCELLES), encoding="utf-8")
+        m = MiroirCadastre(tmp_path / "minimal.db")
+        m.importer_parcelles(fichier, geometries=False)
+        assert m.chercher_parcelle("69290", "AH", "68")["geometry"] is None
+
+
+class TestServiceHorsLigne:
+    """CadastreService répond depuis le miroir, réseau uniquement en cas d'absence."""
+
+    def test_enrichissement_sans_reseau(self, miroir, tmp_path):
+        svc = CadastreService(miroir=miroir)
+        svc.cache = CacheLocal(cache_dir=tmp_path / "cache", ttl_heures=1)
+        donnees = {"bien": {
+            "adresse": {"numero": "170", "voie": "rue Joliot Curie", "code_postal": "69800",
+                        "ville": "Saint-Priest"},
+            "cadastre": [{"section": "AH", "numero": "0068"}, {"section": "A", "numero": "12"}],
+        }}
+
+        with patch.object(svc.session, "get", side_effect=AssertionError("appel réseau")):
+            resultat = svc.enrichir_cadastre(donnees)
+
+        assert resultat["rapport"]["parcelles_validees"] == 2
+        parcelles = resultat["donnees"]["bien"]["cadastre"]
+        assert [p["source"] for p in parcelles] == ["miroir_etalab"] * 2
+        assert parcelles[0]["surface_m2"] == 2207
+
+    def test_repli_sur_la_voie_va_sur_le_reseau(self, miroir, tmp_path):
+        """Numéro inconnu du miroir: la position d'un autre numéro n'est pas retenue."""
+        svc = CadastreService(miroir=miroir)
+        svc.cache = CacheLocal(cache_dir=tmp_path / "cache", ttl_heures=1)
+        with patch.object(svc.session, "get", side_effect=ConnectionError("hors ligne")) as get:
+            assert svc.geocoder_adresse("3 rue Joliot-Curie 69800 Saint-Priest") is None
+            assert svc.geocoder_adresse("170 rue Joliot-Curie 69800 Saint-Priest")["score"] == 1.0
+        assert get.call_count == 1
+
+    def test_absence_va_sur_le_reseau(self, miroir, tmp_path):
+        svc = CadastreService(miroir=miroir)
+        svc.cache = CacheLocal(cache_dir=tmp_path / "cache", ttl_heures=1)
+        with patch.object(svc.session, "get", side_effect=ConnectionError("hors ligne")) as get:
+            assert svc.chercher_parcelle("75102", "AB", "145") is None
+        assert get.call_count == 1
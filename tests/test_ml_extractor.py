@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+test_ml_extractor.py
+--------------------
+Tests unitaires pour ml_extractor.py - Base d'apprentissage SQLite.
+"""
+
+import json
+import threading
+
+from execution.extraction.ml_extractor import BaseApprentissage, MLExtractor
+
+
+def _valider(ml, champ="bien.adresse.code_postal", extrait="6900", corrige="69001", pattern="cp"):
+    ml.valider_extraction("EXT-1", champ, extrait, corrige, "situé à Lyon 6900", pattern)
+
+
+class TestBaseApprentissage:
+    """Mises à jour incrémentales, lecture indexée, persistance."""
+
+    def test_apprentissage_et_correction(self, tmp_path):
+        ml = MLExtractor(BaseApprentissage(tmp_path))
+        assert ml.obtenir_confiance_pattern("cp", "bien.adresse.code_postal") == 0.5
+
+        _valider(ml)
+        assert ml.corriger_valeur("6900", "bien.adresse.code_postal") == ("6900", False)
+        _valider(ml)
+        _valider(ml, corrige=None, extrait="69001")
+
+        assert ml.corriger_valeur("6900", "bien.adresse.code_postal") == ("69001", True)
+        assert ml.corriger_valeur("6900", "autre.champ") == ("6900", False)
+        assert ml.obtenir_confiance_pattern("cp", "bien.adresse.code_postal") == 1 / 3
+
+    def test_persistance_entre_instances(self, tmp_path):
+        _valider(MLExtractor(BaseApprentissage(tmp_path)))
+
+        base = BaseApprentissage(tmp_path)
+
+        assert len(base.extractions) == 1
+        assert base.extractions[0].valeur_corrigee == "69001"
+        assert base.stats == {
+            'total_extractions': 1, 'extractions_correctes': 0,
+            'par_champ': {'bien.adresse.code_postal': {'total': 1, 'correctes': 0}}
+        }
+        assert base.pattern("cp", "bien.adresse.code_postal").exemples_echecs == ["situé à Lyon 6900"]
+
+    def test_migration_json(self, tmp_path):
+        """Les anciens fichiers JSON sont importés une seule fois."""
+        (tmp_path / "patterns_appris.json").write_text(json.dumps([
+            {"pattern": "cp", "champ": "cp", "nb_succes": 3, "nb_echecs": 1,
+             "derniere_utilisation": "", "exemples_succes": [], "exemples_echecs": []}
+        ]), encoding="utf-8")
+        (tmp_path / "corrections_frequentes.json").write_text(json.dumps([
+            {"valeur_incorrecte": "Lyn", "valeur_correcte": "Lyon", "champ": "ville", "nb_occurrences": 4}
+        ]), encoding="utf-8")
+        (tmp_path / "stats_extraction.json").write_text(json.dumps({
+            "total_extractions": 4, "extractions_correctes": 3,
+            "par_champ": {"cp": {"total": 4, "correctes": 3}}
+        }), encoding="utf-8")
+
+        ml = MLExtractor(BaseApprentissage(tmp_path))
+        assert ml.obtenir_confiance_pattern("cp", "cp") == 0.75
+        assert ml.corriger_valeur("Lyn", "ville") == ("Lyon", True)
+        ml.valider_extraction("EXT-2", "cp", "69001", None, "", "cp")
+
+        base = BaseApprentissage(tmp_path)
+        assert base.pattern("cp", "cp").nb_succes == 4
+        assert base.stats['total_extractions'] == 5
+
+    def test_ecritures_concurrentes(self, tmp_path):
+        """Aucune mise à jour perdue entre workers (une instance chacun)."""
+        def travailleur():
+            ml = MLExtractor(BaseApprentissage(tmp_path))
+            for _ in range(20):
+                _valider(ml)
+
+        threads = [threading.Thread(target=travailleur) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        base = BaseApprentissage(tmp_path)
+        assert base.stats['total_extractions'] == 80
+        assert base.pattern("cp", "bien.adresse.code_postal").nb_echecs == 80
+        assert base.correction("6900", "bien.adresse.code_postal").nb_occurrences == 80
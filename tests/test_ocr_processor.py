@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+test_ocr_processor.py
+---------------------
+Tests unitaires pour ocr_processor.py - OCR page par page, parallèle et en cache.
+
+pdf2image/Tesseract ne sont pas nécessaires: rastérisation et reconnaissance
+sont simulées.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import execution.extraction.ocr_processor as module_ocr
+import execution.utils.executeurs as executeurs
+from execution.extraction.ocr_processor import CacheOCR, OCRProcessor
+from execution.utils.executeurs import PoolExecution
+
+
+@pytest.fixture
+def pdf(tmp_path):
+    chemin = tmp_path / "titre.pdf"
+    chemin.write_bytes(b"%PDF-1.4 titre de propriete scanne")
+    return chemin
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = CacheOCR(tmp_path / "cache_ocr")
+    monkeypatch.setenv("NOTAIRE_CACHE_OCR", "1")
+    monkeypatch.setattr(module_ocr, "_cache_ocr", cache)
+    return cache
+
+
+@pytest.fixture
+def pool_partage(monkeypatch):
+    """Pool partagé dont le pool CPU est fait de threads (pas de spawn en test)."""
+    pool = PoolExecution(io_workers=1, cpu_workers=4, file_max=0)
+    pool.cpu._fabrique = lambda: ThreadPoolExecutor(max_workers=4)
+    monkeypatch.setattr(executeurs, "_pool", pool)
+    yield pool
+    pool.arreter()
+
+
+def _processeur(monkeypatch, nb_pages=5, workers=1):
+    """Processeur dont la rastérisation et l'OCR sont simulés et comptés."""
+    processeur = OCRProcessor(workers=workers, verifier_dependances=False)
+    rasterisees = []
+
+    def rasteriser(pdf_path, numero):
+        rasterisees.append(numero)
+        return f"image-{numero}"
+
+    monkeypatch.setattr(processeur, "nombre_pages", lambda pdf_path: nb_pages)
+    monkeypatch.setattr(processeur, "rasteriser_page", rasteriser)
+    monkeypatch.setattr(processeur, "extraire_texte_page",
+                        lambda image, pretraitement=True: (f"texte {image}", 0.9))
+    return processeur, rasterisees
+
+
+def _ocr_lent(pdf_path, numero, langue, dpi, tesseract_path, pretraitement):
+    """Worker simulé: la page 1 est la plus lente."""
+    time.sleep(0.05 / numero)
+    return numero, f"page {numero}", 0.8
+
+
+class TestFlux:
+    """Rastérisation paresseuse et rendu au fil de l'eau."""
+
+    def test_seules_les_pages_demandees(self, monkeypatch, pdf):
+        """Les pages non sélectionnées ne sont jamais rastérisées."""
+        processeur, rasterisees = _processeur(monkeypatch, nb_pages=60)
+        pages = list(processeur.traiter_pdf_flux(str(pdf), pages=[3, 1, 99], utiliser_cache=False))
+
+        assert rasterisees == [1, 3]
+        assert [(p.numero, p.texte) for p in pages] == [(1, "texte image-1"), (3, "texte image-3")]
+
+    def test_pool_rend_dans_l_ordre_d_achevement(self, monkeypatch, pdf, pool_partage):
+        """Avec plusieurs workers, chaque page est rendue dès qu'elle est prête."""
+        monkeypatch.setattr(module_ocr, "_ocr_page_worker", _ocr_lent)
+        processeur, _ = _processeur(monkeypatch, nb_pages=4, workers=4)
+
+        numeros = [p.numero for p in processeur.traiter_pdf_flux(str(pdf), utiliser_cache=False)]
+
+        assert sorted(numeros) == [1, 2, 3, 4]
+        assert numeros[-1] == 1
+        assert pool_partage.cpu.statistiques()["terminees"] == 4
+
+    def test_pool_sature_traite_sur_place(self, monkeypatch, pdf, pool_partage):
+        """Pool partagé plein (autres ingestions): les pages sont faites dans le thread courant."""
+        monkeypatch.setattr(pool_partage.cpu, "admises", pool_partage.cpu.capacite)
+        processeur, rasterisees = _processeur(monkeypatch, nb_pages=3, workers=0)
+
+        pages = list(processeur.traiter_pdf_flux(str(pdf), utiliser_cache=False))
+
+        assert [p.numero for p in pages] == [1, 2, 3] and rasterisees == [1, 2, 3]
+        assert pool_partage.cpu.statistiques()["rejetees"] == 3
+
+    def test_traiter_pdf_trie_les_pages(self, monkeypatch, pdf, pool_partage):
+        monkeypatch.setattr(module_ocr, "_ocr_page_worker", _ocr_lent)
+        monkeypatch.setattr(module_ocr, "get_cache_ocr", lambda: None)
+        processeur, _ = _processeur(monkeypatch, nb_pages=3, workers=3)
+        monkeypatch.setattr(OCRProcessor, "est_disponible", property(lambda self: True))
+        monkeypatch.setattr(processeur, "detecter_pdf_scanne", lambda pdf_path: (True, "scanné"))
+
+        resultat = processeur.traiter_pdf(str(pdf))
+
+        assert [p.numero for p in resultat.pages] == [1, 2, 3]
+        assert resultat.texte_complet == "page 1\n\npage 2\n\npage 3"
+        assert resultat.confiance_moyenne == pytest.approx(0.8)
+
+
+class TestCache:
+    """Résultats conservés par (empreinte du fichier, page, paramètres)."""
+
+    def test_relance_gratuite(self, monkeypatch, pdf, cache):
+        processeur, rasterisees = _processeur(monkeypatch, nb_pages=3)
+        list(processeur.traiter_pdf_flux(str(pdf), pages=[1, 2]))
+        assert rasterisees == [1, 2]
+
+        pages = list(processeur.traiter_pdf_flux(str(pdf)))
+
+        assert rasterisees == [1, 2, 3]  # seule la page 3 était inconnue
+        assert [p.numero for p in pages] == [1, 2, 3]
+        assert cache.stats["hits"] == 2
+
+    def test_reupload_sous_un_autre_nom(self, monkeypatch, pdf, cache, tmp_path):
+        """La clé est le contenu du fichier, pas son chemin."""
+        processeur, rasterisees = _processeur(monkeypatch, nb_pages=2)
+        list(processeur.traiter_pdf_flux(str(pdf)))
+        copie = tmp_path / "upload_42.pdf"
+        copie.write_bytes(pdf.read_bytes())
+
+        assert [p.texte for p in processeur.traiter_pdf_flux(str(copie))] == [
+            "texte image-1", "texte image-2"
+        ]
+        assert rasterisees == [1, 2]
+
+    def test_echec_non_mis_en_cache(self, monkeypatch, pdf, cache):
+        """Une page en échec (Tesseract absent...) est retentée au passage suivant."""
+        processeur, rasterisees = _processeur(monkeypatch, nb_pages=2)
+        monkeypatch.setattr(processeur, "extraire_texte_page",
+                            lambda image, pretraitement=True: ("", 0.0) if image == "image-2"
+                            else (f"texte {image}", 0.9))
+        list(processeur.traiter_pdf_flux(str(pdf)))
+
+        monkeypatch.setattr(processeur, "extraire_texte_page",
+                            lambda image, pretraitement=True: (f"texte {image}", 0.9))
+        pages = list(processeur.traiter_pdf_flux(str(pdf)))
+
+        assert rasterisees == [1, 2, 2]
+        assert [p.texte for p in sorted(pages, key=lambda p: p.numero)] == ["texte image-1", "texte image-2"]
+
+    def test_parametres_distincts(self, monkeypatch, pdf, cache):
+        """Changer de DPI ou de langue refait l'OCR."""
+        processeur, rasterisees = _processeur(monkeypatch, nb_pages=1)
+        list(processeur.traiter_pdf_flux(str(pdf)))
+        processeur.dpi = 200
+        list(processeur.traiter_pdf_flux(str(pdf)))
+
+        assert rasterisees == [1, 1]
+
+    def test_expiration_et_purge(self, monkeypatch, pdf, cache):
+        """Les pages expirent après le TTL; purger() et supprimer() les effacent."""
+        processeur, rasterisees = _processeur(monkeypatch, nb_pages=2)
+        list(processeur.traiter_pdf_flux(str(pdf)))
+        conn = cache._connexion()
+        assert conn.execute("PRAGMA secure_delete").fetchone()[0] == 1
+
+        conn.execute("UPDATE pages SET cree_a = cree_a - ? WHERE page = 1", (cache.ttl_secondes + 60,))
+        list(processeur.traiter_pdf_flux(str(pdf)))
+        assert rasterisees == [1, 2, 1]
+
+        conn.execute("UPDATE pages SET cree_a = 0 WHERE page = 2")
+        assert cache.purger() == 1
+        assert cache.supprimer(module_ocr.empreinte_fichier(str(pdf))) == 1
+        assert conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0] == 0
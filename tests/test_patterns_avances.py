@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+test_patterns_avances.py
+------------------------
+Tests unitaires pour patterns_avances.py - Tables compilées et littéraux requis.
+"""
+
+import re
+
+import pytest
+
+from execution.extraction.patterns_avances import (
+    _TABLES,
+    _TITRE_EXEMPLE,
+    PatternCompile,
+    PatternsAvances,
+    benchmark,
+)
+
+TEXTES = [
+    _TITRE_EXEMPLE * 3,
+    "Madame Sabah KSOURI, célibataire, pacsée avec Jean MARTIN. CRPCEN : 69123",
+    "ſection AB — épOUX communs en BIENS, divorcée, veuve",
+    "",
+]
+
+
+class TestMoteur:
+    """Le moteur compilé rend exactement ce que rend re.finditer()."""
+
+    @pytest.mark.parametrize("texte", TEXTES)
+    def test_equivalence_finditer(self, texte):
+        for nom, flags in _TABLES:
+            attendu = [
+                (m.span(), m.groups(), pid)
+                for pattern, pid, _ in getattr(PatternsAvances, nom)
+                for m in re.finditer(pattern, texte, flags)
+            ]
+            obtenu = [(m.span(), m.groups(), pid) for m, pid, _ in PatternsAvances.rechercher(nom, texte, flags)]
+            assert obtenu == attendu, nom
+
+    def test_litteraux_requis(self):
+        crpcen = PatternCompile.depuis(r'CRPCEN\s*(?:n°|:)?\s*(\d+)', 'crpcen', 0.95, re.IGNORECASE)
+        assert crpcen.requis == [{'crpcen'}]
+        veuf = PatternCompile.depuis(r'(veuf|veuve)', 'veuf', 0.95, re.IGNORECASE)
+        assert veuf.requis == [{'veu'}]
+        # Une branche sans littéral (chiffres) n'impose rien
+        date = PatternCompile.depuis(r'(\d{1,2})[/\-](\d{1,2})[/\-](\d{4})', 'date', 0.9, re.IGNORECASE)
+        assert date.requis == []
+
+    def test_pattern_saute_si_litteral_absent(self):
+        pattern = PatternsAvances.table_compilee('PATTERNS_NOTAIRE', re.IGNORECASE)[-1]
+        assert pattern.pattern_id == 'crpcen'
+        assert not pattern.applicable("Office notarial de LYON", "office notarial de lyon")
+        assert pattern.applicable("Crpcen 123", "crpcen 123")
+
+    def test_table_modifiee_recompilee(self, monkeypatch):
+        table = list(PatternsAvances.PATTERNS_LOT)
+        monkeypatch.setattr(PatternsAvances, 'PATTERNS_LOT', table)
+        assert len(PatternsAvances.table_compilee('PATTERNS_LOT', re.IGNORECASE)) == 3
+        table.append((r'cave\s+n°\s*(\d+)', 'cave', 0.8))
+        assert [p.pattern_id for p in PatternsAvances.table_compilee('PATTERNS_LOT', re.IGNORECASE)][-1] == 'cave'
+
+    def test_benchmark(self):
+        resultats = benchmark(_TITRE_EXEMPLE * 5, repetitions=1)
+        assert resultats['correspondances'] > 0
+        assert resultats['moteur_ms'] > 0 and resultats['reference_ms'] > 0
+
+
+class TestExtracteurV2:
+    """Le régime matrimonial n'est plus recherché une fois par personne."""
+
+    def test_regime_une_seule_fois(self, monkeypatch):
+        from execution.extraction.extracteur_v2 import ExtracteurV2
+
+        appels = []
+        original = PatternsAvances.extraire_regime_matrimonial
+        monkeypatch.setattr(PatternsAvances, 'extraire_regime_matrimonial',
+                            classmethod(lambda cls, texte: appels.append(1) or original(texte)))
+        extracteur = ExtracteurV2(utiliser_ocr=False, utiliser_ml=False)
+
+        donnees = extracteur._extraire_donnees(_TITRE_EXEMPLE * 4, verbose=False)
+
+        assert len(donnees['vendeurs_originaux']) > 1
+        assert len(appels) == 1
+        situations = [v['situation_matrimoniale'] for v in donnees['vendeurs_originaux']]
+        assert situations[0] == {'statut': 'marie', 'regime': 'communauté légale'}
+        assert situations[0] is not situations[1]
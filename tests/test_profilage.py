@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+test_profilage.py
+-----------------
+Tests unitaires pour profilage.py - Chronométrage par étape et métriques.
+"""
+
+import threading
+import time
+
+import pytest
+
+import execution.utils.profilage as profilage
+from execution.utils.profilage import RegistreMetriques, Trace, etape, mesurer, trace_courante, tracer
+
+
+@pytest.fixture
+def registre(monkeypatch):
+    registre = RegistreMetriques()
+    monkeypatch.setattr(profilage, "_registre", registre)
+    monkeypatch.delenv("NOTAIRE_PROFIL_SEUIL_MS", raising=False)
+    return registre
+
+
+class TestTrace:
+    """Traces par requête, étapes séquentielles et imbriquées."""
+
+    def test_mesurer_et_etapes(self, registre):
+        with tracer("promesse") as trace:
+            with mesurer("validation"):
+                time.sleep(0.01)
+            etape("render")
+            time.sleep(0.01)
+            etape("export")
+        # L'étape ouverte est close par la fin de trace
+        assert list(trace.durees()) == ["validation", "render", "export"]
+        assert trace.durees()["render"] >= 10
+        assert trace.en_dict()["total_ms"] >= 20
+        assert trace_courante() is None
+
+    def test_trace_imbriquee_reutilisee(self, registre):
+        with tracer("workflow") as externe:
+            with tracer("promesse") as interne:
+                etape("detection")
+            with mesurer("upload"):
+                pass
+        assert interne is externe
+        assert list(externe.durees()) == ["detection", "upload"]
+
+    def test_isolation_entre_threads(self, registre):
+        traces = {}
+
+        def generer(nom):
+            with tracer(nom) as trace:
+                with mesurer(nom):
+                    time.sleep(0.01)
+            traces[nom] = trace
+
+        threads = [threading.Thread(target=generer, args=(n,)) for n in ("a", "b")]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert list(traces["a"].durees()) == ["a"] and list(traces["b"].durees()) == ["b"]
+
+    def test_trace_explicite_et_fusion(self, registre):
+        trace = Trace("promesse")
+        with mesurer("enrichment", trace=trace):
+            pass
+        trace.fusionner({"total_ms": 5, "etapes": {"render": 3.0, "export": 2.0}})
+        assert list(trace.durees()) == ["enrichment", "render", "export"]
+
+
+class TestMetriques:
+    """Histogrammes et exposition Prometheus."""
+
+    def test_exposition(self, registre):
+        with tracer("promesse"):
+            with mesurer("render"):
+                pass
+            with pytest.raises(ValueError):
+                with mesurer("export"):
+                    raise ValueError("docx")
+
+        texte = registre.exposer({"notaire_pool_io_en_cours": 2}, {"notaire_pool_io_terminees": 7})
+
+        assert 'notaire_etape_duree_secondes_bucket{pipeline="promesse",etape="render",le="0.005"} 1' in texte
+        assert 'notaire_etape_duree_secondes_count{pipeline="promesse",etape="total"} 1' in texte
+        assert 'notaire_etape_erreurs_total{pipeline="promesse",etape="export"} 1' in texte
+        assert "# TYPE notaire_pool_io_en_cours gauge\nnotaire_pool_io_en_cours 2" in texte
+        assert "# TYPE notaire_pool_io_terminees_total counter\nnotaire_pool_io_terminees_total 7" in texte
+
+    def test_buckets_cumulatifs(self):
+        registre = RegistreMetriques(buckets=(0.1, 1.0))
+        registre.observer("p", "e", 0.05)
+        registre.observer("p", "e", 0.5)
+        registre.observer("p", "e", 5.0)
+        texte = registre.exposer()
+        assert 'le="0.1"} 1' in texte and 'le="1.0"} 2' in texte and 'le="+Inf"} 3' in texte
+        assert registre.statistiques()["p.e"]["nombre"] == 3
+
+    def test_profil_requete_lente(self, registre, tmp_path, monkeypatch):
+        monkeypatch.setenv("NOTAIRE_PROFIL_SEUIL_MS", "0")
+        monkeypatch.setenv("NOTAIRE_PROFIL_DIR", str(tmp_path))
+        with tracer("promesse") as trace:
+            sum(range(1000))
+        assert trace.profil and trace.profil.endswith(".prof")
+        assert trace.en_dict()["profil"] == trace.profil
+        assert list(tmp_path.glob("promesse_*.prof"))
+
+
+class TestGeneration:
+    """Ventilation renvoyée par GestionnairePromesses.generer."""
+
+    def test_chronometrage_generer(self, registre):
+        from execution.gestionnaires.gestionnaire_promesses import GestionnairePromesses
+
+        resultat = GestionnairePromesses().generer({})
+
+        assert resultat.succes is False  # données invalides: arrêt après validation
+        assert list(resultat.chronometrage["etapes"]) == ["detection", "validation"]
+        assert "promesse.total" in registre.statistiques()
@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+test_quotas_api.py
+------------------
+Tests unitaires pour quotas_api.py - Rate limiting et cache des clés API
+partagés entre workers (mémoire, SQLite, protocole Redis).
+
+Le backend Redis est testé contre un serveur RESP local minimal: aucun
+serveur Redis n'est nécessaire.
+"""
+
+import asyncio
+import socket
+import socketserver
+import threading
+import time
+
+import pytest
+
+import execution.security.quotas_api as quotas
+from execution.security.quotas_api import (
+    BackendMemoire,
+    BackendRedis,
+    BackendSQLite,
+    CacheClesAPI,
+    ClientRESP,
+    RateLimiter,
+    consommer_jeton,
+    creer_backend,
+)
+
+
+# =============================================================================
+# SERVEUR RESP DE SUBSTITUTION
+# =============================================================================
+
+class StandInRedis:
+    """
+    Serveur RESP en mémoire: GET/SET PX/DEL/PING et le script du seau.
+
+    EVALSHA ne connaît le script qu'après un premier EVAL (comme Redis après
+    un redémarrage), ce qui exerce le repli NOSCRIPT du client.
+    """
+
+    def __init__(self):
+        self.donnees = {}
+        self.expirations = {}
+        self.scripts = set()
+        self.verrou = threading.Lock()
+        self.commandes = []
+        stand_in = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                while True:
+                    ligne = self.rfile.readline()
+                    if not ligne:
+                        return
+                    n = int(ligne[1:-2])
+                    args = []
+                    for _ in range(n):
+                        taille = int(self.rfile.readline()[1:-2])
+                        args.append(self.rfile.read(taille + 2)[:-2].decode())
+                    self.wfile.write(stand_in.executer(args))
+
+        self.serveur = socketserver.ThreadingTCPServer(("127.0.0.1", 0), Handler)
+        self.serveur.daemon_threads = True
+        self.port = self.serveur.server_address[1]
+        threading.Thread(target=self.serveur.serve_forever, daemon=True).start()
+
+    def fermer(self):
+        self.serveur.shutdown()
+        self.serveur.server_close()
+
+    @staticmethod
+    def _bulk(valeur):
+        if valeur is None:
+            return b"$-1\r\n"
+        donnees = valeur.encode()
+        return b"$%d\r\n%s\r\n" % (len(donnees), donnees)
+
+    def _get(self, cle):
+        if cle in self.expirations and self.expirations[cle] < time.time():
+            self.donnees.pop(cle, None)
+            self.expirations.pop(cle, None)
+        return self.donnees.get(cle)
+
+    def executer(self, args):
+        commande = args[0].upper()
+        with self.verrou:
+            self.commandes.append(commande)
+            if commande == "PING":
+                return b"+PONG\r\n"
+            if commande == "AUTH":
+                if args[1] != "secret":
+                    return b"-WRONGPASS invalid password\r\n"
+                return b"+OK\r\n"
+            if commande == "GET":
+                return self._bulk(self._get(args[1]))
+            if commande == "SET":
+                self.donnees[args[1]] = args[2]
+                if len(args) >= 5 and args[3].upper() == "PX":
+                    self.expirations[args[1]] = time.time() + int(args[4]) / 1000
+                return b"+OK\r\n"
+            if commande == "DEL":
+                n = sum(1 for cle in args[1:] if self.donnees.pop(cle, None) is not None)
+                return b":%d\r\n" % n
+            if commande in ("EVAL", "EVALSHA"):
+                sha = quotas.SHA_SCRIPT_SEAU
+                if commande == "EVALSHA" and args[1] not in self.scripts:
+                    return b"-NOSCRIPT No matching script\r\n"
+                if commande == "EVAL":
+                    assert args[1] == quotas.SCRIPT_SEAU
+                    self.scripts.add(sha)
+                cle, capacite, recharge = args[3], float(args[4]), float(args[5])
+                etat = self.donnees.get(cle)
+                autorise, etat = consommer_jeton(etat, capacite, recharge, time.time())
+                self.donnees[cle] = etat
+                return b":%d\r\n" % int(autorise)
+            return b"-ERR unknown command\r\n"
+
+
+@pytest.fixture
+def redis_local():
+    serveur = StandInRedis()
+    yield serveur
+    serveur.fermer()
+
+
+def _backend_redis(serveur):
+    return BackendRedis(ClientRESP("127.0.0.1", serveur.port))
+
+
+# =============================================================================
+# SEAU À JETONS
+# =============================================================================
+
+class TestSeauJetons:
+    """Sémantique du seau à jetons."""
+
+    def test_rafale_puis_refus(self):
+        """Un seau neuf autorise `capacite` requêtes puis refuse."""
+        etat = None
+        resultats = []
+        for _ in range(4):
+            autorise, etat = consommer_jeton(etat, 3, 0.05, 100.0)
+            resultats.append(autorise)
+        assert resultats == [True, True, True, False]
+
+    def test_recharge(self):
+        """Les jetons reviennent au taux de recharge, plafonnés à la capacité."""
+        _, etat = consommer_jeton((0.0, 100.0), 3, 1.0, 100.0)
+        autorise, etat = consommer_jeton(etat, 3, 1.0, 101.0)
+        assert autorise
+        _, etat = consommer_jeton(etat, 3, 1.0, 10_000.0)
+        assert etat[0] == 2.0
+
+    def test_rate_limiter_memoire(self, monkeypatch):
+        """60 rpm: 60 en rafale, puis 1 par seconde."""
+        horloge = [1000.0]
+        monkeypatch.setattr(quotas.time, "monotonic", lambda: horloge[0])
+        limiter = RateLimiter(default_rpm=60)
+
+        assert all(limiter.check("k1") for _ in range(60))
+        assert limiter.check("k1") is False
+        horloge[0] += 1.0
+        assert limiter.check("k1") is True
+        assert limiter.check("k1") is False
+        # Mémoire O(1) par clé
+        assert limiter.backend._seaux["k1"][1] == horloge[0]
+
+
+# =============================================================================
+# BACKENDS PARTAGÉS
+# =============================================================================
+
+class TestBackendSQLite:
+    """Deux instances sur le même fichier simulent deux workers."""
+
+    def test_limite_partagee(self, tmp_path):
+        """La limite est globale, pas multipliée par le nombre de workers."""
+        chemin = tmp_path / "quotas.db"
+        worker_a = RateLimiter(backend=BackendSQLite(chemin))
+        worker_b = RateLimiter(backend=BackendSQLite(chemin))
+
+        autorises = [w.check("k1", 4) for w in (worker_a, worker_b) * 3]
+        assert autorises.count(True) == 4
+
+    def test_revocation_visible_partout(self, tmp_path):
+        """Une révocation sur un worker vide le cache de l'autre."""
+        chemin = tmp_path / "quotas.db"
+        cache_a = CacheClesAPI(backend=BackendSQLite(chemin))
+        cache_b = CacheClesAPI(backend=BackendSQLite(chemin))
+
+        cache_a.ecrire("hash1", "k1", {"etude_id": "e1"})
+        assert cache_b.lire("hash1") == {"etude_id": "e1"}
+
+        assert cache_b.revoquer("k1") is True
+        assert cache_a.lire("hash1") is None
+
+    def test_appels_hors_boucle(self, tmp_path):
+        """Les variantes async exécutent les E/S SQLite hors de la boucle asyncio."""
+        backend = BackendSQLite(tmp_path / "q.db")
+        threads = []
+        lire = backend.cache_lire
+        backend.cache_lire = lambda h: threads.append(threading.get_ident()) or lire(h)
+        cache = CacheClesAPI(backend=backend)
+
+        async def scenario():
+            await cache.ecrire_async("hash1", "k1", {"etude_id": "e1"})
+            return await cache.lire_async("hash1"), threading.get_ident()
+
+        donnees, thread_boucle = asyncio.run(scenario())
+        assert donnees == {"etude_id": "e1"}
+        assert threads and threads[0] != thread_boucle
+        assert asyncio.run(RateLimiter(backend=backend).check_async("k1", 1)) is True
+
+    def test_ttl_raccourci_par_expiration(self, tmp_path):
+        """Une clé qui expire avant le TTL n'est pas servie au-delà."""
+        cache = CacheClesAPI(ttl_seconds=300, backend=BackendSQLite(tmp_path / "q.db"))
+        cache.ecrire("hash1", "k1", {"etude_id": "e1"}, expire_dans=-1)
+        assert cache.lire("hash1") is None
+
+
+class TestBackendRedis:
+    """Backend protocole Redis contre le serveur de substitution."""
+
+    def test_limite_partagee(self, redis_local):
+        """Deux clients (deux workers) partagent le seau côté serveur."""
+        worker_a = RateLimiter(backend=_backend_redis(redis_local))
+        worker_b = RateLimiter(backend=_backend_redis(redis_local))
+
+        autorises = [w.check("k1", 3) for w in (worker_a, worker_b) * 3]
+        assert autorises.count(True) == 3
+        # Premier appel: NOSCRIPT puis EVAL, ensuite EVALSHA uniquement
+        assert redis_local.commandes.count("EVAL") == 1
+
+    def test_revocation_visible_partout(self, redis_local):
+        """La révocation supprime l'entrée et l'index par api_key_id."""
+        cache_a = CacheClesAPI(backend=_backend_redis(redis_local))
+        cache_b = CacheClesAPI(backend=_backend_redis(redis_local))
+
+        cache_a.ecrire("hash1", "k1", {"etude_id": "e1", "rate_limit_rpm": 60})
+        assert cache_b.lire("hash1")["etude_id"] == "e1"
+
+        assert cache_b.revoquer("k1") is True
+        assert cache_a.lire("hash1") is None
+        assert cache_a.revoquer("k1") is False
+
+    def test_auth_refusee(self, redis_local):
+        """Un AUTH refusé ne laisse pas de socket non authentifié réutilisable."""
+        client = ClientRESP("127.0.0.1", redis_local.port, mot_de_passe="mauvais")
+        with pytest.raises(quotas.ErreurRESP):
+            client.commande("PING")
+        assert client._socket is None
+        with pytest.raises(quotas.ErreurRESP):
+            client.commande("PING")
+        assert redis_local.commandes.count("PING") == 0
+
+        client.mot_de_passe = "secret"
+        assert client.commande("PING") == "PONG"
+
+    def test_serveur_injoignable(self):
+        """Backend injoignable: rate limit ouvert, cache vide (pas d'erreur 500)."""
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            port = s.getsockname()[1]
+        backend = BackendRedis(ClientRESP("127.0.0.1", port, timeout=0.2))
+
+        assert RateLimiter(backend=backend).check("k1", 1) is True
+        assert CacheClesAPI(backend=backend).lire("hash1") is None
+
+
+class TestCreerBackend:
+    """Sélection du backend par URL."""
+
+    def test_urls(self, tmp_path):
+        """memoire, sqlite:/// et redis:// sont reconnus."""
+        assert isinstance(creer_backend("memoire"), BackendMemoire)
+        assert isinstance(creer_backend(f"sqlite:///{tmp_path}/q.db"), BackendSQLite)
+        backend = creer_backend("redis://:secret@cache.local:6380/2")
+        assert isinstance(backend, BackendRedis)
+        assert (backend.client.hote, backend.client.port, backend.client.db) == ("cache.local", 6380, 2)
+        assert backend.client.mot_de_passe == "secret"
+
+    def test_url_inconnue(self):
+        """Un schéma inconnu lève ValueError."""
+        with pytest.raises(ValueError):
+            creer_backend("memcached://localhost")
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+test_recherche.py
+-----------------
+Tests unitaires pour recherche.py - Index plein texte / trigrammes.
+"""
+
+from unittest.mock import MagicMock
+
+import pytest
+
+import execution.gestionnaires.gestionnaire_titres as module_titres
+from execution.database.historique import HistoriqueActes
+from execution.database.recherche import IndexRecherche, champs_indexables, normaliser_mots
+from execution.gestionnaires.gestionnaire_promesses import GestionnairePromesses
+
+TITRE_DUPONT = {
+    "proprietaires_actuels": [{"nom": "DUPONT", "prenoms": "Jean-Loïc"}],
+    "bien": {
+        "adresse": {"numero": "12", "voie": "rue de Vendôme", "code_postal": "69006", "ville": "Lyon"},
+        "lots": [{"numero": "27", "designation": "appartement"}],
+        "cadastre": [{"section": "AB", "numero": "123"}],
+    },
+}
+TITRE_MARTIN = {
+    "proprietaires_actuels": [{"nom": "MARTIN", "prenoms": "Sophie"}],
+    "bien": {"adresse": {"voie": "avenue Foch", "code_postal": "75016", "ville": "Paris"}},
+}
+
+
+@pytest.fixture
+def index(tmp_path, monkeypatch):
+    monkeypatch.setenv("NOTAIRE_INDEX_RECHERCHE", str(tmp_path / "index.db"))
+    index = IndexRecherche(tmp_path / "index.db")
+    monkeypatch.setattr("execution.database.recherche._index", index)
+    return index
+
+
+class TestIndex:
+    """Normalisation, tolérance aux fautes, mises à jour incrémentales."""
+
+    def test_normalisation(self):
+        assert normaliser_mots("Mme Dupré-Laval, n°12") == ["mme", "dupre", "laval", "n", "12"]
+        champs = champs_indexables(TITRE_DUPONT)
+        assert champs["parties"] == ["dupont", "jean", "loic"]
+        assert "ab123" in champs["biens"] and "27" in champs["biens"]
+        assert "appartement" not in champs["biens"]
+
+    @pytest.mark.parametrize("requete,champ", [
+        ("Dupond", "parties"),        # faute de frappe
+        ("jean loic", "parties"),     # accents
+        ("vendome lyon", "adresse"),
+        ("AB 123", "biens"),
+        ("ab123", "biens"),
+        ("dup", "parties"),           # saisie partielle
+    ])
+    def test_requetes(self, index, requete, champ):
+        index.indexer("titre", "TITRE-001", TITRE_DUPONT)
+        index.indexer("titre", "TITRE-002", TITRE_MARTIN)
+
+        resultats = index.rechercher(requete)
+
+        assert [r.reference for r in resultats] == ["TITRE-001"]
+        assert resultats[0].champ == champ
+
+    def test_classement(self, index):
+        index.indexer("titre", "TITRE-001", TITRE_DUPONT)
+        index.indexer("titre", "TITRE-002", {**TITRE_MARTIN, "vendeurs": [{"nom": "DUPONT"}]})
+
+        resultats = index.rechercher("dupont lyon")
+
+        assert [r.reference for r in resultats] == ["TITRE-001", "TITRE-002"]
+        assert resultats[0].score == 1.0 and resultats[1].score == 0.5
+
+    def test_reindexation_et_retrait(self, index):
+        index.indexer("acte", "VENTE-1", TITRE_DUPONT)
+        index.indexer("acte", "VENTE-1", TITRE_MARTIN)
+        assert index.rechercher("dupont") == []
+        assert index.references("martin", "acte") == ["VENTE-1"]
+        assert index.references("martin", "titre") == []
+
+        index.retirer("acte", "VENTE-1")
+        assert index.rechercher("martin") == []
+
+    def test_vocabulaire_orphelin_efface(self, index):
+        """Noms retirés ou remplacés (anonymisation) ne restent pas dans le fichier."""
+        index.indexer("titre", "TITRE-001", TITRE_DUPONT)
+        index.indexer("titre", "TITRE-002", TITRE_MARTIN)
+        index.indexer("titre", "TITRE-001", {"proprietaires_actuels": [{"nom": "ANONYMISE"}]})
+        index.retirer("titre", "TITRE-002")
+
+        conn = index._connexion()
+        mots = {mot for (mot,) in conn.execute("SELECT mot FROM mots")}
+        assert mots == {"anonymise", "titre", "001"}
+        assert conn.execute("SELECT COUNT(DISTINCT mot_id) FROM trigrammes").fetchone()[0] == 3
+        assert conn.execute("PRAGMA secure_delete").fetchone()[0] == 1
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        contenu = index.chemin.read_bytes()
+        assert b"dupont" not in contenu and b"martin" not in contenu and b"vendome" not in contenu
+
+    def test_filtre_par_champ(self, index):
+        index.indexer("titre", "TITRE-001", {"proprietaires_actuels": [{"nom": "LYON"}]})
+        index.indexer("titre", "TITRE-002", TITRE_DUPONT)
+        assert index.references("lyon", "titre", champs=["adresse"]) == ["TITRE-002"]
+
+
+class TestIntegration:
+    """Sauvegarde → index → recherche, hors ligne et en ligne."""
+
+    def test_historique_hors_ligne(self, index, monkeypatch):
+        monkeypatch.delenv("SUPABASE_URL", raising=False)
+        historique = HistoriqueActes(url="", key="")
+        historique.sauvegarder_acte("VENTE-001", "vente", {"vendeurs": [{"nom": "Dupré"}], "prix": 250000})
+        historique.sauvegarder_acte("VENTE-002", "vente", {"vendeurs": [{"nom": "Martin"}]})
+
+        assert [a.reference for a in historique.rechercher("dupre")] == ["VENTE-001"]
+        # Repli sous-chaîne pour ce qui n'est pas indexé
+        assert [a.reference for a in historique.rechercher("250000")] == ["VENTE-001"]
+
+        historique.supprimer_acte("VENTE-001")
+        assert index.rechercher("dupre") == []
+
+    def test_titres_hors_ligne(self, index, tmp_path, monkeypatch):
+        monkeypatch.setattr(module_titres, "PROJECT_ROOT", tmp_path)
+        monkeypatch.setattr(module_titres, "HAS_SUPABASE", False)
+        gestionnaire = module_titres.GestionnaireTitres()
+        gestionnaire._sauvegarder_titre(module_titres.TitrePropriete(reference="TITRE-001", donnees=TITRE_DUPONT))
+        gestionnaire._sauvegarder_titre(module_titres.TitrePropriete(reference="TITRE-002", donnees=TITRE_MARTIN))
+        gestionnaire._offline_storage.clear()  # nouveau process: titres relus depuis le JSON
+
+        assert [t.reference for t in gestionnaire.rechercher_titres("Vendome")] == ["TITRE-001"]
+
+    def test_promesses_rpc_puis_repli(self):
+        gestionnaire = GestionnairePromesses.__new__(GestionnairePromesses)
+        gestionnaire.supabase = MagicMock()
+        gestionnaire.supabase.rpc.return_value.execute.return_value = MagicMock(data=[{"reference": "T1"}])
+
+        assert gestionnaire.rechercher_titre_par_proprietaire("dupond", etude_id="e1") == [{"reference": "T1"}]
+        assert gestionnaire.supabase.rpc.call_args.args == ("rechercher_titres", {
+            "p_etude_id": "e1", "p_requete": "dupond", "p_champ": "parties", "p_limite": 50
+        })
+
+        gestionnaire.supabase.rpc.side_effect = Exception("function rechercher_titres does not exist")
+        table = gestionnaire.supabase.table.return_value.select.return_value
+        table.ilike.return_value.eq.return_value.execute.return_value = MagicMock(data=[{"reference": "T2"}])
+        assert gestionnaire.rechercher_titre_par_adresse("rue test", etude_id="e1") == [{"reference": "T2"}]
+        table.ilike.return_value.eq.assert_called_once_with("etude_id", "e1")
+
+    def test_promesses_sans_etude_pas_de_rpc(self):
+        """Sans étude, la RPC (service role, hors RLS) n'est pas appelée."""
+        gestionnaire = GestionnairePromesses.__new__(GestionnairePromesses)
+        gestionnaire.supabase = MagicMock()
+        table = gestionnaire.supabase.table.return_value.select.return_value
+        table.ilike.return_value.execute.return_value = MagicMock(data=[])
+
+        assert gestionnaire.rechercher_titre_par_adresse("rue test") == []
+        gestionnaire.supabase.rpc.assert_not_called()
+
+    def test_titres_rpc_limitee_a_l_etude(self, monkeypatch):
+        """La RPC rend les ids classés; les lignes sont relues pour l'étude seulement."""
+        monkeypatch.setattr(module_titres, "recherche_postgres", lambda: True)
+        gestionnaire = module_titres.GestionnaireTitres.__new__(module_titres.GestionnaireTitres)
+        gestionnaire._offline_mode = False
+        gestionnaire.client = MagicMock()
+        monkeypatch.setattr(gestionnaire, "_index", lambda: None)
+        gestionnaire.client.rpc.return_value.execute.return_value = MagicMock(
+            data=[{"id": "b", "reference": "T-B"}, {"id": "a", "reference": "T-A"}])
+        selection = gestionnaire.client.table.return_value.select.return_value
+        selection.in_.return_value.eq.return_value.execute.return_value = MagicMock(
+            data=[{"id": "a", "reference": "T-A"}, {"id": "b", "reference": "T-B"}])
+
+        titres = gestionnaire.rechercher_titres("dupond", etude_id="e1")
+
+        assert [t.reference for t in titres] == ["T-B", "T-A"]
+        assert gestionnaire.client.rpc.call_args.args[1]["p_etude_id"] == "e1"
+        selection.in_.assert_called_once_with("id", ["b", "a"])
+        selection.in_.return_value.eq.assert_called_once_with("etude_id", "e1")
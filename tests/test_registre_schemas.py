@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+test_registre_schemas.py
+------------------------
+Tests unitaires pour registre_schemas.py - catalogues de questions
+chargés une fois, figés et indexés.
+"""
+
+import copy
+import json
+import os
+from unittest.mock import patch
+
+import pytest
+
+import execution.core.registre_schemas as registre_schemas
+from execution.core.registre_schemas import (
+    CatalogueQuestions, RegistreSchemas, categorie_bien, compiler_condition_section, figer
+)
+
+SCHEMA = {
+    "titre": "Test",
+    "sections": {
+        "2_bien": {
+            "titre": "Bien",
+            "questions": [
+                {"id": "bien_adresse", "variable": "bien.adresse", "obligatoire": True},
+                {"id": "bien_copro", "variable": "bien.copropriete", "type": "booleen",
+                 "sous_questions": {"si_oui": [{"id": "syndic_nom", "variable": "copropriete.syndic.nom"}]}},
+            ],
+        },
+        "1_parties": {"titre": "Parties", "questions": [{"id": "promettant_nom", "variable": "promettant[].nom"}]},
+        "3_mobilier": {"titre": "Mobilier", "condition": "mobilier.existe == true", "questions": []},
+        "4_lots": {"titre": "Lots", "condition_categorie": "copropriete", "questions": []},
+    },
+}
+
+
+@pytest.fixture
+def registre(tmp_path, monkeypatch):
+    (tmp_path / "questions_test.json").write_text(json.dumps(SCHEMA), encoding="utf-8")
+    registre = RegistreSchemas(dossier=tmp_path)
+    monkeypatch.setattr(registre_schemas, "_registre", registre)
+    return registre
+
+
+class TestContenuFige:
+    """Vues partagées en lecture seule, copies modifiables."""
+
+    def test_lecture_seule(self):
+        fige = figer({"a": [1, {"b": 2}]})
+        with pytest.raises(TypeError):
+            fige["a"] = 1
+        with pytest.raises(TypeError):
+            fige["a"].append(3)
+        with pytest.raises(TypeError):
+            fige["a"][1].update(c=3)
+
+        assert isinstance(fige, dict) and json.loads(json.dumps(fige)) == {"a": [1, {"b": 2}]}
+        copie = copy.deepcopy(fige)
+        copie["a"][1]["c"] = 3
+        assert type(copie) is dict and type(copie["a"]) is list and "c" not in fige["a"][1]
+
+
+class TestCatalogue:
+    """Index et applicabilité précalculés."""
+
+    def test_index(self, registre):
+        catalogue = registre.catalogue("questions_test.json")
+
+        assert [cle for cle, _ in catalogue.sections] == ["1_parties", "2_bien", "3_mobilier", "4_lots"]
+        assert catalogue.questions["syndic_nom"]["variable"] == "copropriete.syndic.nom"
+        assert catalogue.par_variable["bien.adresse"]["id"] == "bien_adresse"
+        assert catalogue.variable_par_id["promettant_nom"] == "promettant[].nom"
+        assert catalogue.section_par_question["syndic_nom"] == "2_bien"
+        with pytest.raises(TypeError):
+            catalogue.questions["x"] = {}
+
+    def test_sections_applicables(self, registre):
+        catalogue = registre.catalogue("questions_test.json")
+
+        assert catalogue.sections_applicables({"bien": {"copropriete": False}}) == ["1_parties", "2_bien"]
+        assert catalogue.sections_applicables({"mobilier": {"existe": True}, "bien": {"lots": [1]}}) == [
+            "1_parties", "2_bien", "3_mobilier", "4_lots"
+        ]
+
+    def test_conditions(self):
+        assert compiler_condition_section("toujours")({}) is True
+        assert compiler_condition_section("biens.length > 1")({}) is False
+        assert compiler_condition_section("prix.montant > abc")({"prix": {"montant": 5}}) is True
+        assert compiler_condition_section("prix.type_vente == 'viager'")({"prix": {"type_vente": "Viager"}}) is True
+        assert categorie_bien({"_metadata": {"categorie_bien": "Maison hors copropriété"}}) == "hors_copropriete"
+        assert categorie_bien({"bien": {"type_bien": "parcelle"}}) == "terrain_a_batir"
+
+    def test_questions_en_liste(self):
+        catalogue = CatalogueQuestions.construire("memoire", {"sections": [
+            {"id": "prix", "questions": [{"id": "financement_type"},
+                                         {"id": "pret_montant", "condition": "financement_type != comptant"}]},
+        ]})
+        assert catalogue.question_applicable("pret_montant", {"financement_type": "pret"})
+        assert not catalogue.question_applicable("pret_montant", {"financement_type": "comptant"})
+
+
+class TestRegistre:
+    """Chargement unique, rechargement sur modification."""
+
+    def test_charge_une_fois_et_recharge(self, registre, tmp_path):
+        with patch("execution.core.registre_schemas.json.load", wraps=json.load) as chargement:
+            premier = registre.catalogue("questions_test.json")
+            assert registre.catalogue("questions_test.json") is premier
+            assert chargement.call_count == 1
+
+            fichier = tmp_path / "questions_test.json"
+            fichier.write_text(json.dumps({**SCHEMA, "titre": "Modifie"}), encoding="utf-8")
+            stat = fichier.stat()
+            os.utime(fichier, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+            assert registre.catalogue("questions_test.json").schema["titre"] == "Modifie"
+            assert chargement.call_count == 2
+        assert registre.statistiques()["rechargements"] == 1
+
+        with pytest.raises(FileNotFoundError):
+            registre.catalogue("absent.json")
+
+    def test_collecteurs_partagent_le_schema(self):
+        from execution.agent_autonome import CollecteurInteractif
+
+        with patch("execution.core.registre_schemas.json.load", wraps=json.load) as chargement:
+            a = CollecteurInteractif("promesse_vente")
+            b = CollecteurInteractif("promesse_vente", prefill={"bien": {"lots": [1]}})
+            assert chargement.call_count <= 1
+        assert a.schema is b.schema
+
+        resultat = a.submit_answers({"promettant_nom": "Martin"})
+        assert resultat["accepted"] == 1 and a.donnees == {"promettants": [{"nom": "Martin"}]}
+        assert b.donnees == {"bien": {"lots": [1]}}
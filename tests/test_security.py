@@ -318,7 +318,8 @@ class TestSecureClientManager:
         assert any(c.nom == "Dupont" for c in results)
 
     def test_anonymize_client(self, offline_env):
-        """Test: anonymisation de client."""
+        """Test: anonymisation de client (sessions du chat comprises)."""
+        from execution.security.chat_anonymizer import CacheAnonymisation
         from execution.security.secure_client_manager import SecureClientManager
 
         manager = SecureClientManager(etude_id="test-etude")
@@ -330,10 +331,16 @@ class TestSecureClientManager:
             "email": "jean@example.com"
         })
 
+        cache = CacheAnonymisation()
+        cache.anonymiser_conversation("conv-1", "Vendeur: Dupont", [])
+
         # Anonymiser
-        result = manager._anonymize_client(client_id)
+        with patch("execution.security.secure_client_manager.get_cache_anonymisation",
+                   return_value=cache):
+            result = manager._anonymize_client(client_id)
 
         assert result is True
+        assert cache.statistiques()["conversations"] == 0
 
         # Verifier
         client = manager._offline_storage.get(client_id)
@@ -364,6 +371,222 @@ class TestSecureClientManager:
         assert len(warnings) == 0
 
 
+# =============================================================================
+# TESTS INDEX AVEUGLE
+# =============================================================================
+
+class TestBlindIndex:
+    """Tests pour la recherche de clients chiffres par index aveugle."""
+
+    @pytest.fixture
+    def manager(self, offline_env):
+        from execution.security.secure_client_manager import SecureClientManager
+
+        manager = SecureClientManager(etude_id="test-etude")
+        manager.create_client({"nom": "Dupont", "prenom": "Jean", "date_naissance": "1970-05-12",
+                               "adresse": "12 rue de la Paix, 69006 Lyon"})
+        manager.create_client({"nom": "Dupré-Lévy", "prenom": "Anne", "date_naissance": "1985-01-01",
+                               "adresse": "3 avenue Foch, 75016 Paris"})
+        manager.create_client({"nom": "Martin", "prenom": "Jean", "date_naissance": "1970-02-02"})
+        return manager
+
+    def test_tokens_non_reversibles_et_par_etude(self, encryption_key):
+        """Test: jetons HMAC sans valeur en clair, differents d'une etude a l'autre."""
+        from execution.security.blind_index import BlindIndex
+
+        index = BlindIndex.from_master_key(encryption_key, "etude-a")
+        tokens = index.tokens_for_client({"nom": "Dupont", "prenom": "Jean"})
+
+        assert all(len(t) == 16 and "dupont" not in t for t in tokens)
+        assert "p:dup" in index.terms_for_client({"nom": "Dupont"})
+        assert set(tokens).isdisjoint(index.for_etude("etude-b").tokens_for_client({"nom": "Dupont", "prenom": "Jean"}))
+
+    def test_recherche_prefixe_et_accents(self, manager):
+        """Test: prefixe, casse et accents."""
+        assert [c.nom for c in manager.search_clients(nom="dup")] == ["Dupont", "Dupré-Lévy"]
+        assert [c.nom for c in manager.search_clients(nom="LEVY")] == ["Dupré-Lévy"]
+        assert [c.nom for c in manager.search_clients(nom="Dupont")] == ["Dupont"]
+
+    def test_criteres_combines(self, manager):
+        """Test: annee de naissance et commune filtrent cote index."""
+        assert [c.nom for c in manager.search_clients(prenom="jean", annee_naissance=1970)] == ["Dupont", "Martin"]
+        assert [c.nom for c in manager.search_clients(nom="dup", commune="Lyon")] == ["Dupont"]
+        assert [c.nom for c in manager.search_clients(commune="75016")] == ["Dupré-Lévy"]
+
+    def test_recherche_approchee(self, manager):
+        """Test: faute de frappe tolérée seulement en mode fuzzy."""
+        assert manager.search_clients(nom="Dupond") == []
+        assert [c.nom for c in manager.search_clients(nom="Dupond", fuzzy=True)][0] == "Dupont"
+
+    def test_sans_dechiffrement_en_masse(self, manager):
+        """Test: seuls les candidats de l'index sont dechiffres."""
+        with patch.object(manager.encryption, "_decrypt_chunk", wraps=manager.encryption._decrypt_chunk) as decrypt:
+            manager.search_clients(nom="martin")
+        # 1 candidat: nom + prenom, en un seul lot
+        assert decrypt.call_count == 1
+        assert len(decrypt.call_args.args[0]) == 2
+
+    def test_mise_a_jour_et_anonymisation(self, manager):
+        """Test: jetons recalcules a la mise a jour, retires a l'anonymisation."""
+        client_id = manager.search_clients(nom="martin")[0].id
+
+        manager.update_client(client_id, {"nom": "Bernard"})
+        assert manager.search_clients(nom="martin") == []
+        assert [c.prenom for c in manager.search_clients(nom="bern", annee_naissance=1970)] == ["Jean"]
+
+        manager._anonymize_client(client_id)
+        assert manager.search_clients(nom="anonymise") == []
+
+    def test_client_non_reindexe(self, manager):
+        """Test: sans jetons (avant reindex_blind_index), le nom exact reste trouvable."""
+        client_id = manager.search_clients(nom="martin")[0].id
+        manager._offline_storage[client_id]["blind_index"] = []
+
+        assert [c.id for c in manager.search_clients(nom="Martin")] == [client_id]
+        assert manager.search_clients(nom="mar") == []
+
+        manager.reindex_blind_index()
+        assert [c.id for c in manager.search_clients(nom="mar")] == [client_id]
+
+    def test_requete_serveur_repli_nom_hash(self, mock_supabase_env):
+        """Test: en ligne, les lignes a blind_index vide sont cherchees par nom_hash."""
+        from execution.security.secure_client_manager import SecureClientManager
+
+        with patch("execution.security.secure_client_manager.create_client") as create:
+            manager = SecureClientManager(etude_id="test-etude")
+        table = create.return_value.table.return_value
+        request = table.select.return_value.eq.return_value.is_.return_value.eq.return_value
+        request.contains.return_value.limit.return_value.execute.return_value = MagicMock(data=[])
+        legacy = request.eq.return_value.eq.return_value.limit.return_value
+        legacy.execute.return_value = MagicMock(data=[])
+
+        manager.search_clients(nom="Dupont")
+
+        assert request.eq.call_args.args == ("nom_hash", manager._hash_for_search("Dupont"))
+        assert request.eq.return_value.eq.call_args.args == ("blind_index", "{}")
+
+    def test_requete_serveur(self, mock_supabase_env):
+        """Test: en ligne, filtre @> sur blind_index (pas de list_clients)."""
+        from execution.security.secure_client_manager import SecureClientManager
+
+        with patch("execution.security.secure_client_manager.create_client") as create:
+            manager = SecureClientManager(etude_id="test-etude")
+        table = create.return_value.table.return_value
+        request = table.select.return_value.eq.return_value.is_.return_value.eq.return_value
+        request.contains.return_value.limit.return_value.execute.return_value = MagicMock(data=[])
+
+        manager.search_clients(nom="dup")
+
+        column, tokens = request.contains.call_args.args
+        assert column == "blind_index"
+        assert tokens == manager.blind_index.query(nom="dup").required
+        table.select.return_value.eq.return_value.is_.return_value.eq.return_value \
+            .contains.return_value.limit.assert_called_once_with(200)
+
+
+class TestBulkEncryption:
+    """Tests pour le chiffrement en masse (import, export RGPD)."""
+
+    def test_encrypt_many_roundtrip(self, encryption_service):
+        """Test: encrypt_many/decrypt_many compatibles avec encrypt/decrypt, en parallele."""
+        values = [f"Client {i} é" for i in range(5000)] + [None, ""]
+
+        encrypted = encryption_service.encrypt_many(values, workers=3)
+
+        assert encrypted[-2:] == [None, ""]
+        assert len(set(encrypted[:-2])) == 5000  # nonces distincts
+        assert encryption_service.decrypt(encrypted[1234]) == "Client 1234 é"
+        assert encryption_service.decrypt_many(encrypted, workers=3) == values
+
+    def test_decrypt_many_formats_et_erreurs(self, encryption_service):
+        """Test: anciennes enveloppes et texte clair acceptes, erreurs remplacees."""
+        legacy = json.dumps(json.loads(encryption_service.encrypt("Dupont")), indent=2)
+        corrupted = encryption_service.encrypt("Martin").replace('"c": "', '"c": "AAAA')
+
+        assert encryption_service.decrypt_many([legacy, "clair"]) == ["Dupont", "clair"]
+        assert encryption_service.decrypt_many([corrupted, legacy], error_value="?") == ["?", "Dupont"]
+        with pytest.raises(Exception):
+            encryption_service.decrypt_many([corrupted])
+
+    def test_import_csv_par_lots(self, offline_env, tmp_path):
+        """Test: import en flux par lots, progression rapportee, donnees chiffrees."""
+        from execution.security.secure_client_manager import SecureClientManager
+
+        csv_path = tmp_path / "clients.csv"
+        csv_path.write_text("NOM,PRENOM\n" + "".join(
+            f"Nom{i},Prenom{i}\n" for i in range(25)
+        ), encoding="utf-8")
+        manager = SecureClientManager(etude_id="test-etude")
+        progress = []
+
+        results = manager.import_from_csv(str(csv_path), batch_size=10, progress=progress.append)
+
+        assert results["imported"] == 25 and results["total"] == 25
+        assert [p["imported"] for p in progress] == [10, 20, 25]
+        stored = next(iter(manager._offline_storage.values()))
+        assert "nom" not in stored and stored["source"] == "genapi_import"
+        assert [c.prenom for c in manager.search_clients(nom="nom7")] == ["Prenom7"]
+
+    def test_export_clients(self, offline_env):
+        """Test: export par pages, dechiffre en masse."""
+        from execution.security.secure_client_manager import SecureClientManager
+
+        manager = SecureClientManager(etude_id="test-etude")
+        for i in range(5):
+            manager.create_client({"nom": f"Nom{i}", "email": f"c{i}@exemple.fr"})
+        pages = []
+
+        export = manager.export_clients(batch_size=2, progress=pages.append)
+
+        assert pages == [2, 4, 5]
+        assert [c["email"] for c in export["clients"]] == [f"c{i}@exemple.fr" for i in range(5)]
+
+    def test_import_csv_lot_rejete(self, mock_supabase_env, tmp_path):
+        """Test: un lot rejete est rejoue ligne a ligne, seules les lignes fautives echouent."""
+        from execution.security.secure_client_manager import SecureClientManager
+
+        csv_path = tmp_path / "clients.csv"
+        csv_path.write_text("nom\nA\nB\nC\n", encoding="utf-8")
+        with patch("execution.security.secure_client_manager.create_client") as create:
+            manager = SecureClientManager(etude_id="test-etude")
+
+        def insert(rows):
+            request = MagicMock()
+            if isinstance(rows, list) or rows["nom_hash"] == manager._hash_for_search("B"):
+                request.execute.side_effect = Exception("duplicate key")
+            else:
+                request.execute.return_value = MagicMock(data=[{"id": "x"}])
+            return request
+
+        create.return_value.table.return_value.insert.side_effect = insert
+
+        results = manager.import_from_csv(str(csv_path))
+
+        assert (results["imported"], results["duplicates"]) == (2, 1)
+
+    def test_import_csv_audit_par_client(self, mock_supabase_env, tmp_path):
+        """Test: une ligne d'audit "create" par client importe, en un insert par lot."""
+        from execution.security.secure_client_manager import SecureClientManager
+
+        csv_path = tmp_path / "clients.csv"
+        csv_path.write_text("nom\nA\nB\nC\n", encoding="utf-8")
+        with patch("execution.security.secure_client_manager.create_client") as create:
+            manager = SecureClientManager(etude_id="test-etude")
+        tables = {"clients": MagicMock(), "audit_logs": MagicMock()}
+        create.return_value.table.side_effect = lambda name: tables.setdefault(name, MagicMock())
+        tables["clients"].insert.side_effect = lambda rows: MagicMock(execute=lambda: MagicMock(
+            data=[{"id": f"id-{i}", "source": row["source"]} for i, row in enumerate(rows)]
+        ))
+
+        manager.import_from_csv(str(csv_path))
+
+        audit = [c.args[0] for c in tables["audit_logs"].insert.call_args_list if isinstance(c.args[0], list)]
+        assert len(audit) == 1
+        assert [(a["action"], a["resource_id"]) for a in audit[0]] == [
+            ("create", "id-0"), ("create", "id-1"), ("create", "id-2")
+        ]
+
+
 # =============================================================================
 # TESTS AGENT CLIENT ACCESS
 # =============================================================================
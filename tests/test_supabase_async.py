@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+test_supabase_async.py
+----------------------
+Tests unitaires pour supabase_async.py - Couche PostgREST asynchrone.
+
+Les requêtes sont interceptées par un httpx.MockTransport: aucun appel réseau.
+"""
+
+import asyncio
+import json
+
+import pytest
+
+httpx = pytest.importorskip("httpx")
+
+from execution.database.supabase_async import ErreurSupabase, SupabaseAsync
+
+
+def _client(reponses=None, statut=200):
+    """SupabaseAsync branché sur un transport qui enregistre les requêtes."""
+    requetes = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requetes.append(request)
+        corps = json.loads(request.content) if request.content else None
+        data = reponses(request, corps) if reponses else (corps or [])
+        return httpx.Response(statut, json=data)
+
+    db = SupabaseAsync(
+        url="https://exemple.supabase.co", key="cle-service",
+        transport=httpx.MockTransport(handler),
+    )
+    return db, requetes
+
+
+class TestConfiguration:
+    """Détection de la configuration."""
+
+    def test_non_configure(self, monkeypatch):
+        """Sans URL/clé, est_configure est False."""
+        monkeypatch.delenv("SUPABASE_URL", raising=False)
+        monkeypatch.delenv("SUPABASE_KEY", raising=False)
+        monkeypatch.delenv("SUPABASE_SERVICE_KEY", raising=False)
+        assert SupabaseAsync().est_configure is False
+
+    def test_entetes_authentification(self):
+        """apikey et Bearer sont envoyés sur chaque requête."""
+        db, requetes = _client()
+        asyncio.run(db.selectionner("etudes", "id", limite=1))
+        req = requetes[0]
+        assert req.headers["apikey"] == "cle-service"
+        assert req.headers["authorization"] == "Bearer cle-service"
+        assert req.url.path == "/rest/v1/etudes"
+
+
+class TestSelection:
+    """Traduction des filtres en paramètres PostgREST."""
+
+    def test_filtres(self):
+        """Égalité, null, booléen, opérateur explicite, ordre et limite."""
+        db, requetes = _client(lambda req, corps: [{"id": "1"}])
+        lignes = asyncio.run(db.selectionner(
+            "dossiers", "id, numero, etudes(nom)",
+            filtres={
+                "etude_id": "e1",
+                "deleted_at": None,
+                "anonymized": False,
+                "created_at": ("gte", "2025-01-01"),
+            },
+            ordre="created_at", desc=True, limite=5,
+        ))
+        assert lignes == [{"id": "1"}]
+        params = requetes[0].url.params
+        assert params["select"] == "id,numero,etudes(nom)"
+        assert params["etude_id"] == "eq.e1"
+        assert params["deleted_at"] == "is.null"
+        assert params["anonymized"] == "is.false"
+        assert params["created_at"] == "gte.2025-01-01"
+        assert params["order"] == "created_at.desc"
+        assert params["limit"] == "5"
+
+    def test_filtre_in_echappe(self):
+        """Les éléments de in.(...) sont entre guillemets, `"` et `\\` échappés."""
+        db, requetes = _client()
+        asyncio.run(db.selectionner("clients", filtres={
+            "nom_hash": ("in", ["a,b", 'c)"d', "e\\f"]),
+        }))
+        assert requetes[0].url.params["nom_hash"] == 'in.("a,b","c)\\"d","e\\\\f")'
+
+    def test_erreur_http(self):
+        """Un statut >= 400 lève ErreurSupabase."""
+        db, _ = _client(lambda req, corps: {"message": "denied"}, statut=401)
+        with pytest.raises(ErreurSupabase) as exc:
+            asyncio.run(db.selectionner("agent_api_keys"))
+        assert exc.value.statut == 401
+
+
+class TestBatch:
+    """Insert/upsert multi-lignes."""
+
+    def test_insert_lots(self):
+        """Les lignes sont envoyées par lots, colonnes = union des clés."""
+        db, requetes = _client()
+        lignes = [{"action": f"a{i}", "resource_type": "acte"} for i in range(5)]
+        lignes[3]["resource_id"] = "r3"
+
+        resultat = asyncio.run(db.inserer("audit_logs", lignes, taille_lot=2))
+
+        assert len(requetes) == 3
+        assert len(resultat) == 5
+        assert all(r.method == "POST" for r in requetes)
+        assert "missing=default" in requetes[0].headers["prefer"]
+        assert requetes[1].url.params["columns"] == "action,resource_id,resource_type"
+        assert requetes[0].url.params["columns"] == "action,resource_type"
+
+    def test_upsert_on_conflict(self):
+        """L'upsert ajoute resolution=merge-duplicates et on_conflict."""
+        db, requetes = _client()
+        asyncio.run(db.upserter(
+            "dossiers", [{"etude_id": "e1", "numero": "2025-001"}],
+            on_conflict="etude_id,numero", retourner=False,
+        ))
+        prefer = requetes[0].headers["prefer"]
+        assert "resolution=merge-duplicates" in prefer
+        assert "return=minimal" in prefer
+        assert requetes[0].url.params["on_conflict"] == "etude_id,numero"
+
+    def test_liste_vide_sans_requete(self):
+        """Aucune requête pour un lot vide."""
+        db, requetes = _client()
+        assert asyncio.run(db.inserer("audit_logs", [])) == []
+        assert requetes == []
+
+    def test_update_sans_filtre_refuse(self):
+        """Un UPDATE sans filtre est refusé avant tout appel réseau."""
+        db, requetes = _client()
+        with pytest.raises(ValueError):
+            asyncio.run(db.mettre_a_jour("dossiers", {"statut": "termine"}, {}))
+        assert requetes == []
+
+
+class TestPool:
+    """Réutilisation du pool de connexions."""
+
+    def test_session_reutilisee_meme_boucle(self):
+        """Plusieurs requêtes sur une boucle partagent la même session."""
+        db, _ = _client()
+
+        async def scenario():
+            await db.selectionner("etudes")
+            s1 = db._session
+            await asyncio.gather(*(db.selectionner("etudes") for _ in range(5)))
+            return s1, db._session
+
+        s1, s2 = asyncio.run(scenario())
+        assert s1 is s2
+
+    def test_session_recreee_nouvelle_boucle(self):
+        """Une nouvelle boucle asyncio obtient une nouvelle session."""
+        db, _ = _client()
+        asyncio.run(db.selectionner("etudes"))
+        s1 = db._session
+        asyncio.run(db.selectionner("etudes"))
+        assert db._session is not s1
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+test_telemetrie.py
+------------------
+Tests unitaires pour telemetrie.py - Écrivain de télémétrie en arrière-plan.
+
+Supabase est simulé par un httpx.MockTransport: aucun appel réseau.
+"""
+
+import asyncio
+import json
+
+import pytest
+
+httpx = pytest.importorskip("httpx")
+
+from execution.database.supabase_async import SupabaseAsync
+from execution.database.telemetrie import EcrivainTelemetrie
+
+
+def _ecrivain(tmp_path, handler, intervalle=60):
+    requetes = []
+
+    def _enregistrer(request):
+        requetes.append(request)
+        return handler(request)
+
+    db = SupabaseAsync(
+        url="https://exemple.supabase.co", key="cle-service",
+        transport=httpx.MockTransport(_enregistrer),
+    )
+    return EcrivainTelemetrie(db=db, intervalle=intervalle, dossier_local=tmp_path), requetes
+
+
+def _audits_locaux(tmp_path):
+    lignes = []
+    for fichier in tmp_path.glob("audit_*.jsonl"):
+        lignes += [json.loads(l) for l in fichier.read_text(encoding="utf-8").splitlines()]
+    return lignes
+
+
+class TestCoalescence:
+    """Agrégation des usages et des audits entre deux flush."""
+
+    def test_usages_agreges_par_cle(self, tmp_path):
+        """7 requêtes sur 2 clés → un seul appel RPC avec n par clé."""
+        ecrivain, requetes = _ecrivain(tmp_path, lambda r: httpx.Response(200, json=2))
+        ecrivain._demarrer_si_besoin = lambda: None
+        for _ in range(5):
+            ecrivain.enregistrer_usage_cle("k1")
+        ecrivain.enregistrer_usage_cle("k2")
+        ecrivain.enregistrer_usage_cle("k2")
+
+        asyncio.run(ecrivain.vider())
+
+        assert len(requetes) == 1
+        assert requetes[0].url.path == "/rest/v1/rpc/increment_api_key_usage"
+        usages = {u["id"]: u["n"] for u in json.loads(requetes[0].content)["p_usages"]}
+        assert usages == {"k1": 5, "k2": 2}
+        assert ecrivain.en_attente()["usages"] == 0
+
+    def test_audits_un_seul_insert(self, tmp_path):
+        """Plusieurs audits partent en une requête multi-lignes."""
+        ecrivain, requetes = _ecrivain(tmp_path, lambda r: httpx.Response(201))
+        ecrivain._demarrer_si_besoin = lambda: None
+        for i in range(3):
+            ecrivain.enregistrer_audit({"action": f"a{i}", "resource_type": "acte", "etude_id": "e1"})
+
+        asyncio.run(ecrivain.vider())
+
+        assert len(requetes) == 1
+        corps = json.loads(requetes[0].content)
+        assert [l["action"] for l in corps] == ["a0", "a1", "a2"]
+        assert all(l["created_at"] for l in corps)
+        assert ecrivain.stats["audits_envoyes"] == 3
+
+    def test_lignes_locales_par_lot(self, tmp_path):
+        """Les lignes JSONL locales sont écrites au flush, dans l'ordre."""
+        ecrivain, _ = _ecrivain(tmp_path, lambda r: httpx.Response(200))
+        ecrivain._demarrer_si_besoin = lambda: None
+        fichier = tmp_path / "logs" / "qr.jsonl"
+        ecrivain.enregistrer_ligne_locale(fichier, {"n": 1})
+        ecrivain.enregistrer_ligne_locale(fichier, {"n": 2})
+        assert not fichier.exists()
+
+        asyncio.run(ecrivain.vider())
+
+        lignes = [json.loads(l) for l in fichier.read_text(encoding="utf-8").splitlines()]
+        assert lignes == [{"n": 1}, {"n": 2}]
+
+
+class TestFallback:
+    """Comportement quand Supabase échoue."""
+
+    def test_supabase_indisponible(self, tmp_path):
+        """Audits → fichier local; usages conservés pour le flush suivant."""
+        ecrivain, _ = _ecrivain(tmp_path, lambda r: httpx.Response(503, text="down"))
+        ecrivain._demarrer_si_besoin = lambda: None
+        ecrivain.enregistrer_audit({"action": "agent_execute", "resource_type": "acte"})
+        ecrivain.enregistrer_usage_cle("k1")
+
+        asyncio.run(ecrivain.vider())
+
+        locaux = _audits_locaux(tmp_path)
+        assert len(locaux) == 1
+        assert locaux[0]["action"] == "agent_execute"
+        assert "supabase_error" in locaux[0]
+        assert ecrivain.en_attente()["usages"] == 1
+
+    def test_ligne_invalide_isolee(self, tmp_path):
+        """Un 400 sur le lot → renvoi ligne par ligne, seule la fautive part en local."""
+        def handler(request):
+            lignes = json.loads(request.content)
+            if any(l["resource_id"] == "pas-un-uuid" for l in lignes):
+                return httpx.Response(400, text="invalid input syntax for type uuid")
+            return httpx.Response(201)
+
+        ecrivain, requetes = _ecrivain(tmp_path, handler)
+        ecrivain._demarrer_si_besoin = lambda: None
+        ecrivain.enregistrer_audit({"action": "ok1", "resource_type": "acte"})
+        ecrivain.enregistrer_audit({"action": "ko", "resource_type": "clause", "resource_id": "pas-un-uuid"})
+        ecrivain.enregistrer_audit({"action": "ok2", "resource_type": "acte"})
+
+        asyncio.run(ecrivain.vider())
+
+        assert len(requetes) == 4
+        assert [l["action"] for l in _audits_locaux(tmp_path)] == ["ko"]
+        assert ecrivain.stats["audits_envoyes"] == 2
+
+    def test_rpc_absente_lecture_ecriture(self, tmp_path):
+        """Sans la fonction SQL (404), incrément par lecture puis PATCH."""
+        def handler(request):
+            if "/rpc/" in request.url.path:
+                return httpx.Response(404, text="function not found")
+            if request.method == "GET":
+                return httpx.Response(200, json=[{"id": "k1", "total_requests": 10}])
+            return httpx.Response(204)
+
+        ecrivain, requetes = _ecrivain(tmp_path, handler)
+        ecrivain._demarrer_si_besoin = lambda: None
+        for _ in range(3):
+            ecrivain.enregistrer_usage_cle("k1")
+
+        asyncio.run(ecrivain.vider())
+
+        patch = [r for r in requetes if r.method == "PATCH"]
+        assert len(patch) == 1
+        assert json.loads(patch[0].content)["total_requests"] == 13
+        assert ecrivain._rpc_disponible is False
+
+    def test_non_configure_ecrit_en_local(self, tmp_path, monkeypatch):
+        """Sans Supabase, les audits vont directement dans le fichier local."""
+        monkeypatch.delenv("SUPABASE_URL", raising=False)
+        ecrivain = EcrivainTelemetrie(db=SupabaseAsync(url="", key=""), dossier_local=tmp_path)
+        ecrivain._demarrer_si_besoin = lambda: None
+        ecrivain.enregistrer_audit({"action": "x", "resource_type": "acte"})
+        asyncio.run(ecrivain.vider())
+        assert len(_audits_locaux(tmp_path)) == 1
+
+    def test_agent_db_passe_par_l_ecrivain(self, tmp_path, monkeypatch):
+        """AgentDB.log_action n'insère plus directement: tout passe par l'écrivain."""
+        from unittest.mock import MagicMock
+
+        import execution.database.telemetrie as module_telemetrie
+        from execution.database.agent_database import AgentDB
+
+        ecrivain, requetes = _ecrivain(tmp_path, lambda r: httpx.Response(503))
+        ecrivain._demarrer_si_besoin = lambda: None
+        monkeypatch.setattr(module_telemetrie, "_instance", ecrivain)
+        agent_db = AgentDB.__new__(AgentDB)
+        agent_db._offline = False
+        agent_db.client = MagicMock()
+
+        agent_db.log_action("agent_execute", "acte", etude_id="e1")
+        asyncio.run(ecrivain.vider())
+
+        agent_db.client.table.assert_not_called()
+        assert [a["action"] for a in _audits_locaux(tmp_path)] == ["agent_execute"]
+
+
+class TestThread:
+    """Thread de flush et arrêt."""
+
+    def test_arret_flush_final(self, tmp_path):
+        """arreter() envoie ce qui reste dans les tampons."""
+        ecrivain, requetes = _ecrivain(tmp_path, lambda r: httpx.Response(201), intervalle=60)
+        ecrivain.enregistrer_audit({"action": "a", "resource_type": "acte"})
+        assert ecrivain._thread is not None
+
+        ecrivain.arreter()
+
+        assert len(requetes) == 1
+        assert ecrivain.en_attente() == {"usages": 0, "audits": 0, "lignes_locales": 0}
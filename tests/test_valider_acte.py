@@ -22,6 +22,9 @@ from execution.core.valider_acte import (
     NiveauErreur,
     ResultatValidation,
     RapportValidation,
+    REGLES,
+    indexer_chemins,
+    normaliser_chemin,
 )
 
 
@@ -781,5 +784,109 @@ class TestValidationPersonnesMorales:
         assert "DENOMINATION_MANQUANTE" not in codes_erreurs
 
 
+# =============================================================================
+# TESTS MOTEUR DE RÈGLES (registre + revalidation incrémentale)
+# =============================================================================
+
+def _codes(rapport):
+    return [(r.niveau, r.code, r.chemin) for r in rapport.erreurs + rapport.avertissements + rapport.infos]
+
+
+class TestMoteurRegles:
+    """Tests pour le registre déclaratif et la revalidation incrémentale."""
+
+    def test_index_chemins(self, donnees_minimales):
+        """L'index contient nœuds intermédiaires et feuilles."""
+        index = indexer_chemins(donnees_minimales)
+        assert index["bien.lots.0.numero"] == 1
+        assert index["acte.notaire"]["nom"] == "DUPONT"
+        assert "bien.cadastre" not in index
+
+    def test_normaliser_chemin(self):
+        """Les variables Q&R sont converties en chemins pointés."""
+        assert normaliser_chemin("promettants[0].nom") == "promettants.0.nom"
+        assert normaliser_chemin("promettants[].nom") == "promettants.nom"
+        assert normaliser_chemin("prix.montant") == "prix.montant"
+
+    def test_registre_couvre_toutes_les_regles(self):
+        """Chaque méthode _valider_* de premier niveau est déclarée une fois."""
+        methodes = [r.methode for r in REGLES]
+        assert len(methodes) == len(set(methodes))
+        assert all(hasattr(ValidateurActe, m) for m in methodes)
+
+    def test_terrain_sans_regles_dpe(self, validateur, donnees_minimales):
+        """Terrain à bâtir: pas de règles DPE ni de tantièmes."""
+        donnees_minimales["bien"]["type_bien"] = "terrain"
+        donnees_minimales["bien"]["lots"][0]["tantiemes"] = {"valeur": 2000, "base": 1000}
+        donnees_minimales["diagnostics"] = {"dpe": {"classe_energie": "G"}}
+        rapport = validateur.valider_complet(donnees_minimales)
+
+        codes = [c for _, c, _ in _codes(rapport)]
+        assert "AUDIT_ENERGETIQUE_MANQUANT" not in codes
+        assert "PASSOIRE_ENERGETIQUE" not in codes
+        assert "TANTIEMES_INVALIDES" not in codes
+
+    def test_revalider_identique_au_complet(self, validateur, donnees_minimales):
+        """La revalidation incrémentale donne le même rapport qu'une validation complète."""
+        validateur.valider_complet(donnees_minimales)
+
+        donnees_minimales["prix"]["montant"] = 0
+        donnees_minimales["bien"]["superficie_carrez"] = 50
+        incremental = validateur.revalider(donnees_minimales, ["prix.montant", "bien.superficie_carrez"])
+        complet = ValidateurActe({}).valider_complet(donnees_minimales)
+
+        assert _codes(incremental) == _codes(complet)
+        assert "PRIX_INVALIDE" in [e.code for e in incremental.erreurs]
+
+    def test_revalider_ne_rejoue_que_les_dependances(self, validateur, donnees_minimales, monkeypatch):
+        """Modifier prix.montant ne rejoue ni les personnes ni le cadastre."""
+        validateur.valider_complet(donnees_minimales)
+        appels = []
+        for regle in REGLES:
+            methode = getattr(validateur, regle.methode)
+            monkeypatch.setattr(
+                validateur, regle.methode,
+                lambda d, _m=methode, _n=regle.methode: (appels.append(_n), _m(d))
+            )
+
+        donnees_minimales["prix"]["montant"] = 300000
+        validateur.revalider(donnees_minimales, ["prix.montant"])
+
+        assert "_valider_montants" in appels
+        assert "_valider_coherence_financiere" in appels
+        assert "_valider_personnes" not in appels
+        assert "_valider_cadastre_coherent" not in appels
+
+    def test_revalider_chemins_deduits(self, validateur, donnees_minimales, monkeypatch):
+        """Sans chemins fournis, les modifications sont déduites des empreintes."""
+        validateur.valider_complet(donnees_minimales)
+        appels = []
+        for regle in REGLES:
+            methode = getattr(validateur, regle.methode)
+            monkeypatch.setattr(
+                validateur, regle.methode,
+                lambda d, _m=methode, _n=regle.methode: (appels.append(_n), _m(d))
+            )
+
+        assert validateur.revalider(donnees_minimales).valide is not None
+        assert appels == []
+
+        # Modification faite "ailleurs" (autre endpoint, autre worker)
+        donnees_minimales["prix"]["montant"] = 0
+        incremental = validateur.revalider(donnees_minimales)
+        assert "_valider_montants" in appels and "_valider_personnes" not in appels
+        assert _codes(incremental) == _codes(ValidateurActe({}).valider_complet(donnees_minimales))
+
+    def test_revalider_changement_categorie(self, validateur, donnees_minimales):
+        """Un changement de catégorie de bien réévalue toutes les règles."""
+        donnees_minimales["bien"]["type_bien"] = "terrain"
+        donnees_minimales["diagnostics"] = {"dpe": {"classe_energie": "F"}}
+        validateur.valider_complet(donnees_minimales)
+
+        donnees_minimales["bien"]["type_bien"] = "appartement"
+        rapport = validateur.revalider(donnees_minimales, ["bien.type_bien"])
+        assert "AUDIT_ENERGETIQUE_MANQUANT" in [e.code for e in rapport.erreurs]
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])